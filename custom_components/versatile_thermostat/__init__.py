@@ -17,12 +17,14 @@ from homeassistant.core import HomeAssistant, CoreState, callback
 from homeassistant.helpers.service import async_register_admin_service
 from homeassistant.const import UnitOfTemperature
 
-from vtherm_api.log_collector import VThermLogHandler, async_export_logs, async_register_log_download_endpoint, DEFAULT_MAX_AGE_HOURS
+from vtherm_api.log_collector import async_export_logs, async_register_log_download_endpoint, DEFAULT_MAX_AGE_HOURS, LEVEL_MAP
 from .base_thermostat import BaseThermostat
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
 
 from .vtherm_central_api import VersatileThermostatAPI
+from .log_buffer import CompactLogBuffer, DEFAULT_MAX_BYTES, LOG_SPILL_DIR
+from .log_guard import set_log_collector_level
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -41,6 +43,12 @@ EMA_PARAM_SCHEMA = {
     vol.Required("precision"): cv.positive_int,
 }
 
+WINDOW_AUTO_SLOPE_PARAM_SCHEMA = {
+    vol.Optional("algorithm", default=WINDOW_AUTO_SLOPE_SMOOTHED): vol.In([WINDOW_AUTO_SLOPE_SMOOTHED, WINDOW_AUTO_SLOPE_REGRESSION]),
+    vol.Optional("window_min", default=20): vol.All(vol.Coerce(float), vol.Range(min=1)),
+    vol.Optional("max_samples", default=32): vol.All(cv.positive_int, vol.Range(min=3)),
+}
+
 SAFETY_MODE_PARAM_SCHEMA = {
     vol.Required("check_outdoor_sensor"): bool,
 }
@@ -54,6 +62,15 @@ CONFIG_SCHEMA = vol.Schema(
                 CONF_SAFETY_MODE: vol.Schema(SAFETY_MODE_PARAM_SCHEMA),
                 vol.Optional(CONF_MAX_ON_PERCENT): vol.Coerce(float),
                 vol.Optional(CONF_LOG_BUFFER_MAX_AGE_HOURS, default=DEFAULT_MAX_AGE_HOURS): cv.positive_int,
+                vol.Optional(CONF_LOG_COLLECTOR_LEVEL, default="DEBUG"): vol.In(list(LEVEL_MAP)),
+                vol.Optional(CONF_LOG_BUFFER_MAX_SIZE_MB, default=DEFAULT_MAX_BYTES // (1024 * 1024)): cv.positive_int,
+                vol.Optional(CONF_LOG_BUFFER_SPILL, default=False): cv.boolean,
+                vol.Optional(CONF_USE_CYCLE_MASTER_CLOCK, default=False): cv.boolean,
+                vol.Optional(CONF_PERFORMANCE_PROFILING, default=False): cv.boolean,
+                vol.Optional(CONF_COMMAND_RATE_LIMITS): vol.Schema({cv.string: vol.All(vol.Coerce(float), vol.Range(min=0))}),
+                vol.Optional(CONF_WINDOW_AUTO_SLOPE): vol.Schema(WINDOW_AUTO_SLOPE_PARAM_SCHEMA),
+                vol.Optional(CONF_STARTUP_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(CONF_VALVE_COMMAND_HYSTERESIS): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
             }
         ),
     },
@@ -109,15 +126,19 @@ async def async_setup(
     # Initialize log collector
     # Note: Single shared instance stored in hass.data[DOMAIN] is used for all VTherm loggers.
     # This ensures that all log records are centralized in one ring buffer, regardless of reload.
+    # The debug logs of the hot paths are skipped when the collector level is above DEBUG (see log_guard)
+    set_log_collector_level(LEVEL_MAP[(vtherm_config or {}).get(CONF_LOG_COLLECTOR_LEVEL, "DEBUG")])
     if "log_handler" not in hass.data[DOMAIN]:
         max_age_hours = (
             vtherm_config.get(CONF_LOG_BUFFER_MAX_AGE_HOURS, DEFAULT_MAX_AGE_HOURS)
             if vtherm_config is not None
             else DEFAULT_MAX_AGE_HOURS
         )
-        log_handler = VThermLogHandler(max_age_hours=max_age_hours)
+        max_size_mb = (vtherm_config or {}).get(CONF_LOG_BUFFER_MAX_SIZE_MB, DEFAULT_MAX_BYTES // (1024 * 1024))
+        spill_dir = hass.config.path(LOG_SPILL_DIR) if (vtherm_config or {}).get(CONF_LOG_BUFFER_SPILL, False) else None
+        log_handler = CompactLogBuffer(max_age_hours=max_age_hours, max_bytes=max_size_mb * 1024 * 1024, spill_dir=spill_dir)
         hass.data[DOMAIN]["log_handler"] = log_handler
-        _LOGGER.info("VTherm log collector initialized (buffer: %d h)", max_age_hours)
+        _LOGGER.info("VTherm log collector initialized (buffer: %d h, %d MB, spill: %s)", max_age_hours, max_size_mb, spill_dir is not None)
 
         # Register the HTTP endpoint for log downloads
         # This provides a /api/versatile_thermostat/logs/<filename> endpoint
@@ -187,7 +208,9 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
         return
 
     if entry.data.get(CONF_THERMOSTAT_TYPE) == CONF_THERMOSTAT_CENTRAL_CONFIG:
-        await reload_all_vtherm(hass)
+        # The parameters of the managers are applied to the running VTherms. The other changes need a reload
+        if not api or not await api.central_config_updater.async_apply(entry):
+            await reload_all_vtherm(hass)
     else:
         await hass.config_entries.async_reload(entry.entry_id)
         # Reload the central boiler list of entities
@@ -205,6 +228,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if api:
             if entry.data.get(CONF_THERMOSTAT_TYPE) == CONF_THERMOSTAT_CENTRAL_CONFIG:
                 api.reset_central_config()
+                api.central_config_updater.set_central_data(None)
             api.remove_entry(entry)
             await api.central_boiler_manager.reload_central_boiler_entities_list()
 
@@ -5,14 +5,17 @@ from vtherm_api.log_collector import get_vtherm_logger
 import json
 import os
 import math
+import zlib
 import statistics
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Optional
 from homeassistant.util.unit_conversion import TemperatureConverter
 from homeassistant.const import UnitOfTemperature
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field, fields
 
 import asyncio
+import functools
 from typing import Callable
 
 from homeassistant.core import HomeAssistant, callback
@@ -20,9 +23,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers import entity_platform, service, translation
 from homeassistant.helpers.storage import Store
-from homeassistant.components.recorder import history, get_instance
 from homeassistant.util import dt as dt_util
-from functools import partial
 
 from .const import (
     DOMAIN,
@@ -32,6 +33,10 @@ from .const import (
     CONF_AUTO_TPI_COOLING_POWER,
 )
 from .vtherm_central_api import VersatileThermostatAPI
+from .ring_buffer import FloatRingBuffer
+from .history_loader import states_to_columns
+from .thermal_identification import identify_thermal_model
+from .log_guard import is_debug_enabled
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -49,7 +54,14 @@ INSUFFICIENT_RISE_GAP_THRESHOLD = KEXT_LEARNING_MAX_GAP  # Min gap (°C) to trig
 INSUFFICIENT_RISE_BOOST_FACTOR = 1.08  # Kint increase factor (8%) per stagnating cycle
 MAX_CONSECUTIVE_KINT_BOOSTS = 5  # Max consecutive Kint boosts before warning (undersized heating)
 MIN_PRE_BOOTSTRAP_CALIBRATION_RELIABILITY = 20.0  # Min reliability (%) to use calibration instead of bootstrap
+MIN_IDENTIFICATION_CONFIDENCE = 0.5  # Min confidence (0-1) to seed the learning with the identified thermal model
+IDENTIFICATION_MAX_WEIGHT = 50  # Number of learning cycles a fully confident identification is worth
 MIN_EFFICIENCY_FOR_CAPACITY = 0.60  # Min efficiency (60%) to learn capacity - prevents outliers from external factors
+RECENT_ERRORS_CAPACITY = 20  # Last errors kept for regime change detection (N=10 for detection + buffer)
+
+# Debounced saves of the learning state (limits the storage writes on SD cards)
+SAVE_DELAY_SEC = 60  # Minimal delay between two saves after learning steps
+SAVE_SPREAD_SEC = 60  # The delay of each VTherm is shifted by up to this so that all VTherms don't write at the same time
 
 
 @dataclass
@@ -98,7 +110,7 @@ class AutoTpiState:
     last_learning_status: str = "startup"
     total_cycles: int = 0  # Total number of TPI cycles
     consecutive_boosts: int = 0  # Track consecutive boost attempts
-    recent_errors: list = field(default_factory=list)  # Store last N errors for regime change detection
+    recent_errors: FloatRingBuffer = field(default_factory=lambda: FloatRingBuffer(RECENT_ERRORS_CAPACITY))  # Last N errors for regime change detection
     regime_change_detected: bool = False  # Flag for temporary alpha boost
     learning_start_date: Optional[datetime] = None  # Date when learning started
 
@@ -119,14 +131,16 @@ class AutoTpiState:
                 return None
             if isinstance(value, datetime):
                 return value.isoformat()
+            if isinstance(value, FloatRingBuffer):
+                return value.to_dict()
             if isinstance(value, (list, tuple)):
                 return [make_json_safe(v) for v in value]
             if isinstance(value, dict):
                 return {k: make_json_safe(v) for k, v in value.items()}
             return value
 
-        result = asdict(self)
-        return {k: make_json_safe(v) for k, v in result.items()}
+        # make_json_safe already copies the containers: no need of the deep copy done by asdict
+        return {f.name: make_json_safe(getattr(self, f.name)) for f in fields(self)}
 
     @classmethod
     def from_dict(cls, data):
@@ -150,6 +164,9 @@ class AutoTpiState:
             if key in valid_fields:
                 setattr(instance, key, value)
 
+        # recent_errors is persisted in a compact binary form (or as a list by older versions)
+        instance.recent_errors = FloatRingBuffer.restore(d.get("recent_errors"), RECENT_ERRORS_CAPACITY)
+
         return instance
 
 
@@ -179,6 +196,7 @@ class AutoTpiManager:
         aggressiveness: float = 0.9,
         continuous_kext: bool = False,
         continuous_kext_alpha: float = 0.04,
+        store: Store | None = None,
     ):
         self._hass = hass
         self._name = name
@@ -188,6 +206,8 @@ class AutoTpiManager:
         self._enable_notification = True
         self._unique_id = unique_id
         self._entity_id: str | None = None  # Set by thermostat after entity registration
+        self._temp_sensor_entity_id: str | None = None  # Set by thermostat, for the offline identification
+        self._ext_temp_sensor_entity_id: str | None = None
         self._tpi_threshold_low = tpi_threshold_low
         self._tpi_threshold_high = tpi_threshold_high
         self._minimal_deactivation_delay_sec = minimal_deactivation_delay
@@ -217,7 +237,8 @@ class AutoTpiManager:
         self._last_notified_coef_ext: Optional[float] = None
 
         storage_key = f"{STORAGE_KEY_PREFIX}.{unique_id.replace('.', '_')}"
-        self._store = Store(hass, STORAGE_VERSION, storage_key)
+        self._store = store if store is not None else Store(hass, STORAGE_VERSION, storage_key)
+        self._save_delay = SAVE_DELAY_SEC + zlib.crc32(storage_key.encode()) % SAVE_SPREAD_SEC
         # Convert config coefficients (User Unit) to Internal (Celsius)
         # K_C = K_F * 1.8
         self._default_coef_int = (coef_int if coef_int is not None else 0.6) * self._unit_factor
@@ -288,6 +309,14 @@ class AutoTpiManager:
 
         return data
 
+    def _now(self) -> datetime:
+        """The current date. Overridden to replay recorded data on a simulated clock"""
+        return dt_util.now()
+
+    def _call_later(self, delay: float, action: Callable) -> Callable[[], None]:
+        """Schedule an action. Overridden to replay recorded data on a simulated clock"""
+        return async_call_later(self._hass, delay, action)
+
     def set_is_vtherm_stopping_callback(self, callback: Callable[[], bool]):
         """Set a callback to check if the VTherm is stopping."""
         self._is_vtherm_stopping_callback = callback
@@ -481,6 +510,12 @@ class AutoTpiManager:
         """Save data."""
         await self._store.async_save(self.state.to_dict())
 
+    @callback
+    def async_schedule_save(self):
+        """Save data later. All the calls done before the save are merged in one write
+        and the pending write is flushed by HA on shutdown or by the next async_save_data"""
+        self._store.async_delay_save(lambda: self.state.to_dict(), self._save_delay)
+
     async def async_load_data(self):
         """Load data."""
         data = await self._store.async_load()
@@ -710,14 +745,14 @@ class AutoTpiManager:
             # If base_alpha is very small (after many cycles), boost will still be limited.
             boost_alpha = min(base_alpha * 3.0, 0.15)
 
-            _LOGGER.info(f"%s - Auto TPI: Regime change detected, boosting alpha: {base_alpha:.3f} -> {boost_alpha:.3f}", self._name)
+            _LOGGER.info("%s - Auto TPI: Regime change detected, boosting alpha: %.3f -> %.3f", self._name, base_alpha, boost_alpha)
 
             # The flag will be reset in _learn_indoor after consumption
             return boost_alpha
 
         return base_alpha
 
-    def _detect_regime_change(self, recent_errors: list) -> bool:
+    def _detect_regime_change(self, recent_errors: FloatRingBuffer) -> bool:
         """
         Detects a thermal regime change (systematic bias).
         If detected, we can temporarily increase alpha for faster adaptation.
@@ -727,7 +762,7 @@ class AutoTpiManager:
             return False
 
         # We only look at the last N errors
-        errors_to_check = recent_errors[-N:]
+        errors_to_check = recent_errors.last(N)
 
         # Simple statistical test:
         # Do the last N errors have a systematic bias?
@@ -758,19 +793,23 @@ class AutoTpiManager:
         # If power is >= saturation_threshold, the cycle is saturated and we skip learning.
         saturation_threshold = self.saturation_threshold
         if not (0 < self.state.last_power < saturation_threshold):
-            _LOGGER.debug("%s - Auto TPI: Not learning - Power out of range (%.3f not in 0 < power < %.3f)", self._name, self.state.last_power, saturation_threshold)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Power out of range (%.3f not in 0 < power < %.3f)", self._name, self.state.last_power, saturation_threshold)
             return False
 
         if self._current_cycle_interrupted:
-            _LOGGER.debug("%s - Auto TPI: Not learning - Cycle was interrupted (e.g. Power Shedding)", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Cycle was interrupted (e.g. Power Shedding)", self._name)
             return False
 
         if self._central_boiler_off:
-            _LOGGER.debug("%s - Auto TPI: Not learning - Central boiler is OFF although VTherm is active (boiler below activation threshold)", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Central boiler is OFF although VTherm is active (boiler below activation threshold)", self._name)
             return False
 
         if self._current_is_heating_failure:
-            _LOGGER.debug("%s - Auto TPI: Not learning - Heating/Cooling failure detected", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Heating/Cooling failure detected", self._name)
             return False
 
         # Failures check
@@ -779,10 +818,12 @@ class AutoTpiManager:
 
         # 1. First Cycle Exclusion
         if self.state.previous_state == "stop":
-            _LOGGER.debug("%s - Auto TPI: Not learning - First cycle (previous state was stop)", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - First cycle (previous state was stop)", self._name)
             return False
         if self.state.last_order == 0:
-            _LOGGER.debug("%s - Auto TPI: Not learning - Last order is 0", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Last order is 0", self._name)
             return False
 
         # 2. Mild Weather Exclusion (Safe Ratio)
@@ -790,7 +831,8 @@ class AutoTpiManager:
         delta_out = self.state.last_order - self._current_temp_out
         delta_out_threshold = 1.0  # Celsius
         if abs(delta_out) < delta_out_threshold:
-            _LOGGER.debug("%s - Auto TPI: Not learning - Delta out too small (< %.1f)", self._name, delta_out_threshold)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - Delta out too small (< %.1f)", self._name, delta_out_threshold)
             return False
 
         # Natural drift exclusion - check temperature at CYCLE START
@@ -851,7 +893,8 @@ class AutoTpiManager:
 
         if not (is_heat or is_cool):
             self.state.last_learning_status = "not_heating_or_cooling"
-            _LOGGER.debug("%s - Auto TPI: Not learning - system was in %s mode", self._name, self.state.last_state)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning - system was in %s mode", self._name, self.state.last_state)
             return
 
         # Check if setpoint changed during the cycle - if so, skip ALL learning
@@ -859,10 +902,11 @@ class AutoTpiManager:
         setpoint_changed = abs(self._current_target_temp - self.state.last_order) > 0.1
         if setpoint_changed:
             self.state.last_learning_status = "setpoint_changed_during_cycle"
-            _LOGGER.debug(
-                "%s - Auto TPI: Skipping learning - setpoint changed during cycle (%.1f → %.1f)",
-                self._name, self.state.last_order, self._current_target_temp
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Skipping learning - setpoint changed during cycle (%.1f → %.1f)",
+                    self._name, self.state.last_order, self._current_target_temp
+                )
             return
 
         target_temp = self.state.last_order
@@ -952,15 +996,14 @@ class AutoTpiManager:
 
                     # Reset consecutive Kint boosts counter since temperature is now rising
                     if self.state.consecutive_boosts > 0:
-                        _LOGGER.debug("%s - Auto TPI: Resetting consecutive_boosts counter (was %d)", self._name, self.state.consecutive_boosts)
+                        if is_debug_enabled(_LOGGER):
+                            _LOGGER.debug("%s - Auto TPI: Resetting consecutive_boosts counter (was %d)", self._name, self.state.consecutive_boosts)
                         self.state.consecutive_boosts = 0
 
                     # Continuous Learning: Track error and detect regime change
                     if self._continuous_learning:
+                        # The ring buffer keeps only the last RECENT_ERRORS_CAPACITY errors
                         self.state.recent_errors.append(error)
-                        # Keep only the last 20 errors (N=10 for detection + buffer)
-                        if len(self.state.recent_errors) > 20:
-                            self.state.recent_errors = self.state.recent_errors[-20:]
 
                         is_regime_change = self._detect_regime_change(self.state.recent_errors)
                         if is_regime_change and not self.state.regime_change_detected:
@@ -970,11 +1013,14 @@ class AutoTpiManager:
                     return  # Indoor success, we exit
                 else:
                     # Indoor failed, reason already logged in _learn_indoor
-                    _LOGGER.debug("%s - Auto TPI: Indoor learning failed, will try outdoor", self._name)
+                    if is_debug_enabled(_LOGGER):
+                        _LOGGER.debug("%s - Auto TPI: Indoor learning failed, will try outdoor", self._name)
             else:
-                _LOGGER.debug("%s - Auto TPI: Indoor conditions not met (progress=%.3f, target_diff=%.3f)", self._name, temp_progress, target_diff)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - Auto TPI: Indoor conditions not met (progress=%.3f, target_diff=%.3f)", self._name, temp_progress, target_diff)
         else:
-            _LOGGER.debug("%s - Auto TPI: Skipping indoor coeff learning because power is saturated (%.1f%%)", self._name, self.state.last_power * 100)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Skipping indoor coeff learning because power is saturated (%.1f%%)", self._name, self.state.last_power * 100)
 
         # CASE 2: Outdoor Learning
         # ----------------------------
@@ -1003,10 +1049,11 @@ class AutoTpiManager:
 
             if abs(gap_in) > KEXT_LEARNING_MAX_GAP and not is_active_overshoot:
                 self.state.last_learning_status = f"gap_too_large_for_outdoor(gap={gap_in:.2f} > {KEXT_LEARNING_MAX_GAP})"
-                _LOGGER.debug(
-                    "%s - Auto TPI: Skipping outdoor learning: Gap %.2f > %.2f - Far field stagnation is a Kint/Capacity issue, not Kext.",
-                    self._name, abs(gap_in), KEXT_LEARNING_MAX_GAP
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Auto TPI: Skipping outdoor learning: Gap %.2f > %.2f - Far field stagnation is a Kint/Capacity issue, not Kext.",
+                        self._name, abs(gap_in), KEXT_LEARNING_MAX_GAP
+                    )
                 return
 
             if self._learn_outdoor(current_temp_in, current_temp_out, is_cool):
@@ -1016,13 +1063,16 @@ class AutoTpiManager:
                     self._learning_just_completed = True
                 return  # Outdoor success
             else:
-                _LOGGER.debug("%s - Auto TPI: Outdoor learning failed", self._name)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - Auto TPI: Outdoor learning failed", self._name)
         else:
-            _LOGGER.debug("%s - Auto TPI: Outdoor conditions not met (outdoor_condition=%s, gap_in=%.3f)", self._name, outdoor_condition, gap_in)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Outdoor conditions not met (outdoor_condition=%s, gap_in=%.3f)", self._name, outdoor_condition, gap_in)
 
         # No learning was possible
         self.state.last_learning_status = f"no_learning_possible(progress={temp_progress:.2f},target_diff={target_diff:.2f},gap_in={gap_in:.2f})"
-        _LOGGER.debug("%s - Auto TPI: No learning possible - %s", self._name, self.state.last_learning_status)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - Auto TPI: No learning possible - %s", self._name, self.state.last_learning_status)
 
     def _learn_indoor(self, delta_theoretical: float, delta_real: float, efficiency: float = 1.0, is_cool: bool = False) -> Optional[float]:
         """Learn indoor coefficient and optionally capacity."""
@@ -1031,7 +1081,8 @@ class AutoTpiManager:
         rise_threshold = 0.01
 
         if real_rise <= rise_threshold:
-            _LOGGER.debug("%s - Auto TPI: Cannot learn indoor - real_rise %.3f <= %.3f. Will try outdoor learning.", self._name, real_rise, rise_threshold)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot learn indoor - real_rise %.3f <= %.3f. Will try outdoor learning.", self._name, real_rise, rise_threshold)
             self.state.last_learning_status = "real_rise_too_small"
             return None
 
@@ -1052,14 +1103,16 @@ class AutoTpiManager:
                 )
             else:
                 ref_capacity_h = 1.0  # Standard fallback
-                _LOGGER.debug(
-                    "%s - Capacity not yet converged (count=%d), using fallback 1.0°C/h",
-                    self._name, count
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Capacity not yet converged (count=%d), using fallback 1.0°C/h",
+                        self._name, count
+                    )
 
         # If no capacity defined, skip learning for this cycle
         if ref_capacity_h <= 0:
-            _LOGGER.debug("%s - Auto TPI: Cannot learn indoor - no capacity defined (ref_capacity_h=%.2f)", self._name, ref_capacity_h)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot learn indoor - no capacity defined (ref_capacity_h=%.2f)", self._name, ref_capacity_h)
             self.state.last_learning_status = "no_capacity_defined"
             return False
 
@@ -1080,23 +1133,25 @@ class AutoTpiManager:
         cycle_duration_h = self._cycle_min / 60.0
         max_achievable_rise = effective_capacity_h * cycle_duration_h * efficiency
 
-        _LOGGER.debug(
-            "%s - Auto TPI: Capacity calc: ref=%.3f °C/h, loss=%.2f, eff=%.3f °C/h, max_rise=%.3f °C (cycle=%.1f min, eff=%.2f)",
-            self._name,
-            ref_capacity_h,
-            loss_factor,
-            effective_capacity_h,
-            max_achievable_rise,
-            self._cycle_min,
-            efficiency,
-        )
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug(
+                "%s - Auto TPI: Capacity calc: ref=%.3f °C/h, loss=%.2f, eff=%.3f °C/h, max_rise=%.3f °C (cycle=%.1f min, eff=%.2f)",
+                self._name,
+                ref_capacity_h,
+                loss_factor,
+                effective_capacity_h,
+                max_achievable_rise,
+                self._cycle_min,
+                efficiency,
+            )
 
         # 4. Calculate adjusted_theoretical: aim for full gap, capped by capacity
         adjusted_theoretical = min(delta_theoretical, max_achievable_rise)
 
         if max_achievable_rise < delta_theoretical:
             mode_str = "cooling" if is_cool else "heating"
-            _LOGGER.debug("%s - Auto TPI: Target rise clamped from %.3f to %.3f (Max %s Capacity)", self._name, delta_theoretical, max_achievable_rise, mode_str)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Target rise clamped from %.3f to %.3f (Max %s Capacity)", self._name, delta_theoretical, max_achievable_rise, mode_str)
 
         if adjusted_theoretical <= 0:
             _LOGGER.warning("%s - Auto TPI: Cannot learn indoor - adjusted_theoretical <= 0 (max_rise=%.3f, target_diff=%.3f)", self._name, max_achievable_rise, delta_theoretical)
@@ -1142,14 +1197,16 @@ class AutoTpiManager:
             weight_old = max(effective_count, 1)
 
             avg_coeff = ((old_coeff * weight_old) + coeff_new) / (weight_old + 1)
-            _LOGGER.debug("%s - Auto TPI: Weighted Average: old=%.3f (weight=%d, real_count=%d), new=%.3f, result=%.3f", self._name, old_coeff, weight_old, count, coeff_new, avg_coeff)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Weighted Average: old=%.3f (weight=%d, real_count=%d), new=%.3f, result=%.3f", self._name, old_coeff, weight_old, count, coeff_new, avg_coeff)
 
         else:  # EMA
             # EMA Smoothing (20% weight by default)
             # new_avg = (old_avg * (1 - alpha)) + (new_sample * alpha)
             alpha = self._get_adaptive_alpha(effective_count)
             avg_coeff = (old_coeff * (1.0 - alpha)) + (coeff_new * alpha)
-            _LOGGER.debug("%s - Auto TPI: EMA: old=%.3f, new=%.3f, alpha=%.3f (eff_count=%d, real_count=%d), result=%.3f", self._name, old_coeff, coeff_new, alpha, effective_count, count, avg_coeff)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: EMA: old=%.3f, new=%.3f, alpha=%.3f (eff_count=%d, real_count=%d), result=%.3f", self._name, old_coeff, coeff_new, alpha, effective_count, count, avg_coeff)
 
         # Apply minimum Kint threshold to maintain temperature responsiveness
         if avg_coeff < MIN_KINT:
@@ -1186,7 +1243,8 @@ class AutoTpiManager:
 
         # Reset regime change flag after consuming the boost
         if self._continuous_learning and self.state.regime_change_detected:
-            _LOGGER.debug("%s - Auto TPI: Regime change alpha consumed, resetting flag", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Regime change alpha consumed, resetting flag", self._name)
             self.state.regime_change_detected = False
 
         return adjusted_theoretical - real_rise  # Return the error: Expected Rise - Actual Rise
@@ -1198,12 +1256,14 @@ class AutoTpiManager:
 
         # Validation delta_out (moved here)
         if abs(gap_out) < 0.05:
-            _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - gap_out too small (%.3f)", self._name, abs(gap_out))
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - gap_out too small (%.3f)", self._name, abs(gap_out))
             self.state.last_learning_status = "gap_out_too_small"
             return False
 
         if gap_out == 0:
-            _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - gap_out is 0", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - gap_out is 0", self._name)
             self.state.last_learning_status = "gap_out_is_zero"
             return False
 
@@ -1220,7 +1280,8 @@ class AutoTpiManager:
         consigne_changed = abs(self._current_target_temp - self.state.last_order) > 0.1
 
         if consigne_changed:
-            _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - consigne changed during cycle (%.1f → %.1f)", self._name, self.state.last_order, self._current_target_temp)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - consigne changed during cycle (%.1f → %.1f)", self._name, self.state.last_order, self._current_target_temp)
             self.state.last_learning_status = "consigne_changed"
             return False
 
@@ -1232,7 +1293,8 @@ class AutoTpiManager:
             # Acceptable only if we really cooled (power > 1% instead of 20%)
             # If power is > 1% and we are overcooling, it means Kext is too high and should be reduced.
             if gap_in > 0 and self.state.last_power < 0.01:
-                _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - Anomalous overcooling (gap_in=%.2f, power=%.1f%%)", self._name, gap_in, self.state.last_power * 100)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - Anomalous overcooling (gap_in=%.2f, power=%.1f%%)", self._name, gap_in, self.state.last_power * 100)
                 self.state.last_learning_status = "anomalous_overcooling"
                 return False
 
@@ -1241,10 +1303,11 @@ class AutoTpiManager:
             # AND power is low, then natural recovery is happening. Do not lower Kext.
             # However, if power is still significant, the system is actively cooling and Kext might be too high.
             if gap_in > 0 and current_temp_in > self.state.last_temp_in and self.state.last_power < NATURAL_RECOVERY_POWER_THRESHOLD:
-                _LOGGER.debug(
-                    "%s - Auto TPI: Skipping outdoor learning during natural undershoot recovery (Temp rising %.2f -> %.2f, power=%.1f%%)",
-                    self._name, self.state.last_temp_in, current_temp_in, self.state.last_power * 100
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Auto TPI: Skipping outdoor learning during natural undershoot recovery (Temp rising %.2f -> %.2f, power=%.1f%%)",
+                        self._name, self.state.last_temp_in, current_temp_in, self.state.last_power * 100
+                    )
                 self.state.last_learning_status = "warming_up_naturally"
                 return True  # Considered handled (skipped)
 
@@ -1253,7 +1316,8 @@ class AutoTpiManager:
             # Acceptable only if we really heated (power > 1% instead of 20%)
             # If power is > 1% and we are overheating, it means Kext is too high and should be reduced.
             if gap_in < 0 and self.state.last_power < 0.01:
-                _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - Anomalous overheating (gap_in=%.2f, power=%.1f%%)", self._name, gap_in, self.state.last_power * 100)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - Auto TPI: Cannot learn outdoor - Anomalous overheating (gap_in=%.2f, power=%.1f%%)", self._name, gap_in, self.state.last_power * 100)
                 self.state.last_learning_status = "anomalous_overheating"
                 return False
 
@@ -1262,17 +1326,19 @@ class AutoTpiManager:
             # AND power is low, then natural recovery is happening. Do not lower Kext.
             # However, if power is still significant, the system is actively heating and Kext is likely too high.
             if gap_in < 0 and current_temp_in < self.state.last_temp_in and self.state.last_power < NATURAL_RECOVERY_POWER_THRESHOLD:
-                _LOGGER.debug(
-                    "%s - Auto TPI: Skipping outdoor learning during natural overshoot recovery (Temp falling %.2f -> %.2f, power=%.1f%%)",
-                    self._name, self.state.last_temp_in, current_temp_in, self.state.last_power * 100
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Auto TPI: Skipping outdoor learning during natural overshoot recovery (Temp falling %.2f -> %.2f, power=%.1f%%)",
+                        self._name, self.state.last_temp_in, current_temp_in, self.state.last_power * 100
+                    )
                 self.state.last_learning_status = "cooling_down_naturally"
                 return True  # Considered handled (skipped)
 
         # If we get here with an overshoot AND significant power:
         # → It is a real model error, we MUST learn from it
         # → The Kext correction will help correct the underestimated external influence
-        _LOGGER.debug("%s - Auto TPI: Overshoot validation passed (gap_in=%.2f, power=%.1f%%) - proceeding with learning", self._name, gap_in, self.state.last_power * 100)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - Auto TPI: Overshoot validation passed (gap_in=%.2f, power=%.1f%%) - proceeding with learning", self._name, gap_in, self.state.last_power * 100)
 
         # ratio_influence = gap_in / gap_out
         current_indoor = self.state.coeff_indoor_cool if is_cool else self.state.coeff_indoor_heat
@@ -1311,11 +1377,13 @@ class AutoTpiManager:
             # Kext counter starts at 0, so first cycle should have weight 0
             weight_old = effective_count
             avg_coeff = ((old_coeff * weight_old) + coeff_new) / (weight_old + 1)
-            _LOGGER.debug("%s - Auto TPI: Outdoor Weighted Average: old=%.3f (weight=%d, real_count=%d), new=%.3f, result=%.3f", self._name, old_coeff, weight_old, count, coeff_new, avg_coeff)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Outdoor Weighted Average: old=%.3f (weight=%d, real_count=%d), new=%.3f, result=%.3f", self._name, old_coeff, weight_old, count, coeff_new, avg_coeff)
         else:  # EMA
             alpha = self._get_adaptive_alpha(effective_count)
             avg_coeff = (old_coeff * (1.0 - alpha)) + (coeff_new * alpha)
-            _LOGGER.debug("%s - Auto TPI: Outdoor EMA: old=%.3f, new=%.3f, alpha=%.3f (eff_count=%d, real_count=%d), result=%.3f", self._name, old_coeff, coeff_new, alpha, effective_count, count, avg_coeff)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Outdoor EMA: old=%.3f, new=%.3f, alpha=%.3f (eff_count=%d, real_count=%d), result=%.3f", self._name, old_coeff, coeff_new, alpha, effective_count, count, avg_coeff)
 
         new_count = count + 1
 
@@ -1411,7 +1479,8 @@ class AutoTpiManager:
     def _should_learn_capacity(self) -> bool:
         """Check if capacity learning should occur this cycle."""
         if not self.learning_active and not self._continuous_kext:
-             _LOGGER.debug("%s - Not learning capacity: learning and continuous kext are disabled", self._name)
+             if is_debug_enabled(_LOGGER):
+                 _LOGGER.debug("%s - Not learning capacity: learning and continuous kext are disabled", self._name)
              return False
 
         # Determine if we are in bootstrap
@@ -1456,10 +1525,11 @@ class AutoTpiManager:
 
         # Check Condition 1: Power
         if self.state.last_power < power_threshold:
-            _LOGGER.debug(
-                "%s - Not learning capacity: power too low (%.1f%% < %.0f%%)",
-                self._name, self.state.last_power * 100, power_threshold * 100
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Not learning capacity: power too low (%.1f%% < %.0f%%)",
+                    self._name, self.state.last_power * 100, power_threshold * 100
+                )
             if in_bootstrap:
                 self.state.bootstrap_failure_count += 1
             return False
@@ -1468,10 +1538,11 @@ class AutoTpiManager:
         # When efficiency is low, temperature rise from external factors (sun, window close)
         # gets amplified in capacity calculation, causing outlier spikes.
         if self._last_cycle_power_efficiency < MIN_EFFICIENCY_FOR_CAPACITY:
-            _LOGGER.debug(
-                "%s - Not learning capacity: efficiency too low (%.1f%% < %.0f%%) - external factors may dominate",
-                self._name, self._last_cycle_power_efficiency * 100, MIN_EFFICIENCY_FOR_CAPACITY * 100
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Not learning capacity: efficiency too low (%.1f%% < %.0f%%) - external factors may dominate",
+                    self._name, self._last_cycle_power_efficiency * 100, MIN_EFFICIENCY_FOR_CAPACITY * 100
+                )
             if in_bootstrap:
                 self.state.bootstrap_failure_count += 1
             return False
@@ -1479,10 +1550,11 @@ class AutoTpiManager:
         # Condition 2: Significant rise
         real_rise = self._current_temp_in - self.state.last_temp_in
         if real_rise < rise_threshold:
-            _LOGGER.debug(
-                "%s - Not learning capacity: rise too small (%.3f < %.2f°C)",
-                self._name, real_rise, rise_threshold
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Not learning capacity: rise too small (%.3f < %.2f°C)",
+                    self._name, real_rise, rise_threshold
+                )
             if in_bootstrap:
                 self.state.bootstrap_failure_count += 1
             return False
@@ -1490,10 +1562,11 @@ class AutoTpiManager:
         # Condition 3: Adequate gap (stricter during bootstrap)
         target_diff = self._current_target_temp - self.state.last_temp_in
         if target_diff < min_gap:
-            _LOGGER.debug(
-                "%s - Not learning capacity: gap too small (%.2f < %.1f°C)",
-                self._name, target_diff, min_gap
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Not learning capacity: gap too small (%.2f < %.1f°C)",
+                    self._name, target_diff, min_gap
+                )
             # Note: We don't necessarily increment failure count for "small gap"
             # as this is not a "failed attempt" to heat, but rather "no need to heat much".
             # But if we are in bootstrap, we WANT larger gaps.
@@ -1532,10 +1605,11 @@ class AutoTpiManager:
 
         # Basic validation (physical bounds)
         if adiabatic_capacity <= 0 or adiabatic_capacity > 20.0:
-            _LOGGER.debug(
-                "%s - Capacity measurement out of bounds: %.2f°C/h, skipping",
-                self._name, adiabatic_capacity
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Capacity measurement out of bounds: %.2f°C/h, skipping",
+                    self._name, adiabatic_capacity
+                )
             return False
 
         # Capacity learning with adaptive weighting:
@@ -1670,18 +1744,20 @@ class AutoTpiManager:
         if self._calculation_method == "average":
             boosted_weight = max(1, int(effective_count / OVERSHOOT_CORRECTION_BOOST))
             new_kint = ((old * boosted_weight) + target_kint) / (boosted_weight + 1)
-            _LOGGER.debug(
-                "%s - Deboost Kint (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
-                self._name, old, target_kint, boosted_weight, effective_count, new_kint
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Deboost Kint (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
+                    self._name, old, target_kint, boosted_weight, effective_count, new_kint
+                )
         else:  # EMA
             base_alpha = self._get_adaptive_alpha(effective_count)
             boosted_alpha = min(base_alpha * OVERSHOOT_CORRECTION_BOOST, 0.3)
             new_kint = (old * (1.0 - boosted_alpha)) + (target_kint * boosted_alpha)
-            _LOGGER.debug(
-                "%s - Deboost Kint (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
-                self._name, old, target_kint, boosted_alpha, base_alpha, new_kint
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Deboost Kint (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
+                    self._name, old, target_kint, boosted_alpha, base_alpha, new_kint
+                )
 
         if is_heat:
             if old > self._default_coef_int:
@@ -1721,7 +1797,8 @@ class AutoTpiManager:
         # Calculate delta_ext for the correction
         delta_ext = self.state.last_order - self._current_temp_out
         if abs(delta_ext) < 0.1:
-            _LOGGER.debug("%s - Auto TPI: Cannot correct Kext overshoot - delta_ext too small (%.2f)", self._name, delta_ext)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cannot correct Kext overshoot - delta_ext too small (%.2f)", self._name, delta_ext)
             return False
 
         # Calculate how much Kext should be reduced
@@ -1745,19 +1822,21 @@ class AutoTpiManager:
             # Instead of weight = effective_count, use weight / OVERSHOOT_CORRECTION_BOOST
             boosted_weight = max(1, int(effective_count / OVERSHOOT_CORRECTION_BOOST))
             new_kext = ((old_kext * boosted_weight) + target_kext) / (boosted_weight + 1)
-            _LOGGER.debug(
-                "%s - Auto TPI: Overshoot correction (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
-                self._name, old_kext, target_kext, boosted_weight, effective_count, new_kext
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Overshoot correction (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
+                    self._name, old_kext, target_kext, boosted_weight, effective_count, new_kext
+                )
         else:  # EMA
             # Use boosted alpha for faster correction
             base_alpha = self._get_adaptive_alpha(effective_count)
             boosted_alpha = min(base_alpha * OVERSHOOT_CORRECTION_BOOST, 0.3)
             new_kext = (old_kext * (1.0 - boosted_alpha)) + (target_kext * boosted_alpha)
-            _LOGGER.debug(
-                "%s - Auto TPI: Overshoot correction (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
-                self._name, old_kext, target_kext, boosted_alpha, base_alpha, new_kext
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Overshoot correction (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
+                    self._name, old_kext, target_kext, boosted_alpha, base_alpha, new_kext
+                )
 
         # Ensure Kext doesn't go below minimum
         new_kext = max(0.001, new_kext)
@@ -1830,18 +1909,20 @@ class AutoTpiManager:
         if self._calculation_method == "average":
             boosted_weight = max(1, int(effective_count / OVERSHOOT_CORRECTION_BOOST))
             new_kint = ((old_kint * boosted_weight) + target_kint) / (boosted_weight + 1)
-            _LOGGER.debug(
-                "%s - Boost Kint (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
-                self._name, old_kint, target_kint, boosted_weight, effective_count, new_kint
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Boost Kint (Average): old=%.4f, target=%.4f, weight=%d (boosted from %d), result=%.4f",
+                    self._name, old_kint, target_kint, boosted_weight, effective_count, new_kint
+                )
         else:  # EMA
             base_alpha = self._get_adaptive_alpha(effective_count)
             boosted_alpha = min(base_alpha * OVERSHOOT_CORRECTION_BOOST, 0.3)
             new_kint = (old_kint * (1.0 - boosted_alpha)) + (target_kint * boosted_alpha)
-            _LOGGER.debug(
-                "%s - Boost Kint (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
-                self._name, old_kint, target_kint, boosted_alpha, base_alpha, new_kint
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Boost Kint (EMA): old=%.4f, target=%.4f, alpha=%.3f (boosted from %.3f), result=%.4f",
+                    self._name, old_kint, target_kint, boosted_alpha, base_alpha, new_kint
+                )
 
         # Cap to max coefficient
         new_kint = min(new_kint, self._max_coef_int)
@@ -1851,10 +1932,11 @@ class AutoTpiManager:
 
         # Check if we actually changed anything (might hit cap)
         if abs(new_kint - current_kint) < 0.001:
-            _LOGGER.debug(
-                "%s - Auto TPI: Kint correction skipped - already at limit (current=%.3f, max=%.3f)",
-                self._name, current_kint, self._max_coef_int
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Kint correction skipped - already at limit (current=%.3f, max=%.3f)",
+                    self._name, current_kint, self._max_coef_int
+                )
             return False
 
         old_kint = current_kint
@@ -2045,97 +2127,100 @@ class AutoTpiManager:
         return max(0.0, min(1.0, power))
 
     @staticmethod
-    def _remove_outliers_iqr(values: list[float]) -> list[float]:
+    def _remove_outliers_iqr(values: np.ndarray) -> np.ndarray:
         """
         Remove outliers using Interquartile Range (IQR) method.
         Keeps values within [Q1 - 1.5*IQR, Q3 + 1.5*IQR].
         """
-        if len(values) < 4:
+        if values.size < 4:
             return values
 
-        sorted_values = sorted(values)
-        n = len(sorted_values)
-
-        q1_idx = n // 4
-        q3_idx = (3 * n) // 4
+        sorted_values = np.sort(values)
+        n = sorted_values.size
 
-        q1 = sorted_values[q1_idx]
-        q3 = sorted_values[q3_idx]
+        q1 = sorted_values[n // 4]
+        q3 = sorted_values[(3 * n) // 4]
         iqr = q3 - q1
 
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
+        return values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
 
-        return [v for v in values if lower_bound <= v <= upper_bound]
+    @staticmethod
+    def _states_to_columns(states: list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Convert a list of history states into (timestamps, values) columns.
+
+        Timestamps are POSIX seconds. States which are not numeric (unknown,
+        unavailable, ...) are kept with a NaN value so that their timestamp
+        still counts in the analysed period and they can be reported as invalid.
+        """
+        return states_to_columns(states)
 
-    def _get_power_at_time_sample_hold(self, target_dt: datetime, sorted_power: list, start_idx: int = 0) -> tuple[Optional[float], int]:
+    async def calculate_capacity_from_slope_sensor(
+        self,
+        slope_history: list,
+        power_history: list,
+        min_power_threshold: float = 0.95,
+        kext_coeff: float = 0.0,
+        current_indoor_temp: Optional[float] = None,
+        current_outdoor_temp: Optional[float] = None,
+    ) -> dict:
         """
-        Get the power value at a specific time using sample-and-hold logic.
+        Calculate ADIABATIC capacity using temperature_slope and power_percent sensor histories.
 
-        For event-driven sensors, returns the last known power value before or at target_dt.
-        This is more appropriate for capacity calibration where power may stay stable
-        for long periods without new history entries.
+        The state lists are converted into columns and the computation is done by
+        calculate_capacity_from_columns.
 
         Args:
-            target_dt: The datetime to find power for
-            sorted_power: Power history sorted by time (ascending)
-            start_idx: Index to start searching from (optimization)
+            slope_history: History of temperature_slope sensor
+            power_history: History of power_percent sensor
+            min_power_threshold: Minimum power (0.0-1.0) to consider. Default 0.95 (95%)
+            kext_coeff: Current Kext coefficient for adiabatic correction
+            current_indoor_temp: Current indoor temperature for delta_T estimation
+            current_outdoor_temp: Current outdoor temperature for delta_T estimation
 
         Returns:
-            Tuple of (power value in percent, next index to continue from)
+            Dictionary with adiabatic capacity result and metrics
         """
-        if not sorted_power:
-            return None, 0
-
-        last_valid_power = None
-        last_valid_idx = start_idx
-
-        # Find the last power entry that is <= target_dt
-        for i in range(start_idx, len(sorted_power)):
-            state = sorted_power[i]
-            try:
-                state_dt = state.last_changed
-
-                if state_dt > target_dt:
-                    # We've passed the target time, use the last valid power
-                    break
-
-                # This entry is at or before target_dt
-                state_value = getattr(state, "state", None)
-                if state_value not in ["unknown", "unavailable", None]:
-                    try:
-                        last_valid_power = float(state_value)
-                        last_valid_idx = i
-                    except (ValueError, TypeError):
-                        pass
-
-            except (AttributeError, TypeError):
-                continue
-
-        return last_valid_power, last_valid_idx
+        slope_ts, slope_values = self._states_to_columns(slope_history)
+        power_ts, power_values = self._states_to_columns(power_history)
+
+        return self.calculate_capacity_from_columns(
+            slope_ts,
+            slope_values,
+            power_ts,
+            power_values,
+            min_power_threshold=min_power_threshold,
+            kext_coeff=kext_coeff,
+            current_indoor_temp=current_indoor_temp,
+            current_outdoor_temp=current_outdoor_temp,
+        )
 
-    async def calculate_capacity_from_slope_sensor(
+    def calculate_capacity_from_columns(
         self,
-        slope_history: list,
-        power_history: list,
+        slope_ts: np.ndarray,
+        slope_values: np.ndarray,
+        power_ts: np.ndarray,
+        power_values: np.ndarray,
         min_power_threshold: float = 0.95,
         kext_coeff: float = 0.0,
         current_indoor_temp: Optional[float] = None,
         current_outdoor_temp: Optional[float] = None,
     ) -> dict:
         """
-        Calculate ADIABATIC capacity using temperature_slope and power_percent sensor histories.
+        Calculate ADIABATIC capacity from columnar temperature_slope and power_percent histories.
 
         ALGORITHM:
-        1. Match slope points with power values at the same time
+        1. Match slope points with power values at the same time (sample-and-hold)
         2. Keep points where power >= threshold AND slope direction is correct
         3. Remove outliers using IQR method
         4. Use 75th percentile (biases toward higher/adiabatic values)
         5. Add Kext compensation: capacity = percentile_75 + Kext × avg_delta_T
 
         Args:
-            slope_history: History of temperature_slope sensor
-            power_history: History of power_percent sensor
+            slope_ts: Timestamps (POSIX seconds) of the temperature_slope sensor history
+            slope_values: Values of the temperature_slope sensor history (NaN if invalid)
+            power_ts: Timestamps (POSIX seconds) of the power_percent sensor history
+            power_values: Values of the power_percent sensor history (NaN if invalid)
             min_power_threshold: Minimum power (0.0-1.0) to consider. Default 0.95 (95%)
             kext_coeff: Current Kext coefficient for adiabatic correction
             current_indoor_temp: Current indoor temperature for delta_T estimation
@@ -2144,109 +2229,88 @@ class AutoTpiManager:
         Returns:
             Dictionary with adiabatic capacity result and metrics
         """
-        # Always True now
-        is_heat_mode = True
         power_threshold_percent = min_power_threshold * 100.0
 
         _LOGGER.debug(
             "%s - Capacity Calibration: Analyzing %d slope points and %d power points (threshold=%.0f%%)",
             self._name,
-            len(slope_history) if slope_history else 0,
-            len(power_history) if power_history else 0,
+            slope_ts.size,
+            power_ts.size,
             power_threshold_percent,
         )
 
-        if not slope_history:
+        if slope_ts.size == 0:
             return {"success": False, "error": "No temperature slope history found", "samples_used": 0}
 
-        if not power_history:
+        if power_ts.size == 0:
             return {"success": False, "error": "No power percent history found", "samples_used": 0}
 
-        # Collect valid slope values
-        raw_slopes = []
-        rejected_low_power = 0
-        rejected_wrong_direction = 0
-        rejected_invalid = 0
-
-        # Sort histories by time to enable O(N+M) matching
-        sorted_slopes = sorted(slope_history, key=lambda s: s.last_changed)
-        sorted_power = sorted(power_history, key=lambda s: s.last_changed)
-
-        power_idx = 0
-        for slope_state in sorted_slopes:
-            try:
-                slope_dt = slope_state.last_changed
-                slope_str = getattr(slope_state, "state", None)
-
-                if slope_str in ["unknown", "unavailable", None]:
-                    rejected_invalid += 1
-                    continue
-
-                slope_value = float(slope_str)
-
-                # Find power value using sample-and-hold logic (handles event-driven sensors)
-                power, power_idx = self._get_power_at_time_sample_hold(slope_dt, sorted_power, start_idx=power_idx)
-
-                if power is None:
-                    rejected_invalid += 1
-                    continue
-
-                # Check power threshold
-                if power < power_threshold_percent:
-                    rejected_low_power += 1
-                    continue
-
-                # Check slope direction (always heating check now)
-                if slope_value <= 0:
-                    rejected_wrong_direction += 1
-                    continue
-
-                raw_slopes.append(slope_value)
-
-            except (ValueError, TypeError, AttributeError) as e:
-                _LOGGER.debug("%s - Capacity Calibration: Invalid slope state: %s", self._name, e)
-                rejected_invalid += 1
-                continue
+        # Sort histories by time. Stable sort keeps the recorder order for identical timestamps
+        slope_order = np.argsort(slope_ts, kind="stable")
+        slope_ts = slope_ts[slope_order]
+        slope_values = slope_values[slope_order]
+
+        # Only valid power values are held (an unavailable power keeps the previous value)
+        valid_power = ~np.isnan(power_values)
+        power_ts = power_ts[valid_power]
+        power_values = power_values[valid_power]
+        power_order = np.argsort(power_ts, kind="stable")
+        power_ts = power_ts[power_order]
+        power_values = power_values[power_order]
+
+        # Sample-and-hold join: last power value at or before each slope timestamp (handles event-driven sensors)
+        matched_power = np.full(slope_ts.size, np.nan)
+        if power_ts.size > 0:
+            power_idx = np.searchsorted(power_ts, slope_ts, side="right") - 1
+            has_power = power_idx >= 0
+            matched_power[has_power] = power_values[power_idx[has_power]]
+
+        invalid = np.isnan(slope_values) | np.isnan(matched_power)
+        low_power = ~invalid & (matched_power < power_threshold_percent)
+        # Check slope direction (always heating check now)
+        wrong_direction = ~invalid & ~low_power & (slope_values <= 0)
+
+        raw_slopes = slope_values[~(invalid | low_power | wrong_direction)]
+        rejected_low_power = int(np.count_nonzero(low_power))
+        rejected_wrong_direction = int(np.count_nonzero(wrong_direction))
+        rejected_invalid = int(np.count_nonzero(invalid))
 
         _LOGGER.info(
             "%s - Capacity Calibration: Found %d valid samples (rejected: %d low-power, %d wrong-direction, %d invalid)",
             self._name,
-            len(raw_slopes),
+            raw_slopes.size,
             rejected_low_power,
             rejected_wrong_direction,
             rejected_invalid,
         )
 
-        if len(raw_slopes) < 2:
+        if raw_slopes.size < 2:
             return {
                 "success": False,
-                "error": f"Not enough valid samples ({len(raw_slopes)} found, minimum 2 required)",
-                "samples_used": len(raw_slopes),
+                "error": f"Not enough valid samples ({raw_slopes.size} found, minimum 2 required)",
+                "samples_used": int(raw_slopes.size),
                 "rejection_stats": {"low_power": rejected_low_power, "wrong_direction": rejected_wrong_direction, "invalid": rejected_invalid},
             }
 
         # Remove outliers
         filtered_slopes = self._remove_outliers_iqr(raw_slopes)
-        outliers_removed = len(raw_slopes) - len(filtered_slopes)
+        nb_samples = int(filtered_slopes.size)
+        outliers_removed = int(raw_slopes.size) - nb_samples
 
-        _LOGGER.debug("%s - Capacity Calibration: Removed %d outliers, %d samples remaining", self._name, outliers_removed, len(filtered_slopes))
+        _LOGGER.debug("%s - Capacity Calibration: Removed %d outliers, %d samples remaining", self._name, outliers_removed, nb_samples)
 
-        if len(filtered_slopes) < 2:
+        if nb_samples < 2:
             return {
                 "success": False,
-                "error": f"Not enough samples after outlier removal ({len(filtered_slopes)} remaining)",
-                "samples_used": len(filtered_slopes),
-                "samples_before_filter": len(raw_slopes),
+                "error": f"Not enough samples after outlier removal ({nb_samples} remaining)",
+                "samples_used": nb_samples,
+                "samples_before_filter": int(raw_slopes.size),
             }
 
         # Calculate 75th percentile (biases toward adiabatic - higher values)
         # Higher slopes = less heat loss = closer to adiabatic
-        sorted_slopes = sorted(filtered_slopes)
-        n = len(sorted_slopes)
-
-        # 75th percentile index
-        p75_idx = int(0.75 * (n - 1))
-        observed_capacity = sorted_slopes[p75_idx]
+        p75_idx = int(0.75 * (nb_samples - 1))
+        observed_capacity = float(np.partition(filtered_slopes, p75_idx)[p75_idx])
 
         # Estimate average delta_T for Kext compensation
         # When power is at 100%, we typically have a significant delta_T
@@ -2278,27 +2342,18 @@ class AutoTpiManager:
             capacity = 0.01
 
         # Calculate reliability based on sample count and variance
-        mean_slope = sum(filtered_slopes) / len(filtered_slopes)
-        variance = sum((s - mean_slope) ** 2 for s in filtered_slopes) / len(filtered_slopes)
+        mean_slope = float(filtered_slopes.mean())
+        variance = float(filtered_slopes.var())
         std_dev = math.sqrt(variance) if variance > 0 else 0.0
         cv = std_dev / mean_slope if mean_slope > 0 else 0.0  # Coefficient of variation
 
         # Reliability: higher with more samples and lower variance
-        sample_factor = min(1.0, len(filtered_slopes) / 20.0)  # Max at 20 samples
+        sample_factor = min(1.0, nb_samples / 20.0)  # Max at 20 samples
         variance_factor = max(0.0, 1.0 - (cv / 2.0))  # Lower if high variance
         reliability = 100.0 * sample_factor * variance_factor
 
         # Period calculation (in days)
-        period_days = 0.0
-        if slope_history:
-            try:
-                timestamps = [s.last_changed for s in slope_history]
-                if timestamps:
-                    start_date = min(timestamps)
-                    end_date = max(timestamps)
-                    period_days = (end_date - start_date).total_seconds() / 86400.0
-            except (AttributeError, TypeError):
-                pass
+        period_days = float(slope_ts[-1] - slope_ts[0]) / 86400.0
 
         _LOGGER.info(
             "%s - Capacity Calibration: Adiabatic Capacity=%.3f °C/h (observed=%.3f + Kext×ΔT=%.3f), Reliability=%.1f%%, Samples=%d",
@@ -2307,7 +2362,7 @@ class AutoTpiManager:
             observed_capacity,
             kext_compensation,
             reliability,
-            len(filtered_slopes),
+            nb_samples,
         )
 
         return {
@@ -2316,14 +2371,31 @@ class AutoTpiManager:
             "observed_capacity": round(observed_capacity, 3),
             "kext_compensation": round(kext_compensation, 3),
             "avg_delta_t": round(avg_delta_t, 1),
-            "samples_used": len(filtered_slopes),
-            "samples_before_filter": len(raw_slopes),
+            "samples_used": nb_samples,
+            "samples_before_filter": int(raw_slopes.size),
             "outliers_removed": outliers_removed,
             "reliability": round(reliability, 1),
             "min_power_threshold": min_power_threshold,
             "period": round(period_days, 1),
         }
 
+    def _history_period(self, start_date: datetime | str | None, end_date: datetime | str | None) -> tuple[datetime, datetime]:
+        """The UTC period of the history from the dates of a service (default: the last 30 days)"""
+        # Convert start_date and end_date to datetime objects
+        if isinstance(start_date, str):
+            _date = dt_util.parse_date(start_date)
+            start_date = dt_util.start_of_local_day(_date) if _date else None
+
+        if isinstance(end_date, str):
+            _date = dt_util.parse_date(end_date)
+            _end_day_start = dt_util.start_of_local_day(_date) if _date else None
+            end_date = _end_day_start + timedelta(days=1) if _end_day_start else None
+
+        now = self._now()
+        start_time = dt_util.as_utc(start_date) if start_date is not None else now - timedelta(days=30)
+        end_time = dt_util.as_utc(end_date) if end_date is not None else now
+        return start_time, end_time
+
     async def service_calibrate_capacity(
         self,
         thermostat_entity_id: str,
@@ -2365,20 +2437,8 @@ class AutoTpiManager:
 
         _LOGGER.info("%s - Capacity calibration: Using slope sensor '%s' and power sensor '%s'", self._name, slope_sensor_id, power_sensor_id)
 
-        # 2. Convert start_date and end_date to datetime objects
-        if isinstance(start_date, str):
-            _date = dt_util.parse_date(start_date)
-            start_date = dt_util.start_of_local_day(_date) if _date else None
-
-        if isinstance(end_date, str):
-            _date = dt_util.parse_date(end_date)
-            _end_day_start = dt_util.start_of_local_day(_date) if _date else None
-            end_date = _end_day_start + timedelta(days=1) if _end_day_start else None
-
-        # 3. Determine History Time Range
-        now = dt_util.now()
-        start_time = dt_util.as_utc(start_date) if start_date is not None else now - timedelta(days=30)
-        end_time = dt_util.as_utc(end_date) if end_date is not None else now
+        # 2-3. Determine History Time Range
+        start_time, end_time = self._history_period(start_date, end_date)
 
         _LOGGER.info("%s - Calibrating capacity using history from %s to %s", self._name, start_time, end_time)
 
@@ -2387,46 +2447,19 @@ class AutoTpiManager:
             _LOGGER.debug("%s - Converting min_power_threshold from %.1f to %.2f", self._name, min_power_threshold, min_power_threshold / 100.0)
             min_power_threshold = min_power_threshold / 100.0
 
-        # 4. Fetch sensor histories in chunks to avoid timeouts and cope with gaps
-        entity_ids = [slope_sensor_id, power_sensor_id]
-        slope_history = []
-        power_history = []
-
-        # We use 2-day chunks for robustness
-        chunk_delta = timedelta(days=2)
-        current_start = start_time
-
-        while current_start < end_time:
-            current_end = min(current_start + chunk_delta, end_time)
-            _LOGGER.debug("%s - Fetching history chunk from %s to %s", self._name, current_start, current_end)
-
-            try:
-                chunk_states = await get_instance(self._hass).async_add_executor_job(
-                    partial(
-                        history.get_significant_states,
-                        self._hass,
-                        current_start,
-                        end_time=current_end,
-                        entity_ids=entity_ids,
-                        significant_changes_only=False,
-                    )
-                )
-
-                if chunk_states:
-                    slope_history.extend(chunk_states.get(slope_sensor_id, []))
-                    power_history.extend(chunk_states.get(power_sensor_id, []))
+        # 4. Fetch sensor histories as (timestamp, value) columns. The shared HistoryLoader fetches
+        # the 2-day chunks concurrently and reads the past ones from its disk cache
+        history_loader = VersatileThermostatAPI.get_vtherm_api(self._hass).history_loader
+        columns = await history_loader.async_load([slope_sensor_id, power_sensor_id], start_time, end_time)
+        slope_ts, slope_values = columns[slope_sensor_id]
+        power_ts, power_values = columns[power_sensor_id]
 
-            except Exception as e:
-                _LOGGER.warning("%s - Error fetching history chunk %s to %s: %s", self._name, current_start, current_end, e)
-
-            current_start = current_end
-
-        _LOGGER.debug("%s - Fetched %d slope sensor states and %d power sensor states for capacity calibration.", self._name, len(slope_history), len(power_history))
+        _LOGGER.debug("%s - Fetched %d slope sensor states and %d power sensor states for capacity calibration.", self._name, slope_ts.size, power_ts.size)
 
         # Check if sensors exist
-        if not slope_history:
+        if slope_ts.size == 0:
             _LOGGER.warning("%s - No history found for slope sensor '%s'. " "Make sure the sensor exists and has history enabled in recorder.", self._name, slope_sensor_id)
-        if not power_history:
+        if power_ts.size == 0:
             _LOGGER.warning("%s - No history found for power sensor '%s'. " "Make sure the sensor exists and has history enabled in recorder.", self._name, power_sensor_id)
 
         # 5. Get Kext from HA config (not learned value) for adiabatic correction
@@ -2462,9 +2495,11 @@ class AutoTpiManager:
         )
 
         # 6. Call calculation method with adiabatic correction
-        result = await self.calculate_capacity_from_slope_sensor(
-            slope_history,
-            power_history,
+        result = self.calculate_capacity_from_columns(
+            slope_ts,
+            slope_values,
+            power_ts,
+            power_values,
             min_power_threshold=min_power_threshold,
             kext_coeff=kext_coeff,
             current_indoor_temp=current_indoor_temp,
@@ -2497,6 +2532,146 @@ class AutoTpiManager:
 
         return result
 
+    def _to_celsius_columns(self, columns: tuple[np.ndarray, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """Convert the values of temperature columns to Celsius"""
+        timestamps, values = columns
+        if self._unit_factor == 1.0:
+            return timestamps, values
+        return timestamps, (values - 32.0) / 1.8
+
+    async def identify_thermal_model(
+        self,
+        thermostat_entity_id: str,
+        temp_entity_id: str,
+        ext_temp_entity_id: str,
+        start_date: datetime | str | None = None,
+        end_date: datetime | str | None = None,
+    ) -> dict:
+        """
+        Offline identification: fit the thermal model behind calculate_power on the recorder history.
+
+        Uses the indoor and outdoor temperature sensors and the power_percent sensor of the
+        VTherm. See thermal_identification for the model. Nothing is changed in the state.
+
+        Returns:
+            Dictionary with capacity, coef_int, coef_ext (internal Celsius units), confidence and metrics
+        """
+        if not temp_entity_id or not ext_temp_entity_id:
+            return {"success": False, "error": "No indoor or outdoor temperature sensor", "samples_used": 0}
+
+        base_name = thermostat_entity_id.split(".", 1)[-1]
+        power_sensor_id = f"sensor.{base_name}_power_percent"
+        start_time, end_time = self._history_period(start_date, end_date)
+
+        _LOGGER.info("%s - Thermal model identification using %s, %s and %s from %s to %s", self._name, temp_entity_id, ext_temp_entity_id, power_sensor_id, start_time, end_time)
+
+        history_loader = VersatileThermostatAPI.get_vtherm_api(self._hass).history_loader
+        columns = await history_loader.async_load([temp_entity_id, ext_temp_entity_id, power_sensor_id], start_time, end_time)
+
+        prior_capacity = self.state.max_capacity_heat if self.state.max_capacity_heat > 0 else None
+        result = await self._hass.async_add_executor_job(
+            functools.partial(
+                identify_thermal_model,
+                self._to_celsius_columns(columns[temp_entity_id]),
+                self._to_celsius_columns(columns[ext_temp_entity_id]),
+                columns[power_sensor_id],
+                cycle_min=self._cycle_min,
+                aggressiveness=self._aggressiveness,
+                min_coef_int=MIN_KINT,
+                max_coef_int=self._max_coef_int,
+                prior_capacity=prior_capacity,
+                prior_k_loss=self.state.coeff_outdoor_heat * prior_capacity if prior_capacity else None,
+            )
+        )
+
+        _LOGGER.info("%s - Thermal model identification result: %s", self._name, result)
+        return result
+
+    def seed_from_identification(self, result: dict):
+        """Seed the learning state with an identified thermal model and skip the bootstrap.
+
+        The coefficients count as up to IDENTIFICATION_MAX_WEIGHT learning cycles depending on the
+        confidence of the identification so that the online learning refines them smoothly.
+        """
+        weight = max(1, round(result["confidence"] * IDENTIFICATION_MAX_WEIGHT))
+
+        self.state.max_capacity_heat = result["capacity"]
+        self.state.capacity_heat_learn_count = max(self.state.capacity_heat_learn_count, 3)
+        self.state.bootstrap_failure_count = 0
+        self.state.coeff_indoor_heat = result["coef_int"]
+        self.state.coeff_outdoor_heat = result["coef_ext"]
+        self.state.coeff_indoor_autolearn = max(self.state.coeff_indoor_autolearn, self._avg_initial_weight + weight)
+        self.state.coeff_outdoor_autolearn = max(self.state.coeff_outdoor_autolearn, weight)
+        self.state.last_learning_status = "identified_from_history"
+
+        _LOGGER.info(
+            "%s - Auto TPI: Learning seeded from history: Kint=%.3f, Kext=%.4f, capacity=%.2f °C/h (confidence=%.2f, weight=%d cycles)",
+            self._name,
+            result["coef_int"],
+            result["coef_ext"],
+            result["capacity"],
+            result["confidence"],
+            weight,
+        )
+        self.async_schedule_save()
+
+    async def service_identify_thermal_model(
+        self,
+        thermostat_entity_id: str,
+        temp_entity_id: str,
+        ext_temp_entity_id: str,
+        apply: bool,
+        save_to_config: bool,
+        start_date: datetime | str | None = None,
+        end_date: datetime | str | None = None,
+    ) -> dict:
+        """
+        Orchestrates the thermal model identification service.
+
+        The learning state is seeded with the result if apply is set and the confidence is at
+        least MIN_IDENTIFICATION_CONFIDENCE. The coefficients and capacity are also saved to the
+        config if save_to_config is set.
+        """
+        result = await self.identify_thermal_model(thermostat_entity_id, temp_entity_id, ext_temp_entity_id, start_date, end_date)
+        result["applied"] = False
+        if not result.get("success"):
+            return result
+
+        if result["confidence"] < MIN_IDENTIFICATION_CONFIDENCE:
+            result["error"] = f"Confidence too low ({result['confidence']:.2f} < {MIN_IDENTIFICATION_CONFIDENCE})"
+            return result
+
+        if apply:
+            self.seed_from_identification(result)
+            result["applied"] = True
+
+        if save_to_config:
+            await self.async_update_learning_data(coef_int=result["coef_int"], coef_ext=result["coef_ext"], capacity=result["capacity"], is_heat_mode=True)
+
+        return result
+
+    async def _try_offline_identification(self) -> bool:
+        """
+        Try to identify the whole thermal model from historical data before starting bootstrap.
+
+        Returns True if the learning state has been seeded (the bootstrap is skipped).
+        """
+        if not self._temp_sensor_entity_id or not self._ext_temp_sensor_entity_id:
+            return False
+
+        try:
+            result = await self.identify_thermal_model(self._entity_id or f"climate.{self._unique_id}", self._temp_sensor_entity_id, self._ext_temp_sensor_entity_id)
+        except Exception as e:
+            _LOGGER.warning("%s - Auto TPI: Offline identification error: %s", self._name, e)
+            return False
+
+        if not result.get("success") or result["confidence"] < MIN_IDENTIFICATION_CONFIDENCE:
+            _LOGGER.debug("%s - Auto TPI: Offline identification not used: %s", self._name, result.get("error", f"confidence {result.get('confidence')}"))
+            return False
+
+        self.seed_from_identification(result)
+        return True
+
     async def _try_pre_bootstrap_calibration(self) -> float | None:
         """
         Try to calibrate capacity from historical data before starting bootstrap.
@@ -2569,7 +2744,8 @@ class AutoTpiManager:
     def _capture_end_of_on_temp(self, _):
         """Capture the temperature at the end of the ON pulse."""
         self.state.last_on_temp_in = self._current_temp_in
-        _LOGGER.debug("%s - Auto TPI: Captured end of ON temp: %.1f", self._name, self.state.last_on_temp_in)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - Auto TPI: Captured end of ON temp: %.1f", self._name, self.state.last_on_temp_in)
         self._timer_capture_remove_callback = None
 
     def update_realized_power(self, realized_percent: float):
@@ -2587,10 +2763,11 @@ class AutoTpiManager:
             old = self.state.last_power
             self.state.last_power = realized_percent
             if abs(old - realized_percent) > 0.001:
-                _LOGGER.debug(
-                    "%s - Auto TPI: Realized power updated: %.1f%% -> %.1f%%",
-                    self._name, old * 100, realized_percent * 100
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Auto TPI: Realized power updated: %.1f%% -> %.1f%%",
+                        self._name, old * 100, realized_percent * 100
+                    )
 
     async def on_cycle_started(self, on_time_sec: float, off_time_sec: float, on_percent: float, hvac_mode: str):
         """Called when a TPI cycle starts."""
@@ -2609,9 +2786,10 @@ class AutoTpiManager:
 
         self.state.cycle_active = True
 
-        _LOGGER.debug("%s - Auto TPI: Cycle started. On: %.0fs, Off: %.0fs (%.1f%%), Mode: %s", self._name, on_time_sec, off_time_sec, on_percent * 100, hvac_mode)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - Auto TPI: Cycle started. On: %.0fs, Off: %.0fs (%.1f%%), Mode: %s", self._name, on_time_sec, off_time_sec, on_percent * 100, hvac_mode)
 
-        now = dt_util.now()
+        now = self._now()
 
         # Snapshot current state for learning at the end of the cycle
         self.state.last_temp_in = self._current_temp_in
@@ -2646,7 +2824,7 @@ class AutoTpiManager:
 
         # Schedule capture of temperature at the end of the ON pulse
         if on_time_sec > 0:
-            self._timer_capture_remove_callback = async_call_later(self._hass, on_time_sec, self._capture_end_of_on_temp)
+            self._timer_capture_remove_callback = self._call_later(on_time_sec, self._capture_end_of_on_temp)
 
         # Calculate cold factor for this cycle
         self.state.current_cycle_cold_factor = 0.0
@@ -2658,15 +2836,16 @@ class AutoTpiManager:
             elapsed_off = (now - last_stop).total_seconds() / 60.0
             if elapsed_off >= 0:
                 self.state.current_cycle_cold_factor = min(1.0, max(0.0, elapsed_off / self._heater_cooling_time))
-                _LOGGER.debug(
-                    "%s - Auto TPI: Cold factor calc: elapsed_off=%.1f min, cooling_time=%.1f min, factor=%.2f",
-                    self._name,
-                    elapsed_off,
-                    self._heater_cooling_time,
-                    self.state.current_cycle_cold_factor,
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Auto TPI: Cold factor calc: elapsed_off=%.1f min, cooling_time=%.1f min, factor=%.2f",
+                        self._name,
+                        elapsed_off,
+                        self._heater_cooling_time,
+                        self.state.current_cycle_cold_factor,
+                    )
 
-        await self.async_save_data()
+        self.async_schedule_save()
 
     def _should_learn_continuous_kext(self) -> bool:
         """Check if we should proceed with continuous Kext learning."""
@@ -2725,13 +2904,15 @@ class AutoTpiManager:
         # Check bootstrap for specific mode
         count = self.state.coeff_outdoor_autolearn if is_heat else self.state.coeff_outdoor_cool_autolearn
         if count == 0:
-            _LOGGER.debug("%s - Continuous Kext: Not bootstrapped for %s mode", self._name, "heat" if is_heat else "cool")
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Continuous Kext: Not bootstrapped for %s mode", self._name, "heat" if is_heat else "cool")
             self.state.last_learning_status = "continuous_kext_not_bootstrapped"
             return
 
         # Check setpoint change
         if abs(self._current_target_temp - self.state.last_order) > 0.1:
-            _LOGGER.debug("%s - Continuous Kext: Setpoint changed", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Continuous Kext: Setpoint changed", self._name)
             self.state.last_learning_status = "continuous_kext_setpoint_changed"
             return
 
@@ -2790,7 +2971,7 @@ class AutoTpiManager:
     async def on_cycle_completed(self, e_eff: float = None, **_kw) -> None:
         """Called when a TPI cycle completes."""
         # Validation logic (moved from old _tick)
-        now = dt_util.now()
+        now = self._now()
 
         prev_params = self.state.current_cycle_params or {}
         if self.state.cycle_start_date is not None and self.state.current_cycle_params is not None:
@@ -2807,12 +2988,13 @@ class AutoTpiManager:
 
              # Case 1: Cycle too short (likely forced restart due to preset/temp change or restart)
              if duration_diff < -tolerance:
-                _LOGGER.debug(
-                    "%s - Cycle too short: duration=%.1fmin (expected=%.1fmin). Likely forced restart. Skipping learning.",
-                    self._name,
-                    elapsed_minutes,
-                    expected_duration,
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Cycle too short: duration=%.1fmin (expected=%.1fmin). Likely forced restart. Skipping learning.",
+                        self._name,
+                        elapsed_minutes,
+                        expected_duration,
+                    )
                 self.state.last_learning_status = "cycle_too_short"
                 # We return here because a short cycle shouldn't count towards total_cycles or update stop time
                 # (it was interrupted actively)
@@ -2821,13 +3003,14 @@ class AutoTpiManager:
 
              # Case 2: Cycle too long (Gap/Silence detected)
              if duration_diff > tolerance:
-                _LOGGER.debug(
-                    "%s - Cycle gap detected: duration=%.1fmin (expected=%.1fmin, tolerance=%.1fmin). Resetting cycle but skipping learning.",
-                    self._name,
-                    elapsed_minutes,
-                    expected_duration,
-                    tolerance,
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Cycle gap detected: duration=%.1fmin (expected=%.1fmin, tolerance=%.1fmin). Resetting cycle but skipping learning.",
+                        self._name,
+                        elapsed_minutes,
+                        expected_duration,
+                        tolerance,
+                    )
                 # We do NOT return here. We allow update of total_cycles and last_heater_stop_time
                 self.state.last_learning_status = "cycle_gap_detected"
         else:
@@ -2838,7 +3021,8 @@ class AutoTpiManager:
         off_time_sec = prev_params.get("off_time_sec", 0)
 
         if not self.state.cycle_active:
-            _LOGGER.debug("%s - Auto TPI: Cycle completed but no cycle active. Ignoring.", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Cycle completed but no cycle active. Ignoring.", self._name)
             return
 
         self.state.cycle_active = False
@@ -2852,7 +3036,7 @@ class AutoTpiManager:
 
         # Update last_heater_stop_time if we were heating
         if self.state.last_state == "heat":
-            self.state.last_heater_stop_time = dt_util.now()
+            self.state.last_heater_stop_time = self._now()
 
         # Calculate Power Efficiency based on Heater Warm-up Time and Cold Factor
         # heater_heating_time is the time for the heater to warm up when fully cold.
@@ -2867,24 +3051,26 @@ class AutoTpiManager:
             effective_time = max(0.0, on_time_minutes - effective_warm_up_time)
             self._last_cycle_power_efficiency = effective_time / on_time_minutes
 
-            _LOGGER.debug(
-                "%s - Auto TPI: Power Efficiency calc: on_time=%.1f min, warm_up_time=%.1f, cold_factor=%.2f, eff_warm_up_time=%.1f, eff=%.2f",
-                self._name,
-                on_time_minutes,
-                self._heater_heating_time,
-                self.state.current_cycle_cold_factor,
-                effective_warm_up_time,
-                self._last_cycle_power_efficiency,
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Power Efficiency calc: on_time=%.1f min, warm_up_time=%.1f, cold_factor=%.2f, eff_warm_up_time=%.1f, eff=%.2f",
+                    self._name,
+                    on_time_minutes,
+                    self._heater_heating_time,
+                    self.state.current_cycle_cold_factor,
+                    effective_warm_up_time,
+                    self._last_cycle_power_efficiency,
+                )
 
         if self.learning_active:
             _LOGGER.info(
                 "%s - Auto TPI: Cycle #%d completed after %.1f minutes (efficiency: %.2f)", self._name, self.state.total_cycles, elapsed_minutes, self._last_cycle_power_efficiency
             )
         else:
-            _LOGGER.debug(
-                "%s - Auto TPI: Cycle #%d completed after %.1f minutes (efficiency: %.2f)", self._name, self.state.total_cycles, elapsed_minutes, self._last_cycle_power_efficiency
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - Auto TPI: Cycle #%d completed after %.1f minutes (efficiency: %.2f)", self._name, self.state.total_cycles, elapsed_minutes, self._last_cycle_power_efficiency
+                )
 
         # Attempt learning
         # Determine if in bootstrap
@@ -2904,7 +3090,8 @@ class AutoTpiManager:
 
         # Check if cycle was flagged as invalid (e.g. gap detected)
         if self.state.last_learning_status == "cycle_gap_detected":
-            _LOGGER.debug("%s - Auto TPI: Skipping capacity learning due to invalid cycle (gap detected)", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Skipping capacity learning due to invalid cycle (gap detected)", self._name)
         elif self._should_learn_capacity():
             await self._learn_capacity(
                 power=self.state.last_power,
@@ -2925,7 +3112,8 @@ class AutoTpiManager:
         # PHASE 2: Kint/Kext Learning (requires non-saturated power)
         # Skip during bootstrap (learn only capacity first)
         if in_bootstrap:
-            _LOGGER.debug("%s - Auto TPI: In bootstrap mode, skipping Kint/Kext learning", self._name)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: In bootstrap mode, skipping Kint/Kext learning", self._name)
         elif self._should_learn() and is_significant_cycle:
             _LOGGER.info("%s - Auto TPI: Attempting to learn Kint/Kext from cycle data", self._name)
             await self._perform_learning(self._current_temp_in, self._current_temp_out)
@@ -2937,7 +3125,8 @@ class AutoTpiManager:
             if not is_significant_cycle and reason == "unknown":
                 reason = "on_time_too_short_vs_heating_time"
 
-            _LOGGER.debug("%s - Auto TPI: Not learning Kint/Kext this cycle: %s", self._name, reason)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - Auto TPI: Not learning Kint/Kext this cycle: %s", self._name, reason)
             # Only update status if it wasn't already set to "cycle_gap_detected" or other critical error
             if self.state.last_learning_status != "cycle_gap_detected":
                 self.state.last_learning_status = reason
@@ -2949,7 +3138,7 @@ class AutoTpiManager:
         if self.learning_active:
             await self.process_learning_completion()
 
-        await self.async_save_data()
+        self.async_schedule_save()
 
 
 
@@ -3073,7 +3262,7 @@ class AutoTpiManager:
             self.state.total_cycles = 0
             self.state.consecutive_failures = 0
             self.state.last_learning_status = "learning_started"
-            self.state.cycle_start_date = dt_util.now()
+            self.state.cycle_start_date = self._now()
             self.state.cycle_active = False
             self.state.current_cycle_params = None  # Ensure first tick starts fresh
 
@@ -3114,7 +3303,7 @@ class AutoTpiManager:
 
         # Set start date only if it's a new session (reset) or if it wasn't set (first start)
         if reset_data or self.state.learning_start_date is None:
-            self.state.learning_start_date = dt_util.now()
+            self.state.learning_start_date = self._now()
 
         # ===== BOOTSTRAP PHASE LOGIC =====
         # Determine bootstrap strategy (3 modes)
@@ -3138,8 +3327,15 @@ class AutoTpiManager:
                 self._name, self.state.max_capacity_heat
             )
 
+        elif await self._try_offline_identification():
+            # Mode 2: No manual capacity - the whole model has been identified from the history
+            _LOGGER.info(
+                "%s - Auto TPI: Thermal model identified from history (capacity=%.2f °C/h), skipping bootstrap",
+                self._name, self.state.max_capacity_heat
+            )
+
         else:
-            # Mode 2: No manual capacity - Try pre-bootstrap calibration first
+            # Mode 3: Try pre-bootstrap calibration of the capacity only
             calibration_result = await self._try_pre_bootstrap_calibration()
 
             if calibration_result:
@@ -0,0 +1,298 @@
+"""Offline replay of recorded data through the AutoTpiManager.
+
+The replay engine feeds recorded (timestamp, temp_in, temp_out, setpoint, on_percent)
+samples through AutoTpiManager.update / on_cycle_started / on_cycle_completed on a
+simulated clock, so that a year of data is replayed in seconds without a running
+Home Assistant. Nothing is persisted and the config entries are never updated.
+
+The replay is open loop: the on_percent of the cycles is the recorded one, the
+learned coefficients don't change the replayed temperatures.
+
+The command line replay of CSV traces of several rooms is scripts/auto_tpi_replay.py.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.const import UnitOfTemperature
+from homeassistant.util import dt as dt_util
+
+from .auto_tpi_manager import AutoTpiManager
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# Relative tolerance on the final coefficients used to compute the convergence
+DEFAULT_CONVERGENCE_TOLERANCE = 0.05
+
+
+@dataclass
+class ReplaySample:
+    """One recorded sample"""
+
+    timestamp: datetime
+    temp_in: float | None
+    temp_out: float | None
+    setpoint: float | None
+    on_percent: float
+    hvac_mode: str = "heat"
+
+
+@dataclass
+class ReplayReport:
+    """The result of the replay of one room"""
+
+    name: str
+    nb_cycles: int = 0
+    # Index (0 based) of the first cycle after which the coefficients stay within the tolerance of their final value
+    convergence_cycle: int | None = None
+    convergence_time: timedelta | None = None
+    coef_int: float | None = None
+    coef_ext: float | None = None
+    capacity: float | None = None
+    cpu_time_sec: float = 0.0
+    # number of cycles per learning status
+    statuses: dict[str, int] = field(default_factory=dict)
+    # (cycle end, coef_int, coef_ext) after each cycle
+    history: list[tuple[datetime, float, float]] = field(default_factory=list)
+
+    @property
+    def cpu_time_per_cycle_ms(self) -> float:
+        """The mean CPU time spent by the manager for one cycle"""
+        return 1000.0 * self.cpu_time_sec / self.nb_cycles if self.nb_cycles else 0.0
+
+
+class SimulatedClock:
+    """A clock which only moves when advance_to is called and fires the due timers"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+        self._timers: list[list[Any]] = []
+        self._seq = itertools.count()
+
+    def call_later(self, delay: float, action: Callable) -> Callable[[], None]:
+        """Same as async_call_later on the simulated time. Returns a cancel callable"""
+        entry = [self.now + timedelta(seconds=delay), next(self._seq), action, False]
+        heapq.heappush(self._timers, entry)
+
+        def cancel():
+            entry[3] = True
+
+        return cancel
+
+    def advance_to(self, when: datetime):
+        """Move the time forward and fire the timers due before when"""
+        while self._timers and self._timers[0][0] <= when:
+            due, _, action, cancelled = heapq.heappop(self._timers)
+            if cancelled:
+                continue
+            self.now = max(self.now, due)
+            action(self.now)
+        self.now = max(self.now, when)
+
+
+class _MemoryStore:
+    """Replaces the HA Store: nothing is written on disk"""
+
+    def __init__(self):
+        self.data = None
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+
+    def async_delay_save(self, data_func, _delay: float = 0):
+        self.data = data_func()
+
+
+class _ReplayHass:
+    """The part of HomeAssistant used by the AutoTpiManager"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.data = {}
+        self.config = SimpleNamespace(
+            units=SimpleNamespace(temperature_unit=UnitOfTemperature.CELSIUS),
+            language="en",
+            path=lambda *args: os.path.join(tempfile.gettempdir(), *args),
+        )
+        self.services = SimpleNamespace(async_call=self._async_noop)
+        self.config_entries = SimpleNamespace(async_update_entry=lambda *args, **kwargs: None)
+        self.states = SimpleNamespace(get=lambda entity_id: None)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _async_noop(self, *args, **kwargs):
+        return None
+
+    def async_create_task(self, target, *args, **kwargs) -> asyncio.Task:
+        task = self.loop.create_task(target)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def async_block_till_done(self):
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+
+class ReplayAutoTpiManager(AutoTpiManager):
+    """An AutoTpiManager driven by a SimulatedClock, without persistence nor notifications"""
+
+    def __init__(self, clock: SimulatedClock, hass: Any, name: str, cycle_min: int, **kwargs):
+        super().__init__(
+            hass,
+            SimpleNamespace(data={}),
+            unique_id=f"replay_{name}",
+            name=name,
+            cycle_min=cycle_min,
+            store=_MemoryStore(),
+            **kwargs,
+        )
+        self._clock = clock
+        self._enable_update_config = False
+        self._enable_notification = False
+
+    def _now(self) -> datetime:
+        return self._clock.now
+
+    def _call_later(self, delay: float, action: Callable) -> Callable[[], None]:
+        return self._clock.call_later(delay, action)
+
+    async def _try_pre_bootstrap_calibration(self) -> float | None:
+        # No recorder offline
+        return None
+
+
+def _aware(timestamp: datetime) -> datetime:
+    """Recorded timestamps without timezone are local times"""
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=dt_util.get_default_time_zone())
+
+
+def _compute_convergence(report: ReplayReport, tolerance: float):
+    """Find the first cycle after which the coefficients stay close to their final values"""
+    if not report.history:
+        return
+    _, final_int, final_ext = report.history[-1]
+    first = len(report.history) - 1
+    while first > 0:
+        _, coef_int, coef_ext = report.history[first - 1]
+        if abs(coef_int - final_int) > tolerance * abs(final_int) or abs(coef_ext - final_ext) > tolerance * abs(final_ext):
+            break
+        first -= 1
+    report.convergence_cycle = first
+    report.convergence_time = report.history[first][0] - report.history[0][0]
+
+
+async def async_replay(
+    samples: list[ReplaySample],
+    name: str = "replay",
+    cycle_min: int = 10,
+    start_learning: bool = True,
+    continuous_learning: bool = False,
+    learning_kwargs: dict | None = None,
+    convergence_tolerance: float = DEFAULT_CONVERGENCE_TOLERANCE,
+    **manager_kwargs,
+) -> ReplayReport:
+    """Replay the samples of one room through an AutoTpiManager and returns the report.
+
+    A cycle starts every cycle_min minutes with the on_percent of the last sample. A gap
+    in the data longer than one cycle restarts the cycles at the next sample.
+    manager_kwargs are given to the AutoTpiManager (coef_int, heating_rate, ...)"""
+    report = ReplayReport(name)
+    samples = sorted((sample for sample in samples if sample.timestamp is not None), key=lambda sample: sample.timestamp)
+    if not samples:
+        return report
+    samples = [ReplaySample(_aware(s.timestamp), s.temp_in, s.temp_out, s.setpoint, s.on_percent, s.hvac_mode) for s in samples]
+
+    clock = SimulatedClock(samples[0].timestamp)
+    hass = _ReplayHass(asyncio.get_running_loop())
+    manager = ReplayAutoTpiManager(clock, hass, name, cycle_min, **manager_kwargs)
+    manager._continuous_learning = continuous_learning
+    if start_learning:
+        await manager.start_learning(**(learning_kwargs or {}))
+
+    cycle = timedelta(minutes=cycle_min)
+    cycle_sec = cycle.total_seconds()
+    statuses: Counter = Counter()
+    nb_samples = len(samples)
+    current = samples[0]
+    i = 1
+    cycle_start = current.timestamp
+    cpu_start = time.process_time()
+
+    while True:
+        while i < nb_samples and samples[i].timestamp <= cycle_start:
+            current = samples[i]
+            i += 1
+        clock.advance_to(cycle_start)
+        await _update(manager, current)
+
+        on_percent = min(1.0, max(0.0, current.on_percent or 0.0))
+        await manager.on_cycle_started(
+            on_time_sec=on_percent * cycle_sec,
+            off_time_sec=(1.0 - on_percent) * cycle_sec,
+            on_percent=on_percent,
+            hvac_mode=current.hvac_mode,
+        )
+
+        cycle_end = cycle_start + cycle
+        while i < nb_samples and samples[i].timestamp <= cycle_end:
+            current = samples[i]
+            i += 1
+            clock.advance_to(current.timestamp)
+            await _update(manager, current)
+
+        clock.advance_to(cycle_end)
+        await manager.on_cycle_completed()
+        # let the tasks created by the manager run
+        await hass.async_block_till_done()
+
+        report.nb_cycles += 1
+        # the details between parenthesis change at each cycle
+        statuses[str(manager.state.last_learning_status).split("(", 1)[0]] += 1
+        report.history.append((cycle_end, manager.state.coeff_indoor_heat, manager.state.coeff_outdoor_heat))
+
+        if i >= nb_samples:
+            break
+        cycle_start = cycle_end if samples[i].timestamp - cycle_end <= cycle else samples[i].timestamp
+
+    report.cpu_time_sec = time.process_time() - cpu_start
+    report.statuses = dict(statuses)
+    report.coef_int = manager.state.coeff_indoor_heat
+    report.coef_ext = manager.state.coeff_outdoor_heat
+    report.capacity = manager.state.max_capacity_heat
+    _compute_convergence(report, convergence_tolerance)
+
+    _LOGGER.info(
+        "%s - Auto TPI replay: %d cycles, Kint=%.3f, Kext=%.3f, capacity=%.2f, convergence after %s cycles, %.3f ms CPU/cycle",
+        name,
+        report.nb_cycles,
+        report.coef_int,
+        report.coef_ext,
+        report.capacity,
+        report.convergence_cycle,
+        report.cpu_time_per_cycle_ms,
+    )
+    return report
+
+
+async def _update(manager: AutoTpiManager, sample: ReplaySample):
+    """Give a sample to the manager like control_heating does"""
+    await manager.update(
+        room_temp=sample.temp_in,
+        ext_temp=sample.temp_out,
+        hvac_mode=sample.hvac_mode,
+        target_temp=sample.setpoint,
+    )
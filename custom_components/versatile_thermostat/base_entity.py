@@ -2,20 +2,17 @@
 
 import logging
 from vtherm_api.log_collector import get_vtherm_logger
-from datetime import timedelta
 from homeassistant.core import HomeAssistant, callback, Event
-from homeassistant.components.climate import ClimateEntity
-from homeassistant.components.climate.const import DOMAIN as CLIMATE_DOMAIN
 from homeassistant.const import EntityCategory
-from homeassistant.helpers.entity_component import EntityComponent
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.event import async_track_state_change_event, async_call_later
+from homeassistant.helpers.event import async_track_state_change_event
 
 
 from .const import DOMAIN, DEVICE_MANUFACTURER
 
 from .base_thermostat import BaseThermostat
+from .vtherm_central_api import VersatileThermostatAPI
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -35,7 +32,7 @@ class VersatileThermostatBaseEntity(Entity):
         self._device_name = device_name
         # self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._my_climate = None
-        self._cancel_call = None
+        self._wait_climate_task = None
         self._attr_has_entity_name = True
 
     @property
@@ -66,46 +63,49 @@ class VersatileThermostatBaseEntity(Entity):
 
     def find_my_versatile_thermostat(self) -> BaseThermostat:
         """Find the underlying climate entity"""
-        try:
-            component: EntityComponent[ClimateEntity] = self.hass.data[CLIMATE_DOMAIN]
-            for entity in list(component.entities):
-                # _LOGGER.debug("Device_info is %s", entity.device_info)
-                if entity.device_info == self.device_info:
-                    # _LOGGER.debug("Found %s!", entity)
-                    return entity
-        except KeyError:
-            pass
-
-        return None
+        api: VersatileThermostatAPI = VersatileThermostatAPI.get_vtherm_api(self.hass)
+        if api is None:
+            return None
+        return api.get_climate(self._config_id)
 
     @callback
     async def async_added_to_hass(self):
         """Listen to my climate state change"""
+        _LOGGER.debug("%s - Calling VersatileThermostatBaseEntity.async_added_to_hass", self)
+
+        if self.my_climate:
+            self._listen_my_climate()
+            return
+
+        # The climate is not registered yet. Wait for it without blocking the platform setup
+        _LOGGER.debug("%s - no entity to listen. Wait for its registration", self)
+        self._wait_climate_task = self.hass.async_create_background_task(self._async_wait_for_my_climate(), f"{DOMAIN}_wait_climate_{self._config_id}")
+        self.async_on_remove(self._cancel_wait_for_my_climate)
 
-        # Check delay condition
-        async def try_find_climate(_):
-            _LOGGER.debug(
-                "%s - Calling VersatileThermostatBaseEntity.async_added_to_hass", self
+    async def _async_wait_for_my_climate(self):
+        """Wait for the registration of my climate and then listen to it"""
+        api: VersatileThermostatAPI = VersatileThermostatAPI.get_vtherm_api(self.hass)
+        await api.async_wait_for_climate(self._config_id)
+        self._wait_climate_task = None
+        if self.my_climate:
+            self._listen_my_climate()
+
+    @callback
+    def _cancel_wait_for_my_climate(self):
+        """Cancel the wait of my climate if the entity is removed before"""
+        if self._wait_climate_task:
+            self._wait_climate_task.cancel()
+            self._wait_climate_task = None
+
+    def _listen_my_climate(self):
+        """Listen to the state changes of my climate"""
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass,
+                [self._my_climate.entity_id],
+                self.async_my_climate_changed,
             )
-            mcl = self.my_climate
-            if mcl:
-                if self._cancel_call:
-                    self._cancel_call()
-                    self._cancel_call = None
-                self.async_on_remove(
-                    async_track_state_change_event(
-                        self.hass,
-                        [mcl.entity_id],
-                        self.async_my_climate_changed,
-                    )
-                )
-            else:
-                _LOGGER.debug("%s - no entity to listen. Try later", self)
-                self._cancel_call = async_call_later(
-                    self.hass, timedelta(seconds=1), try_find_climate
-                )
-
-        await try_find_climate(None)
+        )
 
     @callback
     def my_climate_is_initialized(self):
@@ -38,6 +38,12 @@ class BaseFeatureManager:
         """Start listening the underlying entity"""
         raise NotImplementedError()
 
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new configuration parameters to a running FeatureManager without
+        resetting its live state (detection states, timers, bypass, ...).
+        The default re-runs post_init which is right for the managers without live state"""
+        self.post_init(entry_infos)
+
     def stop_listening(self) -> bool:
         """stop listening to the sensor"""
         while self._active_listener:
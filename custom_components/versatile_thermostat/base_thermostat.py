@@ -2,6 +2,7 @@
 # pylint: disable=too-many-lines
 # pylint: disable=invalid-name
 """ Implements the VersatileThermostat climate component """
+import asyncio
 import math
 from typing import Optional, Any, Generic
 from datetime import datetime
@@ -48,7 +49,7 @@ from homeassistant.const import (
 )
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
-from .commons import write_event_log
+from .commons import write_event_log, freeze_attributes
 from .commons_type import ConfigData
 
 from .config_schema import *  # pylint: disable=wildcard-import, unused-wildcard-import
@@ -57,6 +58,8 @@ from .vtherm_central_api import VersatileThermostatAPI
 from .underlyings import UnderlyingEntity, T
 
 from .ema import ExponentialMovingAverage
+from .control_loop_profiler import ControlLoopProfiler
+from .central_config_updater import MANAGER_CONFIG_KEYS, TPI_CONFIG_KEYS, TEMPERATURE_LIMIT_KEYS
 
 from .base_manager import BaseFeatureManager
 from .feature_presence_manager import FeaturePresenceManager
@@ -77,6 +80,56 @@ from .vtherm_hvac_mode import VThermHvacMode, VThermHvacMode_OFF, to_legacy_ha_h
 _LOGGER = get_vtherm_logger(__name__)
 
 
+def merge_central_config(config_entry: ConfigData, central_data: ConfigData | None) -> dict[str, Any]:
+    """The configuration of a VTherm merged with the central configuration: the values of the
+    sections which use the central configuration are removed from config_entry and the missing
+    values are taken from central_data"""
+
+    def clean_one(cfg, schema: vol.Schema):
+        """Clean one schema"""
+        for marker in schema.schema:
+            # Extract the actual key from Voluptuous Marker objects
+            key = marker.schema if hasattr(marker, 'schema') else marker
+            if key in cfg:
+                del cfg[key]
+
+    cfg = dict(config_entry)
+    if central_data:
+        # Removes config if central is used
+        if cfg.get(CONF_USE_MAIN_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_MAIN_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_TPI_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_TPI_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_WINDOW_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_WINDOW_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_MOTION_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_MOTION_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_POWER_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_POWER_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_PRESENCE_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_PRESENCE_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_ADVANCED_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_ADVANCED_DATA_SCHEMA)
+
+        if cfg.get(CONF_USE_LOCK_CENTRAL_CONFIG) is True:
+            clean_one(cfg, STEP_CENTRAL_LOCK_DATA_SCHEMA)
+
+        # take all central config
+        entry_infos = dict(central_data)
+        # and merge with cleaned config_entry
+        entry_infos.update(cfg)
+    else:
+        entry_infos = cfg
+
+    return entry_infos
+
+
 class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
     """Representation of a base class for all Versatile Thermostat device."""
 
@@ -127,6 +180,8 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         self._is_ready: bool = False
 
         self._cycle_scheduler = None
+        # The optional profiler of the control loop (see performance_profiling)
+        self._profiler: ControlLoopProfiler | None = None
 
         # Callbacks for TPI cycle events
         self._on_cycle_start_callbacks: list[Callable] = []
@@ -198,6 +253,17 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
 
         self._hvac_off_reason: str | None = None
         self._hvac_mode_reason: str | None = None
+
+        # Cached sections of the custom attributes which only change on configuration changes.
+        # A missing section is rebuilt by update_custom_attributes (see mark_custom_attributes_dirty)
+        self._custom_attributes_sections: dict[str, dict[str, Any]] = {}
+        # Snapshot of the visible part of the last written state, used to skip identical writes
+        self._last_written_state = None
+        # While the state writes are held (see hold_state_write), the writes are only marked pending.
+        # The number of holds: the holds may be nested or overlap
+        self._state_write_holds = 0
+        self._state_write_pending = False
+
         self._hvac_list: list[VThermHvacMode] = []
         self._str_hvac_list: list[str] = []
         self._temperature_reason: str | None = None
@@ -288,54 +354,43 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         self, config_entry: ConfigData, central_config: ConfigEntry | None
     ) -> dict[str, Any]:
         """Removes all values from config with are concerned by central_config"""
+        return merge_central_config(config_entry, central_config.data if central_config else None)
+
+    async def async_apply_central_config(self, entry_infos: ConfigData, changed_keys: set[str]):
+        """Apply a change of the central configuration without reload. entry_infos is the new
+        merged configuration and changed_keys the keys of the VTherm which changed.
+        Only the managers which read a changed key receive the new parameters. Their live
+        state (window, safety, overpowering, ...) is kept"""
+        write_event_log(_LOGGER, self, "Apply central configuration change %s", sorted(changed_keys))
+        self._entry_infos = entry_infos
 
-        def clean_one(cfg, schema: vol.Schema):
-            """Clean one schema"""
-            for marker in schema.schema:
-                # Extract the actual key from Voluptuous Marker objects
-                key = marker.schema if hasattr(marker, 'schema') else marker
-                if key in cfg:
-                    del cfg[key]
-
-        cfg = config_entry.copy()
-        if central_config and central_config.data:
-            # Removes config if central is used
-            if cfg.get(CONF_USE_MAIN_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_MAIN_DATA_SCHEMA)
-
-            if cfg.get(CONF_USE_TPI_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_TPI_DATA_SCHEMA)
-
-            if cfg.get(CONF_USE_WINDOW_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_WINDOW_DATA_SCHEMA)
-
-            if cfg.get(CONF_USE_MOTION_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_MOTION_DATA_SCHEMA)
-
-            if cfg.get(CONF_USE_POWER_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_POWER_DATA_SCHEMA)
-
-            if cfg.get(CONF_USE_PRESENCE_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_PRESENCE_DATA_SCHEMA)
+        for manager_name, keys in MANAGER_CONFIG_KEYS.items():
+            manager: BaseFeatureManager | None = getattr(self, manager_name, None)
+            if manager is None or not changed_keys & keys:
+                continue
+            await manager.apply_config(entry_infos)
 
-            if cfg.get(CONF_USE_ADVANCED_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_ADVANCED_DATA_SCHEMA)
+        if changed_keys & TEMPERATURE_LIMIT_KEYS:
+            self._attr_max_temp = float(entry_infos.get(CONF_TEMP_MAX, 0.0))
+            self._attr_min_temp = float(entry_infos.get(CONF_TEMP_MIN, 0.0))
+            if (step := entry_infos.get(CONF_STEP_TEMPERATURE)) is not None:
+                self._attr_target_temperature_step = step
 
-            if cfg.get(CONF_USE_LOCK_CENTRAL_CONFIG) is True:
-                clean_one(cfg, STEP_CENTRAL_LOCK_DATA_SCHEMA)
+        if changed_keys & TPI_CONFIG_KEYS:
+            self.apply_tpi_config(entry_infos)
 
-            # take all central config
-            entry_infos = central_config.data.copy()
-            # and merge with cleaned config_entry
-            entry_infos.update(cfg)
-        else:
-            entry_infos = cfg
+        self.mark_custom_attributes_dirty()
+        self.requested_state.force_changed()
+        await self.update_states(True)
 
-        return entry_infos
+    def apply_tpi_config(self, entry_infos: ConfigData):
+        """Apply the TPI parameters of the configuration. Nothing to do for the VTherms without TPI"""
 
     def post_init(self, config_entry: ConfigData):
         """Finish the initialization of the thermostat"""
 
+        self.mark_custom_attributes_dirty()
+
         _LOGGER.info(
             "%s - Updating VersatileThermostat with infos %s",
             self,
@@ -468,16 +523,14 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             )
 
         if self._ext_temp_sensor_entity_id:
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass,
-                    [self._ext_temp_sensor_entity_id],
-                    self._async_ext_temperature_changed,
-                )
-            )
+            # The outdoor sensor is often shared by all the VTherms: the hub listens once and spreads the control cycles
+            self.async_on_remove(VersatileThermostatAPI.get_vtherm_api(self._hass).outdoor_temperature_hub.subscribe(self._ext_temp_sensor_entity_id, self))
 
         self.async_on_remove(self.remove_thermostat)
 
+        # Companion entities (sensors, numbers, ...) find their climate through the API
+        VersatileThermostatAPI.get_vtherm_api(self._hass).register_climate(self._unique_id, self)
+
         # issue 428. Link to others entities will start at link
         # await self.async_startup()
 
@@ -501,6 +554,14 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         if self._cycle_scheduler:
             self._cycle_scheduler.shutdown()
 
+        self._last_written_state = None
+
+        # Remove this VTherm from the central shedding index
+        api: VersatileThermostatAPI = VersatileThermostatAPI.get_vtherm_api(self._hass)
+        if api:
+            api.central_power_manager.invalidate_vtherm_index()
+            api.unregister_climate(self._unique_id, self)
+
         # stop listening for all managers
         for manager in self._managers:
             manager.stop_listening()
@@ -535,6 +596,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """Triggered on startup, used to get old state and set internal states
          accordingly. This is triggered by VTherm API"""
         write_event_log(_LOGGER, self, "Start up VTherm")
+        self.mark_custom_attributes_dirty()
 
         _LOGGER.debug("%s - Calling async_startup_internal", self)
         # need_write_state = False
@@ -558,6 +620,12 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             for cb in self._on_cycle_start_callbacks:
                 self._cycle_scheduler.register_cycle_start_callback(cb)
 
+        # The profiler wraps the hot path methods only when enabled so that it costs nothing otherwise
+        if VersatileThermostatAPI.get_vtherm_api(self._hass).performance_profiling:
+            if self._profiler is None:
+                self._profiler = ControlLoopProfiler(self._name)
+            self._profiler.instrument_thermostat(self)
+
         # init presets. Should be after underlyings init because for over_climate it uses the hvac_modes
         await self.init_presets(central_configuration)
 
@@ -804,6 +872,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         # aggregate all available presets now
         self._presets: dict[str, Any] = presets
         self._presets_away: dict[str, Any] = presets_away
+        self.mark_custom_attributes_dirty("preset_temperatures")
 
         # Calculate all possible presets
         self._attr_preset_modes = [VThermPreset.NONE]
@@ -1179,6 +1248,11 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """Return the external temperature sensor entity ID."""
         return self._ext_temp_sensor_entity_id
 
+    @property
+    def temp_sensor_entity_id(self) -> str | None:
+        """Return the room temperature sensor entity ID."""
+        return self._temp_sensor_entity_id
+
     @property
     def max_on_percent(self) -> float | None:
         """Return the maximum on percentage."""
@@ -1264,6 +1338,16 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """Return the CycleScheduler instance, if any."""
         return self._cycle_scheduler
 
+    @property
+    def managers(self) -> list[BaseFeatureManager]:
+        """Return all the feature managers"""
+        return self._managers
+
+    @property
+    def profiler(self) -> ControlLoopProfiler | None:
+        """Return the profiler of the control loop or None if the profiling is disabled"""
+        return self._profiler
+
     @property
     def underlyings(self) -> list:
         """Return the list of underlying entities."""
@@ -1472,7 +1556,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
     @check_lock
     async def async_set_hvac_mode(self, hvac_mode: VThermHvacMode):  # , need_control_heating=True):
         """Set new target hvac mode. Uses the HA VThermHvacMode enum to respect the original type."""
-        write_event_log(_LOGGER, self, f"Set hvac mode: {hvac_mode}")
+        write_event_log(_LOGGER, self, "Set hvac mode: %s", hvac_mode)
 
         if hvac_mode is None:
             return
@@ -1491,7 +1575,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         # 3. or last_central_mode is CENTRAL_MODE_FROST_PROTECTION and preset_mode is
         #    VThermPreset.FROST (to be abel to re-set the preset_mode)
 
-        write_event_log(_LOGGER, self, f"Set preset mode: {preset_mode}")
+        write_event_log(_LOGGER, self, "Set preset mode: %s", preset_mode)
 
         vtherm_preset_mode = VThermPreset(preset_mode)
         accept = self._last_central_mode in [
@@ -1530,14 +1614,14 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
 
     async def async_set_humidity(self, humidity: int):
         """Set new target humidity."""
-        write_event_log(_LOGGER, self, f"Set humidity: {humidity}")
+        write_event_log(_LOGGER, self, "Set humidity: %s", humidity)
         return
 
     @check_lock
     async def async_set_temperature(self, **kwargs):
         """Set new requested target temperature and turn off any active presets."""
         temperature = kwargs.get(ATTR_TEMPERATURE)
-        write_event_log(_LOGGER, self, f"Set target temp: {temperature}")
+        write_event_log(_LOGGER, self, "Set target temp: %s", temperature)
         if temperature is None:
             return
 
@@ -1559,7 +1643,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         target:
             entity_id: climate.thermostat_2
         """
-        write_event_log(_LOGGER, self, f"Calling SERVICE_SET_PRESET_TEMPERATURE, preset: {preset}, temperature: {temperature}, temperature_away: {temperature_away}")
+        write_event_log(_LOGGER, self, "Calling SERVICE_SET_PRESET_TEMPERATURE, preset: %s, temperature: %s, temperature_away: %s", preset, temperature, temperature_away)
 
         if preset in self._presets:
             if temperature is not None:
@@ -1581,6 +1665,8 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
                 preset,
             )
 
+        self.mark_custom_attributes_dirty("preset_temperatures")
+
         # If the changed preset is active, change the current temperature
         # Issue #119 - reload new preset temperature also in ac mode
         is_active_preset = preset.startswith(self.preset_mode)
@@ -1630,9 +1716,9 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
                 # Apply hvac_mode
                 if self._state_manager.current_state.is_hvac_mode_changed:
                     _LOGGER.info("%s - Applying new hvac mode: %s", self, self.vtherm_hvac_mode)
-                    # Delegate to all underlying
-                    for under in self._underlyings:
-                        sub_need_control_heating = await under.set_hvac_mode(self.vtherm_hvac_mode) or sub_need_control_heating
+                    # Delegate to all underlying. They are sent together so that the identical commands are merged
+                    results = await asyncio.gather(*(under.set_hvac_mode(self.vtherm_hvac_mode) for under in self._underlyings))
+                    sub_need_control_heating = any(results) or sub_need_control_heating
                     self._attr_hvac_mode = to_legacy_ha_hvac_mode(self.vtherm_hvac_mode)
                     self.send_event(EventType.HVAC_MODE_EVENT, {"hvac_mode": str(self.vtherm_hvac_mode)})
                     # Remove eventual overpowering if we want to turn-off
@@ -1653,6 +1739,9 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         self._state_manager.requested_state.reset_changed()
         self._state_manager.current_state.reset_changed()
 
+        # target temperature, on/off or overpowering state may have changed
+        self._power_manager.refresh_central_power_index()
+
         return changed
 
     async def async_control_heating(self, timestamp=None, force=False) -> bool:
@@ -1761,6 +1850,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             self._last_temperature_measure = self._last_ext_temperature_measure = (
                 self.now
             )
+            self._safety_manager.refresh_deadline()
 
     def find_preset_temp(self, preset_mode: VThermPreset):
         """Find the right temperature of a preset considering
@@ -1862,9 +1952,15 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
 
     async def check_central_mode(self, new_central_mode: str | None, old_central_mode: str | None):
         """Take into account a central mode change"""
+        if self.prepare_central_mode(new_central_mode, old_central_mode):
+            await self.update_states()
+
+    def prepare_central_mode(self, new_central_mode: str | None, old_central_mode: str | None) -> bool:
+        """Take the new central mode into the requested state without applying it.
+        Returns True if the states should be updated (see update_states)"""
         if not self.is_controlled_by_central_mode:
             self._last_central_mode = None
-            return
+            return False
 
         _LOGGER.info(
             "%s - Central mode have change from %s to %s",
@@ -1876,8 +1972,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         self._last_central_mode = new_central_mode
 
         self.requested_state.force_changed()
-        await self.update_states()
-        return
+        return True
 
     def recalculate(self, force=False):
         """A utility function to force the calculation of a the algo and
@@ -1957,29 +2052,9 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
                 "not_initialized_entities": not_initialized_entities,
                 "messages": messages,
             },
-            "configuration": {
-                "ac_mode": self._ac_mode,
-                "type": self.vtherm_type,
-                "proportional_function": self.proportional_function,
-                "is_controlled_by_central_mode": self.is_controlled_by_central_mode,
-                "target_temperature_step": self.target_temperature_step,
-                "timezone": str(self._current_tz),
-                "temperature_unit": self.temperature_unit,
-                "is_used_by_central_boiler": self.is_used_by_central_boiler,
-                "max_on_percent": self._max_on_percent,
-                "have_valve_regulation": self.have_valve_regulation,
-                "cycle_min": self._cycle_min,
-            },
-            "preset_temperatures": {
-                "frost_temp": self._presets.get(VThermPreset.FROST, 0),
-                "eco_temp": self._presets.get(VThermPreset.ECO, 0),
-                "boost_temp": self._presets.get(VThermPreset.BOOST, 0),
-                "comfort_temp": self._presets.get(VThermPreset.COMFORT, 0),
-                "frost_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.FROST), 0),
-                "eco_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.ECO), 0),
-                "boost_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.BOOST), 0),
-                "comfort_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.COMFORT), 0),
-            },
+            # copies of the cached sections because they can be completed in place (ex: by the prop handlers)
+            "configuration": dict(self._get_custom_attributes_section("configuration", self._build_configuration_attributes)),
+            "preset_temperatures": dict(self._get_custom_attributes_section("preset_temperatures", self._build_preset_temperatures_attributes)),
         }
 
         self._state_manager.add_custom_attributes(self._attr_extra_state_attributes)
@@ -1992,6 +2067,106 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             if callable(publish_attributes):
                 publish_attributes(self._attr_extra_state_attributes)
 
+    def _build_configuration_attributes(self) -> dict[str, Any]:
+        """Build the configuration section of the custom attributes"""
+        return {
+            "ac_mode": self._ac_mode,
+            "type": self.vtherm_type,
+            "proportional_function": self.proportional_function,
+            "is_controlled_by_central_mode": self.is_controlled_by_central_mode,
+            "target_temperature_step": self.target_temperature_step,
+            "timezone": str(self._current_tz),
+            "temperature_unit": self.temperature_unit,
+            "is_used_by_central_boiler": self.is_used_by_central_boiler,
+            "max_on_percent": self._max_on_percent,
+            "have_valve_regulation": self.have_valve_regulation,
+            "cycle_min": self._cycle_min,
+        }
+
+    def _build_preset_temperatures_attributes(self) -> dict[str, Any]:
+        """Build the preset_temperatures section of the custom attributes"""
+        return {
+            "frost_temp": self._presets.get(VThermPreset.FROST, 0),
+            "eco_temp": self._presets.get(VThermPreset.ECO, 0),
+            "boost_temp": self._presets.get(VThermPreset.BOOST, 0),
+            "comfort_temp": self._presets.get(VThermPreset.COMFORT, 0),
+            "frost_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.FROST), 0),
+            "eco_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.ECO), 0),
+            "boost_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.BOOST), 0),
+            "comfort_away_temp": self._presets_away.get(self.get_preset_away_name(VThermPreset.COMFORT), 0),
+        }
+
+    def _get_custom_attributes_section(self, section: str, build: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Returns the cached section of the custom attributes. Build it if it is dirty"""
+        attributes = self._custom_attributes_sections.get(section)
+        if attributes is None:
+            attributes = self._custom_attributes_sections[section] = build()
+        return attributes
+
+    def mark_custom_attributes_dirty(self, *sections: str):
+        """Mark some cached sections of the custom attributes as dirty so that they
+        are rebuilt on the next update_custom_attributes. All sections if none is given"""
+        if sections:
+            for section in sections:
+                self._custom_attributes_sections.pop(section, None)
+        else:
+            self._custom_attributes_sections.clear()
+
+    def _get_visible_state(self):
+        """Returns a snapshot of all what is visible in the state of the VTherm.
+        The last_update_datetime is ignored because it changes on each update"""
+        extra_state_attributes = dict(self.extra_state_attributes or {})
+        specific_states = extra_state_attributes.get("specific_states")
+        if isinstance(specific_states, dict):
+            extra_state_attributes["specific_states"] = {key: value for key, value in specific_states.items() if key != "last_update_datetime"}
+
+        return freeze_attributes(
+            (
+                self.available,
+                self.state,
+                self.capability_attributes,
+                self.state_attributes,
+                extra_state_attributes,
+            )
+        )
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state to the state machine only if something visible have changed
+        since the last write. This avoids storing identical states in the recorder"""
+        if self.hass is None or self.entity_id is None:
+            # let the Entity raise the right error
+            super().async_write_ha_state()
+            return
+
+        if self._state_write_holds > 0:
+            self._state_write_pending = True
+            return
+
+        visible_state = self._get_visible_state()
+        if visible_state == self._last_written_state:
+            return
+
+        self._last_written_state = visible_state
+        super().async_write_ha_state()
+
+    def hold_state_write(self):
+        """Hold the state writes until release_state_write. Used to write only the final
+        state when several updates are done in a row (see CentralModeBroadcaster). Each hold needs its release"""
+        self._state_write_holds += 1
+
+    def release_state_write(self):
+        """Release a hold of the state writes. The state is written when the last hold is released if a write has been held"""
+        self._state_write_holds = max(0, self._state_write_holds - 1)
+        if self._state_write_holds == 0 and self._state_write_pending:
+            self._state_write_pending = False
+            self.async_write_ha_state()
+
+    @callback
+    def async_registry_entry_updated(self) -> None:
+        """The name or the icon may have been changed in the registry. Force the next write"""
+        self._last_written_state = None
+
     def send_event(self, event_type: EventType, data: dict):
         """Send an event"""
         send_vtherm_event(self._hass, event_type=event_type, entity=self, data=data)
@@ -2018,7 +2193,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """Handle temperature of the temperature sensor changes.
         Return the function to dearm (clear) the window auto check"""
         new_state: State = event.data.get("new_state")
-        write_event_log(_LOGGER, self, f"Temperature changed to state {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self, "Temperature changed to state %s", new_state.state if new_state else None)
 
         if new_state is None or new_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
             return
@@ -2039,7 +2214,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
     async def _async_last_seen_temperature_changed(self, event: Event):
         """Handle last seen temperature sensor changes."""
         new_state: State = event.data.get("new_state")
-        write_event_log(_LOGGER, self, f"Last seen temperature changed to state {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self, "Last seen temperature changed to state %s", new_state.state if new_state else None)
 
         if new_state is None or new_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
             return
@@ -2051,6 +2226,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
 
             # Convert ISO 8601 string to datetime object
             self._last_temperature_measure = self.get_last_updated_date_or_now(new_state)
+            self._safety_manager.refresh_deadline()
             # issue 690 - don't reset the last change time on lastSeen
             # self.reset_last_change_time_from_vtherm()
             _LOGGER.debug(
@@ -2080,12 +2256,24 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
     async def _async_ext_temperature_changed(self, event: Event):
         """Handle external temperature of the sensor changes."""
         new_state: State = event.data.get("new_state")
-        write_event_log(_LOGGER, self, f"Outdoor temperature changed to state {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self, "Outdoor temperature changed to state %s", new_state.state if new_state else None)
 
         if new_state is None or new_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
             return
 
         await self._async_update_ext_temp(new_state)
+        await self.async_ext_temperature_control()
+
+    @callback
+    def set_ext_temperature(self, cur_ext_temp: float, state: State):
+        """Set the external temperature already parsed by the OutdoorTemperatureHub"""
+        write_event_log(_LOGGER, self, "Outdoor temperature changed to state %s", state.state)
+        self._cur_ext_temp = cur_ext_temp
+        self._last_ext_temperature_measure = self.get_state_date_or_now(state)
+        self._safety_manager.refresh_deadline()
+
+    async def async_ext_temperature_control(self):
+        """Recalculate and control the heating after a change of the external temperature"""
         self.recalculate()
 
         # Potentially it generates a safety event
@@ -2103,8 +2291,10 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             if math.isnan(cur_temp) or math.isinf(cur_temp):
                 raise ValueError(f"Sensor has illegal state {state.state}")
             self._cur_temp = cur_temp
+            self._power_manager.refresh_central_power_index()
 
             self._last_temperature_measure = self.get_state_date_or_now(state)
+            self._safety_manager.refresh_deadline()
 
             # calculate the smooth_temperature with EMA calculation
             self._ema_temp = self._ema_algo.calculate_ema(self._cur_temp, self._last_temperature_measure)
@@ -2135,6 +2325,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
                 raise ValueError(f"Sensor has illegal state {state.state}")
             self._cur_ext_temp = cur_ext_temp
             self._last_ext_temperature_measure = self.get_state_date_or_now(state)
+            self._safety_manager.refresh_deadline()
 
             _LOGGER.debug(
                 "%s - After setting _last_ext_temperature_measure %s, state.last_changed.replace=%s",
@@ -2163,7 +2354,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """
         if self.lock_manager.check_is_locked("service_set_presence"):
             return
-        write_event_log(_LOGGER, self, f"Calling SERVICE_SET_PRESENCE, presence: {presence}")
+        write_event_log(_LOGGER, self, "Calling SERVICE_SET_PRESENCE, presence: %s", presence)
         await self._presence_manager.update_presence(presence)
         await self.async_control_heating(force=True)
 
@@ -2208,7 +2399,7 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
         """
         if self.lock_manager.check_is_locked("service_set_window_bypass_state"):
             return
-        write_event_log(_LOGGER, self, f"Calling SERVICE_SET_WINDOW_BYPASS, window_bypass: {window_bypass}")
+        write_event_log(_LOGGER, self, "Calling SERVICE_SET_WINDOW_BYPASS, window_bypass: %s", window_bypass)
         if await self._window_manager.set_window_bypass(window_bypass):
             self.requested_state.force_changed()
             await self.update_states(force=True)
@@ -2303,6 +2494,23 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             "This thermostat does not use TPI algorithm."
         )
 
+    async def service_auto_tpi_identify_model(
+        self,
+        apply: bool,
+        save_to_config: bool,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ):
+        """Stub method for Auto TPI thermal model identification service on non-TPI thermostats.
+
+        Raises:
+            ServiceValidationError: Always raised to indicate the service is not available
+        """
+        raise ServiceValidationError(
+            f"{self} - The auto_tpi_identify_model service is only available for switch/valve type thermostats. "
+            "This thermostat does not use TPI algorithm."
+        )
+
     async def service_set_timed_preset(self, preset: str, duration_minutes: float):
         """Called by a service call:
         service: versatile_thermostat.set_timed_preset
@@ -2379,6 +2587,10 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             _LOGGER.warning("%s - Log collector is not initialized", self._name)
             return
 
+        # The segments of the log buffer spilled on disk are read in the executor, for this export only
+        export_view = getattr(handler, "export_view", None)
+        if export_view is not None:
+            handler = await self._hass.async_add_executor_job(export_view, period_start, period_end)
         await async_export_logs(
             hass=self._hass,
             handler=handler,
@@ -2390,6 +2602,32 @@ class BaseThermostat(ClimateEntity, RestoreEntity, Generic[T]):
             config_entry=self._entry_infos,
         )
 
+    async def service_get_performance_stats(self, reset: bool = False):
+        """Called by a service call:
+        service: versatile_thermostat.get_performance_stats
+        data:
+            reset: false
+        target:
+            entity_id: climate.thermostat_1
+
+        Returns the latencies of the control loop phases and the counters of the VTherm.
+        The performance_profiling option should be set in the YAML configuration.
+        The state of the CommandQueue (shared by all the VTherms) and the duration of the last
+        startup of the VTherm are always returned.
+        """
+        api = VersatileThermostatAPI.get_vtherm_api(self._hass)
+        command_queue = api.service_call_dispatcher.command_queue.stats
+        startup_sec = api.startup_orchestrator.get_startup_duration(self.entity_id)
+        if self._profiler is None:
+            return {"enabled": False, "command_queue": command_queue, "startup_sec": startup_sec}
+
+        stats = self._profiler.to_dict()
+        stats["command_queue"] = command_queue
+        stats["startup_sec"] = startup_sec
+        if reset:
+            self._profiler.reset()
+        return stats
+
     ##
     ## For testing purpose
     ##
@@ -0,0 +1,153 @@
+"""CentralConfigUpdater: applies a change of the central configuration to the running VTherms.
+
+Without it, a change of the central configuration reloads all the config entries: each
+VTherm and its companion entities are removed and built again and init_vtherm_links
+starts them again, with no control of the rooms in the meantime.
+
+The updater keeps the central configuration which is in use. When it changes:
+- the changed keys are compared to the keys which can be applied to running objects
+  (the sections of the central configuration read by the feature managers and the TPI
+  algorithm, the temperature limits, the central power and boiler parameters). If
+  another key changed (a feature flag, an external sensor, ...), the caller does the
+  full reload as before,
+- the central managers (power, boiler) whose keys changed receive the new parameters,
+- for each VTherm, the configuration merged with the old and with the new central
+  configuration are compared. The VTherms which don't use a changed key are not touched.
+  The others receive the new merged configuration. Only the managers which read a
+  changed key apply it (apply_config) and they keep their live state: window, bypass,
+  safety, overpowering, ... (see BaseThermostat.async_apply_central_config).
+
+The preset temperatures of the central configuration are number entities which are
+already applied without reload (see init_vtherm_preset_with_central).
+"""
+
+import time
+from typing import Any
+
+import voluptuous as vol
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_TEMP_MIN,
+    CONF_TEMP_MAX,
+    CONF_STEP_TEMPERATURE,
+    CONF_POWER_SENSOR,
+    CONF_MAX_POWER_SENSOR,
+    CONF_PRESET_POWER,
+)
+from .config_schema import (
+    STEP_CENTRAL_WINDOW_DATA_SCHEMA,
+    STEP_CENTRAL_MOTION_DATA_SCHEMA,
+    STEP_CENTRAL_POWER_DATA_SCHEMA,
+    STEP_CENTRAL_PRESENCE_DATA_SCHEMA,
+    STEP_CENTRAL_ADVANCED_DATA_SCHEMA,
+    STEP_CENTRAL_LOCK_DATA_SCHEMA,
+    STEP_CENTRAL_HEATING_FAILURE_DETECTION_SCHEMA,
+    STEP_CENTRAL_TPI_DATA_SCHEMA_CENTRAL,
+    STEP_CENTRAL_BOILER_SCHEMA,
+)
+
+_LOGGER = get_vtherm_logger(__name__)
+
+
+def schema_keys(schema: vol.Schema) -> frozenset[str]:
+    """The keys of a config flow schema"""
+    return frozenset(marker.schema if hasattr(marker, "schema") else marker for marker in schema.schema)
+
+
+def changed_keys(old: dict[str, Any], new: dict[str, Any]) -> set[str]:
+    """The keys whose value is different (or missing) in one of the configurations"""
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+# The keys read by each feature manager of a VTherm (by the name of the property of the VTherm)
+MANAGER_CONFIG_KEYS: dict[str, frozenset[str]] = {
+    "window_manager": schema_keys(STEP_CENTRAL_WINDOW_DATA_SCHEMA),
+    "motion_manager": schema_keys(STEP_CENTRAL_MOTION_DATA_SCHEMA),
+    "presence_manager": schema_keys(STEP_CENTRAL_PRESENCE_DATA_SCHEMA),
+    "power_manager": schema_keys(STEP_CENTRAL_POWER_DATA_SCHEMA),
+    "safety_manager": schema_keys(STEP_CENTRAL_ADVANCED_DATA_SCHEMA),
+    "repair_incorrect_state_manager": schema_keys(STEP_CENTRAL_ADVANCED_DATA_SCHEMA),
+    "lock_manager": schema_keys(STEP_CENTRAL_LOCK_DATA_SCHEMA),
+    "heating_failure_detection_manager": schema_keys(STEP_CENTRAL_HEATING_FAILURE_DETECTION_SCHEMA),
+}
+# The keys of the TPI algorithm
+TPI_CONFIG_KEYS = schema_keys(STEP_CENTRAL_TPI_DATA_SCHEMA_CENTRAL)
+# The keys of the main section which are simple attributes of the VTherm
+TEMPERATURE_LIMIT_KEYS = frozenset({CONF_TEMP_MIN, CONF_TEMP_MAX, CONF_STEP_TEMPERATURE})
+# The keys of the central managers
+CENTRAL_POWER_KEYS = frozenset({CONF_POWER_SENSOR, CONF_MAX_POWER_SENSOR, CONF_PRESET_POWER})
+CENTRAL_BOILER_KEYS = schema_keys(STEP_CENTRAL_BOILER_SCHEMA)
+
+# All the keys which can be applied to the VTherms without reload
+VTHERM_HOT_KEYS = frozenset().union(*MANAGER_CONFIG_KEYS.values(), TPI_CONFIG_KEYS, TEMPERATURE_LIMIT_KEYS)
+HOT_APPLY_KEYS = VTHERM_HOT_KEYS | CENTRAL_POWER_KEYS | CENTRAL_BOILER_KEYS
+
+
+class CentralConfigUpdater:
+    """Applies the changes of the central configuration without reloading the VTherms"""
+
+    def __init__(self, hass: HomeAssistant, vtherm_api: Any):
+        self._hass = hass
+        self._vtherm_api = vtherm_api
+        # The central configuration in use or None before the setup of the central configuration
+        self._central_data: dict[str, Any] | None = None
+
+    def __str__(self) -> str:
+        return "CentralConfigUpdater"
+
+    def set_central_data(self, central_data: dict[str, Any] | None):
+        """Keep the central configuration in use (at the setup of the central config entry)"""
+        self._central_data = dict(central_data) if central_data is not None else None
+
+    async def async_apply(self, central_entry: ConfigEntry) -> bool:
+        """Apply the new central configuration to the running objects.
+        Returns False if the change cannot be applied and all the VTherms should be reloaded"""
+        # pylint: disable=import-outside-toplevel
+        from .base_thermostat import merge_central_config
+
+        if self._central_data is None:
+            return False
+
+        old_data, new_data = self._central_data, dict(central_entry.data)
+        changed = changed_keys(old_data, new_data)
+        if not changed:
+            _LOGGER.debug("%s - The central configuration is unchanged", self)
+            return True
+
+        if not changed <= HOT_APPLY_KEYS:
+            _LOGGER.info("%s - The central configuration changes %s which cannot be applied without reload", self, sorted(changed - HOT_APPLY_KEYS))
+            return False
+
+        began = time.perf_counter()
+        self._central_data = new_data
+
+        if changed & CENTRAL_POWER_KEYS:
+            await self._vtherm_api.central_power_manager.apply_config(new_data)
+
+        if changed & CENTRAL_BOILER_KEYS:
+            await self._vtherm_api.central_boiler_manager.apply_config(new_data)
+
+        nb_applied = 0
+        for vtherm in self._vtherm_api.registered_climates:
+            entry = self._hass.config_entries.async_get_entry(vtherm.unique_id)
+            if entry is None:
+                continue
+            new_infos = merge_central_config(entry.data, new_data)
+            # The keys of the VTherm which changed: the sections with their own values are not concerned
+            vtherm_changed = changed_keys(merge_central_config(entry.data, old_data), new_infos) & VTHERM_HOT_KEYS
+            if vtherm_changed:
+                await vtherm.async_apply_central_config(new_infos, vtherm_changed)
+                nb_applied += 1
+
+        _LOGGER.info(
+            "%s - The central configuration change %s has been applied to %d VTherm(s) in %.1f ms",
+            self,
+            sorted(changed),
+            nb_applied,
+            (time.perf_counter() - began) * 1000,
+        )
+        return True
@@ -0,0 +1,107 @@
+"""CentralModeBroadcaster: the propagation of a central change to all the VTherms.
+
+A change of the central mode (or of a central preset temperature) concerns all the
+VTherms. Applied one VTherm after the other, the last VTherm waits for the service
+calls to the underlyings of all the others, and each VTherm may write its state
+several times during its update.
+
+The broadcaster runs in two phases:
+- the new requested state of each VTherm is computed first (prepare). It only changes
+  the VTherm attributes, so all the VTherms see the same central state,
+- the updates (update_states) of the prepared VTherms are then run concurrently, with at
+  most max_concurrency of them at the same time. The identical service calls sent at the
+  same time are merged by the ServiceCallDispatcher. The state writes of the VTherms are
+  held from the prepare phase and each VTherm writes its final state once, at the end
+  of its own update: a fast VTherm does not wait for the slowest one.
+
+An error in the update of a VTherm is logged and does not stop the others. The latency
+of the whole propagation is returned in the report and is sent as an event by the API.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The default number of VTherms updated at the same time
+DEFAULT_BROADCAST_CONCURRENCY = 10
+
+
+class CentralModeBroadcaster:
+    """Propagates a central change to the VTherms with a bounded concurrency"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_BROADCAST_CONCURRENCY):
+        self._max_concurrency = max(1, max_concurrency)
+
+    @property
+    def max_concurrency(self) -> int:
+        """The maximal number of updates at the same time"""
+        return self._max_concurrency
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: int):
+        self._max_concurrency = max(1, value)
+
+    async def async_broadcast(
+        self,
+        vtherms: list[Any],
+        prepare: Callable[[Any], Awaitable[bool]],
+        update: Callable[[Any], Awaitable[Any]],
+    ) -> dict[str, Any]:
+        """Prepare all the VTherms, then update the prepared ones concurrently.
+        prepare returns True if the VTherm should be updated. Returns the report of the propagation"""
+        began = time.perf_counter()
+        errors: dict[str, str] = {}
+
+        prepared = []
+        for vtherm in vtherms:
+            try:
+                if await prepare(vtherm):
+                    prepared.append(vtherm)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.error("Error preparing the central change of %s: %s", vtherm.entity_id, err)
+                errors[vtherm.entity_id] = str(err)
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        # The VTherms whose state writes are still held
+        holding = list(prepared)
+
+        async def update_one(vtherm):
+            try:
+                async with semaphore:
+                    try:
+                        await update(vtherm)
+                    except Exception as err:  # pylint: disable=broad-except
+                        _LOGGER.error("Error applying the central change to %s: %s", vtherm.entity_id, err)
+                        errors[vtherm.entity_id] = str(err)
+            finally:
+                # The final state of the VTherm is written as soon as its update is done
+                holding.remove(vtherm)
+                vtherm.release_state_write()
+
+        for vtherm in prepared:
+            vtherm.hold_state_write()
+        try:
+            await asyncio.gather(*(update_one(vtherm) for vtherm in prepared))
+        finally:
+            # The updates which have not started (cancellation) release their hold too
+            for vtherm in holding:
+                vtherm.release_state_write()
+
+        latency_ms = (time.perf_counter() - began) * 1000
+        _LOGGER.info(
+            "The central change has been propagated to %d/%d VTherm(s) in %.1f ms (concurrency %d)",
+            len(prepared),
+            len(vtherms),
+            latency_ms,
+            self._max_concurrency,
+        )
+        return {
+            "nb_vtherms": len(vtherms),
+            "nb_updated": len(prepared),
+            "latency_ms": round(latency_ms, 1),
+            "errors": errors,
+        }
@@ -55,6 +55,7 @@ async def async_setup_entry(
         vtherm_api = VersatileThermostatAPI.get_vtherm_api(hass)
         vtherm_api.reset_central_config()
         vtherm_api.central_power_manager.post_init(entry.data)
+        vtherm_api.central_config_updater.set_central_data(entry.data)
         return
 
     # Instantiate the right base class
@@ -192,6 +193,18 @@ async def async_setup_entry(
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    platform.async_register_entity_service(
+        SERVICE_AUTO_TPI_IDENTIFY_MODEL,
+        {
+            vol.Optional("start_date"): selector.DateTimeSelector(),
+            vol.Optional("end_date"): selector.DateTimeSelector(),
+            vol.Optional("apply", default=True): vol.In([True, False]),
+            vol.Optional("save_to_config", default=False): vol.In([True, False]),
+        },
+        "service_auto_tpi_identify_model",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     platform.async_register_entity_service(
         SERVICE_SET_TIMED_PRESET,
         {
@@ -229,3 +242,12 @@ async def async_setup_entry(
         },
         "service_download_logs",
     )
+
+    platform.async_register_entity_service(
+        SERVICE_GET_PERFORMANCE_STATS,
+        {
+            vol.Optional("reset", default=False): vol.In([True, False]),
+        },
+        "service_get_performance_stats",
+        supports_response=SupportsResponse.ONLY,
+    )
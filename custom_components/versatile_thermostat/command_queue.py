@@ -0,0 +1,404 @@
+"""CommandQueue: rate limiting of the commands sent to the radio-backed underlyings.
+
+The TRVs and relays behind a Zigbee or Z-Wave mesh accept a few commands per second.
+A building-wide preset change makes hundreds of commands in the same second, which
+floods the mesh and delays (or loses) all of them.
+
+The queue keeps one token bucket per integration of the underlying entities (zha,
+mqtt, zwave_js, ...). A command is sent immediately if its integration has no limit or
+if a token is available and nothing is waiting. Otherwise it waits in the queue of
+its integration, ordered by priority (turn-off and safety commands first), and the
+queue is drained as the tokens come back.
+The priority never reorders the commands of the same entity: when a command is queued,
+the older waiting commands of its entities with a lower priority are raised to its
+priority, so they are still sent before it.
+A command waiting with the same supersede key as a new one (the same entity and the
+same kind of service) is superseded: it is dropped, only the latest command is sent
+and the caller of the dropped command gets SUPERSEDED.
+
+The identical commands to several entities of an integration (submitted together with
+async_submit_merged) wait with one command per entity, so that they are superseded per
+entity. When one of them leaves the queue, the waiting commands with the same merge key
+leave with it and are sent in one call, which costs one token.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = get_vtherm_logger(__name__)
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+# The default limits in commands per second of the integrations which use a radio mesh
+DEFAULT_COMMAND_RATE_LIMITS: dict[str, float] = {
+    "zha": 10.0,
+    "mqtt": 10.0,
+    "deconz": 10.0,
+    "zwave_js": 5.0,
+}
+# The bucket accepts bursts of BURST_FACTOR seconds of commands
+BURST_FACTOR = 2.0
+
+
+class _Superseded:
+    """The type of SUPERSEDED"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "SUPERSEDED"
+
+
+# The result of a command which has been replaced by a newer one before it was sent
+SUPERSEDED = _Superseded()
+
+
+class TokenBucket:
+    """A token bucket refilled at rate tokens per second up to capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_take(self, cost: float, now: float) -> bool:
+        """Take cost tokens if they are available"""
+        self._refill(now)
+        cost = min(cost, self.capacity)
+        if self.tokens + 1e-9 < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+    def delay_for(self, cost: float, now: float) -> float:
+        """The number of seconds before cost tokens are available"""
+        self._refill(now)
+        return max(0.0, (min(cost, self.capacity) - self.tokens) / self.rate)
+
+
+class _QueuedCommand:
+    """A command waiting for a token"""
+
+    __slots__ = ("priority", "seq", "entity_ids", "cost", "send", "future", "supersede_key", "merge_key", "send_merged", "dropped")
+
+    def __init__(
+        self,
+        priority: int,
+        seq: int,
+        entity_ids: tuple[str, ...],
+        send: Callable[[], Awaitable[Any]],
+        future,
+        supersede_key,
+        merge_key=None,
+        send_merged: Callable[[tuple[str, ...]], Awaitable[Any]] | None = None,
+    ):
+        self.priority = priority
+        self.seq = seq
+        self.entity_ids = entity_ids
+        # One token per entity: the integration sends one command per device
+        self.cost = float(len(entity_ids))
+        self.send = send
+        self.future = future
+        self.supersede_key = supersede_key
+        # The commands with the same merge key are sent together with send_merged
+        self.merge_key = merge_key
+        self.send_merged = send_merged
+        self.dropped = False
+
+    def __lt__(self, other: "_QueuedCommand") -> bool:
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class _IntegrationQueue:
+    """The bucket, the waiting commands and the counters of one integration"""
+
+    __slots__ = ("bucket", "heap", "by_key", "by_entity", "timer", "nb_sent", "nb_delayed", "nb_dropped")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.heap: list[_QueuedCommand] = []
+        self.by_key: dict[Any, _QueuedCommand] = {}
+        # The waiting commands of each entity
+        self.by_entity: dict[str, list[_QueuedCommand]] = {}
+        self.timer: CALLBACK_TYPE | None = None
+        self.nb_sent = 0
+        self.nb_delayed = 0
+        self.nb_dropped = 0
+
+    def push(self, command: _QueuedCommand):
+        """Add a waiting command"""
+        heapq.heappush(self.heap, command)
+        if command.supersede_key is not None:
+            self.by_key[command.supersede_key] = command
+        for entity_id in command.entity_ids:
+            self.by_entity.setdefault(entity_id, []).append(command)
+
+    def forget(self, command: _QueuedCommand):
+        """Remove a command which is sent or dropped from the indexes. It stays in the heap until it is on top"""
+        if command.supersede_key is not None and self.by_key.get(command.supersede_key) is command:
+            del self.by_key[command.supersede_key]
+        for entity_id in command.entity_ids:
+            waiting = [other for other in self.by_entity.get(entity_id, ()) if other is not command and not other.dropped]
+            if waiting:
+                self.by_entity[entity_id] = waiting
+            else:
+                self.by_entity.pop(entity_id, None)
+
+    def raise_priority(self, entity_ids: tuple[str, ...], priority: int):
+        """Raise to priority the waiting commands of the entities (and of the entities of these commands)
+        so that a new command with this priority is not sent before them"""
+        todo = list(entity_ids)
+        while todo:
+            for command in list(self.by_entity.get(todo.pop(), ())):
+                if command.dropped or command.priority >= priority:
+                    continue
+                # The heap entry cannot be changed: it is replaced by a copy with the same seq
+                raised = _QueuedCommand(priority, command.seq, command.entity_ids, command.send, command.future, command.supersede_key, command.merge_key, command.send_merged)
+                command.dropped = True
+                self.forget(command)
+                self.push(raised)
+                todo.extend(command.entity_ids)
+
+    def take_merged(self, command: _QueuedCommand) -> list[_QueuedCommand]:
+        """Remove from the queue the waiting commands which can be sent with command: the same merge key and
+        no older waiting command for their entities"""
+        if command.merge_key is None:
+            return []
+        merged = []
+        for other in sorted(self.heap):
+            if other.dropped or other.merge_key != command.merge_key:
+                continue
+            if any(waiting.seq < other.seq for entity_id in other.entity_ids for waiting in self.by_entity.get(entity_id, ()) if not waiting.dropped):
+                continue
+            other.dropped = True
+            self.forget(other)
+            merged.append(other)
+        return merged
+
+    @property
+    def depth(self) -> int:
+        """The number of waiting commands"""
+        return sum(1 for command in self.heap if not command.dropped)
+
+
+class CommandQueue:
+    """The rate limited queues of the commands sent to the underlyings"""
+
+    def __init__(self, hass: HomeAssistant, rate_limits: dict[str, float] | None = None):
+        self._hass = hass
+        self._rate_limits: dict[str, float] = dict(DEFAULT_COMMAND_RATE_LIMITS if rate_limits is None else rate_limits)
+        self._queues: dict[str, _IntegrationQueue] = {}
+        self._integrations: dict[str, str | None] = {}
+        self._seq = itertools.count()
+
+    def set_rate_limits(self, rate_limits: dict[str, float]):
+        """Change the limits (in commands per second, 0 means no limit). The waiting commands are kept"""
+        self._rate_limits = dict(rate_limits)
+        for integration, queue in list(self._queues.items()):
+            rate = self._rate_limits.get(integration) or 0
+            if rate > 0:
+                queue.bucket.rate = rate
+                queue.bucket.capacity = max(1.0, rate * BURST_FACTOR)
+                continue
+
+            # No more limit: send the waiting commands now
+            del self._queues[integration]
+            if queue.timer:
+                queue.timer()
+            for command in sorted(queue.heap):
+                if not command.dropped:
+                    queue.nb_sent += 1
+                    self._hass.async_create_task(self._async_send(command))
+
+    def integration_of(self, entity_id: str) -> str | None:
+        """The integration (platform) which provides the entity"""
+        if entity_id not in self._integrations:
+            try:
+                entry = er.async_get(self._hass).async_get(entity_id)
+                platform = entry.platform if entry else None
+                self._integrations[entity_id] = platform if isinstance(platform, str) else None
+            except Exception:  # pylint: disable=broad-exception-caught
+                self._integrations[entity_id] = None
+        return self._integrations[entity_id]
+
+    def _get_queue(self, integration: str | None) -> _IntegrationQueue | None:
+        """The queue of the integration or None if the integration is not rate limited"""
+        if integration is None:
+            return None
+        queue = self._queues.get(integration)
+        if queue is None:
+            rate = self._rate_limits.get(integration) or 0
+            if rate <= 0:
+                return None
+            queue = self._queues[integration] = _IntegrationQueue(TokenBucket(rate, max(1.0, rate * BURST_FACTOR), time.monotonic()))
+        return queue
+
+    async def async_submit(self, entity_ids: list[str], send: Callable[[], Awaitable[Any]], priority: int = PRIORITY_NORMAL, supersede_key: Any = None) -> Any:
+        """Send the command when the integration of the entities allows it. Returns the result of send,
+        or SUPERSEDED if a newer command with the same supersede_key was submitted before it was sent.
+        The supersede_key should identify the entity and the kind of command"""
+        integration = self.integration_of(entity_ids[0]) if entity_ids else None
+        queue = self._get_queue(integration)
+        if queue is None:
+            return await send()
+
+        command = _QueuedCommand(priority, next(self._seq), tuple(entity_ids), send, None, supersede_key)
+        if not queue.heap and queue.bucket.try_take(command.cost, time.monotonic()):
+            queue.nb_sent += 1
+            return await send()
+
+        self._enqueue(integration, queue, command)
+        self._arm_timer(integration, queue)
+        return await command.future
+
+    async def async_submit_merged(
+        self,
+        commands: list[tuple[str, Callable[[], Awaitable[Any]], Any]],
+        send_merged: Callable[[tuple[str, ...]], Awaitable[Any]],
+        priority: int = PRIORITY_NORMAL,
+        merge_key: Any = None,
+    ) -> list[Any]:
+        """Send an identical command to several entities of one integration in one call (send_merged with the
+        entity_ids), for one token. commands gives for each entity its (entity_id, send, supersede_key): send sends
+        the command to the entity alone, if the merged call fails. If the command cannot be sent now, each entity
+        waits with its own command. Returns the result (or the exception) of each command, or SUPERSEDED"""
+        loop = asyncio.get_running_loop()
+        integration = self.integration_of(commands[0][0])
+        queue = self._get_queue(integration)
+        queued = [_QueuedCommand(priority, next(self._seq), (entity_id,), send, loop.create_future(), supersede_key, merge_key, send_merged) for entity_id, send, supersede_key in commands]
+
+        if queue is None or (not queue.heap and queue.bucket.try_take(1.0, time.monotonic())):
+            if queue is not None:
+                queue.nb_sent += 1
+            await self._async_send_merged(queued)
+        else:
+            for command in queued:
+                self._enqueue(integration, queue, command)
+            self._arm_timer(integration, queue)
+
+        return await asyncio.gather(*(command.future for command in queued), return_exceptions=True)
+
+    def _enqueue(self, integration: str, queue: _IntegrationQueue, command: _QueuedCommand):
+        """Add a command to the waiting ones. It supersedes the waiting command with the same supersede key"""
+        if command.supersede_key is not None and (previous := queue.by_key.get(command.supersede_key)) is not None:
+            previous.dropped = True
+            queue.forget(previous)
+            queue.nb_dropped += 1
+            if not previous.future.done():
+                previous.future.set_result(SUPERSEDED)
+            _LOGGER.debug("CommandQueue - %s: a waiting command for %s is superseded", integration, command.entity_ids)
+
+        queue.raise_priority(command.entity_ids, command.priority)
+        if command.future is None:
+            command.future = asyncio.get_running_loop().create_future()
+        queue.push(command)
+        queue.nb_delayed += 1
+
+    def _arm_timer(self, integration: str, queue: _IntegrationQueue):
+        """Wake up when the first waiting command can be sent"""
+        if queue.timer is not None or not queue.heap:
+            return
+
+        @callback
+        def _on_timer(_now):
+            queue.timer = None
+            self._drain(integration)
+
+        queue.timer = async_call_later(self._hass, queue.bucket.delay_for(queue.heap[0].cost, time.monotonic()), _on_timer)
+
+    def _drain(self, integration: str):
+        """Send the waiting commands while there are tokens"""
+        queue = self._queues[integration]
+        now = time.monotonic()
+        while queue.heap:
+            command = queue.heap[0]
+            if command.dropped:
+                heapq.heappop(queue.heap)
+                continue
+            if not queue.bucket.try_take(command.cost, now):
+                break
+            heapq.heappop(queue.heap)
+            queue.forget(command)
+            queue.nb_sent += 1
+            merged = queue.take_merged(command)
+            if merged:
+                self._hass.async_create_task(self._async_send_merged([command] + merged))
+            else:
+                self._hass.async_create_task(self._async_send(command))
+        self._arm_timer(integration, queue)
+
+    @staticmethod
+    async def _async_send(command: _QueuedCommand):
+        """Send a command which was waiting and give the result to its caller"""
+        try:
+            result = await command.send()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            if not command.future.done():
+                command.future.set_exception(err)
+            return
+        if not command.future.done():
+            command.future.set_result(result)
+
+    async def _async_send_merged(self, commands: list[_QueuedCommand]):
+        """Send the identical commands of several entities in one call. If it fails, each command is sent alone
+        so that the error is given to the caller of the entity which caused it"""
+        if len(commands) == 1 or commands[0].send_merged is None:
+            await asyncio.gather(*(self._async_send(command) for command in commands))
+            return
+        entity_ids = tuple(entity_id for command in commands for entity_id in command.entity_ids)
+        try:
+            result = await commands[0].send_merged(entity_ids)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            _LOGGER.warning("CommandQueue - the merged command for %s failed (%s). Sending it entity by entity", entity_ids, err)
+            await asyncio.gather(*(self._async_send(command) for command in commands))
+            return
+        for command in commands:
+            if not command.future.done():
+                command.future.set_result(result)
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the timers and the waiting commands"""
+        for queue in self._queues.values():
+            if queue.timer:
+                queue.timer()
+                queue.timer = None
+            for command in queue.heap:
+                if not command.future.done():
+                    command.future.cancel()
+            queue.heap.clear()
+            queue.by_key.clear()
+            queue.by_entity.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """The queue depth and the counters of each rate limited integration"""
+        return {
+            integration: {
+                "rate_limit": queue.bucket.rate,
+                "queue_depth": queue.depth,
+                "nb_sent": queue.nb_sent,
+                "nb_delayed": queue.nb_delayed,
+                "nb_dropped": queue.nb_dropped,
+            }
+            for integration, queue in self._queues.items()
+        }
@@ -2,6 +2,7 @@
 
 # pylint: disable=line-too-long
 
+import functools
 import logging
 from vtherm_api.log_collector import get_vtherm_logger
 import warnings
@@ -152,9 +153,33 @@ def deprecated(message):
     return decorator
 
 
-def write_event_log(logger: logging.Logger, vtherm: "BaseThermostat", message: str):
-    """Write an event log entry for the thermostat."""
-    logger.info("%s - ---------------------> NEW EVENT: %s --------------------------------------------------------------", vtherm, message)
+EVENT_LOG_FORMAT = "%s - ---------------------> NEW EVENT: {} --------------------------------------------------------------"
+
+
+@functools.lru_cache(maxsize=256)
+def _event_log_format(message: str) -> str:
+    return EVENT_LOG_FORMAT.format(message)
+
+
+def write_event_log(logger: logging.Logger, vtherm: "BaseThermostat", message: str, *args):
+    """Write an event log entry for the thermostat.
+    The message is a %-format of the args, which is formatted only when the record is emitted"""
+    if args:
+        logger.info(_event_log_format(message), vtherm, *args)
+    else:
+        logger.info(_event_log_format("%s"), vtherm, message)
+
+
+def freeze_attributes(value):
+    """Returns an immutable snapshot of an attributes value (dict, list, set and scalars)
+    which can be compared later even if the original value is modified in place"""
+    if isinstance(value, dict):
+        return tuple((key, freeze_attributes(val)) for key, val in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_attributes(val) for val in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
 
 
 async def cleanup_orphan_entity(
@@ -201,6 +201,18 @@ CONF_SHORT_EMA_PARAMS = "short_ema_params"
 CONF_SAFETY_MODE = "safety_mode"
 CONF_MAX_ON_PERCENT = "max_on_percent"
 CONF_LOG_BUFFER_MAX_AGE_HOURS = "log_buffer_max_age_hours"
+CONF_LOG_COLLECTOR_LEVEL = "log_collector_level"
+CONF_LOG_BUFFER_MAX_SIZE_MB = "log_buffer_max_size_mb"
+CONF_LOG_BUFFER_SPILL = "log_buffer_spill"
+CONF_STARTUP_CONCURRENCY = "startup_concurrency"
+CONF_VALVE_COMMAND_HYSTERESIS = "valve_command_hysteresis"
+CONF_USE_CYCLE_MASTER_CLOCK = "use_cycle_master_clock"
+CONF_PERFORMANCE_PROFILING = "performance_profiling"
+CONF_COMMAND_RATE_LIMITS = "command_rate_limits"
+CONF_WINDOW_AUTO_SLOPE = "window_auto_slope"
+
+WINDOW_AUTO_SLOPE_SMOOTHED = "smoothed"
+WINDOW_AUTO_SLOPE_REGRESSION = "regression"
 
 CONF_USE_MAIN_CENTRAL_CONFIG = "use_main_central_config"
 CONF_USE_TPI_CENTRAL_CONFIG = "use_tpi_central_config"
@@ -496,11 +508,14 @@ SERVICE_UNLOCK = "unlock"
 SERVICE_SET_TPI_PARAMETERS = "set_tpi_parameters"
 SERVICE_SET_AUTO_TPI_MODE = "set_auto_tpi_mode"
 SERVICE_AUTO_TPI_CALIBRATE_CAPACITY = "auto_tpi_calibrate_capacity"
+SERVICE_AUTO_TPI_IDENTIFY_MODEL = "auto_tpi_identify_model"
 AUTO_TPI_EVENT = "versatile_thermostat_auto_tpi_event"
+CENTRAL_MODE_EVENT = "versatile_thermostat_central_mode_event"
 SERVICE_SET_TIMED_PRESET = "set_timed_preset"
 SERVICE_CANCEL_TIMED_PRESET = "cancel_timed_preset"
 SERVICE_RECALIBRATE_VALVES = "recalibrate_valves"
 SERVICE_DOWNLOAD_LOGS = "download_logs"
+SERVICE_GET_PERFORMANCE_STATS = "get_performance_stats"
 
 DEFAULT_SAFETY_MIN_ON_PERCENT = 0.5
 DEFAULT_SAFETY_DEFAULT_ON_PERCENT = 0.1
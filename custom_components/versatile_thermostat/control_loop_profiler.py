@@ -0,0 +1,193 @@
+"""ControlLoopProfiler: timers and counters on the hot path of a VTherm.
+
+The profiler is only created when the performance_profiling option of the
+versatile_thermostat YAML configuration is true. It wraps the profiled methods
+of the instances of one VTherm (the thermostat, its managers, its cycle scheduler
+and its underlyings) so that nothing is added to the hot path when it is off.
+
+Each phase keeps the durations of its last PROFILER_WINDOW calls in a ring buffer
+and the p50/p95 are computed when the stats are read.
+"""
+
+import functools
+import inspect
+import time
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from .ring_buffer import FloatRingBuffer
+from .underlyings import UnderlyingSwitch
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The number of durations kept per phase to compute the percentiles
+PROFILER_WINDOW = 200
+
+PHASE_CONTROL_HEATING = "control_heating"
+PHASE_CONTROL_HEATING_SPECIFIC = "control_heating_specific"
+PHASE_UPDATE_CUSTOM_ATTRIBUTES = "update_custom_attributes"
+PHASE_WRITE_HA_STATE = "write_ha_state"
+PHASE_CYCLE_TICK = "cycle_tick"
+COUNTER_SERVICE_CALLS = "service_calls"
+
+_PROFILED_MARKER = "_vtherm_profiled"
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float | None:
+    """The nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class _PhaseStats:
+    """The durations (in ms) of one phase"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "durations")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.durations = FloatRingBuffer(window)
+
+    def add(self, duration_ms: float):
+        """Add a duration"""
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.durations.append(duration_ms)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The stats of the phase"""
+        durations = sorted(self.durations)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": round(percentile(durations, 0.5), 3) if durations else None,
+            "p95_ms": round(percentile(durations, 0.95), 3) if durations else None,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class ControlLoopProfiler:
+    """The timers and counters of one VTherm"""
+
+    def __init__(self, name: str, window: int = PROFILER_WINDOW):
+        self._name = name
+        self._window = window
+        self._phases: dict[str, _PhaseStats] = {}
+        self._counters: dict[str, int] = {}
+        self._started_at = time.monotonic()
+
+    def __str__(self):
+        return f"ControlLoopProfiler-{self._name}"
+
+    def record(self, phase: str, duration_ms: float):
+        """Record a duration of the phase"""
+        stats = self._phases.get(phase)
+        if stats is None:
+            stats = self._phases[phase] = _PhaseStats(self._window)
+        stats.add(duration_ms)
+
+    def increment(self, counter: str, value: int = 1):
+        """Increment a counter"""
+        self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def instrument(self, obj: Any, method_name: str, phase: str) -> bool:
+        """Replace the method of the instance by a timed one. Returns False if the method doesn't exist or is already profiled"""
+        method = getattr(obj, method_name, None)
+        if method is None or getattr(method, _PROFILED_MARKER, False):
+            return False
+
+        record = self.record
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    record(phase, (time.perf_counter() - start) * 1000)
+
+        else:
+
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    record(phase, (time.perf_counter() - start) * 1000)
+
+        setattr(timed, _PROFILED_MARKER, True)
+        setattr(obj, method_name, timed)
+        return True
+
+    def count_calls(self, obj: Any, method_name: str, counter: str) -> bool:
+        """Replace the coroutine method of the instance by one which increments the counter at each call"""
+        method = getattr(obj, method_name, None)
+        if method is None or getattr(method, _PROFILED_MARKER, False):
+            return False
+
+        increment = self.increment
+
+        @functools.wraps(method)
+        async def counted(*args, **kwargs):
+            increment(counter)
+            return await method(*args, **kwargs)
+
+        setattr(counted, _PROFILED_MARKER, True)
+        setattr(obj, method_name, counted)
+        return True
+
+    def instrument_thermostat(self, thermostat: Any):
+        """Profile the hot path of a VTherm. Can be called again after its underlyings or scheduler have been rebuilt"""
+        self.instrument(thermostat, "async_control_heating", PHASE_CONTROL_HEATING)
+        self.instrument(thermostat, "_control_heating_specific", PHASE_CONTROL_HEATING_SPECIFIC)
+        self.instrument(thermostat, "update_custom_attributes", PHASE_UPDATE_CUSTOM_ATTRIBUTES)
+        self.instrument(thermostat, "async_write_ha_state", PHASE_WRITE_HA_STATE)
+
+        for manager in thermostat.managers:
+            self.instrument(manager, "refresh_state", f"{type(manager).__name__}.refresh_state")
+
+        if thermostat.cycle_scheduler is not None:
+            self.instrument(thermostat.cycle_scheduler, "_tick", PHASE_CYCLE_TICK)
+
+        for under in thermostat.underlying_entities:
+            # The switches send their commands directly, the other underlyings use hass_services_async_call
+            for method_name in ("hass_services_async_call", "turn_on", "turn_off") if isinstance(under, UnderlyingSwitch) else ("hass_services_async_call",):
+                self.count_calls(under, method_name, COUNTER_SERVICE_CALLS)
+
+        _LOGGER.debug("%s - the control loop of %s is profiled", self, thermostat)
+
+    def reset(self):
+        """Forget all the recorded durations and counters"""
+        self._phases.clear()
+        self._counters.clear()
+        self._started_at = time.monotonic()
+
+    @property
+    def nb_control_cycles(self) -> int:
+        """The number of async_control_heating calls"""
+        stats = self._phases.get(PHASE_CONTROL_HEATING)
+        return stats.count if stats else 0
+
+    def phase_stats(self, phase: str) -> dict[str, Any] | None:
+        """The stats of one phase or None if it has never been called"""
+        stats = self._phases.get(phase)
+        return stats.to_dict() if stats else None
+
+    def to_dict(self) -> dict[str, Any]:
+        """All the stats (for the diagnostic sensor and the get_performance_stats service)"""
+        return {
+            "enabled": True,
+            "uptime_sec": round(time.monotonic() - self._started_at, 1),
+            "nb_control_cycles": self.nb_control_cycles,
+            "phases": {phase: stats.to_dict() for phase, stats in sorted(self._phases.items())},
+            "counters": dict(self._counters),
+        }
@@ -0,0 +1,159 @@
+"""Building-wide load-levelling planner for the switch based VTherms.
+
+Each CycleScheduler staggers the ON windows of its own underlyings with
+compute_circular_offsets. The planner does the same between VTherms: when a
+scheduler starts a cycle, it chooses the shift of all its ON windows which
+minimizes the peak of the building power (and then its variance), given the
+ON windows already planned by the other VTherms.
+
+Time is absolute (time.time()) so that VTherms with different cycle start
+times and different cycle durations can be compared. A planned load is
+supposed to repeat identically on its next cycles.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Number of bins of the power profile computed on one cycle. This is also the number of candidate shifts
+NB_BINS = 120
+# A load not refreshed since this number of its cycles is forgotten
+STALE_CYCLES = 2
+
+
+@dataclass
+class PlannedLoad:
+    """The ON windows of one VTherm during its current cycle"""
+
+    cycle_start: float
+    cycle_duration: float
+    # (on_t, off_t) relative to the cycle start. off_t < on_t when the window wraps around
+    windows: list[tuple[float, float]]
+    # power of each window (the power of one underlying)
+    power: float
+
+    def is_on(self, times: np.ndarray) -> np.ndarray:
+        """Returns the number of ON windows at each of the absolute times"""
+        rel = np.mod(times - self.cycle_start, self.cycle_duration)
+        count = np.zeros(len(times))
+        for on_t, off_t in self.windows:
+            if off_t > on_t:
+                count += (rel >= on_t) & (rel < off_t)
+            elif off_t < on_t:
+                count += (rel >= on_t) | (rel < off_t)
+            else:
+                # on_t == off_t is a full cycle window (see compute_target_state)
+                count += 1
+        return count
+
+    def power_at(self, times: np.ndarray) -> np.ndarray:
+        """Returns the power of this load at each of the absolute times"""
+        return self.is_on(times) * self.power
+
+
+def windows_from_offsets(offsets: list[float], on_time: float, cycle_duration: float) -> list[tuple[float, float]]:
+    """Build the ON windows of the underlyings of a VTherm from their offsets"""
+    if on_time >= cycle_duration:
+        return [(0.0, 0.0)] * len(offsets)
+    return [(offset % cycle_duration, (offset + on_time) % cycle_duration) for offset in offsets]
+
+
+def profile_stats(profile: np.ndarray) -> tuple[float, float]:
+    """Returns the peak and the standard deviation of a power profile"""
+    if len(profile) == 0:
+        return 0.0, 0.0
+    return float(np.max(profile)), float(np.std(profile))
+
+
+class CycleLoadPlanner:
+    """Keeps the ON windows planned by each VTherm and computes the shifts of the new cycles"""
+
+    def __init__(self, nb_bins: int = NB_BINS):
+        self._nb_bins = nb_bins
+        self._loads: dict[object, PlannedLoad] = {}
+
+    def building_power(self, times: np.ndarray, exclude: object = None) -> np.ndarray:
+        """Returns the power of all the planned loads (except exclude) at each of the absolute times"""
+        power = np.zeros(len(times))
+        for key, load in self._loads.items():
+            if key is not exclude:
+                power += load.power_at(times)
+        return power
+
+    def plan_shift(
+        self,
+        key: object,
+        cycle_start: float,
+        cycle_duration: float,
+        offsets: list[float],
+        on_time: float,
+        power: float,
+    ) -> float:
+        """Choose the shift (in seconds, in [0, cycle_duration)) to add to the offsets of a new cycle
+        and register the shifted ON windows under key.
+
+        The chosen shift minimizes the peak of the building power over the cycle, then its variance.
+        On a tie, the smallest shift is chosen"""
+        self._forget_stale(cycle_start)
+        self._loads.pop(key, None)
+
+        if cycle_duration <= 0 or on_time <= 0 or power <= 0 or not offsets:
+            return 0.0
+
+        bin_sec = cycle_duration / self._nb_bins
+        times = cycle_start + (np.arange(self._nb_bins) + 0.5) * bin_sec
+        others = self.building_power(times)
+
+        shift = 0.0
+        if on_time < cycle_duration:
+            # own[k] is the power profile of this VTherm for a shift of k bins (circulant matrix)
+            base = PlannedLoad(cycle_start, cycle_duration, windows_from_offsets(offsets, on_time, cycle_duration), power).power_at(times)
+            shifts = np.arange(self._nb_bins)
+            own = base[(np.arange(self._nb_bins)[None, :] - shifts[:, None]) % self._nb_bins]
+            total = own + others[None, :]
+            peaks = np.round(total.max(axis=1), 6)
+            squares = np.round((total * total).sum(axis=1), 6)
+            # lexicographic minimum on (peak, sum of squares, shift)
+            best = np.lexsort((shifts, squares, peaks))[0]
+            shift = float(best * bin_sec)
+
+        self._loads[key] = PlannedLoad(
+            cycle_start,
+            cycle_duration,
+            windows_from_offsets([offset + shift for offset in offsets], on_time, cycle_duration),
+            power,
+        )
+        return shift
+
+    def remove(self, key: object):
+        """Forget the load of a VTherm (cycle cancelled or stopped)"""
+        self._loads.pop(key, None)
+
+    def clear(self):
+        """Forget all the loads"""
+        self._loads.clear()
+
+    def _forget_stale(self, now: float):
+        """Forget the loads which have not been refreshed for STALE_CYCLES cycles"""
+        stale = [key for key, load in self._loads.items() if now - load.cycle_start > STALE_CYCLES * load.cycle_duration]
+        for key in stale:
+            del self._loads[key]
+
+    @property
+    def nb_loads(self) -> int:
+        """The number of planned loads"""
+        return len(self._loads)
+
+
+def plan_offsets(loads: list[tuple[float, float, float]], nb_bins: int = NB_BINS) -> list[float]:
+    """Plan the shifts of a set of VTherms starting their cycle at the same time.
+
+    loads is a list of (cycle_duration, on_time, power) with one underlying each.
+    The biggest energies are placed first. Returns the shift of each load in the input order"""
+    planner = CycleLoadPlanner(nb_bins)
+    shifts = [0.0] * len(loads)
+    order = sorted(range(len(loads)), key=lambda i: loads[i][1] * loads[i][2], reverse=True)
+    for i in order:
+        cycle_duration, on_time, power = loads[i]
+        shifts[i] = planner.plan_shift(i, 0.0, cycle_duration, [0.0], on_time, power)
+    return shifts
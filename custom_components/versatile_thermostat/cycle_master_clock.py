@@ -0,0 +1,233 @@
+"""CycleMasterClock: a shared clock which drives all the CycleScheduler timers.
+
+Without the master clock, each CycleScheduler installs its own async_call_later
+timers (ticks and master cycle end). With dozens of over_switch VTherms, this
+makes hundreds of independent timers and uncoordinated relay switching bursts.
+
+The master clock keeps all the deadlines in one heap and arms a single HA timer
+for the earliest one. Deadlines are rounded up to a slot of SLOT_SEC seconds so
+that close deadlines of different VTherms are handled in the same wakeup.
+It also gives each scheduler a phase (a fraction of its cycle) so that the ON
+periods of different VTherms are spread instead of all starting at the cycle start.
+When the device power of the VTherms is known, the CycleLoadPlanner chooses the
+shift of each new cycle to level the building power instead.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from typing import Any, Callable
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .cycle_load_planner import CycleLoadPlanner
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# Width of a slot of the timing wheel. Deadlines are rounded up to the next slot
+SLOT_SEC = 0.25
+# A tick fired later than its slot plus this tolerance is counted as late
+LATE_TICK_TOLERANCE_SEC = 1.0
+# The fractional part of the golden ratio gives a low discrepancy sequence of phases
+GOLDEN_RATIO_CONJUGATE = (math.sqrt(5) - 1) / 2
+# The window used to compute the wakeups per minute
+WAKEUPS_WINDOW_SEC = 60.0
+
+
+class _ClockEntry:
+    """A deadline registered in the master clock"""
+
+    __slots__ = ("deadline", "job", "cancelled")
+
+    def __init__(self, deadline: float, job: HassJob):
+        self.deadline = deadline
+        self.job = job
+        self.cancelled = False
+
+
+class CycleMasterClock:
+    """A single timer which drives all the CycleScheduler instances"""
+
+    def __init__(self, hass: HomeAssistant, slot_sec: float = SLOT_SEC):
+        self._hass = hass
+        self._slot_sec = slot_sec
+        self._heap: list[tuple[float, int, _ClockEntry]] = []
+        self._seq = itertools.count()
+        self._timer_unsub: CALLBACK_TYPE | None = None
+        self._timer_deadline: float | None = None
+        self._nb_pending = 0
+        self._nb_schedulers = 0
+        self._planner = CycleLoadPlanner()
+        # Counters
+        self._wakeups = 0
+        self._late_ticks = 0
+        self._max_lateness_sec = 0.0
+        self._wakeup_times: deque[float] = deque()
+
+    def register_scheduler(self) -> float:
+        """Register a new scheduler and returns its phase as a fraction of its cycle.
+        Consecutive schedulers get well spread phases whatever their number is"""
+        phase = (self._nb_schedulers * GOLDEN_RATIO_CONJUGATE) % 1.0
+        self._nb_schedulers += 1
+        return phase
+
+    def plan_shift(
+        self,
+        scheduler: Any,
+        cycle_start: float,
+        cycle_duration: float,
+        offsets: list[float],
+        on_time: float,
+        power: float,
+        default_shift: float = 0.0,
+    ) -> float:
+        """Returns the shift (in seconds) of the ON windows of the new cycle of a scheduler.
+        Without device power the load cannot be levelled and default_shift is returned"""
+        if not power or power <= 0:
+            self._planner.remove(scheduler)
+            return default_shift
+        return self._planner.plan_shift(scheduler, cycle_start, cycle_duration, offsets, on_time, power)
+
+    def release(self, scheduler: Any):
+        """The cycle of the scheduler is stopped. Its ON windows are no more planned"""
+        self._planner.remove(scheduler)
+
+    @callback
+    def async_call_later(self, delay: float, action: Callable[[Any], Any]) -> CALLBACK_TYPE:
+        """Same as homeassistant.helpers.event.async_call_later but driven by the master clock.
+        Returns a callable which cancels the call"""
+        entry = _ClockEntry(time.monotonic() + max(0.0, delay), HassJob(action, "versatile_thermostat master clock"))
+        heapq.heappush(self._heap, (entry.deadline, next(self._seq), entry))
+        self._nb_pending += 1
+        self._arm()
+
+        @callback
+        def cancel():
+            if not entry.cancelled:
+                entry.cancelled = True
+                self._nb_pending -= 1
+
+        return cancel
+
+    def _slot_of(self, deadline: float) -> float:
+        """Returns the end of the slot which contains the deadline"""
+        return math.ceil(deadline / self._slot_sec) * self._slot_sec
+
+    def _arm(self):
+        """Arm the HA timer for the earliest pending deadline if needed"""
+        # Drop the cancelled entries on top of the heap
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+        if not self._heap:
+            self._cancel_timer()
+            return
+
+        slot = self._slot_of(self._heap[0][0])
+        if self._timer_unsub is not None and self._timer_deadline is not None and self._timer_deadline <= slot:
+            # the armed timer will fire before (or with) this deadline
+            return
+
+        self._cancel_timer()
+        self._timer_deadline = slot
+        self._timer_unsub = async_call_later(self._hass, max(0.0, slot - time.monotonic()), self._on_timer)
+
+    def _cancel_timer(self):
+        """Cancel the HA timer"""
+        if self._timer_unsub is not None:
+            self._timer_unsub()
+        self._timer_unsub = None
+        self._timer_deadline = None
+
+    @callback
+    def _on_timer(self, _now):
+        """Called by the HA timer. Runs all the due jobs and re-arm the timer"""
+        self._timer_unsub = None
+        self._timer_deadline = None
+
+        now = time.monotonic()
+        self._record_wakeup(now)
+
+        # All the deadlines of the current slot are due
+        due_before = self._slot_of(now)
+        utc_now = dt_util.utcnow()
+        while self._heap and self._heap[0][0] <= due_before:
+            _, _, entry = heapq.heappop(self._heap)
+            if entry.cancelled:
+                continue
+            entry.cancelled = True
+            self._nb_pending -= 1
+
+            lateness = now - self._slot_of(entry.deadline)
+            if lateness > LATE_TICK_TOLERANCE_SEC:
+                self._late_ticks += 1
+                self._max_lateness_sec = max(self._max_lateness_sec, lateness)
+                _LOGGER.debug("CycleMasterClock - late tick of %.2f sec", lateness)
+
+            self._hass.async_run_hass_job(entry.job, utc_now)
+
+        self._arm()
+
+    def _record_wakeup(self, now: float):
+        """Count a wakeup of the master clock"""
+        self._wakeups += 1
+        self._wakeup_times.append(now)
+        self._trim_wakeup_times(now)
+
+    def _trim_wakeup_times(self, now: float):
+        """Forget the wakeups older than the wakeups window"""
+        while self._wakeup_times and self._wakeup_times[0] < now - WAKEUPS_WINDOW_SEC:
+            self._wakeup_times.popleft()
+
+    @callback
+    def async_shutdown(self):
+        """Cancel all pending calls and the HA timer"""
+        for _, _, entry in self._heap:
+            entry.cancelled = True
+        self._heap = []
+        self._nb_pending = 0
+        self._cancel_timer()
+        self._planner.clear()
+
+    @property
+    def nb_pending(self) -> int:
+        """The number of pending calls"""
+        return self._nb_pending
+
+    @property
+    def wakeups(self) -> int:
+        """The total number of wakeups of the master clock"""
+        return self._wakeups
+
+    @property
+    def wakeups_per_minute(self) -> int:
+        """The number of wakeups during the last minute"""
+        self._trim_wakeup_times(time.monotonic())
+        return len(self._wakeup_times)
+
+    @property
+    def late_ticks(self) -> int:
+        """The number of ticks fired later than their slot plus LATE_TICK_TOLERANCE_SEC"""
+        return self._late_ticks
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """All the counters of the master clock"""
+        return {
+            "nb_schedulers": self._nb_schedulers,
+            "nb_planned_loads": self._planner.nb_loads,
+            "nb_pending": self._nb_pending,
+            "wakeups": self._wakeups,
+            "wakeups_per_minute": self.wakeups_per_minute,
+            "late_ticks": self._late_ticks,
+            "max_lateness_sec": round(self._max_lateness_sec, 3),
+        }
+
+    def __str__(self):
+        return "CycleMasterClock"
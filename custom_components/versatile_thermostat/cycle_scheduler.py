@@ -6,6 +6,7 @@ For valves: passthrough mode that calls set_valve_open_percent() directly
 without temporal scheduling.
 """
 
+import asyncio
 import logging
 import time
 from vtherm_api.log_collector import get_vtherm_logger
@@ -17,6 +18,8 @@ from homeassistant.helpers.event import async_call_later
 
 from .vtherm_hvac_mode import VThermHvacMode, VThermHvacMode_OFF
 
+from .cycle_master_clock import CycleMasterClock
+from .log_guard import is_debug_enabled
 from .cycle_tick_logic import (
     UnderlyingCycleState,
     compute_circular_offsets,
@@ -88,6 +91,7 @@ class CycleScheduler:
         cycle_duration_sec: float,
         min_activation_delay: int = 0,
         min_deactivation_delay: int = 0,
+        master_clock: CycleMasterClock | None = None,
     ):
         self._hass = hass
         self._thermostat = thermostat
@@ -127,6 +131,16 @@ class CycleScheduler:
         self._is_starting: bool = False
         # Detect valve mode from underlying types
         self._is_valve_mode: bool = self._detect_valve_mode()
+        # Optional shared clock. When set, it drives the timers and gives the phase
+        # (fraction of the cycle) of this scheduler to spread ON periods across VTherms
+        self._master_clock: CycleMasterClock | None = master_clock
+        self._phase: float = master_clock.register_scheduler() if master_clock is not None else 0.0
+
+    def _call_later(self, delay: float, action: Callable) -> CALLBACK_TYPE:
+        """Schedule an action with the master clock if any or with a dedicated HA timer"""
+        if self._master_clock is not None:
+            return self._master_clock.async_call_later(delay, action)
+        return async_call_later(self._hass, delay, action)
 
     @property
     def is_cycle_running(self) -> bool:
@@ -251,14 +265,15 @@ class CycleScheduler:
                 # Valve mode must keep the current master-cycle window for
                 # learning callbacks, but the physical valve command still has
                 # to follow each new regulation result immediately.
-                _LOGGER.debug(
-                    "%s - Valve cycle already running, applying immediate update: "
-                    "on_time=%.0f, off_time=%.0f, on_percent=%.2f",
-                    self._thermostat,
-                    on_time_sec,
-                    off_time_sec,
-                    realized_on_percent,
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Valve cycle already running, applying immediate update: "
+                        "on_time=%.0f, off_time=%.0f, on_percent=%.2f",
+                        self._thermostat,
+                        on_time_sec,
+                        off_time_sec,
+                        realized_on_percent,
+                    )
                 await self._update_running_valve_cycle(
                     hvac_mode,
                     on_time_sec,
@@ -269,16 +284,17 @@ class CycleScheduler:
             if self._active_on_time_sec > 0:
                 # A real cycle is actively running — don't interrupt it.
                 # Just update stored params so the next auto-repeat uses them.
-                _LOGGER.debug(
-                    "%s - Cycle already running (on_time=%.0fs), skipping (force=%s). "
-                    "Updating params for next repeat: on_time=%.0f, off_time=%.0f, on_percent=%.2f",
-                    self._thermostat,
-                    self._active_on_time_sec,
-                    force,
-                    on_time_sec,
-                    off_time_sec,
-                    realized_on_percent,
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Cycle already running (on_time=%.0fs), skipping (force=%s). "
+                        "Updating params for next repeat: on_time=%.0f, off_time=%.0f, on_percent=%.2f",
+                        self._thermostat,
+                        self._active_on_time_sec,
+                        force,
+                        on_time_sec,
+                        off_time_sec,
+                        realized_on_percent,
+                    )
                 self._set_pending_cycle(hvac_mode, on_time_sec, off_time_sec, realized_on_percent)
                 return
             # Current cycle is idle (on_time=0, device off).
@@ -294,16 +310,18 @@ class CycleScheduler:
                 off_time_sec,
                 realized_on_percent,
             ):
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - Current cycle is idle and unchanged, keeping existing cycle",
+                        self._thermostat,
+                    )
+                self._set_pending_cycle(hvac_mode, on_time_sec, off_time_sec, realized_on_percent)
+                return
+            if is_debug_enabled(_LOGGER):
                 _LOGGER.debug(
-                    "%s - Current cycle is idle and unchanged, keeping existing cycle",
+                    "%s - Current cycle is idle (on_time=0), replacing with changed cycle",
                     self._thermostat,
                 )
-                self._set_pending_cycle(hvac_mode, on_time_sec, off_time_sec, realized_on_percent)
-                return
-            _LOGGER.debug(
-                "%s - Current cycle is idle (on_time=0), replacing with changed cycle",
-                self._thermostat,
-            )
 
         await self._cancel_cycle_impl()
 
@@ -385,7 +403,8 @@ class CycleScheduler:
             under._on_time_sec = on_time_sec
             under._off_time_sec = off_time_sec
             under._hvac_mode = hvac_mode
-            await under.set_valve_open_percent()
+        # The valves are updated in one round-trip (see ServiceCallDispatcher)
+        await asyncio.gather(*(under.set_valve_open_percent() for under in self._underlyings))
 
     def _reset_valve_cycle_trace(self, on_percent: float) -> None:
         """Start a new valve trace for the current master cycle."""
@@ -426,8 +445,7 @@ class CycleScheduler:
             self._current_off_time_sec,
         )
         self._reset_valve_cycle_trace(self._current_on_percent)
-        self._cycle_end_unsub = async_call_later(
-            self._hass,
+        self._cycle_end_unsub = self._call_later(
             self._cycle_duration_sec,
             self._on_master_cycle_end,
         )
@@ -447,27 +465,32 @@ class CycleScheduler:
             under._hvac_mode = hvac_mode
 
         if hvac_mode == VThermHvacMode_OFF or on_time_sec <= 0:
-            # Turn off all underlyings
+            # Turn off all underlyings (together, so that the commands are merged by the ServiceCallDispatcher)
+            await asyncio.gather(*(under.turn_off() for under in self._underlyings if under.is_device_active))
             for under in self._underlyings:
-                if under.is_device_active:
-                    await under.turn_off()
                 under._should_be_on = False
             # Keep a real master-cycle start time so the next automatic restart
             # reports a full elapsed_ratio instead of looking interrupted with 0 s elapsed.
             self._cycle_start_time = time.time()
+            self._release_planned_load()
             # Schedule next cycle evaluation
-            self._cycle_end_unsub = async_call_later(self._hass, self._cycle_duration_sec, self._on_master_cycle_end)
+            self._cycle_end_unsub = self._call_later(self._cycle_duration_sec, self._on_master_cycle_end)
             return
 
         if on_time_sec >= self._cycle_duration_sec:
             # 100% power: Turn on all underlyings unconditionally to enforce state
+            await asyncio.gather(*(under.turn_on() for under in self._underlyings))
             for under in self._underlyings:
-                await under.turn_on()
                 under._should_be_on = True
             # Keep a real master-cycle start time for the same reason as 0% cycles.
             self._cycle_start_time = time.time()
+            if self._master_clock is not None:
+                # Always ON: the other VTherms have to be levelled around it
+                self._master_clock.plan_shift(
+                    self, self._cycle_start_time, self._cycle_duration_sec, [0.0] * len(self._underlyings), self._cycle_duration_sec, self._underlying_power()
+                )
             # Schedule next cycle evaluation
-            self._cycle_end_unsub = async_call_later(self._hass, self._cycle_duration_sec, self._on_master_cycle_end)
+            self._cycle_end_unsub = self._call_later(self._cycle_duration_sec, self._on_master_cycle_end)
             return
 
         self._init_cycle(on_percent)
@@ -476,7 +499,7 @@ class CycleScheduler:
         await self._tick(_is_initial=True)
 
         # Also ensure master cycle end is scheduled independently to wrap up the cycle
-        self._cycle_end_unsub = async_call_later(self._hass, self._cycle_duration_sec, self._on_master_cycle_end)
+        self._cycle_end_unsub = self._call_later(self._cycle_duration_sec, self._on_master_cycle_end)
 
     def _init_cycle(self, on_percent: float):
         """Initialize states and penalty for the new cycle.
@@ -490,6 +513,19 @@ class CycleScheduler:
         n = len(self._underlyings)
         on_time = self._cycle_duration_sec * on_percent
         offsets = compute_circular_offsets(self._cycle_duration_sec, n)
+        if self._master_clock is not None:
+            # Shift this VTherm relatively to the others driven by the master clock
+            shift = self._master_clock.plan_shift(
+                self,
+                self._cycle_start_time,
+                self._cycle_duration_sec,
+                offsets,
+                on_time,
+                self._underlying_power(),
+                default_shift=self._phase * self._cycle_duration_sec,
+            )
+            if shift > 0:
+                offsets = [(offset + shift) % self._cycle_duration_sec for offset in offsets]
 
         self._states = []
         for i, under in enumerate(self._underlyings):
@@ -504,6 +540,19 @@ class CycleScheduler:
             self._thermostat, on_percent, offsets
         )
 
+    def _underlying_power(self) -> float:
+        """Returns the power of one underlying (the device power is shared by all the underlyings)"""
+        power_manager = getattr(self._thermostat, "power_manager", None)
+        device_power = getattr(power_manager, "device_power", None)
+        if not isinstance(device_power, (int, float)) or device_power <= 0 or not self._underlyings:
+            return 0.0
+        return device_power / len(self._underlyings)
+
+    def _release_planned_load(self):
+        """Remove the ON windows of this scheduler from the building load plan"""
+        if self._master_clock is not None:
+            self._master_clock.release(self)
+
     async def _tick(self, _now=None, _is_initial: bool = False):
         """Evaluate all underlyings and schedule the next tick.
 
@@ -557,10 +606,11 @@ class CycleScheduler:
                         except Exception as err:
                             _LOGGER.error("%s - tick turn_on failed: %s", under, err)
                     elif action == 'skip' and new_on_t is not None:
-                        _LOGGER.debug(
-                            "%s - tick skip turn_on (racollage), on_t shifted %.1f -> %.1f, penalty=%.1f",
-                            under, state.on_t, new_on_t, pen_delta
-                        )
+                        if is_debug_enabled(_LOGGER):
+                            _LOGGER.debug(
+                                "%s - tick skip turn_on (racollage), on_t shifted %.1f -> %.1f, penalty=%.1f",
+                                under, state.on_t, new_on_t, pen_delta
+                            )
                         state.on_t = new_on_t
                         self._penalty += pen_delta
                         resched_time = new_on_t - current_t
@@ -590,10 +640,11 @@ class CycleScheduler:
                         except Exception as err:
                             _LOGGER.error("%s - tick turn_off failed: %s", under, err)
                     elif action == 'skip' and new_off_t is not None:
-                        _LOGGER.debug(
-                            "%s - tick skip turn_off (racollage), off_t shifted %.1f -> %.1f, penalty=%.1f",
-                            under, state.off_t, new_off_t, pen_delta
-                        )
+                        if is_debug_enabled(_LOGGER):
+                            _LOGGER.debug(
+                                "%s - tick skip turn_off (racollage), off_t shifted %.1f -> %.1f, penalty=%.1f",
+                                under, state.off_t, new_off_t, pen_delta
+                            )
                         state.off_t = new_off_t
                         self._penalty += pen_delta
                         resched_time = new_off_t - current_t
@@ -612,7 +663,7 @@ class CycleScheduler:
         next_global_tick = max(0.1, next_global_tick)
 
         # Schedule next tick
-        self._tick_unsub = async_call_later(self._hass, next_global_tick, self._tick)
+        self._tick_unsub = self._call_later(next_global_tick, self._tick)
 
     async def _on_master_cycle_end(self, _now):
         """Called at the end of the master cycle. Restart with the same parameters.
@@ -649,6 +700,7 @@ class CycleScheduler:
             self._cycle_end_unsub()
             self._cycle_end_unsub = None
         self._valve_cycle_trace = []
+        self._release_planned_load()
         self._set_pending_cycle(None, 0, 0, 0.0)
         self._set_active_cycle(None, 0, 0, 0.0)
         self._is_cancelling = False
@@ -673,6 +725,8 @@ class CycleScheduler:
             self._cycle_end_unsub()
             self._cycle_end_unsub = None
 
+        self._release_planned_load()
+
         elapsed_sec = time.time() - self._cycle_start_time if self._cycle_start_time > 0 else 0
 
         # Fire end-of-cycle callback for cycles that ran long enough.
@@ -684,7 +738,8 @@ class CycleScheduler:
             realized_e_eff = self._calculate_realized_e_eff(elapsed_sec)
             elapsed_ratio = min(1.0, elapsed_sec / self._cycle_duration_sec) if self._cycle_duration_sec > 0 else 1.0
 
-            _LOGGER.debug("%s - cycle end: elapsed_sec=%.1f, realized_e_eff=%.3f, elapsed_ratio=%.2f", self._thermostat, elapsed_sec, realized_e_eff, elapsed_ratio)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - cycle end: elapsed_sec=%.1f, realized_e_eff=%.3f, elapsed_ratio=%.2f", self._thermostat, elapsed_sec, realized_e_eff, elapsed_ratio)
             await self._fire_cycle_end_callbacks(realized_e_eff, elapsed_ratio)
 
         self._states = []
@@ -694,7 +749,8 @@ class CycleScheduler:
         self._cycle_start_time = 0.0
         # Reset only after all state is cleared so the guard stays active until fully done.
         self._is_cancelling = False
-        _LOGGER.debug("%s - Cycle cancelled", self._thermostat)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - Cycle cancelled", self._thermostat)
 
     def _calculate_realized_e_eff(self, elapsed_sec: float) -> float:
         """Calculate the actual effective power applied over the given elapsed time."""
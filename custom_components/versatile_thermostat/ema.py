@@ -7,6 +7,8 @@ from vtherm_api.log_collector import get_vtherm_logger
 import math
 from datetime import datetime, tzinfo
 
+from .log_guard import is_debug_enabled
+
 _LOGGER = get_vtherm_logger(__name__)
 
 MIN_TIME_DECAY_SEC = 0
@@ -55,22 +57,24 @@ class ExponentialMovingAverage:
             return measurement
 
         if self._current_ema is None:
-            _LOGGER.debug(
-                "%s - First init of the EMA",
-                self,
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - First init of the EMA",
+                    self,
+                )
             self._current_ema = measurement
             self._last_timestamp = timestamp
             return self._current_ema
 
         time_decay = (timestamp - self._last_timestamp).total_seconds()
         if time_decay < MIN_TIME_DECAY_SEC:
-            _LOGGER.debug(
-                "%s - time_decay %s is too small (< %s). Forget the measurement",
-                self,
-                time_decay,
-                MIN_TIME_DECAY_SEC,
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - time_decay %s is too small (< %s). Forget the measurement",
+                    self,
+                    time_decay,
+                    MIN_TIME_DECAY_SEC,
+                )
             return self._current_ema
 
         alpha = 1 - math.exp(math.log(0.5) * time_decay / self._halflife)
@@ -80,14 +84,15 @@ class ExponentialMovingAverage:
 
         self._last_timestamp = timestamp
         self._current_ema = new_ema
-        _LOGGER.debug(
-            "%s - timestamp=%s alpha=%.2f measurement=%.2f current_ema=%.2f new_ema=%.2f",
-            self,
-            timestamp,
-            alpha,
-            measurement,
-            self._current_ema,
-            new_ema,
-        )
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug(
+                "%s - timestamp=%s alpha=%.2f measurement=%.2f current_ema=%.2f new_ema=%.2f",
+                self,
+                timestamp,
+                alpha,
+                measurement,
+                self._current_ema,
+                new_ema,
+            )
 
         return round(self._current_ema, self._precision)
@@ -166,7 +166,7 @@ class FeatureAutoStartStopManager(BaseFeatureManager):
         Returns True if the state has changed, False otherwise"""
         old_auto_start_stop: bool = self.is_auto_stop_detected
         if old_auto_start_stop != await self.refresh_state():
-            write_event_log(_LOGGER, self._vtherm, f"Auto start/stop state changed from {old_auto_start_stop} to {self.is_auto_stop_detected}")
+            write_event_log(_LOGGER, self._vtherm, "Auto start/stop state changed from %s to %s", old_auto_start_stop, self.is_auto_stop_detected)
             self._vtherm.requested_state.force_changed()
             await self._vtherm.update_states(force=True)
             return True
@@ -212,7 +212,7 @@ class FeatureAutoStartStopManager(BaseFeatureManager):
         if self._stop_mode == stop_mode:
             return
 
-        write_event_log(_LOGGER, self._vtherm, f"Auto start/stop stop mode changed from {self._stop_mode} to {stop_mode}")
+        write_event_log(_LOGGER, self._vtherm, "Auto start/stop stop mode changed from %s to %s", self._stop_mode, stop_mode)
         self._stop_mode = stop_mode
 
         # If a stop is currently active, re-evaluate the state so the hvac_mode
@@ -15,6 +15,7 @@ from homeassistant.helpers.event import (
 )
 
 from .base_manager import BaseFeatureManager
+from .command_queue import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
 from .commons import check_and_extract_service_configuration, write_event_log
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
 from vtherm_api.log_collector import get_vtherm_logger
@@ -67,6 +68,15 @@ class FeatureCentralBoilerManager(BaseFeatureManager):
         self._is_configured = bool(self._service_activate or self._service_deactivate)
         self._keep_alive_boiler_state_enabled = self._keep_alive_boiler_delay_sec > 0 and self._is_configured
 
+    @overrides
+    async def apply_config(self, entry_infos: dict):
+        """Apply new boiler services and delays. The boiler state and the last sent service are kept"""
+        last_activated_service = self._last_activated_service
+        self.post_init(entry_infos)
+        if self._keep_alive_boiler_state_enabled:
+            self._last_activated_service = last_activated_service
+        await self.start_listening(force=True)
+
     @overrides
     async def start_listening(self, force: bool = False):
         """Initialize the listening of state change of VTherms"""
@@ -215,7 +225,7 @@ class FeatureCentralBoilerManager(BaseFeatureManager):
                         self._call_later_handle = None
 
                     # call deactivation service
-                    await self.call_service(self._service_deactivate)
+                    await self.call_service(self._service_deactivate, priority=PRIORITY_HIGH)
                     _LOGGER.info("%s - central boiler have been turned off", self)
                     self._is_on = active
                     if self._keep_alive_boiler_state_enabled:
@@ -244,7 +254,7 @@ class FeatureCentralBoilerManager(BaseFeatureManager):
         # Send keep-alive command for the last activated service
         if self._last_activated_service:
             try:
-                await self.call_service(self._last_activated_service)
+                await self.call_service(self._last_activated_service, priority=PRIORITY_LOW)
                 entity_id = self._last_activated_service.get("entity_id", "unknown")
                 _LOGGER.debug(
                     "%s - Keep-alive boiler command sent (entity %s)",
@@ -258,8 +268,8 @@ class FeatureCentralBoilerManager(BaseFeatureManager):
                     err,
                 )
 
-    async def call_service(self, service_config: dict):
-        """Make a call to a service if correctly configured"""
+    async def call_service(self, service_config: dict, priority: int = PRIORITY_NORMAL):
+        """Make a call to a service if correctly configured. The call is rate limited by the CommandQueue of the VTherm API"""
         if not service_config:
             return
 
@@ -269,13 +279,14 @@ class FeatureCentralBoilerManager(BaseFeatureManager):
             f"{service_config['service_domain']}.{service_config['service_name']}",
             service_config.get("data", {}),
         )
-        await self._hass.services.async_call(
+        await self._vtherm_api.service_call_dispatcher.async_call(
             service_config["service_domain"],
             service_config["service_name"],
             service_data=service_config["data"],
             target={
                 "entity_id": service_config["entity_id"],
             },
+            priority=priority,
         )
 
     async def reload_central_boiler_binary_listener(self):
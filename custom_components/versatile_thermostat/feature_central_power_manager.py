@@ -1,10 +1,11 @@
 """ Implements a central Power Feature Manager for Versatile Thermostat """
 
+import asyncio
+import bisect
 import logging
 from vtherm_api.log_collector import get_vtherm_logger
 
 from typing import Any
-from functools import cmp_to_key
 
 from datetime import timedelta
 
@@ -24,6 +25,7 @@ from homeassistant.components.climate import (
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
 from .commons import write_event_log
+from .log_guard import is_debug_enabled
 from .commons_type import ConfigData
 from .base_manager import BaseFeatureManager
 
@@ -51,6 +53,15 @@ class FeatureCentralPowerManager(BaseFeatureManager):
         self._power_temp: float | None = None
         self._cancel_calculate_shedding_call = None
         self._started_vtherm_total_power_by_id: dict[str, float] = {}
+        # Persistent index of the power managed VTherms which are on, sorted by dtemp.
+        # Each entry is (dtemp, seq) where seq is a stable registration order used to
+        # keep the sort stable. The index is built lazily and then updated incrementally
+        # each time a VTherm notifies a change of target, temperature or on/off state.
+        self._vtherm_index: list[tuple[float, int]] = []
+        self._vtherm_index_key_by_id: dict[Any, tuple[float, int]] = {}
+        self._vtherm_seq_by_id: dict[Any, int] = {}
+        self._vtherm_by_seq: dict[int, Any] = {}
+        self._is_vtherm_index_valid: bool = False
         # Not used now
         self._last_shedding_date = None
         self._state = False
@@ -69,6 +80,7 @@ class FeatureCentralPowerManager(BaseFeatureManager):
         self._is_configured = False
         self._current_power = None
         self._current_max_power = None
+        self.invalidate_vtherm_index()
         if (
             entry_infos.get(CONF_USE_POWER_FEATURE, False)
             and self._max_power_sensor_entity_id
@@ -80,6 +92,25 @@ class FeatureCentralPowerManager(BaseFeatureManager):
         else:
             _LOGGER.info("%s - Power management is not fully configured and will be deactivated", self)
 
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply a new central power configuration. If the sensors are the same, the measured
+        powers and the power reservations of the VTherms are kept"""
+        if (
+            entry_infos.get(CONF_POWER_SENSOR) != self._power_sensor_entity_id
+            or entry_infos.get(CONF_MAX_POWER_SENSOR) != self._max_power_sensor_entity_id
+            or not self._is_configured
+        ):
+            self.post_init(entry_infos)
+            await self.start_listening()
+            await self.refresh_state()
+            return
+
+        self._power_temp = entry_infos.get(CONF_PRESET_POWER)
+        if not self._power_temp:
+            _LOGGER.info("%s - Power management is not fully configured and will be deactivated", self)
+            self._is_configured = False
+            self.stop_listening()
+
     async def start_listening(self):
         """Start listening the power sensor"""
         if not self._is_configured:
@@ -106,7 +137,7 @@ class FeatureCentralPowerManager(BaseFeatureManager):
     @callback
     async def _power_sensor_changed(self, event: Event[EventStateChangedData]):
         """Handle power changes."""
-        write_event_log(_LOGGER, self, f"Receive power sensor state {event.data.get('new_state').state if event.data.get('new_state') else None}")
+        write_event_log(_LOGGER, self, "Receive power sensor state %s", event.data.get('new_state').state if event.data.get('new_state') else None)
 
         self._started_vtherm_total_power_by_id = {}
         await self.refresh_state()
@@ -114,7 +145,7 @@ class FeatureCentralPowerManager(BaseFeatureManager):
     @callback
     async def _max_power_sensor_changed(self, event: Event[EventStateChangedData]):
         """Handle power max changes."""
-        write_event_log(_LOGGER, self, f"Receive max power sensor state {event.data.get('new_state').state if event.data.get('new_state') else None}")
+        write_event_log(_LOGGER, self, "Receive max power sensor state %s", event.data.get('new_state').state if event.data.get('new_state') else None)
         await self.refresh_state()
 
     @overrides
@@ -170,19 +201,21 @@ class FeatureCentralPowerManager(BaseFeatureManager):
 
         changed_vtherm = []
 
-        _LOGGER.debug("%s - -------- Start of calculate_shedding", self)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - -------- Start of calculate_shedding", self)
         # Find all VTherms
         available_power = self.current_max_power - self.current_power
         vtherms_sorted = self.find_all_vtherm_with_power_management_sorted_by_dtemp()
 
         # shedding only
         if available_power < 0:
-            _LOGGER.debug(
-                "%s - The available power is is < 0 (%s). Set overpowering only for list: %s",
-                self,
-                available_power,
-                vtherms_sorted,
-            )
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug(
+                    "%s - The available power is is < 0 (%s). Set overpowering only for list: %s",
+                    self,
+                    available_power,
+                    vtherms_sorted,
+                )
             # we will set overpowering for the nearest target temp first
             total_power_gain = 0
 
@@ -193,15 +226,20 @@ class FeatureCentralPowerManager(BaseFeatureManager):
                     _LOGGER.info("vtherm %s should be in overpowering state (device_power=%.2f)", vtherm.name, device_power)
                     await vtherm.power_manager.set_overpowering(True, device_power)
                     changed_vtherm.append(vtherm)
+                    # the dtemp of an overpowered VTherm is calculated with its requested target
+                    self.update_vtherm(vtherm)
 
-                _LOGGER.debug("%s - after vtherm %s total_power_gain=%s, available_power=%s", self, vtherm.name, total_power_gain, available_power)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - after vtherm %s total_power_gain=%s, available_power=%s", self, vtherm.name, total_power_gain, available_power)
                 if total_power_gain >= -available_power:
-                    _LOGGER.debug("%s - We have found enough vtherm to set to overpowering", self)
+                    if is_debug_enabled(_LOGGER):
+                        _LOGGER.debug("%s - We have found enough vtherm to set to overpowering", self)
                     break
         # unshedding only
         else:
             vtherms_sorted.reverse()
-            _LOGGER.debug("%s - The available power is is > 0 (%s). Do a complete shedding/un-shedding calculation for list: %s", self, available_power, vtherms_sorted)
+            if is_debug_enabled(_LOGGER):
+                _LOGGER.debug("%s - The available power is is > 0 (%s). Do a complete shedding/un-shedding calculation for list: %s", self, available_power, vtherms_sorted)
 
             total_power_added = 0
 
@@ -219,9 +257,10 @@ class FeatureCentralPowerManager(BaseFeatureManager):
                         device_power * vtherm.on_percent,
                     )
 
-                _LOGGER.debug(
-                    "%s - vtherm %s power_consumption_max is %s (device_power=%s, overclimate=%s)", self, vtherm.name, power_consumption_max, device_power, vtherm.is_over_climate
-                )
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug(
+                        "%s - vtherm %s power_consumption_max is %s (device_power=%s, overclimate=%s)", self, vtherm.name, power_consumption_max, device_power, vtherm.is_over_climate
+                    )
 
                 # or not ... is for initializing the overpowering state if not already done
                 if total_power_added + power_consumption_max < available_power or not vtherm.power_manager.is_overpowering_detected:
@@ -232,22 +271,27 @@ class FeatureCentralPowerManager(BaseFeatureManager):
 
                     await vtherm.power_manager.set_overpowering(False)
                     changed_vtherm.append(vtherm)
+                    self.update_vtherm(vtherm)
 
                 if total_power_added >= available_power:
-                    _LOGGER.debug("%s - We have found enough vtherm to set to non-overpowering", self)
+                    if is_debug_enabled(_LOGGER):
+                        _LOGGER.debug("%s - We have found enough vtherm to set to non-overpowering", self)
                     break
 
-                _LOGGER.debug("%s - after vtherm %s total_power_added=%s, available_power=%s", self, vtherm.name, total_power_added, available_power)
+                if is_debug_enabled(_LOGGER):
+                    _LOGGER.debug("%s - after vtherm %s total_power_added=%s, available_power=%s", self, vtherm.name, total_power_added, available_power)
 
-        # We have set the evenual new state, fr
-        for vtherm in changed_vtherm:
-            vtherm.requested_state.force_changed()
-            await vtherm.update_states(force=True)
+        # We have set the eventual new state. Update all the changed VTherms in one batch
+        if changed_vtherm:
+            for vtherm in changed_vtherm:
+                vtherm.requested_state.force_changed()
+            await asyncio.gather(*(vtherm.update_states(force=True) for vtherm in changed_vtherm))
         self._last_shedding_date = self._vtherm_api.now
 
         # calculate a state as true if one of the VTherm is in shedding
         self._state = any(vtherm.power_manager.is_overpowering_detected for vtherm in vtherms_sorted)
-        _LOGGER.debug("%s - -------- End of calculate_shedding", self)
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug("%s - -------- End of calculate_shedding", self)
 
     def get_climate_components_entities(self) -> list:
         """Get all VTherms entitites"""
@@ -269,31 +313,84 @@ class FeatureCentralPowerManager(BaseFeatureManager):
     def find_all_vtherm_with_power_management_sorted_by_dtemp(
         self,
     ) -> list:
-        """Returns all the VTherms with power management activated"""
-        entities = self.get_climate_components_entities()
-        vtherms = [
-            vtherm
-            for vtherm in entities
-            if vtherm.power_manager.is_configured and vtherm.is_on
-        ]
-
-        # sort the result with the min temp difference first. A and B should be BaseThermostat class
-        def cmp_temps(a, b) -> int:
-            diff_a = float("inf")
-            diff_b = float("inf")
-            a_target = a.target_temperature if not a.power_manager.is_overpowering_detected else a.requested_state.target_temperature
-            b_target = b.target_temperature if not b.power_manager.is_overpowering_detected else b.requested_state.target_temperature
-            if a.current_temperature is not None and a_target is not None:
-                diff_a = a_target - a.current_temperature
-            if b.current_temperature is not None and b_target is not None:
-                diff_b = b_target - b.current_temperature
-
-            if diff_a == diff_b:
-                return 0
-            return 1 if diff_a > diff_b else -1
-
-        vtherms.sort(key=cmp_to_key(cmp_temps))
-        return vtherms
+        """Returns all the VTherms with power management activated and on,
+        sorted with the min temp difference first"""
+        if not self._is_vtherm_index_valid:
+            self._build_vtherm_index()
+
+        return [self._vtherm_by_seq[seq] for _, seq in self._vtherm_index]
+
+    def invalidate_vtherm_index(self):
+        """Invalidate the VTherm index. It will be rebuilt from the climate entities
+        at the next use. Should be called when VTherms are added or removed"""
+        self._is_vtherm_index_valid = False
+
+    def update_vtherm(self, vtherm):
+        """Re-position one VTherm in the sorted index. Should be called when the target
+        temperature, the current temperature or the on/off state of the VTherm has changed.
+        This is a O(log N) bisect (plus a list move) instead of a full rescan and sort"""
+        if not self._is_vtherm_index_valid:
+            # the index will be fully calculated at next use
+            return
+
+        vtherm_id = self._vtherm_id(vtherm)
+        old_key = self._vtherm_index_key_by_id.pop(vtherm_id, None)
+        if old_key is not None:
+            idx = bisect.bisect_left(self._vtherm_index, old_key)
+            if idx < len(self._vtherm_index) and self._vtherm_index[idx] == old_key:
+                del self._vtherm_index[idx]
+
+        if not self._is_vtherm_indexable(vtherm):
+            return
+
+        seq = self._vtherm_seq_by_id.get(vtherm_id)
+        if seq is None:
+            seq = len(self._vtherm_seq_by_id)
+            self._vtherm_seq_by_id[vtherm_id] = seq
+        self._vtherm_by_seq[seq] = vtherm
+
+        new_key = (self._calculate_dtemp(vtherm), seq)
+        bisect.insort(self._vtherm_index, new_key)
+        self._vtherm_index_key_by_id[vtherm_id] = new_key
+
+    def _build_vtherm_index(self):
+        """Build the sorted index from all the climate entities"""
+        self._vtherm_index = []
+        self._vtherm_index_key_by_id = {}
+        self._vtherm_seq_by_id = {}
+        self._vtherm_by_seq = {}
+        for seq, vtherm in enumerate(self.get_climate_components_entities()):
+            vtherm_id = self._vtherm_id(vtherm)
+            self._vtherm_seq_by_id[vtherm_id] = seq
+            self._vtherm_by_seq[seq] = vtherm
+            if self._is_vtherm_indexable(vtherm):
+                key = (self._calculate_dtemp(vtherm), seq)
+                self._vtherm_index.append(key)
+                self._vtherm_index_key_by_id[vtherm_id] = key
+
+        self._vtherm_index.sort()
+        self._is_vtherm_index_valid = True
+        _LOGGER.debug("%s - VTherm index built with %d power managed VTherms", self, len(self._vtherm_index))
+
+    @staticmethod
+    def _vtherm_id(vtherm):
+        """The key of a VTherm in the index"""
+        return vtherm.unique_id
+
+    @staticmethod
+    def _is_vtherm_indexable(vtherm) -> bool:
+        """True if the VTherm should be in the index (power managed and on)"""
+        return bool(vtherm.power_manager.is_configured and vtherm.is_on)
+
+    @staticmethod
+    def _calculate_dtemp(vtherm) -> float:
+        """Calculate the temperature difference used to sort the VTherms.
+        If the VTherm is in overpowering the requested target temperature is used.
+        Unknown temperatures are sorted last"""
+        target = vtherm.target_temperature if not vtherm.power_manager.is_overpowering_detected else vtherm.requested_state.target_temperature
+        if vtherm.current_temperature is None or target is None:
+            return float("inf")
+        return target - vtherm.current_temperature
 
     def get_started_vtherm_power(self, reservation_key: str) -> float:
         """Return the reserved started power for a given underlying key."""
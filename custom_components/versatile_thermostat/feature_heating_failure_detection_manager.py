@@ -117,6 +117,15 @@ class FeatureHeatingFailureDetectionManager(BaseFeatureManager):
         self._heating_failure_state = STATE_UNKNOWN
         self._cooling_failure_state = STATE_UNKNOWN
 
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new thresholds and delay. The failure states and the tracking in progress are kept"""
+        heating_failure_state, cooling_failure_state = self._heating_failure_state, self._cooling_failure_state
+        was_configured = self._is_configured
+        self.post_init(entry_infos)
+        if self._is_configured and was_configured:
+            self._heating_failure_state, self._cooling_failure_state = heating_failure_state, cooling_failure_state
+
     @overrides
     async def start_listening(self):
         """Start listening the underlying entity"""
@@ -64,6 +64,12 @@ class FeatureMotionManager(BaseFeatureManager):
         """Reinit of the manager"""
         self.dearm_motion_timer()
 
+        self._read_config(entry_infos)
+        if self._is_configured:
+            self._motion_state = STATE_UNKNOWN
+
+    def _read_config(self, entry_infos: ConfigData):
+        """Read the parameters of the manager"""
         self._motion_sensor_entity_id = entry_infos.get(CONF_MOTION_SENSOR, None)
         self._motion_delay_sec = entry_infos.get(CONF_MOTION_DELAY, 0)
         self._motion_off_delay_sec = entry_infos.get(CONF_MOTION_OFF_DELAY, None)
@@ -72,13 +78,21 @@ class FeatureMotionManager(BaseFeatureManager):
 
         self._motion_preset = entry_infos.get(CONF_MOTION_PRESET)
         self._no_motion_preset = entry_infos.get(CONF_NO_MOTION_PRESET)
-        if (
+        self._is_configured = (
             self._motion_sensor_entity_id is not None
             and self._motion_preset is not None
             and self._no_motion_preset is not None
-        ):
-            self._is_configured = True
-            self._motion_state = STATE_UNKNOWN
+        )
+
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new delays and presets. The motion state and the running timer are kept"""
+        was_configured = self._is_configured
+        self._read_config(entry_infos)
+        if self._is_configured != was_configured:
+            self._motion_state = STATE_UNKNOWN if self._is_configured else STATE_UNAVAILABLE
+            self.stop_listening()
+            await self.start_listening()
 
     @overrides
     async def start_listening(self):
@@ -245,7 +259,7 @@ class FeatureMotionManager(BaseFeatureManager):
             self._motion_state = STATE_ON if new_state == STATE_ON else STATE_OFF
 
         if old_motion_state != self._motion_state:
-            write_event_log(_LOGGER, self._vtherm, f"Motion state changed from {old_motion_state} to {self._motion_state}")
+            write_event_log(_LOGGER, self._vtherm, "Motion state changed from %s to %s", old_motion_state, self._motion_state)
             self._vtherm.requested_state.force_changed()
             await self._vtherm.update_states(True)
             return True
@@ -56,21 +56,31 @@ class FeaturePowerManager(BaseFeatureManager):
         self._use_power_feature = entry_infos.get(CONF_USE_POWER_FEATURE, False)
         self._is_configured = False
 
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new power parameters. The overpowering state is kept"""
+        self.post_init(entry_infos)
+        if self._check_configuration() and self._overpowering_state is None:
+            self._overpowering_state = STATE_UNKNOWN
+
     @overrides
     async def start_listening(self):
         """Start listening the underlying entity. There is nothing to listen"""
-        central_power_configuration = (
-            VersatileThermostatAPI.get_vtherm_api().central_power_manager.is_configured
-        )
-
-        if self._use_power_feature and self._device_power and central_power_configuration:
-            self._is_configured = True
+        if self._check_configuration():
             # Try to restore _overpowering_state from previous state
             old_state = await self._vtherm.async_get_last_state()
             self._overpowering_state = (
                 STATE_ON if old_state is not None and hasattr(old_state, "attributes") and old_state.attributes.get("overpowering_state") == STATE_ON else STATE_UNKNOWN
             )
-        else:
+
+    def _check_configuration(self) -> bool:
+        """Set and return the configured flag. Warn if the power feature is not fully configured"""
+        central_power_configuration = (
+            VersatileThermostatAPI.get_vtherm_api().central_power_manager.is_configured
+        )
+
+        self._is_configured = bool(self._use_power_feature and self._device_power and central_power_configuration)
+        if not self._is_configured:
             if self._use_power_feature:
                 if not central_power_configuration:
                     _LOGGER.warning(
@@ -82,6 +92,7 @@ class FeaturePowerManager(BaseFeatureManager):
                         "%s - Power management is not fully configured. You have to configure the power feature of the VTherm",
                         self,
                     )
+        return self._is_configured
 
     def add_custom_attributes(self, extra_state_attributes: dict[str, Any]):
         """Add some custom attributes"""
@@ -303,6 +314,15 @@ class FeaturePowerManager(BaseFeatureManager):
             return
         # self._vtherm.update_custom_attributes()
 
+    def refresh_central_power_index(self):
+        """Notify the central power manager that the dtemp or the on/off state of the
+        VTherm may have changed so that its position in the shedding index is updated"""
+        vtherm_api = VersatileThermostatAPI.get_vtherm_api()
+        if not self._is_configured or not vtherm_api.central_power_manager.is_configured:
+            return
+
+        vtherm_api.central_power_manager.update_vtherm(self._vtherm)
+
     @overrides
     @property
     def is_configured(self) -> bool:
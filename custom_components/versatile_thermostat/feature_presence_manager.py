@@ -53,13 +53,28 @@ class FeaturePresenceManager(BaseFeatureManager):
     @overrides
     def post_init(self, entry_infos: ConfigData):
         """Reinit of the manager"""
+        self._read_config(entry_infos)
+        if self._is_configured:
+            self._presence_state = STATE_UNKNOWN
+
+    def _read_config(self, entry_infos: ConfigData):
+        """Read the parameters of the manager"""
         self._presence_sensor_entity_id = entry_infos.get(CONF_PRESENCE_SENSOR)
-        if (
+        self._is_configured = bool(
             entry_infos.get(CONF_USE_PRESENCE_FEATURE, False)
             and self._presence_sensor_entity_id is not None
-        ):
-            self._is_configured = True
-            self._presence_state = STATE_UNKNOWN
+        )
+
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply a new presence sensor. The presence state is kept if the sensor is the same"""
+        old_sensor_entity_id, was_configured = self._presence_sensor_entity_id, self._is_configured
+        self._read_config(entry_infos)
+        if self._is_configured != was_configured or self._presence_sensor_entity_id != old_sensor_entity_id:
+            self._presence_state = STATE_UNKNOWN if self._is_configured else STATE_UNAVAILABLE
+            self.stop_listening()
+            await self.start_listening()
+            await self.refresh_state()
 
     @overrides
     async def start_listening(self):
@@ -98,7 +113,7 @@ class FeaturePresenceManager(BaseFeatureManager):
     async def _presence_sensor_changed(self, event: Event[EventStateChangedData]):
         """Handle presence changes."""
         new_state = event.data.get("new_state")
-        write_event_log(_LOGGER, self._vtherm, f"Presence sensor changed to state {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self._vtherm, "Presence sensor changed to state %s", new_state.state if new_state else None)
 
         if new_state is None:
             return
@@ -59,6 +59,13 @@ class FeatureRepairIncorrectStateManager(BaseFeatureManager):
         self._ready_start_time = None
         self._consecutive_repair_count = 0
 
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Enable or disable the repair. The repair counters are kept"""
+        self._is_configured = entry_infos.get(
+            CONF_REPAIR_INCORRECT_STATE, DEFAULT_REPAIR_INCORRECT_STATE
+        )
+
     @overrides
     async def start_listening(self):
         """Start listening - no external entity to monitor for this feature"""
@@ -47,10 +47,29 @@ class FeatureSafetyManager(BaseFeatureManager):
         self._safety_default_on_percent = None
         self._safety_state = STATE_UNAVAILABLE
         self._is_outdoor_checked = True
+        # The timestamp at which the temperature measures expire and the measures it is computed from
+        self._deadline: float | None = None
+        self._deadline_measures: tuple[Any, Any] | None = None
 
     @overrides
     def post_init(self, entry_infos: ConfigData):
         """Reinit of the manager"""
+        self._read_config(entry_infos)
+        if self._is_configured:
+            self._safety_state = STATE_UNKNOWN
+
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new safety parameters. The safety state is kept and the deadline
+        of the measures is computed with the new delay"""
+        was_configured = self._is_configured
+        self._read_config(entry_infos)
+        if self._is_configured and not was_configured:
+            self._safety_state = STATE_UNKNOWN
+        self.refresh_deadline()
+
+    def _read_config(self, entry_infos: ConfigData):
+        """Read the parameters of the manager"""
         self._safety_delay_min = entry_infos.get(CONF_SAFETY_DELAY_MIN)
         self._safety_min_on_percent = (
             entry_infos.get(CONF_SAFETY_MIN_ON_PERCENT)
@@ -68,7 +87,6 @@ class FeatureSafetyManager(BaseFeatureManager):
             and self._safety_default_on_percent is not None
             and self._safety_default_on_percent is not None
         ):
-            self._safety_state = STATE_UNKNOWN
             self._is_configured = True
 
         api: VersatileThermostatAPI = VersatileThermostatAPI.get_vtherm_api(self.hass)
@@ -79,10 +97,49 @@ class FeatureSafetyManager(BaseFeatureManager):
     @overrides
     async def start_listening(self):
         """Start listening the underlying entity"""
+        self.refresh_deadline()
 
     @overrides
     def stop_listening(self):
         """Stop listening and remove the eventual timer still running"""
+        self._deadline = self._deadline_measures = None
+        VersatileThermostatAPI.get_vtherm_api(self.hass).safety_watchdog.remove(self)
+
+    def refresh_deadline(self):
+        """Compute the date at which the temperature measures expire and register it in the
+        SafetyWatchdog. Should be called when a temperature measure date changes"""
+        last_temperature_measure = self._vtherm.last_temperature_measure
+        last_ext_temperature_measure = self._vtherm.last_ext_temperature_measure
+        if not self._is_configured:
+            self.stop_listening()
+            return
+        if not isinstance(last_temperature_measure, datetime):
+            return
+
+        current_tz = dt_util.get_time_zone(self._hass.config.time_zone)
+        oldest = last_temperature_measure.replace(tzinfo=current_tz).timestamp()
+        if self._is_outdoor_checked and isinstance(last_ext_temperature_measure, datetime):
+            oldest = min(oldest, last_ext_temperature_measure.replace(tzinfo=current_tz).timestamp())
+
+        self._deadline = oldest + self._safety_delay_min * 60.0
+        self._deadline_measures = (last_temperature_measure, last_ext_temperature_measure)
+        VersatileThermostatAPI.get_vtherm_api(self.hass).safety_watchdog.set_deadline(self, self._deadline)
+
+    async def async_on_deadline(self):
+        """Called by the SafetyWatchdog when the temperature measures expire"""
+        self._deadline = self._deadline_measures = None
+        if self._vtherm.is_ready:
+            await self.refresh_and_update_if_changed()
+
+    def _is_before_deadline(self, now: datetime) -> bool:
+        """True if the temperature measures are known not to be expired at now"""
+        return (
+            self._deadline is not None
+            and self._deadline_measures is not None
+            and self._deadline_measures[0] is self._vtherm.last_temperature_measure
+            and self._deadline_measures[1] is self._vtherm.last_ext_temperature_measure
+            and now.timestamp() <= self._deadline
+        )
 
     @overrides
     async def refresh_state(self) -> bool:
@@ -99,10 +156,16 @@ class FeatureSafetyManager(BaseFeatureManager):
             return False
 
         now = self._vtherm.now
-        current_tz = dt_util.get_time_zone(self._hass.config.time_zone)
-
         is_safety_detected = self.is_safety_detected
 
+        # The measures are not expired: the safety cannot start
+        if not is_safety_detected and self._is_before_deadline(now):
+            if self._safety_state == STATE_UNKNOWN:
+                self._safety_state = STATE_OFF
+            return False
+
+        current_tz = dt_util.get_time_zone(self._hass.config.time_zone)
+
         delta_temp = (
             now - self._vtherm.last_temperature_measure.replace(tzinfo=current_tz)
         ).total_seconds() / 60.0
@@ -277,6 +340,7 @@ class FeatureSafetyManager(BaseFeatureManager):
     def set_safety_delay_min(self, safety_delay_min):
         """Set the delay min"""
         self._safety_delay_min = safety_delay_min
+        self.refresh_deadline()
 
     def set_safety_min_on_percent(self, safety_min_on_percent):
         """Set the min on percent"""
@@ -33,7 +33,13 @@ from .commons_type import ConfigData
 from .vtherm_hvac_mode import VThermHvacMode
 
 from .base_manager import BaseFeatureManager
-from .open_window_algorithm import WindowOpenDetectionAlgorithm
+from .open_window_algorithm import (
+    WindowOpenDetectionAlgorithm,
+    RegressionSlopeAlgorithm,
+    DEFAULT_REGRESSION_WINDOW_MIN,
+    DEFAULT_REGRESSION_MAX_SAMPLES,
+)
+from .vtherm_central_api import VersatileThermostatAPI
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -74,6 +80,32 @@ class FeatureWindowManager(BaseFeatureManager):
         self._window_auto_state = STATE_UNAVAILABLE
         self._window_state = STATE_UNAVAILABLE
 
+        self._read_config(entry_infos)
+
+        # The slope estimator can be changed in configuration.yaml (window_auto_slope)
+        slope_params = VersatileThermostatAPI.get_vtherm_api(self.hass).window_auto_slope_params or {}
+        if slope_params.get("algorithm") == WINDOW_AUTO_SLOPE_REGRESSION:
+            self._window_auto_algo = RegressionSlopeAlgorithm(
+                alert_threshold=self._window_auto_open_threshold,
+                end_alert_threshold=self._window_auto_close_threshold,
+                vtherm=self._vtherm,
+                window_min=slope_params.get("window_min", DEFAULT_REGRESSION_WINDOW_MIN),
+                max_samples=slope_params.get("max_samples", DEFAULT_REGRESSION_MAX_SAMPLES),
+            )
+        else:
+            self._window_auto_algo = WindowOpenDetectionAlgorithm(
+                alert_threshold=self._window_auto_open_threshold,
+                end_alert_threshold=self._window_auto_close_threshold,
+                vtherm=self._vtherm,
+            )
+
+        if self._is_window_auto_configured:
+            self._window_auto_state = STATE_UNKNOWN
+        if self._is_configured:
+            self._window_state = STATE_UNKNOWN
+
+    def _read_config(self, entry_infos: ConfigData):
+        """Read the parameters of the manager"""
         self._window_sensor_entity_id = entry_infos.get(CONF_WINDOW_SENSOR)
         self._window_delay_sec = entry_infos.get(CONF_WINDOW_DELAY)
         # default is the WINDOW_ON delay if not configured
@@ -93,7 +125,7 @@ class FeatureWindowManager(BaseFeatureManager):
 
         use_window_feature = entry_infos.get(CONF_USE_WINDOW_FEATURE, False)
 
-        if (  # pylint: disable=too-many-boolean-expressions
+        self._is_window_auto_configured = bool(  # pylint: disable=too-many-boolean-expressions
             use_window_feature
             and self._window_sensor_entity_id is None
             and self._window_auto_open_threshold is not None
@@ -102,24 +134,29 @@ class FeatureWindowManager(BaseFeatureManager):
             and self._window_auto_max_duration is not None
             and self._window_auto_max_duration > 0
             and self._window_action is not None
-        ):
-            self._is_window_auto_configured = True
-            self._window_auto_state = STATE_UNKNOWN
-
-        self._window_auto_algo = WindowOpenDetectionAlgorithm(
-            alert_threshold=self._window_auto_open_threshold,
-            end_alert_threshold=self._window_auto_close_threshold,
-            vtherm=self._vtherm,
         )
 
-        if self._is_window_auto_configured or (
+        self._is_configured = self._is_window_auto_configured or bool(
             use_window_feature
             and self._window_sensor_entity_id is not None
             and self._window_delay_sec is not None
             and self._window_action is not None
-        ):
-            self._is_configured = True
-            self._window_state = STATE_UNKNOWN
+        )
+
+    @overrides
+    async def apply_config(self, entry_infos: ConfigData):
+        """Apply new parameters. The window states, the bypass, the running timer
+        and the measures of the slope algorithm are kept"""
+        was_configured, was_auto_configured = self._is_configured, self._is_window_auto_configured
+        self._read_config(entry_infos)
+        self._window_auto_algo.set_thresholds(self._window_auto_open_threshold, self._window_auto_close_threshold)
+
+        if self._is_window_auto_configured != was_auto_configured:
+            self._window_auto_state = STATE_UNKNOWN if self._is_window_auto_configured else STATE_UNAVAILABLE
+        if self._is_configured != was_configured:
+            self._window_state = STATE_UNKNOWN if self._is_configured else STATE_UNAVAILABLE
+            self.stop_listening()
+            self._listen_window_sensor()
 
     @overrides
     async def start_listening(self):
@@ -130,16 +167,19 @@ class FeatureWindowManager(BaseFeatureManager):
         old_attributes = getattr(old_state, "attributes", None) or {}
         self._is_window_bypass = (old_attributes.get("window_manager") or {}).get("is_window_bypass") is True
 
-        if self._is_configured:
-            self.stop_listening()
-            if self._window_sensor_entity_id:
-                self.add_listener(
-                    async_track_state_change_event(
-                        self.hass,
-                        [self._window_sensor_entity_id],
-                        self._window_sensor_changed,
-                    )
+        self.stop_listening()
+        self._listen_window_sensor()
+
+    def _listen_window_sensor(self):
+        """Listen to the window sensor if configured"""
+        if self._is_configured and self._window_sensor_entity_id:
+            self.add_listener(
+                async_track_state_change_event(
+                    self.hass,
+                    [self._window_sensor_entity_id],
+                    self._window_sensor_changed,
                 )
+            )
 
     @overrides
     def stop_listening(self):
@@ -180,7 +220,7 @@ class FeatureWindowManager(BaseFeatureManager):
         """Handle window sensor changes."""
         new_state = event.data.get("new_state")
         old_state = event.data.get("old_state")
-        write_event_log(_LOGGER, self._vtherm, f"Window sensor changed to state {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self._vtherm, "Window sensor changed to state %s", new_state.state if new_state else None)
 
         # Check delay condition
         async def try_window_condition(_):
@@ -241,7 +281,7 @@ class FeatureWindowManager(BaseFeatureManager):
             write_event_log(_LOGGER, self._vtherm, "Window is detected as closed.")
         # Window is now opened
         else:
-            write_event_log(_LOGGER, self._vtherm, f"Window is detected as open ({self._window_action})")
+            write_event_log(_LOGGER, self._vtherm, "Window is detected as open (%s)", self._window_action)
 
         self._window_state = new_state
         if old_state != new_state:
@@ -296,9 +336,10 @@ class FeatureWindowManager(BaseFeatureManager):
             )
 
         _LOGGER.debug(
-            "%s - Window auto is on, check the alert. last slope is %.3f",
+            "%s - Window auto is on, check the alert. last slope is %.3f interval is %s",
             self,
             slope if slope is not None else 0.0,
+            self._window_auto_algo.slope_confidence_interval,
         )
 
         if self.is_window_bypass or not self._is_window_auto_configured:
@@ -374,6 +415,7 @@ class FeatureWindowManager(BaseFeatureManager):
                         "window_auto_open_threshold": self._window_auto_open_threshold,
                         "window_auto_close_threshold": self._window_auto_close_threshold,
                         "window_auto_max_duration": self._window_auto_max_duration,
+                        "window_auto_slope_interval": self.slope_confidence_interval,
                     }
                 }
             )
@@ -470,6 +512,13 @@ class FeatureWindowManager(BaseFeatureManager):
             return None
         return self._window_auto_algo.last_slope
 
+    @property
+    def slope_confidence_interval(self) -> tuple[float, float] | None:
+        """Return the confidence interval of the last slope (in °C/hour) if the slope estimator gives one"""
+        if not self._window_auto_algo:
+            return None
+        return self._window_auto_algo.slope_confidence_interval
+
     @property
     def is_detected(self) -> bool:
         """Return the overall state of the feature manager based on window state"""
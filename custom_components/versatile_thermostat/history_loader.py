@@ -0,0 +1,244 @@
+"""HistoryLoader: columnar access to the recorder history of numeric sensors.
+
+The Auto TPI calibrations (capacity and TPI coefficients) only need the
+(timestamp, value) pairs of a few sensors over weeks. Materializing the full State
+objects (with their attributes) of each 2-day chunk, one chunk after the other,
+costs minutes of executor time when many VTherms are calibrated.
+
+The loader splits the period into chunks aligned on chunk_duration, fetches them
+concurrently in the recorder executor with the compressed, attribute-less format of
+the recorder and reduces each of them to two float64 arrays per entity. The chunks
+which are over (older than CACHE_SETTLE_DELAY) never change anymore: they are cached
+on disk per entity (in CACHE_DIR, out of the .storage directory of the HA stores) and
+read back instead of being fetched again. A chunk is written to a temporary file which
+replaces the cached file when it is complete. A cached file which cannot be read is
+removed and its chunk is fetched again.
+"""
+
+import asyncio
+import math
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import numpy as np
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.const import COMPRESSED_STATE_LAST_CHANGED, COMPRESSED_STATE_LAST_UPDATED, COMPRESSED_STATE_STATE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+_LOGGER = get_vtherm_logger(__name__)
+
+HISTORY_CHUNK_DURATION = timedelta(days=2)
+MAX_CONCURRENT_CHUNKS = 4
+# The cache directory, relative to the Home Assistant configuration directory
+CACHE_DIR = os.path.join(".cache", "versatile_thermostat", "history")
+# A chunk is cached only when it ended at least this long ago (the recorder may still commit states)
+CACHE_SETTLE_DELAY = timedelta(hours=1)
+# The cached chunks older than this are removed
+CACHE_MAX_AGE = timedelta(days=120)
+
+Columns = tuple[np.ndarray, np.ndarray]
+
+
+def empty_columns() -> Columns:
+    """The columns of an entity without history"""
+    return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+
+
+def states_to_columns(states: list) -> Columns:
+    """Convert the history of an entity into (timestamps, values) columns.
+
+    The states can be compressed dicts (as returned with compressed_state_format) or State
+    objects. Timestamps are POSIX seconds. The states which are not numeric (unknown,
+    unavailable, ...) are kept with a NaN value so that they can be reported as invalid.
+    """
+    nb_states = len(states) if states else 0
+    timestamps = np.empty(nb_states, dtype=np.float64)
+    values = np.empty(nb_states, dtype=np.float64)
+
+    count = 0
+    for state in states or []:
+        try:
+            if isinstance(state, dict):
+                timestamp = state.get(COMPRESSED_STATE_LAST_CHANGED, state.get(COMPRESSED_STATE_LAST_UPDATED))
+                value = state.get(COMPRESSED_STATE_STATE)
+            else:
+                timestamp = state.last_changed.timestamp()
+                value = state.state
+            timestamps[count] = float(timestamp)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        try:
+            values[count] = float(value)
+        except (ValueError, TypeError):
+            values[count] = np.nan
+        count += 1
+
+    return timestamps[:count], values[:count]
+
+
+class HistoryLoader:
+    """Loads the history of numeric sensors as columns, with a disk cache of the past chunks"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        cache_dir: str | None = None,
+        chunk_duration: timedelta = HISTORY_CHUNK_DURATION,
+        max_concurrent: int = MAX_CONCURRENT_CHUNKS,
+    ):
+        self._hass = hass
+        self._cache_dir = cache_dir
+        self._chunk_sec = chunk_duration.total_seconds()
+        self._max_concurrent = max_concurrent
+        self._nb_chunks_fetched = 0
+        self._nb_chunks_from_cache = 0
+
+    @property
+    def cache_dir(self) -> str:
+        """The directory of the cached chunks"""
+        if self._cache_dir is None:
+            self._cache_dir = self._hass.config.path(CACHE_DIR)
+        return self._cache_dir
+
+    async def async_load(self, entity_ids: list[str], start_time: datetime, end_time: datetime) -> dict[str, Columns]:
+        """The (timestamps, values) columns of each entity between start_time and end_time.
+
+        The last state before start_time is kept (its value holds at start_time). A chunk which
+        cannot be fetched is skipped with a warning
+        """
+        start_ts = dt_util.as_utc(start_time).timestamp()
+        end_ts = dt_util.as_utc(end_time).timestamp()
+        now_ts = time.time()
+        if end_ts <= start_ts:
+            return {entity_id: empty_columns() for entity_id in entity_ids}
+
+        chunk_starts = np.arange(math.floor(start_ts / self._chunk_sec) * self._chunk_sec, end_ts, self._chunk_sec)
+        cache_dir = self.cache_dir
+        recorder = get_instance(self._hass)
+        semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        async def load_chunk(chunk_start: float) -> dict[str, Columns]:
+            chunk_end = min(chunk_start + self._chunk_sec, now_ts)
+            async with semaphore:
+                try:
+                    return await recorder.async_add_executor_job(self._load_chunk, cache_dir, entity_ids, chunk_start, chunk_end, now_ts)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    _LOGGER.warning("HistoryLoader - error fetching the history of %s from %s: %s", entity_ids, dt_util.utc_from_timestamp(chunk_start), err)
+                    return {}
+
+        chunks = await asyncio.gather(*(load_chunk(float(chunk_start)) for chunk_start in chunk_starts))
+
+        result = {}
+        for entity_id in entity_ids:
+            parts = [chunk[entity_id] for chunk in chunks if entity_id in chunk]
+            if not parts:
+                result[entity_id] = empty_columns()
+                continue
+            timestamps = np.concatenate([part[0] for part in parts])
+            values = np.concatenate([part[1] for part in parts])
+            first = max(int(np.searchsorted(timestamps, start_ts, side="right")) - 1, 0)
+            last = int(np.searchsorted(timestamps, end_ts, side="right"))
+            result[entity_id] = (timestamps[first:last], values[first:last])
+
+        _LOGGER.debug(
+            "HistoryLoader - %d chunk(s) of %s loaded (%d fetched, %d from cache so far)",
+            len(chunk_starts),
+            entity_ids,
+            self._nb_chunks_fetched,
+            self._nb_chunks_from_cache,
+        )
+        return result
+
+    def _load_chunk(self, cache_dir: str, entity_ids: list[str], chunk_start: float, chunk_end: float, now_ts: float) -> dict[str, Columns]:
+        """Read the chunk from the cache or fetch it from the recorder. Runs in the recorder executor"""
+        cacheable = chunk_end <= now_ts - CACHE_SETTLE_DELAY.total_seconds()
+        result: dict[str, Columns] = {}
+        if cacheable:
+            for entity_id in entity_ids:
+                columns = self._read_cache(cache_dir, entity_id, chunk_start)
+                if columns is not None:
+                    result[entity_id] = columns
+
+        missing = [entity_id for entity_id in entity_ids if entity_id not in result]
+        if not missing:
+            self._nb_chunks_from_cache += 1
+            return result
+
+        chunk_states = history.get_significant_states(
+            self._hass,
+            dt_util.utc_from_timestamp(chunk_start),
+            end_time=dt_util.utc_from_timestamp(chunk_end),
+            entity_ids=missing,
+            significant_changes_only=False,
+            minimal_response=True,
+            no_attributes=True,
+            compressed_state_format=True,
+        )
+        self._nb_chunks_fetched += 1
+        for entity_id in missing:
+            result[entity_id] = states_to_columns((chunk_states or {}).get(entity_id, []))
+            if cacheable:
+                self._write_cache(cache_dir, entity_id, chunk_start, result[entity_id], now_ts)
+        return result
+
+    @staticmethod
+    def _entity_dir(cache_dir: str, entity_id: str) -> str:
+        return os.path.join(cache_dir, entity_id.replace(".", "__"))
+
+    def _read_cache(self, cache_dir: str, entity_id: str, chunk_start: float) -> Columns | None:
+        """The cached columns of the chunk or None"""
+        path = os.path.join(self._entity_dir(cache_dir, entity_id), f"{int(chunk_start)}.npz")
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return data["timestamps"], data["values"]
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as err:
+            _LOGGER.warning("HistoryLoader - the cached chunk %s is invalid (%s). It will be fetched again", path, err)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_cache(self, cache_dir: str, entity_id: str, chunk_start: float, columns: Columns, now_ts: float):
+        """Cache the columns of the chunk and remove the chunks of the entity which are too old"""
+        entity_dir = self._entity_dir(cache_dir, entity_id)
+        temp_path = None
+        try:
+            os.makedirs(entity_dir, exist_ok=True)
+            # A reader never sees a partial file: the complete file replaces the cached one
+            with tempfile.NamedTemporaryFile(dir=entity_dir, suffix=".tmp", delete=False) as temp_file:
+                temp_path = temp_file.name
+                np.savez(temp_file, timestamps=columns[0], values=columns[1])
+            os.replace(temp_path, os.path.join(entity_dir, f"{int(chunk_start)}.npz"))
+            temp_path = None
+
+            oldest = now_ts - CACHE_MAX_AGE.total_seconds()
+            for file_name in os.listdir(entity_dir):
+                name, extension = os.path.splitext(file_name)
+                path = os.path.join(entity_dir, file_name)
+                if name.isdigit() and int(name) < oldest:
+                    os.remove(path)
+                elif extension == ".tmp" and os.path.getmtime(path) < now_ts - CACHE_SETTLE_DELAY.total_seconds():
+                    # left by an interrupted write
+                    os.remove(path)
+        except OSError as err:
+            _LOGGER.debug("HistoryLoader - cannot cache the history of %s: %s", entity_id, err)
+        finally:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Statistics of the loader (for diagnostics)"""
+        return {"nb_chunks_fetched": self._nb_chunks_fetched, "nb_chunks_from_cache": self._nb_chunks_from_cache}
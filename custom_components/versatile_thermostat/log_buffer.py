@@ -0,0 +1,424 @@
+"""CompactLogBuffer: the memory-bounded log collector of the VTherms.
+
+The collector of vtherm_api keeps a deque of entries bounded by age only and a
+download of the logs of one VTherm scans all of them. With tens of VTherms at DEBUG
+level this grows to hundreds of MB.
+
+This collector has the same interface (emit, get_entries, purge, size) so that the
+export of vtherm_api works unchanged. It only uses the public part of vtherm_api (the
+matching of the thermostat hints is copied below), and:
+- the records are stored in segments of columns (timestamps, levels, ids) with the
+  logger names and the thermostat hints interned once,
+- each segment indexes its records by thermostat hint, so that the entries of one
+  VTherm are found in O(records of that VTherm),
+- the oldest segments are evicted when the buffer is older than max_age or bigger than
+  max_bytes. If a spill directory is given, the evicted segments are compressed on disk
+  (by a worker thread: emit is called in the event loop) and read back in the executor
+  by export_view, for one export only.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from vtherm_api.log_collector import DEFAULT_MAX_AGE_HOURS, VThermLogEntry
+
+from .log_guard import LeveledLogHandler, get_log_collector_level
+
+SEGMENT_SIZE = 4096
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_SPILL_BYTES = 200 * 1024 * 1024
+# The spill directory, relative to the Home Assistant configuration directory
+LOG_SPILL_DIR = os.path.join(".cache", "versatile_thermostat", "log_spill")
+# The fixed size of one record in the columns and the index (the message is counted apart)
+RECORD_OVERHEAD_BYTES = 8 + 1 + 2 + 4 + 4 + 8
+# The hint id of the records without thermostat hint (they belong to every export)
+NO_HINT = 0
+# The export periods are given in local time: the spilled segments are loaded with this margin
+SPILL_LOAD_MARGIN_SEC = 14 * 3600
+# The thermostat hint of a message: the "%s - ..." prefix (same as the vtherm_api collector)
+THERMOSTAT_PATTERN = re.compile(r"^(.+?) - ")
+
+# A standard logger: a VThermLogger would call emit again while the lock is held
+_LOGGER = logging.getLogger(__name__)
+
+
+def extract_thermostat_hint(message: str) -> str | None:
+    """The thermostat name of a log message which follows the '%s - ...' pattern"""
+    match = THERMOSTAT_PATTERN.match(message)
+    return match.group(1) if match else None
+
+
+def hint_matches_thermostat(hint_lower: str, name_lower: str) -> bool:
+    """True if a hint is '{name}', '{Prefix}-{name}' or '{Prefix}-{name}-{entity}' (same as the vtherm_api collector)"""
+    if hint_lower == name_lower:
+        return True
+    suffix = "-" + name_lower
+    return hint_lower.endswith(suffix) or suffix + "-" in hint_lower
+
+
+class _Segment:
+    """Up to SEGMENT_SIZE records in columns, with an index of the positions by hint id"""
+
+    __slots__ = ("timestamps", "levels", "loggers", "hints", "messages", "by_hint", "nb_bytes")
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.levels = array("B")
+        self.loggers = array("H")
+        self.hints = array("I")
+        self.messages: list[str] = []
+        self.by_hint: dict[int, array] = {}
+        self.nb_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, timestamp: float, level: int, logger_id: int, hint_id: int, message: str):
+        """Add a record"""
+        position = len(self.messages)
+        self.timestamps.append(timestamp)
+        self.levels.append(min(level, 255))
+        self.loggers.append(logger_id)
+        self.hints.append(hint_id)
+        self.messages.append(message)
+        positions = self.by_hint.get(hint_id)
+        if positions is None:
+            positions = self.by_hint[hint_id] = array("I")
+        positions.append(position)
+        self.nb_bytes += sys.getsizeof(message) + RECORD_OVERHEAD_BYTES
+
+    @property
+    def first_timestamp(self) -> float:
+        """The time of the oldest record"""
+        return self.timestamps[0]
+
+    @property
+    def last_timestamp(self) -> float:
+        """The time of the newest record"""
+        return self.timestamps[-1]
+
+
+class _SpilledSegment:
+    """A segment compressed on disk"""
+
+    __slots__ = ("path", "first_timestamp", "last_timestamp", "nb_bytes")
+
+    def __init__(self, path: str, first_timestamp: float, last_timestamp: float, nb_bytes: int):
+        self.path = path
+        self.first_timestamp = first_timestamp
+        self.last_timestamp = last_timestamp
+        self.nb_bytes = nb_bytes
+
+
+class _ExportView:
+    """The buffer and the spilled segments read back for one export. It is dropped with the export"""
+
+    def __init__(self, buffer: "CompactLogBuffer", loaded: list[_Segment]):
+        self._buffer = buffer
+        self._loaded = loaded
+
+    @property
+    def nb_loaded(self) -> int:
+        """The number of spilled segments read back"""
+        return len(self._loaded)
+
+    def get_entries(
+        self,
+        thermostat_name: str | None = None,
+        min_level: int = logging.DEBUG,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[VThermLogEntry]:
+        """The entries of the buffer and of the spilled segments"""
+        return self._buffer.get_entries(thermostat_name, min_level, start, end, extra_segments=self._loaded)
+
+
+class CompactLogBuffer(LeveledLogHandler):
+    """The log collector with interned names, per thermostat indexes and a bounded size"""
+
+    def __init__(
+        self,
+        max_age_hours: int = DEFAULT_MAX_AGE_HOURS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill_dir: str | None = None,
+        max_spill_bytes: int = DEFAULT_MAX_SPILL_BYTES,
+    ):
+        # The parent registers the handler as the collector of the VThermLoggers. Its buffer is not used
+        super().__init__(max_age_hours=max_age_hours, max_entries=1)
+        self._records_lock = threading.Lock()
+        self._max_age_sec = max_age_hours * 3600
+        self._max_bytes = max_bytes
+        self._spill_dir = spill_dir
+        self._max_spill_bytes = max_spill_bytes
+        self._segments: list[_Segment] = [_Segment()]
+        self._nb_bytes = 0
+        self._nb_records = 0
+        self._spilled: list[_SpilledSegment] = []
+        self._spilled_bytes = 0
+        # The interned names: id -> name and name -> id. The hint 0 is the "no hint"
+        self._logger_names: list[str] = []
+        self._logger_ids: dict[str, int] = {}
+        self._hint_names: list[str | None] = [None]
+        self._hint_ids: dict[str, int] = {}
+        self._matching_hints: dict[str, tuple[int, ...]] = {}
+        self._nb_evicted = 0
+        # The number of records read by get_entries
+        self._nb_visited = 0
+        self._spill_executor: ThreadPoolExecutor | None = None
+        if spill_dir:
+            self._spill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vtherm_log_spill")
+            self._spill_executor.submit(self._clear_spill_dir)
+
+    # --- Handler interface ---------------------------------------------------
+
+    def _intern_logger(self, name: str) -> int:
+        logger_id = self._logger_ids.get(name)
+        if logger_id is None:
+            logger_id = self._logger_ids[name] = len(self._logger_names)
+            self._logger_names.append(name)
+        return logger_id
+
+    def _intern_hint(self, hint: str | None) -> int:
+        if hint is None:
+            return NO_HINT
+        hint_id = self._hint_ids.get(hint)
+        if hint_id is None:
+            hint_id = self._hint_ids[hint] = len(self._hint_names)
+            self._hint_names.append(hint)
+            # A new hint may match the thermostats already queried
+            self._matching_hints.clear()
+        return hint_id
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Store a log record in the buffer"""
+        if record.levelno < get_log_collector_level():
+            return
+        try:
+            message = self.format(record) if self.formatter else record.getMessage()
+            hint = extract_thermostat_hint(message)
+            with self._records_lock:
+                segment = self._segments[-1]
+                before = segment.nb_bytes
+                segment.append(record.created, record.levelno, self._intern_logger(record.name), self._intern_hint(hint), message)
+                self._nb_bytes += segment.nb_bytes - before
+                self._nb_records += 1
+                if len(segment) >= SEGMENT_SIZE:
+                    self._segments.append(_Segment())
+                    self._evict_unlocked(time.time())
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+    # --- Eviction ------------------------------------------------------------
+
+    def _evict_unlocked(self, now: float):
+        """Remove (or spill) the oldest closed segments which are too old or over the size. Must be called with lock held"""
+        cutoff = now - self._max_age_sec
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            if oldest.last_timestamp >= cutoff and self._nb_bytes <= self._max_bytes:
+                break
+            self._segments.pop(0)
+            self._nb_bytes -= oldest.nb_bytes
+            self._nb_records -= len(oldest)
+            self._nb_evicted += len(oldest)
+            if self._spill_executor and oldest.last_timestamp >= cutoff:
+                # The names are resolved now: the file is self-contained
+                loggers = [self._logger_names[logger_id] for logger_id in oldest.loggers]
+                hints = [self._hint_names[hint_id] for hint_id in oldest.hints]
+                self._spill_executor.submit(self._spill, oldest, loggers, hints)
+
+        while self._spilled and (self._spilled[0].last_timestamp < cutoff or self._spilled_bytes > self._max_spill_bytes):
+            spilled = self._spilled.pop(0)
+            self._spilled_bytes -= spilled.nb_bytes
+            if self._spill_executor:
+                self._spill_executor.submit(self._remove_file, spilled.path)
+
+    def purge(self) -> None:
+        """Remove the records older than max_age"""
+        with self._records_lock:
+            # The current segment is closed so that it can be evicted too
+            if len(self._segments[-1]) > 0:
+                self._segments.append(_Segment())
+            self._evict_unlocked(time.time())
+
+    # --- Spill ---------------------------------------------------------------
+
+    def _spill(self, segment: _Segment, loggers: list[str], hints: list[str | None]):
+        """Compress the segment on disk (in the spill thread)"""
+        data = {
+            "timestamps": segment.timestamps.tolist(),
+            "levels": segment.levels.tolist(),
+            "loggers": loggers,
+            "hints": hints,
+            "messages": segment.messages,
+        }
+        path = os.path.join(self._spill_dir, f"{segment.first_timestamp:.6f}.json.z")
+        try:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6)
+            with open(path, "wb") as file:
+                file.write(payload)
+        except (OSError, TypeError, ValueError) as err:
+            _LOGGER.debug("Cannot spill the log segment to %s: %s", path, err)
+            return
+        with self._records_lock:
+            self._spilled.append(_SpilledSegment(path, segment.first_timestamp, segment.last_timestamp, len(payload)))
+            self._spilled_bytes += len(payload)
+
+    def flush_spill(self):
+        """Wait for the segments being written to disk"""
+        if self._spill_executor:
+            self._spill_executor.submit(lambda: None).result()
+
+    def _read_spilled(self, spilled: _SpilledSegment) -> _Segment | None:
+        try:
+            with open(spilled.path, "rb") as file:
+                data = json.loads(zlib.decompress(file.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error) as err:
+            _LOGGER.debug("Cannot read the spilled log segment %s: %s", spilled.path, err)
+            return None
+        segment = _Segment()
+        with self._records_lock:
+            for timestamp, level, logger_name, hint, message in zip(data["timestamps"], data["levels"], data["loggers"], data["hints"], data["messages"]):
+                segment.append(timestamp, level, self._intern_logger(logger_name), self._intern_hint(hint), message)
+        return segment
+
+    @staticmethod
+    def _to_timestamp(value: datetime | str | None) -> float | None:
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        return value.timestamp() if isinstance(value, datetime) else None
+
+    def export_view(self, start: datetime | str | None = None, end: datetime | str | None = None) -> _ExportView:
+        """The handler of one export, with the spilled segments of the period read back. Does I/O: run it in the executor"""
+        self.flush_spill()
+        start_ts = self._to_timestamp(start)
+        start_ts = start_ts - SPILL_LOAD_MARGIN_SEC if start_ts is not None else 0.0
+        end_ts = self._to_timestamp(end)
+        end_ts = end_ts + SPILL_LOAD_MARGIN_SEC if end_ts is not None else float("inf")
+        with self._records_lock:
+            spilled = [item for item in self._spilled if item.last_timestamp >= start_ts and item.first_timestamp <= end_ts]
+        loaded = [segment for segment in (self._read_spilled(item) for item in spilled) if segment is not None and len(segment) > 0]
+        return _ExportView(self, loaded)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def close(self):
+        """Stop the spill thread when the handler is closed"""
+        if self._spill_executor:
+            self._spill_executor.shutdown(wait=True)
+            self._spill_executor = None
+        super().close()
+
+    def _clear_spill_dir(self):
+        """The spilled files of a previous run cannot be indexed anymore: remove them"""
+        try:
+            for file_name in os.listdir(self._spill_dir):
+                if file_name.endswith(".json.z"):
+                    self._remove_file(os.path.join(self._spill_dir, file_name))
+        except OSError:
+            pass
+
+    # --- Query interface -----------------------------------------------------
+
+    def _hints_of(self, thermostat_name: str) -> tuple[int, ...]:
+        """The hint ids of the records of a thermostat (and the records without hint)"""
+        hint_ids = self._matching_hints.get(thermostat_name)
+        if hint_ids is None:
+            name_lower = thermostat_name.lower()
+            hint_ids = (NO_HINT,) + tuple(hint_id for hint_id, hint in enumerate(self._hint_names) if hint is not None and hint_matches_thermostat(hint.lower(), name_lower))
+            self._matching_hints[thermostat_name] = hint_ids
+        return hint_ids
+
+    def get_entries(
+        self,
+        thermostat_name: str | None = None,
+        min_level: int = logging.DEBUG,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        extra_segments: list[_Segment] | None = None,
+    ) -> list[VThermLogEntry]:
+        """Return filtered entries from the buffer (same filter as VThermLogHandler.get_entries) and from the extra segments"""
+        if end is None:
+            end = datetime.now(tz=timezone.utc)
+        if start is None:
+            start = end - timedelta(minutes=60)
+        # A margin of one microsecond: the exact comparison is done on the datetimes below
+        start_ts, end_ts = start.timestamp() - 1e-6, end.timestamp() + 1e-6
+
+        result: list[VThermLogEntry] = []
+        with self._records_lock:
+            hint_ids = self._hints_of(thermostat_name) if thermostat_name else None
+            segments = sorted(extra_segments or (), key=lambda segment: segment.first_timestamp) + [segment for segment in self._segments if len(segment) > 0]
+            logger_names = list(self._logger_names)
+            hint_names = list(self._hint_names)
+
+            for segment in segments:
+                if segment.last_timestamp < start_ts or segment.first_timestamp > end_ts:
+                    continue
+                if hint_ids is None:
+                    positions = range(len(segment))
+                else:
+                    indexes = [segment.by_hint[hint_id] for hint_id in hint_ids if hint_id in segment.by_hint]
+                    positions = sorted(position for index in indexes for position in index) if len(indexes) > 1 else (indexes[0] if indexes else ())
+                self._nb_visited += len(positions)
+                timestamps, levels = segment.timestamps, segment.levels
+                for position in positions:
+                    timestamp = timestamps[position]
+                    if timestamp < start_ts or timestamp > end_ts or levels[position] < min_level:
+                        continue
+                    # The bounds are compared on the datetimes (rounded to the microsecond) like the vtherm_api collector
+                    entry_time = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+                    if entry_time < start or entry_time > end:
+                        continue
+                    result.append(
+                        VThermLogEntry(
+                            timestamp=entry_time,
+                            level=levels[position],
+                            logger_name=logger_names[segment.loggers[position]],
+                            message=segment.messages[position],
+                            thermostat_hint=hint_names[segment.hints[position]],
+                        )
+                    )
+        return result
+
+    # --- Buffer info ---------------------------------------------------------
+
+    @property
+    def size(self) -> int:
+        """Return current number of entries in memory"""
+        with self._records_lock:
+            return self._nb_records
+
+    @property
+    def stats(self) -> dict:
+        """The memory used by the buffer (for diagnostics)"""
+        with self._records_lock:
+            return {
+                "nb_records": self._nb_records,
+                "nb_bytes": self._nb_bytes,
+                "nb_segments": len(self._segments),
+                "nb_evicted": self._nb_evicted,
+                "nb_visited": self._nb_visited,
+                "nb_spilled_segments": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+                "nb_loggers": len(self._logger_names),
+                "nb_hints": len(self._hint_names) - 1,
+            }
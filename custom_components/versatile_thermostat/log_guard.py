@@ -0,0 +1,46 @@
+"""The guard of the debug logs of the hot paths.
+
+The VThermLogger of the log collector always creates the log records (its isEnabledFor
+always returns True) so that the in-memory collector keeps everything, even when
+home-assistant.log is at INFO. So a _LOGGER.debug call of a hot path always builds a
+LogRecord and formats its message (str() of the VTherm, of the lists, ...) in the
+collector, at each temperature event and each cycle tick.
+
+The level of the collector can be raised with the log_collector_level option. Then
+is_debug_enabled is False unless the logger itself is at DEBUG in the Home Assistant
+configuration, and the hot paths skip their debug calls. The check of the standard
+Logger is cached by the logging module so the guard costs two comparisons.
+"""
+
+import logging
+
+from vtherm_api.log_collector import VThermLogHandler
+
+# The minimal level of the records kept by the log collector
+_collector_level: int = logging.DEBUG
+
+
+def set_log_collector_level(level: int):
+    """Change the minimal level of the records kept by the log collector"""
+    global _collector_level  # pylint: disable=global-statement
+    _collector_level = level
+
+
+def get_log_collector_level() -> int:
+    """The minimal level of the records kept by the log collector"""
+    return _collector_level
+
+
+def is_debug_enabled(logger: logging.Logger) -> bool:
+    """True if a debug record of the logger would be kept by the collector or by the Home Assistant handlers"""
+    # logging.Logger.isEnabledFor is the cached check of the standard Logger (the VThermLogger one always returns True)
+    return _collector_level <= logging.DEBUG or logging.Logger.isEnabledFor(logger, logging.DEBUG)
+
+
+class LeveledLogHandler(VThermLogHandler):
+    """The log collector which drops the records under the log_collector_level"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < _collector_level:
+            return
+        super().emit(record)
@@ -5,11 +5,21 @@
     -    calculate the slope of the temperature curve. For this we calculate the slope(t) = 1/2 slope(t-1) + 1/2 * dTemp / dt
     -    if the slope is lower than a threshold the window opens alert is notified
     -    if the slope regain positive the end of the window open alert is notified
+
+    RegressionSlopeAlgorithm is an alternative which fits a linear regression on the
+    measurements of the last window_min minutes. The samples are kept in a fixed-size
+    circular buffer and the regression is updated with running sums, so each measurement
+    costs O(1) without allocation. It gives a confidence interval of the slope which is
+    used to take the open/close decisions only when the slope is significant.
 """
 
 import logging
+import math
+from array import array
 from vtherm_api.log_collector import get_vtherm_logger
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from .log_guard import is_debug_enabled
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -23,6 +33,20 @@ MAX_DURATION_MIN = 30  # a fake data point is added in the cycle if last measure
 
 MIN_NB_POINT = 4  # do not calculate slope until we have enough point
 
+DEFAULT_REGRESSION_WINDOW_MIN = 20
+DEFAULT_REGRESSION_MAX_SAMPLES = 32
+MIN_REGRESSION_NB_POINT = 3  # the confidence interval needs at least 3 points
+
+# Quantiles of the Student distribution for a two-sided 90% interval (so each bound is a one-sided 95% bound)
+STUDENT_T_90 = (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812)
+
+
+def student_t_90(degrees_of_freedom: int) -> float:
+    """The 95% quantile of the Student distribution (asymptotic approximation above 10 degrees of freedom)"""
+    if degrees_of_freedom <= len(STUDENT_T_90):
+        return STUDENT_T_90[degrees_of_freedom - 1]
+    return 1.645 + 1.6 / degrees_of_freedom
+
 
 class WindowOpenDetectionAlgorithm:
     """The class that implements the algorithm listed above"""
@@ -57,19 +81,22 @@ class WindowOpenDetectionAlgorithm:
         """Add a new temperature measurement
         returns the last slope
         """
+        debug = is_debug_enabled(_LOGGER)
         if self._last_datetime is None or self._last_temperature is None:
-            _LOGGER.debug("%s - First initialisation", self)
+            if debug:
+                _LOGGER.debug("%s - First initialisation", self)
             self._last_datetime = datetime_measure
             self._last_temperature = temperature
             self._nb_point = self._nb_point + 1
             return None
 
-        _LOGGER.debug(
-            "%s - We are already initialized slope=%s last_temp=%0.2f",
-            self,
-            self._last_slope,
-            self._last_temperature,
-        )
+        if debug:
+            _LOGGER.debug(
+                "%s - We are already initialized slope=%s last_temp=%0.2f",
+                self,
+                self._last_slope,
+                self._last_temperature,
+            )
         lspe = self._last_slope
 
         delta_t_sec = float((datetime_measure - self._last_datetime).total_seconds())
@@ -109,16 +136,17 @@ class WindowOpenDetectionAlgorithm:
         self._last_temperature = temperature
 
         self._nb_point = self._nb_point + 1
-        _LOGGER.debug(
-            "%s - delta_t=%.3f delta_temp=%.3f new_slope=%.3f last_slope=%s slope=%.3f nb_point=%s",
-            self,
-            delta_t,
-            delta_temp,
-            new_slope,
-            lspe,
-            self._last_slope,
-            self._nb_point,
-        )
+        if debug:
+            _LOGGER.debug(
+                "%s - delta_t=%.3f delta_temp=%.3f new_slope=%.3f last_slope=%s slope=%.3f nb_point=%s",
+                self,
+                delta_t,
+                delta_temp,
+                new_slope,
+                lspe,
+                self._last_slope,
+                self._nb_point,
+            )
 
         return self._last_slope
 
@@ -142,13 +170,196 @@ class WindowOpenDetectionAlgorithm:
 
         return self._last_slope >= self._end_alert_threshold
 
+    def set_thresholds(self, alert_threshold, end_alert_threshold):
+        """Change the both threshold. The measures and the slope are kept"""
+        self._alert_threshold = alert_threshold
+        self._end_alert_threshold = end_alert_threshold
+
     @property
     def last_slope(self) -> float:
         """Return the last calculated slope"""
         return self._last_slope
 
+    @property
+    def slope_confidence_interval(self) -> tuple[float, float] | None:
+        """The confidence interval of the slope. Not available with the smoothed two-point slope"""
+        return None
+
     def __str__(self) -> str:
         if self._vtherm and hasattr(self._vtherm, "name"):
             return f"{self._vtherm.name}-WindowOpenDetectionAlgorithm"
         else:
             return f"UnknownVTherm-WindowOpenDetectionAlgorithm"
+
+
+class RegressionSlopeAlgorithm(WindowOpenDetectionAlgorithm):
+    """Detects the open window with a linear regression on the measurements of a sliding time window"""
+
+    def __init__(
+        self,
+        alert_threshold,
+        end_alert_threshold,
+        vtherm=None,
+        window_min: float = DEFAULT_REGRESSION_WINDOW_MIN,
+        max_samples: int = DEFAULT_REGRESSION_MAX_SAMPLES,
+    ) -> None:
+        super().__init__(alert_threshold, end_alert_threshold, vtherm)
+        self._window_hour: float = window_min / 60.0
+        self._size: int = max(max_samples, MIN_REGRESSION_NB_POINT)
+        # Circular buffer: x in hours since _ref_datetime, y in ° relative to _ref_temperature
+        self._x = array("d", bytes(8 * self._size))
+        self._y = array("d", bytes(8 * self._size))
+        self._head: int = 0
+        self._count: int = 0
+        self._ref_datetime: datetime | None = None
+        self._ref_temperature: float = 0.0
+        self._sum_x: float = 0.0
+        self._sum_y: float = 0.0
+        self._sum_xx: float = 0.0
+        self._sum_xy: float = 0.0
+        self._sum_yy: float = 0.0
+        self._nb_since_rebase: int = 0
+        self._slope_low: float | None = None
+        self._slope_high: float | None = None
+
+    def _push(self, x: float, y: float):
+        index = (self._head + self._count) % self._size
+        self._x[index] = x
+        self._y[index] = y
+        self._count += 1
+        self._sum_x += x
+        self._sum_y += y
+        self._sum_xx += x * x
+        self._sum_xy += x * y
+        self._sum_yy += y * y
+
+    def _pop(self):
+        x = self._x[self._head]
+        y = self._y[self._head]
+        self._head = (self._head + 1) % self._size
+        self._count -= 1
+        self._sum_x -= x
+        self._sum_y -= y
+        self._sum_xx -= x * x
+        self._sum_xy -= x * y
+        self._sum_yy -= y * y
+
+    def _rebase(self):
+        """Move the origin to the oldest sample and recompute the sums. This bounds the rounding errors
+        of the running sums. Done once every _size samples so the cost is O(1) per sample"""
+        offset_x = self._x[self._head]
+        offset_y = self._y[self._head]
+        self._ref_datetime += timedelta(hours=offset_x)
+        self._ref_temperature += offset_y
+        self._sum_x = self._sum_y = self._sum_xx = self._sum_xy = self._sum_yy = 0.0
+        for i in range(self._count):
+            index = (self._head + i) % self._size
+            x = self._x[index] - offset_x
+            y = self._y[index] - offset_y
+            self._x[index] = x
+            self._y[index] = y
+            self._sum_x += x
+            self._sum_y += y
+            self._sum_xx += x * x
+            self._sum_xy += x * y
+            self._sum_yy += y * y
+        self._nb_since_rebase = 0
+
+    def _update_slope(self):
+        """Calculate the slope and its confidence interval from the running sums"""
+        n = self._count
+        self._last_slope = self._slope_low = self._slope_high = None
+        if n < 2:
+            return
+        sxx = self._sum_xx - self._sum_x * self._sum_x / n
+        if sxx <= 1e-12:
+            return
+        sxy = self._sum_xy - self._sum_x * self._sum_y / n
+        slope = sxy / sxx
+        self._last_slope = slope
+        if n < MIN_REGRESSION_NB_POINT:
+            return
+        syy = self._sum_yy - self._sum_y * self._sum_y / n
+        residual = max(syy - slope * sxy, 0.0)
+        half_width = student_t_90(n - 2) * math.sqrt(residual / (n - 2) / sxx)
+        self._slope_low = slope - half_width
+        self._slope_high = slope + half_width
+
+    def add_temp_measurement(self, temperature: float, datetime_measure: datetime, store_date: bool = True) -> float:
+        """Add a new temperature measurement
+        returns the last slope
+        """
+        if self._ref_datetime is None:
+            self._ref_datetime = datetime_measure
+            self._ref_temperature = temperature
+
+        x = (datetime_measure - self._ref_datetime).total_seconds() / 3600.0
+        y = temperature - self._ref_temperature
+        if self._count > 0:
+            last = (self._head + self._count - 1) % self._size
+            delta_t_hour = x - self._x[last]
+            if delta_t_hour * 3600.0 <= MIN_DELTA_T_SEC:
+                _LOGGER.debug("%s - Measurement at %s is not after the last one. We don't consider this value", self, datetime_measure)
+                return self._last_slope
+            if abs(y - self._y[last]) / delta_t_hour > MAX_SLOPE_VALUE:
+                _LOGGER.debug("%s - Slope to the last measurement is > %.2f which should be not possible. We don't consider this value", self, MAX_SLOPE_VALUE)
+                return self._last_slope
+
+        if self._count == self._size:
+            self._pop()
+        self._push(x, y)
+        # Keep at least 2 points so that there is a slope after a long gap
+        while self._count > 2 and x - self._x[self._head] > self._window_hour:
+            self._pop()
+
+        self._nb_since_rebase += 1
+        if self._nb_since_rebase >= self._size:
+            self._rebase()
+
+        # if we are in cycle check and so adding a fake datapoint, we don't store the event datetime
+        # so that the age of the last real measurement is still checked
+        if store_date:
+            self._last_datetime = datetime_measure
+        self._last_temperature = temperature
+        self._nb_point += 1
+
+        self._update_slope()
+        if is_debug_enabled(_LOGGER):
+            _LOGGER.debug(
+                "%s - nb_samples=%d slope=%s interval=[%s, %s] nb_point=%s",
+                self,
+                self._count,
+                self._last_slope,
+                self._slope_low,
+                self._slope_high,
+                self._nb_point,
+            )
+        return self._last_slope
+
+    def is_window_open_detected(self) -> bool:
+        """True if the slope is under -_alert_threshold and the temperature is significantly decreasing"""
+        if self._alert_threshold is None or self._slope_high is None:
+            return False
+
+        return self._last_slope < -self._alert_threshold and self._slope_high < 0
+
+    def is_window_close_detected(self) -> bool:
+        """True if the slope is above _end_alert_threshold and the temperature is significantly not decreasing
+        anymore at the alert rate"""
+        if self._end_alert_threshold is None or self._slope_low is None:
+            return False
+
+        alert_threshold = self._alert_threshold if self._alert_threshold is not None else 0.0
+        return self._last_slope >= self._end_alert_threshold and self._slope_low > -alert_threshold
+
+    @property
+    def slope_confidence_interval(self) -> tuple[float, float] | None:
+        """The 90% confidence interval of the slope (in °C/hour) or None if there is not enough samples"""
+        if self._slope_low is None:
+            return None
+        return self._slope_low, self._slope_high
+
+    def __str__(self) -> str:
+        if self._vtherm and hasattr(self._vtherm, "name"):
+            return f"{self._vtherm.name}-RegressionSlopeAlgorithm"
+        return "UnknownVTherm-RegressionSlopeAlgorithm"
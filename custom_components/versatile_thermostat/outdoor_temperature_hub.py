@@ -0,0 +1,149 @@
+"""OutdoorTemperatureHub: one subscription per outdoor temperature sensor shared by all the VTherms.
+
+Very often all the VTherms of a building use the same weather sensor. Without the hub,
+each VTherm listens to the sensor on its own and runs a full control cycle at the
+same event-loop instant, which makes a burst of control cycles, service calls and
+state writes at each outdoor temperature update.
+
+The hub listens once per sensor, parses the value once and gives it to all the
+subscribed VTherms immediately. The control cycle of each VTherm is then scheduled
+with a jitter bounded by max_jitter_sec (spread by subscription order). An update
+received while the control of a VTherm is still pending is coalesced: the VTherm
+already has the new value and the pending control will use it.
+"""
+
+import math
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The control cycles of the VTherms using the same sensor are spread over this duration
+EXT_TEMP_MAX_JITTER_SEC = 10.0
+
+
+class OutdoorTemperatureHub:
+    """Fan-out of the outdoor temperature sensors to the VTherms"""
+
+    def __init__(self, hass: HomeAssistant, max_jitter_sec: float = EXT_TEMP_MAX_JITTER_SEC):
+        self._hass = hass
+        self._max_jitter_sec = max_jitter_sec
+        # The subscribed VTherms of each sensor in subscription order
+        self._subscribers: dict[str, list[Any]] = {}
+        self._unsub_listeners: dict[str, CALLBACK_TYPE] = {}
+        # The pending control of each VTherm (by id)
+        self._pending: dict[int, CALLBACK_TYPE] = {}
+        self._nb_events = 0
+        self._nb_controls = 0
+        self._nb_coalesced = 0
+
+    @callback
+    def subscribe(self, entity_id: str, vtherm: Any) -> CALLBACK_TYPE:
+        """Give the outdoor temperature of entity_id to the vtherm. Returns the function which unsubscribes.
+
+        The vtherm should have a set_ext_temperature(value, state) callback and an async_ext_temperature_control() coroutine
+        """
+        subscribers = self._subscribers.setdefault(entity_id, [])
+        subscribers.append(vtherm)
+        if entity_id not in self._unsub_listeners:
+            self._unsub_listeners[entity_id] = async_track_state_change_event(self._hass, [entity_id], self._async_sensor_changed)
+            _LOGGER.debug("OutdoorTemperatureHub - listening to %s", entity_id)
+
+        @callback
+        def unsubscribe():
+            self._cancel_pending(vtherm)
+            if vtherm in subscribers:
+                subscribers.remove(vtherm)
+            if not subscribers and self._subscribers.get(entity_id) is subscribers:
+                del self._subscribers[entity_id]
+                unsub = self._unsub_listeners.pop(entity_id, None)
+                if unsub:
+                    unsub()
+                _LOGGER.debug("OutdoorTemperatureHub - stop listening to %s", entity_id)
+
+        return unsubscribe
+
+    @callback
+    def _async_sensor_changed(self, event: Event):
+        """Parse the new outdoor temperature and fan it out to the VTherms"""
+        new_state: State = event.data.get("new_state")
+        if new_state is None or new_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return
+
+        try:
+            value = float(new_state.state)
+            if math.isnan(value) or math.isinf(value):
+                raise ValueError(f"Sensor has illegal state {new_state.state}")
+        except ValueError as ex:
+            _LOGGER.error("Unable to update external temperature from sensor: %s", ex)
+            return
+
+        subscribers = list(self._subscribers.get(event.data.get("entity_id", new_state.entity_id), []))
+        self._nb_events += 1
+        _LOGGER.debug("OutdoorTemperatureHub - outdoor temperature of %s changed to %s for %d VTherm(s)", new_state.entity_id, value, len(subscribers))
+
+        nb = len(subscribers)
+        for index, vtherm in enumerate(subscribers):
+            vtherm.set_ext_temperature(value, new_state)
+            self._schedule_control(vtherm, self._max_jitter_sec * index / nb)
+
+    @callback
+    def _schedule_control(self, vtherm: Any, delay: float):
+        """Schedule the control cycle of the vtherm unless one is already pending"""
+        key = id(vtherm)
+        if key in self._pending:
+            self._nb_coalesced += 1
+            return
+
+        async def _async_run_control(_now):
+            self._pending.pop(key, None)
+            self._nb_controls += 1
+            await vtherm.async_ext_temperature_control()
+
+        if delay <= 0:
+            # the first VTherm is controlled immediately (in a task so that the fan-out is not blocked)
+            self._nb_controls += 1
+            self._hass.async_create_task(vtherm.async_ext_temperature_control())
+            return
+
+        self._pending[key] = async_call_later(self._hass, delay, _async_run_control)
+
+    @callback
+    def _cancel_pending(self, vtherm: Any):
+        """Cancel the pending control of the vtherm if any"""
+        cancel = self._pending.pop(id(vtherm), None)
+        if cancel:
+            cancel()
+
+    @callback
+    def async_shutdown(self):
+        """Stop listening to all the sensors and cancel the pending controls"""
+        for cancel in self._pending.values():
+            cancel()
+        self._pending.clear()
+        for unsub in self._unsub_listeners.values():
+            unsub()
+        self._unsub_listeners.clear()
+        self._subscribers.clear()
+
+    @property
+    def nb_pending_controls(self) -> int:
+        """The number of scheduled control cycles"""
+        return len(self._pending)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Statistics of the hub (for diagnostics)"""
+        return {
+            "nb_sensors": len(self._subscribers),
+            "nb_subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "nb_events": self._nb_events,
+            "nb_controls": self._nb_controls,
+            "nb_coalesced": self._nb_coalesced,
+            "nb_pending_controls": len(self._pending),
+        }
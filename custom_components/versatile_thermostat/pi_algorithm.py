@@ -2,11 +2,72 @@
 """ The PI algorithm implementation """
 
 import logging
+import numpy as np
 from vtherm_api.log_collector import get_vtherm_logger
 
 _LOGGER = get_vtherm_logger(__name__)
 
 
+def compute_pi_regulation(
+    target_temp,
+    room_temp,
+    external_temp,
+    accumulated_error,
+    kp,
+    ki,
+    k_ext,
+    offset_max,
+    accumulated_error_threshold,
+    overheat_protection: bool,
+    time_delta: float,
+):
+    """One step of the PI self-regulation.
+    Works on numbers and element-wise on NumPy arrays (see scripts/thermal_simulator.py).
+
+    Returns (regulated_temp, accumulated_error, offset, offset_ext)
+    """
+    vectorized = isinstance(room_temp, np.ndarray) or isinstance(accumulated_error, np.ndarray)
+
+    # Calculate the error factor (P)
+    error = target_temp - room_temp
+
+    # Calculate the sum of error (I)
+    # Discussion #384. Finally don't reset the accumulated error but smoothly reset it if the sign is inversed
+    # If the error have change its sign, reset smoothly the accumulated error
+    # The divisor is clamped so that a fractional cycle (time_delta < 0.5), which happens when
+    # the regulation is triggered twice in quick succession (e.g. repeated target changes),
+    # can never amplify the accumulated error instead of decaying it.
+    if vectorized:
+        if overheat_protection:
+            accumulated_error = np.where(error * accumulated_error < 0, accumulated_error / (2.0 * max(time_delta, 0.5)), accumulated_error)
+        accumulated_error = np.clip(accumulated_error + error * time_delta, -accumulated_error_threshold, accumulated_error_threshold)
+    else:
+        if overheat_protection and error * accumulated_error < 0:
+            accumulated_error = accumulated_error / (2.0 * max(time_delta, 0.5))
+
+        accumulated_error += error * time_delta
+
+        # Capping of the error
+        accumulated_error = min(
+            accumulated_error_threshold,
+            max(-accumulated_error_threshold, accumulated_error),
+        )
+
+    # Calculate the offset (proportionnel + intégral)
+    offset = kp * error + ki * accumulated_error
+
+    # Calculate the exterior offset
+    offset_ext = k_ext * (room_temp - external_temp)
+
+    # Capping of offset
+    total_offset = offset + offset_ext
+    if vectorized:
+        return np.round(target_temp + np.clip(total_offset, -offset_max, offset_max), 1), accumulated_error, offset, offset_ext
+
+    total_offset = min(offset_max, max(-offset_max, total_offset))
+    return round(target_temp + total_offset, 1), accumulated_error, offset, offset_ext
+
+
 class PITemperatureRegulator:
     """A class implementing a PI Algorithm
     PI algorithms calculate a target temperature by adding an offset which is calculating as follow:
@@ -80,41 +141,23 @@ class PITemperatureRegulator:
             )
             time_delta = 1.0
 
-        # Calculate the error factor (P)
-        error = self.target_temp - room_temp
-
-        # Calculate the sum of error (I)
-        # Discussion #384. Finally don't reset the accumulated error but smoothly reset it if the sign is inversed
-        # If the error have change its sign, reset smoothly the accumulated error
-        # The divisor is clamped so that a fractional cycle (time_delta < 0.5), which happens when
-        # the regulation is triggered twice in quick succession (e.g. repeated target changes),
-        # can never amplify the accumulated error instead of decaying it.
-        if self.overheat_protection and error * self.accumulated_error < 0:
-            self.accumulated_error = self.accumulated_error / (2.0 * max(time_delta, 0.5))
-
-        self.accumulated_error += error * time_delta
-
-        # Capping of the error
-        self.accumulated_error = min(
+        result, self.accumulated_error, offset, offset_ext = compute_pi_regulation(
+            self.target_temp,
+            room_temp,
+            external_temp,
+            self.accumulated_error,
+            self.kp,
+            self.ki,
+            self.k_ext,
+            self.offset_max,
             self.accumulated_error_threshold,
-            max(-self.accumulated_error_threshold, self.accumulated_error),
+            self.overheat_protection,
+            time_delta,
         )
 
-        # Calculate the offset (proportionnel + intégral)
-        offset = self.kp * error + self.ki * self.accumulated_error
-
-        # Calculate the exterior offset
-        offset_ext = self.k_ext * (room_temp - external_temp)
-
-        # Capping of offset
-        total_offset = offset + offset_ext
-        total_offset = min(self.offset_max, max(-self.offset_max, total_offset))
-
-        result = round(self.target_temp + total_offset, 1)
-
         _LOGGER.debug(
             "PITemperatureRegulator - Error: %.2f accumulated_error: %.2f (overheat protection %s and delta %.2f) offset: %.2f offset_ext: %.2f target_tem: %.1f regulatedTemp: %.1f",
-            error,
+            self.target_temp - room_temp,
             self.accumulated_error,
             self.overheat_protection,
             time_delta,
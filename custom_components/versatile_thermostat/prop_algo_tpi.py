@@ -1,6 +1,7 @@
 """ The TPI calculation module """
 # pylint: disable='line-too-long'
 import logging
+import numpy as np
 from vtherm_api.log_collector import get_vtherm_logger
 
 from .vtherm_hvac_mode import VThermHvacMode, VThermHvacMode_OFF, VThermHvacMode_COOL, VThermHvacMode_SLEEP
@@ -13,6 +14,26 @@ def is_number(value):
     return isinstance(value, (int, float))
 
 
+def compute_tpi_on_percent(tpi_coef_int, tpi_coef_ext, delta_temp, delta_ext_temp, max_on_percent=None):
+    """The TPI formula: on_percent = coef_int * delta_temp + coef_ext * delta_ext_temp, clamped to [0, 1]
+    and to max_on_percent if set. Works on numbers and element-wise on NumPy arrays (see scripts/thermal_simulator.py)"""
+    on_percent = tpi_coef_int * delta_temp + tpi_coef_ext * delta_ext_temp
+    if isinstance(on_percent, np.ndarray):
+        on_percent = np.clip(on_percent, 0, 1)
+        return np.minimum(on_percent, max_on_percent) if max_on_percent is not None else on_percent
+
+    on_percent = min(1, max(0, on_percent))
+    if max_on_percent is not None and on_percent > max_on_percent:
+        on_percent = max_on_percent
+    return on_percent
+
+
+def is_outside_tpi_thresholds(delta_temp, slope, tpi_threshold_low, tpi_threshold_high):
+    """True when the temperature is above the target by more than the threshold of the slope direction.
+    Works on numbers and element-wise on NumPy arrays"""
+    return ((slope > 0.0) & (-delta_temp > tpi_threshold_high)) | ((slope < 0.0) & (-delta_temp > tpi_threshold_low))
+
+
 class TpiAlgorithm:
     """This class aims to do all calculation of the Proportional alogorithm"""
 
@@ -102,12 +123,9 @@ class TpiAlgorithm:
 
             # Apply thresholds
             if (
-                # fmt: off
                 self._apply_threshold
                 and slope is not None
-                and ((slope > 0.0 and -delta_temp > self._tpi_threshold_high)
-                or (slope < 0.0 and -delta_temp > self._tpi_threshold_low))
-                # fmt: on
+                and is_outside_tpi_thresholds(delta_temp, slope, self._tpi_threshold_low, self._tpi_threshold_high)
             ):
                 _LOGGER.debug(
                     "%s - Proportional algorithm: on_percent is forced to 0 cause current_temp (%.1f) is outside the thresholds (slope=%.1f, target_temp=%.1f, tpi_threshold_low=%.1f, tpi_threshold_high=%.1f). Heating/cooling will be disabled.",  # pylint: disable=line-too-long
@@ -121,15 +139,9 @@ class TpiAlgorithm:
                 self._calculated_on_percent = 0
             else:
                 if hvac_mode not in [VThermHvacMode_OFF, VThermHvacMode_SLEEP]:
-                    self._calculated_on_percent = self._tpi_coef_int * delta_temp + self._tpi_coef_ext * delta_ext_temp
-                    # calculated on_time duration in seconds
-                    if self._calculated_on_percent > 1:
-                        self._calculated_on_percent = 1
-                    if self._calculated_on_percent < 0:
-                        self._calculated_on_percent = 0
-
-                    if self._max_on_percent is not None and self._calculated_on_percent > self._max_on_percent:
-                        self._calculated_on_percent = self._max_on_percent
+                    self._calculated_on_percent = compute_tpi_on_percent(
+                        self._tpi_coef_int, self._tpi_coef_ext, delta_temp, delta_ext_temp, self._max_on_percent
+                    )
                 else:
                     _LOGGER.debug(
                         "%s - Proportional algorithm: VTherm is off. Heating will be disabled",
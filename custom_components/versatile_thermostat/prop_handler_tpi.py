@@ -185,6 +185,9 @@ class TPIHandler:
         if self._auto_tpi_manager:
             # Set entity_id for pre-bootstrap calibration sensor lookup
             self._auto_tpi_manager._entity_id = t.entity_id
+            # Set the sensors for the offline identification of the thermal model
+            self._auto_tpi_manager._temp_sensor_entity_id = t.temp_sensor_entity_id
+            self._auto_tpi_manager._ext_temp_sensor_entity_id = t.ext_temp_sensor_entity_id
             _LOGGER.info("%s - DEBUG: Before load_data - int=%.3f, ext=%.3f", t, t.tpi_coef_int, t.tpi_coef_ext)
             await self._auto_tpi_manager.async_load_data()
 
@@ -417,6 +420,38 @@ class TPIHandler:
             result = t.hass.config_entries.async_update_entry(entry, data=new_data)
             _LOGGER.debug("%s - Config entry updated with new TPI params: %s", t, result)
 
+    def apply_tpi_config(self, entry_infos: dict[str, Any]):
+        """Apply the TPI parameters of a new central configuration to the running algorithm.
+        While the Auto TPI learning is active the coefficients are the learned ones: only the defaults change."""
+        t = self._thermostat
+        coef_int = entry_infos.get(CONF_TPI_COEF_INT)
+        coef_ext = entry_infos.get(CONF_TPI_COEF_EXT)
+        threshold_low = entry_infos.get(CONF_TPI_THRESHOLD_LOW, 0.0)
+        threshold_high = entry_infos.get(CONF_TPI_THRESHOLD_HIGH, 0.0)
+        if threshold_low == 0.0 or threshold_high == 0.0:
+            threshold_low = threshold_high = 0.0
+
+        self._default_coef_int = coef_int
+        self._default_coef_ext = coef_ext
+        if t.ext_temp_sensor_entity_id is None:
+            coef_ext = 0
+
+        if t.prop_algorithm and not (self._auto_tpi_manager and self._auto_tpi_manager.learning_active):
+            t.prop_algorithm.update_parameters(coef_int, coef_ext, threshold_low, threshold_high)
+            t.tpi_coef_int = t.prop_algorithm.tpi_coef_int
+            t.tpi_coef_ext = t.prop_algorithm.tpi_coef_ext
+        elif t.prop_algorithm:
+            t.prop_algorithm.update_parameters(tpi_threshold_low=threshold_low, tpi_threshold_high=threshold_high)
+        t.tpi_threshold_low = threshold_low
+        t.tpi_threshold_high = threshold_high
+
+        t.minimal_activation_delay = entry_infos.get(CONF_MINIMAL_ACTIVATION_DELAY, 0)
+        t.minimal_deactivation_delay = entry_infos.get(CONF_MINIMAL_DEACTIVATION_DELAY, 0)
+        if t.cycle_scheduler:
+            t.cycle_scheduler.min_activation_delay = t.minimal_activation_delay
+            t.cycle_scheduler.min_deactivation_delay = t.minimal_deactivation_delay
+        t.recalculate()
+
     async def service_set_tpi_parameters(
         self,
         tpi_coef_int: float | None = None,
@@ -529,7 +564,7 @@ class TPIHandler:
         if not t.entry_infos.get(CONF_AUTO_TPI_MODE, False):
             raise ServiceValidationError(f"{t} - Auto TPI is not enabled in configuration.")
 
-        write_event_log(_LOGGER, t, f"Calling SERVICE_AUTO_TPI_CALIBRATE_CAPACITY, save_to_config: {save_to_config}, start_date: {start_date}, end_date: {end_date}, min_power_threshold: {min_power_threshold}")
+        write_event_log(_LOGGER, t, "Calling SERVICE_AUTO_TPI_CALIBRATE_CAPACITY, save_to_config: %s, start_date: %s, end_date: %s, min_power_threshold: %s", save_to_config, start_date, end_date, min_power_threshold)
 
         if not self._auto_tpi_manager:
             raise ServiceValidationError(f"{t} - Auto TPI Manager not initialized, cannot calibrate capacity.")
@@ -551,6 +586,44 @@ class TPIHandler:
 
         return result
 
+    async def service_auto_tpi_identify_model(
+        self,
+        apply: bool,
+        save_to_config: bool,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ):
+        """Service handler for auto_tpi_identify_model."""
+        t = self._thermostat
+
+        if t.proportional_function != PROPORTIONAL_FUNCTION_TPI:
+            raise ServiceValidationError(f"{t} - This service is only available for TPI algorithm.")
+        if not t.entry_infos.get(CONF_AUTO_TPI_MODE, False):
+            raise ServiceValidationError(f"{t} - Auto TPI is not enabled in configuration.")
+
+        write_event_log(_LOGGER, t, "Calling SERVICE_AUTO_TPI_IDENTIFY_MODEL, apply: %s, save_to_config: %s, start_date: %s, end_date: %s", apply, save_to_config, start_date, end_date)
+
+        if not self._auto_tpi_manager:
+            raise ServiceValidationError(f"{t} - Auto TPI Manager not initialized, cannot identify the thermal model.")
+
+        result = await self._auto_tpi_manager.service_identify_thermal_model(
+            thermostat_entity_id=t.entity_id,
+            temp_entity_id=t.temp_sensor_entity_id,
+            ext_temp_entity_id=t.ext_temp_sensor_entity_id,
+            apply=apply,
+            save_to_config=save_to_config,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+        if result.get("applied"):
+            t.recalculate()
+
+        t.update_custom_attributes()
+        t.async_write_ha_state()
+
+        return result
+
     async def async_set_auto_tpi_mode(
         self,
         auto_tpi_mode: bool,
@@ -0,0 +1,110 @@
+"""A fixed capacity ring buffer of floats with a compact binary persistence."""
+
+import base64
+import sys
+from array import array
+from typing import Iterable, Iterator
+
+
+class FloatRingBuffer:
+    """A fixed capacity FIFO of floats backed by an array('d').
+
+    Appending to a full buffer overwrites the oldest value. Iteration and indexing
+    go from the oldest to the newest value, like the list it replaces.
+    """
+
+    __slots__ = ("_capacity", "_data", "_start", "_size")
+
+    def __init__(self, capacity: int, values: Iterable[float] = ()):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self._capacity = capacity
+        self._data = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+        self.extend(values)
+
+    @property
+    def capacity(self) -> int:
+        """The maximum number of values"""
+        return self._capacity
+
+    def append(self, value: float):
+        """Add a value. The oldest one is dropped if the buffer is full"""
+        if self._size < self._capacity:
+            self._data[(self._start + self._size) % self._capacity] = value
+            self._size += 1
+        else:
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self._capacity
+
+    def extend(self, values: Iterable[float]):
+        """Add all the values"""
+        for value in values:
+            self.append(float(value))
+
+    def clear(self):
+        """Remove all the values"""
+        self._start = 0
+        self._size = 0
+
+    def last(self, n: int) -> list[float]:
+        """Returns the n newest values (oldest first)"""
+        n = max(0, min(n, self._size))
+        return [self._data[(self._start + i) % self._capacity] for i in range(self._size - n, self._size)]
+
+    def to_list(self) -> list[float]:
+        """Returns all the values (oldest first)"""
+        return self.last(self._size)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        return self._data[(self._start + index) % self._capacity]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FloatRingBuffer):
+            return self._capacity == other._capacity and self.to_list() == other.to_list()
+        if isinstance(other, (list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FloatRingBuffer(capacity={self._capacity}, values={self.to_list()})"
+
+    def to_dict(self) -> dict:
+        """Returns a JSON-safe compact form: the values are stored as little endian doubles encoded in base64"""
+        values = array("d", self.to_list())
+        if sys.byteorder != "little":
+            values.byteswap()
+        return {"capacity": self._capacity, "data": base64.b64encode(values.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int | None = None) -> "FloatRingBuffer":
+        """Build a ring buffer from the result of to_dict"""
+        values = array("d")
+        values.frombytes(base64.b64decode(data.get("data", "")))
+        if sys.byteorder != "little":
+            values.byteswap()
+        return cls(capacity or data.get("capacity") or max(1, len(values)), values)
+
+    @classmethod
+    def restore(cls, value, capacity: int) -> "FloatRingBuffer":
+        """Build a ring buffer from a persisted value: the to_dict form or a plain list (old format)"""
+        if isinstance(value, FloatRingBuffer):
+            return cls(capacity, value)
+        if isinstance(value, dict):
+            return cls.from_dict(value, capacity)
+        if isinstance(value, (list, tuple)):
+            return cls(capacity, value)
+        return cls(capacity)
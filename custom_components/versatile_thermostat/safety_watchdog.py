@@ -0,0 +1,148 @@
+"""SafetyWatchdog: a shared timer which detects the expired temperature sensors.
+
+Without the watchdog, a stale temperature sensor is only noticed when the safety
+manager is refreshed, mostly by the periodic control cycle. The safety mode starts up
+to one cycle after the expiration and each cycle computes the time since the last
+measures of every VTherm.
+
+Each safety manager registers the date (a timestamp) at which its temperature
+measures expire (the oldest measure plus safety_delay_min). The watchdog keeps these
+deadlines in one heap and arms a single HA timer for the earliest one. A new measure
+moves the deadline of its VTherm with a push in the heap: the previous entry is left
+in the heap and is dropped when it comes on top (the deadline of a manager is the one
+in the deadlines dict). When a deadline is reached the safety state of its VTherm is
+refreshed, so the safety mode starts at the expiration time.
+"""
+
+import heapq
+import itertools
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The heap is rebuilt when it has more than this factor of entries per deadline
+HEAP_COMPACT_FACTOR = 4
+# The timer fires a bit after the deadline so that the measures are seen as expired
+DEADLINE_MARGIN_SEC = 1.0
+
+
+class SafetyWatchdog:
+    """A single timer for the temperature expiration of all the VTherms"""
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        # The deadline of each safety manager
+        self._deadlines: dict[Any, float] = {}
+        self._heap: list[tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+        self._timer_unsub: CALLBACK_TYPE | None = None
+        self._timer_deadline: float | None = None
+        # Counters
+        self._nb_expirations = 0
+
+    @callback
+    def set_deadline(self, manager: Any, deadline: float):
+        """Set the timestamp at which the temperature measures of the manager expire.
+        The manager is called (async_on_deadline) at this date"""
+        if self._deadlines.get(manager) == deadline:
+            return
+        self._deadlines[manager] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._seq), manager))
+        if len(self._heap) > HEAP_COMPACT_FACTOR * len(self._deadlines) + 16:
+            self._compact()
+        self._arm()
+
+    @callback
+    def remove(self, manager: Any):
+        """Forget the deadline of a manager"""
+        if self._deadlines.pop(manager, None) is not None:
+            self._arm()
+
+    def get_deadline(self, manager: Any) -> float | None:
+        """The deadline of a manager or None"""
+        return self._deadlines.get(manager)
+
+    def _is_current(self, entry: tuple[float, int, Any]) -> bool:
+        """True if the heap entry is the current deadline of its manager"""
+        return self._deadlines.get(entry[2]) == entry[0]
+
+    def _compact(self):
+        """Rebuild the heap with only the current deadlines"""
+        self._heap = [entry for entry in self._heap if self._is_current(entry)]
+        heapq.heapify(self._heap)
+
+    def _arm(self):
+        """Arm the HA timer for the earliest deadline if needed"""
+        # Drop the moved or removed deadlines on top of the heap
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+
+        if not self._heap:
+            self._cancel_timer()
+            return
+
+        deadline = self._heap[0][0]
+        if self._timer_unsub is not None and self._timer_deadline <= deadline:
+            # the armed timer will fire before (or with) this deadline
+            return
+
+        self._cancel_timer()
+        self._timer_deadline = deadline
+        self._timer_unsub = async_call_later(self._hass, max(0.0, deadline + DEADLINE_MARGIN_SEC - dt_util.utcnow().timestamp()), self._on_timer)
+
+    def _cancel_timer(self):
+        """Cancel the HA timer"""
+        if self._timer_unsub is not None:
+            self._timer_unsub()
+        self._timer_unsub = None
+        self._timer_deadline = None
+
+    @callback
+    def _on_timer(self, _now):
+        """Called by the HA timer. Refresh the managers whose deadline is reached and re-arm the timer"""
+        self._timer_unsub = None
+        self._timer_deadline = None
+
+        now = dt_util.utcnow().timestamp()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._is_current(entry):
+                continue
+            manager = entry[2]
+            del self._deadlines[manager]
+            self._nb_expirations += 1
+            _LOGGER.debug("SafetyWatchdog - the temperature of %s expired", manager)
+            self._hass.async_create_task(manager.async_on_deadline())
+
+        self._arm()
+
+    @callback
+    def async_shutdown(self):
+        """Forget all the deadlines and cancel the HA timer"""
+        self._deadlines = {}
+        self._heap = []
+        self._cancel_timer()
+
+    @property
+    def nb_deadlines(self) -> int:
+        """The number of registered deadlines"""
+        return len(self._deadlines)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """The counters of the watchdog"""
+        return {
+            "nb_deadlines": len(self._deadlines),
+            "heap_size": len(self._heap),
+            "nb_expirations": self._nb_expirations,
+            "next_deadline": self._heap[0][0] if self._heap else None,
+        }
+
+    def __str__(self):
+        return "SafetyWatchdog"
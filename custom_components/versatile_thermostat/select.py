@@ -117,7 +117,7 @@ class CentralModeSelect(SelectEntity, RestoreEntity):
             return
 
         if option in CENTRAL_MODES:
-            write_event_log(_LOGGER, self, f"Central mode is being changed from {old_option} to {option}")
+            write_event_log(_LOGGER, self, "Central mode is being changed from %s to %s", old_option, option)
             self._attr_current_option = option
             await self.notify_central_mode_change(old_central_mode=old_option)
 
@@ -235,7 +235,7 @@ class AutoStartStopStopModeSelect(
             return
 
         if option in self.options:
-            write_event_log(_LOGGER, self, f"Auto start/stop stop mode is being changed from {self._attr_current_option} to {option}")
+            write_event_log(_LOGGER, self, "Auto start/stop stop mode is being changed from %s to %s", self._attr_current_option, option)
             self._attr_current_option = option
             await self.update_my_state_and_vtherm()
 
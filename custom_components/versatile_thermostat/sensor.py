@@ -8,6 +8,7 @@ from collections.abc import Callable
 from homeassistant.core import HomeAssistant, callback, Event, State
 
 from homeassistant.const import (
+    EntityCategory,
     UnitOfTime,
     UnitOfPower,
     UnitOfEnergy,
@@ -38,6 +39,7 @@ from .base_thermostat import BaseThermostat
 from .vtherm_central_api import VersatileThermostatAPI
 from .base_entity import VersatileThermostatBaseEntity
 from .commons import cleanup_orphan_entity
+from .control_loop_profiler import PHASE_CONTROL_HEATING, COUNTER_SERVICE_CALLS
 from .const import (
     DOMAIN,
     DEVICE_MANUFACTURER,
@@ -94,6 +96,8 @@ async def async_setup_entry(
             TemperatureSlopeSensor(hass, unique_id, name, entry.data),
             EMATemperatureSensor(hass, unique_id, name, entry.data),
         ]
+        if VersatileThermostatAPI.get_vtherm_api(hass).performance_profiling:
+            entities.append(ControlLoopPerformanceSensor(hass, unique_id, name, entry.data))
         if entry.data.get(CONF_DEVICE_POWER):
             entities.append(EnergySensor(hass, unique_id, name, entry.data))
             if have_valve_regulation or entry.data.get(CONF_THERMOSTAT_TYPE) in [
@@ -766,6 +770,56 @@ class EMATemperatureSensor(VersatileThermostatBaseEntity, SensorEntity):
         return 2
 
 
+class ControlLoopPerformanceSensor(VersatileThermostatBaseEntity, SensorEntity):
+    """Representation of the p95 latency of the control loop (only when performance_profiling is set)"""
+
+    def __init__(self, hass: HomeAssistant, unique_id, name, entry_infos) -> None:
+        """Initialize the control loop performance sensor"""
+        super().__init__(hass, unique_id, entry_infos.get(CONF_NAME))
+        self._attr_name = "Control loop latency"
+        self._attr_unique_id = f"{self._device_name}_control_loop_latency"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @callback
+    async def async_my_climate_changed(self, event: Event = None):
+        """Called when my climate have change"""
+        profiler = self.my_climate.profiler if self.my_climate else None
+        if profiler is None:
+            return
+
+        stats = profiler.to_dict()
+        control_heating = stats["phases"].get(PHASE_CONTROL_HEATING) or {}
+        self._attr_native_value = control_heating.get("p95_ms")
+        self._attr_extra_state_attributes = {
+            "nb_control_cycles": stats["nb_control_cycles"],
+            "service_calls": stats["counters"].get(COUNTER_SERVICE_CALLS, 0),
+            **{f"{phase}_p50_ms": phase_stats["p50_ms"] for phase, phase_stats in stats["phases"].items()},
+            **{f"{phase}_p95_ms": phase_stats["p95_ms"] for phase, phase_stats in stats["phases"].items()},
+        }
+        self.async_write_ha_state()
+
+    @property
+    def icon(self) -> str | None:
+        return "mdi:timer-outline"
+
+    @property
+    def device_class(self) -> SensorDeviceClass | None:
+        return SensorDeviceClass.DURATION
+
+    @property
+    def state_class(self) -> SensorStateClass | None:
+        return SensorStateClass.MEASUREMENT
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        return UnitOfTime.MILLISECONDS
+
+    @property
+    def suggested_display_precision(self) -> int | None:
+        """Return the suggested number of decimal digits for display."""
+        return 1
+
+
 class NbActiveDeviceForBoilerSensor(SensorEntity):
     """Representation of the  number of VTherm
     which are active and configured to activate the boiler"""
@@ -786,6 +840,9 @@ class NbActiveDeviceForBoilerSensor(SensorEntity):
         self._entities = []
         self._attr_active_device_ids = []  # Holds the entity ids of active devices``
         self._cancel_listener_nb_active: Callable | None = None
+        # The running contribution (value, active device ids) of each VTherm by entity_id and their sum
+        self._contributions: dict[str, tuple[float, list[str]]] = {}
+        self._contributions_sum = 0
 
     @property
     def extra_state_attributes(self) -> dict:
@@ -838,6 +895,7 @@ class NbActiveDeviceForBoilerSensor(SensorEntity):
             return
 
         self.cancel_listening_nb_active()
+        self.reset_contributions()
 
         for entity in list(component.entities):
             if isinstance(entity, BaseThermostat) and entity.is_used_by_central_boiler:
@@ -906,26 +964,53 @@ class NbActiveDeviceForBoilerSensor(SensorEntity):
                 self,
             )
 
-        nb_active = 0
-        active_device_ids = []
+        await self.async_update_contributions(self._entities)
 
-        for entity in self._entities:
-            device_actives = entity.device_actives
-            _LOGGER.debug(
-                "%s - After examining the device_actives, device_actives is %s",
-                entity.name,
-                device_actives,
-            )
+    def calculate_contribution(self, entity: BaseThermostat) -> tuple[float, list[str]]:
+        """Calculate the contribution of one VTherm: the number of its active devices and their ids"""
+        device_actives = entity.device_actives
+        _LOGGER.debug(
+            "%s - After examining the device_actives, device_actives is %s",
+            entity.name,
+            device_actives,
+        )
+        return len(device_actives), list(device_actives)
 
-            nb_active += len(device_actives)
-            active_device_ids.extend(device_actives)
+    async def async_update_contributions(self, entities: list[BaseThermostat]):
+        """Update the running contributions of the given VTherms. The state is written
+        and the central boiler is refreshed only if the aggregated value have changed"""
+        changed = self._attr_native_value is None
 
-        self._attr_native_value = nb_active
-        self._attr_active_device_ids = active_device_ids
+        for entity in entities:
+            new_contribution = self.calculate_contribution(entity)
+            old_contribution = self._contributions.get(entity.entity_id)
+            if new_contribution == old_contribution:
+                continue
+            self._contributions[entity.entity_id] = new_contribution
+            # round to avoid the accumulation of float errors in the running sum
+            self._contributions_sum = round(self._contributions_sum + new_contribution[0] - (old_contribution[0] if old_contribution else 0), 6)
+            changed = True
+
+        if not changed:
+            return
+
+        self._attr_native_value = self._contributions_sum
+        self._attr_active_device_ids = [device_id for _, device_ids in self._contributions.values() for device_id in device_ids]
 
         self.async_write_ha_state()
         await VersatileThermostatAPI.get_vtherm_api(self._hass).central_boiler_manager.refresh_central_boiler_custom_attributes()
 
+    async def async_update_vtherm(self, vtherm: BaseThermostat):
+        """Update the contribution of one VTherm only (called when one of its underlyings changes)"""
+        if vtherm.entity_id in self._contributions:
+            await self.async_update_contributions([vtherm])
+
+    def reset_contributions(self):
+        """Reset the running contributions. Should be called when the list of VTherms changes"""
+        self._contributions = {}
+        self._contributions_sum = 0
+        self._attr_native_value = None
+
     @property
     def active_device_ids(self) -> list:
         """Get the list of active device id"""
@@ -994,6 +1079,7 @@ class TotalPowerActiveDeviceForBoilerSensor(NbActiveDeviceForBoilerSensor):
             return
 
         self.cancel_listening_power()
+        self.reset_contributions()
 
         for entity in list(component.entities):
             if isinstance(entity, BaseThermostat) and entity.is_used_by_central_boiler:
@@ -1019,6 +1105,20 @@ class TotalPowerActiveDeviceForBoilerSensor(NbActiveDeviceForBoilerSensor):
 
         await self.calculate_total_power(None)
 
+    @overrides
+    def calculate_contribution(self, entity: BaseThermostat) -> tuple[float, list[str]]:
+        """Calculate the contribution of one VTherm: its mean cycle power and its activable devices ids"""
+        mean_cycle_power = entity.power_manager.mean_cycle_power
+        if mean_cycle_power is None or mean_cycle_power <= 0:
+            return 0, []
+
+        _LOGGER.debug(
+            "%s - After examining the mean_cycle_power, mean_cycle_power is %s",
+            entity.name,
+            mean_cycle_power,
+        )
+        return mean_cycle_power, [under.entity_id for under in entity.activable_underlying_entities]
+
     async def calculate_total_power(self, event: Event):
         """Calculate the total active power that have an
         influence on the central boiler and update the list of active device names."""
@@ -1056,29 +1156,12 @@ class TotalPowerActiveDeviceForBoilerSensor(NbActiveDeviceForBoilerSensor):
                 self,
             )
 
-        total_active_power = 0
-        active_device_ids = []
-
-        for entity in self._entities:
-            mean_cycle_power = entity.power_manager.mean_cycle_power
-            if mean_cycle_power is None or mean_cycle_power <= 0:
-                continue
-
-            _LOGGER.debug(
-                "%s - After examining the mean_cycle_power, mean_cycle_power is %s",
-                entity.name,
-                mean_cycle_power,
-            )
-
-            active_device_ids.extend([under.entity_id for under in entity.activable_underlying_entities])
-
-            total_active_power += mean_cycle_power
-
-        self._attr_native_value = total_active_power
-        self._attr_active_device_ids = active_device_ids
+        # Only the VTherm which have sent the event have a new contribution
+        changed_entities = self._entities
+        if event is not None:
+            changed_entities = [entity for entity in self._entities if entity.entity_id == event.data.get("entity_id")]
 
-        self.async_write_ha_state()
-        await VersatileThermostatAPI.get_vtherm_api(self._hass).central_boiler_manager.refresh_central_boiler_custom_attributes()
+        await self.async_update_contributions(changed_entities)
 
     @property
     def active_device_ids(self) -> list:
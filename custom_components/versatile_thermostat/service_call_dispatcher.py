@@ -0,0 +1,276 @@
+"""ServiceCallDispatcher: batching of the service calls sent to the underlyings.
+
+A VTherm with several underlyings sends the same command to each of them (a regulated
+temperature, a valve opening, a turn_on). Sent one after the other, they cost one
+round-trip of the Zigbee/MQTT bridge each.
+
+The first call received opens a collection window of one event-loop iteration. All the
+calls made by the underlyings started together (with asyncio.gather) are received in
+that window. Then the calls with the same domain, service and payload are merged into
+one call with the list of the entity_id. The other calls are sent concurrently, with at
+most max_concurrent calls in flight per integration of the entities: a slow bridge does
+not delay the calls to the other integrations.
+
+Each caller gets its own result or exception: if a merged call fails, it is sent again
+entity by entity so that the error is reported by the underlying which caused it. The
+collected calls are sent from their own task: the cancellation of a caller does not
+cancel the calls of the others.
+
+The calls are then rate limited by the CommandQueue of the integration of the entities.
+A merged call costs one token. If it has to wait, each entity waits with its own command
+in the queue so that a newer command for an entity supersedes only the waiting command
+of this entity, and the identical commands still waiting are merged again when they
+leave the queue.
+"""
+
+import asyncio
+import functools
+import json
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceResponse
+from homeassistant.exceptions import HomeAssistantError
+
+from .command_queue import CommandQueue, PRIORITY_HIGH, PRIORITY_NORMAL
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The maximum number of service calls in flight per integration
+MAX_CONCURRENT_SERVICE_CALLS = 4
+# The services which change the on/off state: a new one supersedes a waiting one
+_SWITCH_STATE_SERVICES = ("turn_on", "turn_off", "toggle")
+
+
+def _bind_call_args(domain: str, service: str, service_data: dict | None = None, blocking: bool = False, context=None, target: dict | None = None, return_response: bool = False) -> dict[str, Any]:
+    """Name the arguments of a ServiceRegistry.async_call"""
+    return {
+        "domain": domain,
+        "service": service,
+        "service_data": service_data,
+        "blocking": blocking,
+        "context": context,
+        "target": target,
+        "return_response": return_response,
+    }
+
+
+class _PendingCall:
+    """A service call waiting for the end of the collection window"""
+
+    __slots__ = ("args", "kwargs", "params", "entity_id", "entity_in_target", "key", "future", "priority")
+
+    def __init__(self, args: tuple, kwargs: dict, future: asyncio.Future, priority: int = PRIORITY_NORMAL):
+        self.args = args
+        self.kwargs = kwargs
+        self.params = _bind_call_args(*args, **kwargs)
+        self.future = future
+        self.entity_id, self.entity_in_target = self._find_entity_id()
+        self.key = self._build_key()
+        # The turn-off commands are always sent first
+        service_data = self.params["service_data"] or {}
+        is_off = self.params["service"] == "turn_off" or service_data.get("hvac_mode") == "off"
+        self.priority = PRIORITY_HIGH if is_off else priority
+
+    def _find_entity_id(self) -> tuple[str | None, bool]:
+        """The single entity_id of the call and True if it is given in the target"""
+        target = self.params["target"] or {}
+        if isinstance(target.get(ATTR_ENTITY_ID), str):
+            return target[ATTR_ENTITY_ID], True
+        service_data = self.params["service_data"] or {}
+        if isinstance(service_data.get(ATTR_ENTITY_ID), str):
+            return service_data[ATTR_ENTITY_ID], False
+        return None, False
+
+    def _build_key(self) -> tuple | None:
+        """The calls with the same key can be merged. None if the call cannot be merged"""
+        if self.entity_id is None or self.params["return_response"]:
+            return None
+
+        def without_entity(values: dict | None) -> dict:
+            return {name: value for name, value in (values or {}).items() if name != ATTR_ENTITY_ID}
+
+        try:
+            payload = json.dumps([without_entity(self.params["service_data"]), without_entity(self.params["target"])], sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+        context = self.params["context"]
+        return (self.params["domain"], self.params["service"], self.params["blocking"], id(context) if context else None, self.entity_in_target, payload)
+
+    @property
+    def supersede_key(self) -> tuple | None:
+        """The calls with the same supersede key (the same entity and kind of service) replace each other
+        while they wait in the CommandQueue"""
+        if self.entity_id is None or self.params["return_response"]:
+            return None
+        service = self.params["service"]
+        return (self.params["domain"], "switch_state" if service in _SWITCH_STATE_SERVICES else service, self.entity_id)
+
+    def merged_args(self, entity_ids: list[str]) -> tuple:
+        """The arguments of the call for all the entity_ids"""
+        service_data = dict(self.params["service_data"] or {})
+        target = dict(self.params["target"] or {})
+        if self.entity_in_target:
+            target[ATTR_ENTITY_ID] = entity_ids
+        else:
+            service_data[ATTR_ENTITY_ID] = entity_ids
+        return (self.params["domain"], self.params["service"], service_data, self.params["blocking"], self.params["context"], target or None, False)
+
+
+class ServiceCallDispatcher:
+    """Merges and bounds the service calls sent to the underlyings"""
+
+    def __init__(self, hass: HomeAssistant, max_concurrent: int = MAX_CONCURRENT_SERVICE_CALLS):
+        self._hass = hass
+        self._max_concurrent = max_concurrent
+        # The bound of the calls in flight of each integration (None for the entities of no known integration)
+        self._semaphores: dict[str | None, asyncio.Semaphore] = {}
+        self._command_queue = CommandQueue(hass)
+        self._pending: list[_PendingCall] = []
+        self._is_collecting = False
+        self._nb_commands = 0
+        self._nb_service_calls = 0
+        self._nb_merged_commands = 0
+
+    @property
+    def command_queue(self) -> CommandQueue:
+        """The rate limited queues of the integrations"""
+        return self._command_queue
+
+    async def async_call(self, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> ServiceResponse:
+        """Send a service call. Takes the same arguments as hass.services.async_call and the priority in the CommandQueue"""
+        call = _PendingCall(args, kwargs, asyncio.get_running_loop().create_future(), priority)
+        self._nb_commands += 1
+        if call.key is None:
+            await self._async_send_single(call)
+            return call.future.result()
+
+        self._pending.append(call)
+        if not self._is_collecting:
+            # This call opens the collection window: the batch is sent by its own task once the other underlyings have added their calls
+            self._is_collecting = True
+            self._hass.async_create_background_task(self._async_send_collected(), "versatile_thermostat_service_call_batch")
+        # The cancellation of this caller does not cancel the call, which may be merged with the calls of others
+        return await asyncio.shield(call.future)
+
+    async def _async_send_collected(self):
+        """Send the calls collected during one event-loop iteration"""
+        calls: list[_PendingCall] = []
+        try:
+            await asyncio.sleep(0)
+            self._is_collecting = False
+            calls, self._pending = self._pending, []
+            await self._async_send_batch(calls)
+        finally:
+            if self._is_collecting:
+                # Cancelled during the collection window
+                self._is_collecting = False
+                calls, self._pending = self._pending, []
+            for call in calls:
+                if not call.future.done():
+                    call.future.set_exception(HomeAssistantError(f"The service call {call.params['domain']}.{call.params['service']} has not been sent"))
+
+    async def _async_send_batch(self, calls: list[_PendingCall]):
+        """Send the collected calls: one call per group of identical commands"""
+        groups: dict[tuple, list[_PendingCall]] = {}
+        for call in calls:
+            # A merged call is sent to the entities of one integration, with one priority in the CommandQueue
+            groups.setdefault((call.key, call.priority, self._command_queue.integration_of(call.entity_id)), []).append(call)
+
+        # The errors are given to the callers: a failing group does not stop the others
+        await asyncio.gather(*(self._async_send_group(group) for group in groups.values()), return_exceptions=True)
+
+    async def _async_send_group(self, calls: list[_PendingCall]):
+        """Send one call for all the entities of the group"""
+        # The first call of each entity (the others are identical)
+        first_calls: dict[str, _PendingCall] = {}
+        for call in calls:
+            first_calls.setdefault(call.entity_id, call)
+        if len(first_calls) == 1:
+            # Nothing to merge: the call is sent unchanged (and only once)
+            await self._async_send_single(calls[0])
+            for call in calls[1:]:
+                self._copy_result(calls[0], call)
+            return
+
+        # Each entity has its own command in the CommandQueue, sent in one merged call
+        integration = self._command_queue.integration_of(calls[0].entity_id)
+        results = await self._command_queue.async_submit_merged(
+            [(entity_id, functools.partial(self._async_limited_call, integration, call.args, call.kwargs), call.supersede_key) for entity_id, call in first_calls.items()],
+            functools.partial(self._async_send_merged, calls[0], integration),
+            calls[0].priority,
+            calls[0].key,
+        )
+
+        outcomes = dict(zip(first_calls, results))
+        for call in calls:
+            if call.future.done():
+                continue
+            outcome = outcomes[call.entity_id]
+            if isinstance(outcome, asyncio.CancelledError):
+                # The command has been cancelled in the CommandQueue (shutdown): the caller gets an error it can handle
+                call.future.set_exception(HomeAssistantError(f"The service call {call.params['domain']}.{call.params['service']} has been cancelled"))
+            elif isinstance(outcome, BaseException):
+                call.future.set_exception(outcome)
+            else:
+                call.future.set_result(outcome)
+
+    async def _async_send_merged(self, call: _PendingCall, integration: str | None, entity_ids: tuple[str, ...]) -> ServiceResponse:
+        """Send the call once for all the entity_ids"""
+        response = await self._async_limited_call(integration, call.merged_args(list(entity_ids)), {})
+        self._nb_merged_commands += len(entity_ids)
+        _LOGGER.debug("ServiceCallDispatcher - %s.%s sent once for %s", call.params["domain"], call.params["service"], entity_ids)
+        return response
+
+    async def _async_send_single(self, call: _PendingCall):
+        """Send the call as it has been requested"""
+        entity_ids = [call.entity_id] if call.entity_id else []
+        try:
+            response = await self._command_queue.async_submit(
+                entity_ids,
+                functools.partial(self._async_limited_call, self._command_queue.integration_of(call.entity_id) if call.entity_id else None, call.args, call.kwargs),
+                call.priority,
+                call.supersede_key,
+            )
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            if not call.future.done():
+                call.future.set_exception(err)
+            return
+        if not call.future.done():
+            call.future.set_result(response)
+
+    async def _async_limited_call(self, integration: str | None, args: tuple, kwargs: dict) -> ServiceResponse:
+        """Send the service call when less than max_concurrent calls to the integration are in flight"""
+        semaphore = self._semaphores.get(integration)
+        if semaphore is None:
+            semaphore = self._semaphores[integration] = asyncio.Semaphore(self._max_concurrent)
+        async with semaphore:
+            self._nb_service_calls += 1
+            return await self._hass.services.async_call(*args, **kwargs)
+
+    @staticmethod
+    def _copy_result(source: _PendingCall, destination: _PendingCall):
+        """Give the result of a call to an identical one"""
+        if destination.future.done() or not source.future.done():
+            return
+        if source.future.exception() is not None:
+            destination.future.set_exception(source.future.exception())
+        else:
+            destination.future.set_result(source.future.result())
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Statistics of the dispatcher (for diagnostics)"""
+        return {
+            "nb_commands": self._nb_commands,
+            "nb_service_calls": self._nb_service_calls,
+            "nb_merged_commands": self._nb_merged_commands,
+            "command_queue": self._command_queue.stats,
+        }
+
+    def async_shutdown(self):
+        """Cancel the commands waiting in the CommandQueue"""
+        self._command_queue.async_shutdown()
@@ -0,0 +1,101 @@
+"""StartupOrchestrator: the concurrent startup of the VTherms.
+
+When Home Assistant is started, init_vtherm_links starts all the VTherms: each one
+starts its managers, restores its previous state, initializes its presets and reads
+its sensors. Started one after the other, the last VTherm of a big installation is
+controlled tens of seconds after the first one.
+
+The orchestrator runs the startups concurrently, with at most max_concurrency of them
+at the same time (the central configuration is resolved once by the caller). An error
+in the startup of a VTherm is logged and does not stop the others. The duration of
+each startup is kept in the report of the last run, so that the time to control can be
+checked: it should be near the duration of the slowest VTherm.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The default number of VTherms started at the same time
+DEFAULT_STARTUP_CONCURRENCY = 10
+
+
+class StartupOrchestrator:
+    """Runs the startup of the VTherms with a bounded concurrency"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_STARTUP_CONCURRENCY):
+        self._max_concurrency = max(1, max_concurrency)
+        # The durations (in sec) of the startups of the last run by entity_id
+        self._durations: dict[str, float] = {}
+        self._errors: dict[str, str] = {}
+        self._total_sec: float | None = None
+
+    @property
+    def max_concurrency(self) -> int:
+        """The maximal number of startups at the same time"""
+        return self._max_concurrency
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: int):
+        self._max_concurrency = max(1, value)
+
+    async def async_start(self, vtherms: list[Any], central_configuration) -> dict[str, float]:
+        """Start the VTherms (calls async_startup) and return the duration of each startup by entity_id"""
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        durations: dict[str, float] = {}
+        errors: dict[str, str] = {}
+
+        async def start_one(vtherm):
+            async with semaphore:
+                began = time.perf_counter()
+                try:
+                    await vtherm.async_startup(central_configuration)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.error("Error initializing entity %s: %s", vtherm.entity_id, err)
+                    errors[vtherm.entity_id] = str(err)
+                durations[vtherm.entity_id] = time.perf_counter() - began
+
+        began = time.perf_counter()
+        await asyncio.gather(*(start_one(vtherm) for vtherm in vtherms))
+        total_sec = time.perf_counter() - began
+
+        # A run for one VTherm (reload of an entry) only updates the report of this VTherm
+        if len(vtherms) > 1 or not self._durations:
+            self._durations = {}
+            self._errors = {}
+            self._total_sec = total_sec
+        for entity_id in durations:
+            self._errors.pop(entity_id, None)
+        self._durations.update(durations)
+        self._errors.update(errors)
+
+        if durations:
+            slowest = max(durations, key=durations.get)
+            _LOGGER.info(
+                "%d VTherm(s) started in %.2f s (concurrency %d). The slowest is %s with %.2f s, the sum of the startups is %.2f s",
+                len(durations),
+                total_sec,
+                self._max_concurrency,
+                slowest,
+                durations[slowest],
+                sum(durations.values()),
+            )
+        return durations
+
+    def get_startup_duration(self, entity_id: str) -> float | None:
+        """The duration in sec of the last startup of a VTherm or None"""
+        return self._durations.get(entity_id)
+
+    @property
+    def report(self) -> dict[str, Any]:
+        """The report of the last startup of all the VTherms"""
+        return {
+            "max_concurrency": self._max_concurrency,
+            "total_sec": None if self._total_sec is None else round(self._total_sec, 3),
+            "vtherms": {entity_id: round(duration, 3) for entity_id, duration in self._durations.items()},
+            "errors": dict(self._errors),
+        }
@@ -0,0 +1,157 @@
+"""Batch identification of the thermal model of a room from its recorded history.
+
+The Auto TPI learning uses a first-order model of the room:
+
+    dT_in/dt = capacity * power - k_loss * (T_in - T_out) + gain
+
+where capacity is the adiabatic heating rate at 100% power (°C/h), k_loss the loss
+rate (1/h) and gain the free heat (sun, people) in °C/h. The online learning
+estimates it one cycle at a time. Here it is fitted in one pass on weeks of history:
+
+1. the indoor temperature, outdoor temperature and power columns are held on a
+   uniform grid (step_sec),
+2. the rise rate over each sliding window (window_min) is regressed on the mean
+   power and the mean indoor/outdoor difference of the window,
+3. the 3x3 normal equations are solved with a ridge regularization toward a prior.
+
+Everything is done with cumulative sums so a year of 1-minute data is a few numpy
+passes over 500k points. The TPI coefficients are then the fixed point of the
+online learning rules: Kext = k_loss / capacity and Kint = aggressiveness / (rise
+reachable in one cycle).
+"""
+
+import math
+from typing import Any
+
+import numpy as np
+
+Columns = tuple[np.ndarray, np.ndarray]
+
+IDENTIFICATION_STEP_SEC = 60
+IDENTIFICATION_WINDOW_MIN = 30
+IDENTIFICATION_RIDGE = 1e-3
+# A sensor value older than this is considered as missing
+MAX_SENSOR_AGE_SEC = 6 * 3600
+# The power should move for the capacity to be observable
+MIN_POWER_STD = 0.05
+MIN_WINDOWS = 48
+
+
+def hold_on_grid(columns: Columns, grid: np.ndarray, max_age_sec: float = MAX_SENSOR_AGE_SEC) -> np.ndarray:
+    """The last value at or before each grid time (sample-and-hold). NaN before the first value or if too old"""
+    timestamps, values = columns
+    index = np.searchsorted(timestamps, grid, side="right") - 1
+    held = values[np.maximum(index, 0)].astype(np.float64)
+    held[(index < 0) | (grid - timestamps[np.maximum(index, 0)] > max_age_sec)] = np.nan
+    return held
+
+
+def _window_means(values: np.ndarray, window: int) -> np.ndarray:
+    """The mean of the window samples starting at each index (NaN if one is NaN)"""
+    missing = np.isnan(values)
+    cumsum = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values))))
+    nb_missing = np.concatenate(([0], np.cumsum(missing)))
+    means = (cumsum[window:] - cumsum[:-window]) / window
+    means[nb_missing[window:] - nb_missing[:-window] > 0] = np.nan
+    return means
+
+
+def _sorted(columns: Columns) -> Columns:
+    timestamps, values = (np.asarray(column, dtype=np.float64) for column in columns)
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], values[order]
+
+
+def identify_thermal_model(
+    temp_in: Columns,
+    temp_out: Columns,
+    power_percent: Columns,
+    cycle_min: float,
+    aggressiveness: float = 1.0,
+    min_coef_int: float = 0.01,
+    max_coef_int: float = 1.0,
+    prior_capacity: float | None = None,
+    prior_k_loss: float | None = None,
+    step_sec: float = IDENTIFICATION_STEP_SEC,
+    window_min: float = IDENTIFICATION_WINDOW_MIN,
+    ridge: float = IDENTIFICATION_RIDGE,
+) -> dict[str, Any]:
+    """Fit the thermal model on the (timestamps, values) columns of the sensors.
+
+    power_percent is in % (0-100). Returns a dict with success, capacity (°C/h), k_loss (1/h),
+    gain (°C/h), coef_int, coef_ext, r_squared, confidence (0-1) and samples_used, or success False
+    and an error
+    """
+    temp_in, temp_out, power_percent = _sorted(temp_in), _sorted(temp_out), _sorted(power_percent)
+    if min(temp_in[0].size, temp_out[0].size, power_percent[0].size) == 0:
+        return {"success": False, "error": "Missing history", "samples_used": 0}
+
+    start = max(temp_in[0][0], temp_out[0][0], power_percent[0][0])
+    end = min(temp_in[0][-1], temp_out[0][-1], power_percent[0][-1]) + step_sec
+    grid = np.arange(start, end, step_sec)
+    window = max(1, int(round(window_min * 60 / step_sec)))
+    if grid.size <= window:
+        return {"success": False, "error": "History too short", "samples_used": 0}
+
+    t_in = hold_on_grid(temp_in, grid)
+    delta_t = t_in - hold_on_grid(temp_out, grid)
+    power = hold_on_grid(power_percent, grid) / 100.0
+
+    window_h = window * step_sec / 3600.0
+    rate = (t_in[window:] - t_in[:-window]) / window_h
+    mean_power = _window_means(power, window)[:-1]
+    mean_delta_t = _window_means(delta_t, window)[:-1]
+
+    valid = np.isfinite(rate) & np.isfinite(mean_power) & np.isfinite(mean_delta_t)
+    nb_windows = int(np.count_nonzero(valid))
+    if nb_windows < MIN_WINDOWS:
+        return {"success": False, "error": f"Not enough valid samples ({nb_windows})", "samples_used": nb_windows}
+    if float(np.std(mean_power[valid])) < MIN_POWER_STD:
+        return {"success": False, "error": "The power does not vary enough to identify the capacity", "samples_used": nb_windows}
+
+    features = np.column_stack((mean_power[valid], -mean_delta_t[valid], np.ones(nb_windows)))
+    target = rate[valid]
+
+    # Ridge toward the prior, scaled by the diagonal so that it does not depend on the units of the features
+    prior = np.array([prior_capacity or 0.0, prior_k_loss or 0.0, 0.0])
+    gram = features.T @ features
+    scale = ridge * np.diag(np.diag(gram))
+    normal_matrix = gram + scale
+    try:
+        coefs = np.linalg.solve(normal_matrix, features.T @ target + scale @ prior)
+    except np.linalg.LinAlgError:
+        return {"success": False, "error": "Singular regression", "samples_used": nb_windows}
+    capacity, k_loss, gain = (float(value) for value in coefs)
+
+    if not (math.isfinite(capacity) and capacity > 0 and math.isfinite(k_loss) and k_loss > 0):
+        return {"success": False, "error": f"Non physical model (capacity={capacity:.3f}, k_loss={k_loss:.4f})", "samples_used": nb_windows}
+
+    residuals = target - features @ coefs
+    ss_res = float(residuals @ residuals)
+    ss_tot = float(((target - target.mean()) ** 2).sum())
+    r_squared = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
+
+    # The overlapping windows are correlated: only one window out of `window` is independent
+    nb_independent = max(nb_windows / window, 4.0)
+    sigma2 = ss_res / max(nb_windows - 3, 1)
+    covariance = sigma2 * np.linalg.inv(normal_matrix) * (nb_windows / nb_independent)
+    rel_se = max(math.sqrt(max(covariance[0, 0], 0.0)) / capacity, math.sqrt(max(covariance[1, 1], 0.0)) / k_loss)
+    confidence = max(0.0, min(1.0, r_squared)) * max(0.0, 1.0 - 2.0 * rel_se)
+
+    # Fixed points of the online learning: Kext compensates the losses, Kint covers the gap in one cycle
+    coef_ext = k_loss / capacity
+    loss_factor = min(coef_ext * max(0.0, float(np.median(mean_delta_t[valid]))), 0.95)
+    reachable_per_cycle = capacity * (1.0 - loss_factor) * cycle_min / 60.0
+    coef_int = min(max(aggressiveness / reachable_per_cycle, min_coef_int), max_coef_int)
+
+    return {
+        "success": True,
+        "capacity": round(capacity, 4),
+        "k_loss": round(k_loss, 5),
+        "gain": round(gain, 4),
+        "coef_int": round(coef_int, 4),
+        "coef_ext": round(coef_ext, 4),
+        "r_squared": round(r_squared, 3),
+        "confidence": round(confidence, 3),
+        "samples_used": nb_windows,
+    }
@@ -1,5 +1,6 @@
 # pylint: disable=line-too-long, too-many-lines, abstract-method
 """ A climate over climate classe """
+import asyncio
 import logging
 from vtherm_api.log_collector import get_vtherm_logger
 from typing import Optional
@@ -189,14 +190,14 @@ class ThermostatOverClimate(BaseThermostat[UnderlyingClimate]):
             # target temperature and send it to all underlyings only when it differs from
             # the last sent value, to avoid resending the same setpoint on each cycle.
             self._regulated_target_temp = self.target_temperature
-            for under in self._underlyings:
-                if under.last_sent_temperature == self.target_temperature:
-                    continue
-                await under.set_temperature(
-                    self.target_temperature,
-                    self._attr_max_temp,
-                    self._attr_min_temp,
+            # Sent together so that the identical commands are merged by the ServiceCallDispatcher
+            await asyncio.gather(
+                *(
+                    under.set_temperature(self.target_temperature, self._attr_max_temp, self._attr_min_temp)
+                    for under in self._underlyings
+                    if under.last_sent_temperature != self.target_temperature
                 )
+            )
             # Reset the timer of last regulation change to avoid time delta too high
             self._last_regulation_change = self.now
             return
@@ -245,6 +246,7 @@ class ThermostatOverClimate(BaseThermostat[UnderlyingClimate]):
         )
 
         self._last_regulation_change = self.now
+        sends = []
         for under in self._underlyings:
             # issue 348 - use device temperature if configured as offset
             offset_temp = 0
@@ -284,12 +286,17 @@ class ThermostatOverClimate(BaseThermostat[UnderlyingClimate]):
                 target_temp,
             )
 
-            await under.set_temperature(
-                target_temp,
-                self._attr_max_temp,
-                self._attr_min_temp,
+            sends.append(
+                under.set_temperature(
+                    target_temp,
+                    self._attr_max_temp,
+                    self._attr_min_temp,
+                )
             )
 
+        # All the underlyings are updated in one round-trip (see ServiceCallDispatcher)
+        await asyncio.gather(*sends)
+
         # Update regulated_target_temp after the loop to avoid affecting dtemp calculation for other underlyings
         self._regulated_target_temp = new_regulated_temp
 
@@ -729,7 +736,7 @@ class ThermostatOverClimate(BaseThermostat[UnderlyingClimate]):
     ):
         """Handle underlying changes. This is called by the UnderlyingClimate class when the entity changes. The UnderlyingClimate does some checks to ensure that the change is relevant. When an attribute is not changed, the corresponding parameter is None."""
 
-        write_event_log(_LOGGER, self, f"Underlying climate {under.entity_id}state changed from {old_state} to new_state {new_state}")
+        write_event_log(_LOGGER, self, "Underlying climate %sstate changed from %s to new_state %s", under.entity_id, old_state, new_state)
 
         async def end_climate_changed(changes: bool):
             """To end the event management"""
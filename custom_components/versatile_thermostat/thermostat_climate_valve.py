@@ -17,14 +17,14 @@ from .underlyings import UnderlyingValveRegulation, UnderlyingClimate
 from .base_thermostat import ConfigData
 from .thermostat_climate import ThermostatOverClimate
 from .thermostat_prop import ThermostatProp
+from .vtherm_central_api import VersatileThermostatAPI
 from .cycle_scheduler import CycleScheduler
+from .valve_command_stage import ValveCommandStage
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
 from .commons import write_event_log
 from .vtherm_hvac_mode import VThermHvacMode, VThermHvacMode_OFF, VThermHvacMode_SLEEP
 
-# from .vtherm_central_api import VersatileThermostatAPI
-
 _LOGGER = get_vtherm_logger(__name__)
 
 
@@ -57,6 +57,8 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
         self._recalibrate_lock: asyncio.Lock = asyncio.Lock()
         self._climate_under_initialized: bool = False
         self._valve_under_initialized: bool = False
+        # The commands of all the valves (see valve_command_hysteresis)
+        self._valve_command_stage: ValveCommandStage = ValveCommandStage()
 
         super().__init__(hass, unique_id, name, entry_infos)
 
@@ -99,6 +101,8 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
                 int(x.strip()) for x in self._max_opening_degrees.split(",")
             ]
 
+        self._valve_command_stage.hysteresis = VersatileThermostatAPI.get_vtherm_api(self._hass).valve_command_hysteresis
+
         for idx, _ in enumerate(config_entry.get(CONF_UNDERLYING_LIST)):
             # number of opening should equal number of underlying
             opening = opening_list[idx]
@@ -118,6 +122,7 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
                 max_opening_degree=(max_opening_degrees_list[idx] if idx < len(max_opening_degrees_list) else opening_entity.attributes.get("max", 100) if opening_entity else 100),
                 max_closing_degree=self._max_closing_degree,
                 opening_threshold=self._opening_threshold_degree,
+                command_stage=self._valve_command_stage,
             )
             self._underlyings_valve_regulation.append(under)
 
@@ -128,6 +133,7 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
             cycle_duration_sec=self._cycle_min * 60,
             min_activation_delay=self.minimal_activation_delay,
             min_deactivation_delay=self.minimal_deactivation_delay,
+            master_clock=VersatileThermostatAPI.get_vtherm_api(self._hass).cycle_master_clock,
         ))
 
     async def init_underlyings_completed(self, under_entity_id: Optional[str] = None):
@@ -220,6 +226,7 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
                         "auto_regulation_dpercent": self._auto_regulation_dpercent,
                         "auto_regulation_period_min": self._auto_regulation_period_min,
                         "last_calculation_timestamp": (self._last_calculation_timestamp.astimezone(self._current_tz).isoformat() if self._last_calculation_timestamp else None),
+                        "valve_commands": self._valve_command_stage.stats,
                     },
                     "underlying_valves": valve_attributes,
                 }
@@ -323,13 +330,13 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
 
         # Don't send temperature if hvac_mode is off
         if self.vtherm_hvac_mode != VThermHvacMode_OFF:
-            for under in self._underlyings:
-                if self.target_temperature != under.last_sent_temperature:
-                    await under.set_temperature(
-                        self.target_temperature,
-                        self._attr_max_temp,
-                        self._attr_min_temp,
-                    )
+            await asyncio.gather(
+                *(
+                    under.set_temperature(self.target_temperature, self._attr_max_temp, self._attr_min_temp)
+                    for under in self._underlyings
+                    if self.target_temperature != under.last_sent_temperature
+                )
+            )
 
             self._last_regulation_change = self.now
             self.reset_last_change_time_from_vtherm()
@@ -338,8 +345,8 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
             "%s - last_regulation_change is now: %s and last_change_from_vtherm is now: %s", self, self._last_regulation_change, self._last_change_time_from_vtherm
         )  # pylint: disable=protected-access
 
-        for under in self._underlyings_valve_regulation:
-            await under.set_valve_open_percent()
+        # The commands of all the valves are computed at once and sent concurrently
+        await self._valve_command_stage.async_apply(self._underlyings_valve_regulation)
 
     @overrides
     def build_hvac_list(self) -> list[VThermHvacMode]:
@@ -364,6 +371,11 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
         else:
             _LOGGER.debug("%s - no underlying_climate_start_hvac_action_date to calculate energy", self)
 
+    @property
+    def valve_command_stage(self) -> ValveCommandStage:
+        """The commands sent to the valves and their counters"""
+        return self._valve_command_stage
+
     @property
     def have_valve_regulation(self) -> bool:
         """True if the Thermostat is regulated by valve"""
@@ -509,7 +521,7 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
         if self.lock_manager.check_is_locked("service_recalibrate_valves"):
             return {"message": "thermostat locked"}
 
-        write_event_log(_LOGGER, self, f"Calling SERVICE_RECALIBRATE_VALVES delay_seconds={delay_seconds}")
+        write_event_log(_LOGGER, self, "Calling SERVICE_RECALIBRATE_VALVES delay_seconds=%s", delay_seconds)
 
         # Validate underlyings synchronously before launching background task
         if not self._underlyings_valve_regulation:
@@ -614,8 +626,9 @@ class ThermostatOverClimateValve(ThermostatProp[UnderlyingClimate], ThermostatOv
                 except Exception as exc:  # pylint: disable=broad-except
                     _LOGGER.error("%s - Error during recalibration: %s", self, exc)
 
-            # Restore requested state
+            # Restore requested state. The valves are not at the last sent values anymore
             _LOGGER.info("%s - Recalibration - Restoring requested state", self)
+            self._valve_command_stage.invalidate()
             if expected_state:
                 try:
                     self.requested_state.set_state(
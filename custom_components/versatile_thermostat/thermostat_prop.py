@@ -253,6 +253,11 @@ class ThermostatProp(BaseThermostat[T], Generic[T]):
         if self._algo_handler and hasattr(self._algo_handler, "update_attributes"):
             self._algo_handler.update_attributes()
 
+    def apply_tpi_config(self, entry_infos: ConfigData):
+        """Apply the TPI parameters of a new central configuration."""
+        if hasattr(self._algo_handler, "apply_tpi_config"):
+            self._algo_handler.apply_tpi_config(entry_infos)
+
     # =========================================================================
     # SERVICE METHODS - Delegate to handler
     # =========================================================================
@@ -315,6 +320,24 @@ class ThermostatProp(BaseThermostat[T], Generic[T]):
         else:
             raise ServiceValidationError(f"{self} - This service is only available for TPI algorithm.")
 
+    async def service_auto_tpi_identify_model(
+        self,
+        apply: bool,
+        save_to_config: bool,
+        start_date=None,
+        end_date=None,
+    ):
+        """Service: identify the Auto TPI thermal model from the history."""
+        if hasattr(self._algo_handler, 'service_auto_tpi_identify_model'):
+            return await self._algo_handler.service_auto_tpi_identify_model(
+                apply=apply,
+                save_to_config=save_to_config,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        else:
+            raise ServiceValidationError(f"{self} - This service is only available for TPI algorithm.")
+
     async def async_set_auto_tpi_mode(
         self,
         auto_tpi_mode: bool,
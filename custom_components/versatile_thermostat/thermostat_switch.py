@@ -27,6 +27,7 @@ from .commons import write_event_log
 
 from .base_thermostat import BaseThermostat, ConfigData
 from .thermostat_prop import ThermostatProp
+from .vtherm_central_api import VersatileThermostatAPI
 from .underlyings import UnderlyingSwitch
 from .cycle_scheduler import CycleScheduler
 
@@ -94,6 +95,7 @@ class ThermostatOverSwitch(ThermostatProp[UnderlyingSwitch]):
             cycle_duration_sec=self._cycle_min * 60,
             min_activation_delay=self.minimal_activation_delay,
             min_deactivation_delay=self.minimal_deactivation_delay,
+            master_clock=VersatileThermostatAPI.get_vtherm_api(self._hass).cycle_master_clock,
         ))
 
         self._should_relaunch_control_heating = False
@@ -209,7 +211,7 @@ class ThermostatOverSwitch(ThermostatProp[UnderlyingSwitch]):
         new_state = event.data.get("new_state")
         old_state = event.data.get("old_state")
 
-        write_event_log(_LOGGER, self, f"Underlying switch state changed from {old_state.state if old_state else None} to {new_state.state if new_state else None}")
+        write_event_log(_LOGGER, self, "Underlying switch state changed from %s to %s", old_state.state if old_state else None, new_state.state if new_state else None)
         if new_state is None:
             return
         # #1654 - nno more needed now
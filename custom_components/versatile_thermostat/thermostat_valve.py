@@ -14,6 +14,7 @@ from homeassistant.core import Event, HomeAssistant, callback
 
 from .base_thermostat import BaseThermostat, ConfigData
 from .thermostat_prop import ThermostatProp
+from .vtherm_central_api import VersatileThermostatAPI
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
 from .commons import write_event_log
@@ -92,6 +93,7 @@ class ThermostatOverValve(ThermostatProp[UnderlyingValve]):  # pylint: disable=a
             cycle_duration_sec=self._cycle_min * 60,
             min_activation_delay=self.minimal_activation_delay,
             min_deactivation_delay=self.minimal_deactivation_delay,
+            master_clock=VersatileThermostatAPI.get_vtherm_api(self._hass).cycle_master_clock,
         ))
 
         self._should_relaunch_control_heating = False
@@ -129,7 +131,7 @@ class ThermostatOverValve(ThermostatProp[UnderlyingValve]):  # pylint: disable=a
         self.calculate_hvac_action()
         self.update_custom_attributes()
         self.async_write_ha_state()
-        write_event_log(_LOGGER, self, f"Underlying valve state changed to {new_state}")
+        write_event_log(_LOGGER, self, "Underlying valve state changed to %s", new_state)
 
     @overrides
     def update_custom_attributes(self):
@@ -36,6 +36,8 @@ from homeassistant.util import dt as dt_util
 
 from vtherm_api.log_collector import get_vtherm_logger
 from .opening_degree_algorithm import OpeningClosingDegreeCalculation
+from .command_queue import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from .valve_command_stage import ValveCommandStage
 
 
 from .const import *  # pylint: disable=wildcard-import, unused-wildcard-import
@@ -155,7 +157,7 @@ class UnderlyingEntity:
             and self._api.central_boiler_manager is not None
             and self._api.central_boiler_manager.nb_device_active_for_boiler_entity is not None
         ):
-            await self._api.central_boiler_manager.nb_device_active_for_boiler_entity.calculate_nb_active_devices(None)
+            await self._api.central_boiler_manager.nb_device_active_for_boiler_entity.async_update_vtherm(self._thermostat)
 
     async def set_hvac_mode(self, hvac_mode: VThermHvacMode):
         """Set the HVACmode"""
@@ -205,15 +207,21 @@ class UnderlyingEntity:
         target: dict[str, Any] | None = None,
         return_response: bool = False,
     ) -> ServiceResponse:
-        """Wrapper for HASS service calls"""
+        """Wrapper for HASS service calls. The calls of the underlyings are merged by the ServiceCallDispatcher"""
         try:
-            response: ServiceResponse = await self._hass.services.async_call(domain, service, service_data, blocking, context, target, return_response)
+            response: ServiceResponse = await self._api.service_call_dispatcher.async_call(domain, service, service_data, blocking, context, target, return_response, priority=self.command_priority)
 
             self._last_command_sent_datetime = self._thermostat.now
             return response
         except Exception as err:
             _LOGGER.error("%s - Error calling service %s.%s: %s. The underlying will not change its state.", self, domain, service, err)
 
+    @property
+    def command_priority(self) -> int:
+        """The priority of the commands in the CommandQueue: the commands of a VTherm in safety are sent first"""
+        safety_manager = getattr(self._thermostat, "safety_manager", None)
+        return PRIORITY_HIGH if safety_manager is not None and safety_manager.is_safety_detected is True else PRIORITY_NORMAL
+
     def clamp_sent_value(self, value) -> float:
         """capping of the value send to the underlying eqt"""
         return value
@@ -444,7 +452,7 @@ class UnderlyingSwitch(UnderlyingEntity):
                     self._entity_id,
                     state.state,
                 )
-            await (self.turn_on() if self._is_on_part_running else self.turn_off())
+            await (self.turn_on(priority=PRIORITY_LOW) if self._is_on_part_running else self.turn_off(priority=PRIORITY_LOW))
 
     def build_command(self, use_on: bool) -> Tuple[str, Dict[str, str]]:
         """Build a command and returns a command and a dict as data"""
@@ -475,7 +483,7 @@ class UnderlyingSwitch(UnderlyingEntity):
 
         return command, data, value
 
-    async def turn_off(self):
+    async def turn_off(self, priority: int | None = None):
         """Turn heater toggleable device off."""
         self._keep_alive.cancel()  # Cancel early to avoid a turn_on/turn_off race condition
         _LOGGER.debug("%s - Stopping underlying entity %s", self, self._entity_id)
@@ -490,7 +498,7 @@ class UnderlyingSwitch(UnderlyingEntity):
                     self.power_reservation_key
                 )
                 _LOGGER.debug("%s - Sending command %s with data=%s", self, command, data)
-                await self._hass.services.async_call(self._domain, command, data)
+                await self._api.service_call_dispatcher.async_call(self._domain, command, data, priority=self.command_priority if priority is None else priority)
                 self._is_on_part_running = False
                 self._keep_alive.set_async_action(self._keep_alive_callback)
             except Exception:
@@ -499,7 +507,7 @@ class UnderlyingSwitch(UnderlyingEntity):
         except ServiceNotFound as err:
             _LOGGER.error(err)
 
-    async def turn_on(self):
+    async def turn_on(self, priority: int | None = None):
         """Turn heater toggleable device on."""
         self._keep_alive.cancel()  # Cancel early to avoid a turn_on/turn_off race condition
         _LOGGER.debug("%s - Starting underlying entity %s", self, self._entity_id)
@@ -518,7 +526,7 @@ class UnderlyingSwitch(UnderlyingEntity):
                     self.power_reservation_key
                 )
                 _LOGGER.debug("%s - Sending command %s with data=%s", self, command, data)
-                await self._hass.services.async_call(self._domain, command, data)
+                await self._api.service_call_dispatcher.async_call(self._domain, command, data, priority=self.command_priority if priority is None else priority)
                 self._is_on_part_running = True
                 self._keep_alive.set_async_action(self._keep_alive_callback)
                 return True
@@ -1325,11 +1333,19 @@ class UnderlyingValve(UnderlyingEntity):
         """The current percent open"""
         return self._percent_open
 
+    @percent_open.setter
+    def percent_open(self, value: int):
+        self._percent_open = value
+
     @property
     def last_sent_opening_value(self) -> int | None:
         """Return the last sent value to the valve"""
         return self._last_sent_opening_value
 
+    @last_sent_opening_value.setter
+    def last_sent_opening_value(self, value: int | None):
+        self._last_sent_opening_value = value
+
     @overrides
     async def check_and_repair(self) -> bool:
         """Check if the valve opening matches the last sent value and repair if needed.
@@ -1374,8 +1390,10 @@ class UnderlyingValveRegulation(UnderlyingValve):
         max_opening_degree: int = 100,
         max_closing_degree: int = 100,
         opening_threshold: int = 0,
+        command_stage: ValveCommandStage | None = None,
     ) -> None:
-        """Initialize the underlying TRV with valve regulation"""
+        """Initialize the underlying TRV with valve regulation.
+        The command_stage is shared by all the valves of the VTherm"""
         super().__init__(
             hass,
             thermostat,
@@ -1390,6 +1408,7 @@ class UnderlyingValveRegulation(UnderlyingValve):
         self._min_opening_degree: int = min_opening_degree
         self._max_closing_degree: int = max_closing_degree
         self._opening_threshold: int = opening_threshold
+        self._command_stage: ValveCommandStage = command_stage if command_stage is not None else ValveCommandStage()
 
         if self._min_opening_degree >= self._max_opening_degree:
             self._min_opening_degree = self._opening_threshold
@@ -1471,30 +1490,41 @@ class UnderlyingValveRegulation(UnderlyingValve):
             entities.append(self._closing_degree_entity_id)
         self._state_manager.add_underlying_entities(entities)
 
-    async def send_percent_open(self, fixed_value: int = None):
-        """Send the percent open to the underlying valve"""
-        # Caclulate percent_open
-        value = self._percent_open if fixed_value is None else fixed_value
+    def valve_commands(self, percent_open: float) -> list[tuple[str, int]]:
+        """The values of the opening degree (first) and closing degree numbers for a valve open percent"""
         opening_degree, closing_degree = OpeningClosingDegreeCalculation.calculate_opening_closing_degree(
-            brut_valve_open_percent=value,
+            brut_valve_open_percent=percent_open,
             min_opening_degree=self._min_opening_degree,
             max_closing_degree=self._max_closing_degree,
             max_opening_degree=self._max_opening_degree,
             opening_threshold=self._opening_threshold,
         )
+        commands = [(self._opening_degree_entity_id, opening_degree)]
+        if self.has_closing_degree_entity:
+            commands.append((self._closing_degree_entity_id, closing_degree))
+        return commands
+
+    async def send_percent_open(self, fixed_value: int = None):
+        """Send the percent open to the underlying valve"""
+        value = self._percent_open if fixed_value is None else fixed_value
+        await self._command_stage.async_send(self, value)
 
-        # Send opening_degree in UnderlyingValve
-        await super().send_percent_open(opening_degree)
+        _LOGGER.debug("%s - valve regulation - I have sent the commands of percent_open=%s", self, value)
 
-        if self.has_closing_degree_entity:
-            await self.send_value_to_number(self._closing_degree_entity_id, closing_degree)
+    @overrides
+    async def set_valve_open_percent(self):
+        """Update the valve open percent through the command stage of the VTherm"""
+        await self._command_stage.async_apply([self])
 
-        _LOGGER.debug(
-            "%s - valve regulation - I have sent opening_degree=%s closing_degree=%s",
-            self,
-            opening_degree,
-            closing_degree,
-        )
+    @property
+    def target_percent_open(self) -> int:
+        """The valve open percent asked by the VTherm"""
+        return self.clamp_sent_value(self._thermostat.valve_open_percent)
+
+    @property
+    def opening_threshold(self) -> int:
+        """The open percent under which the valve is closed"""
+        return self._opening_threshold
 
     @property
     def opening_degree_entity_id(self) -> str:
@@ -0,0 +1,127 @@
+"""ValveCommandStage: the commands sent to the opening and closing degree numbers of a VTherm.
+
+A VTherm over climate with valve regulation drives each TRV with an opening degree
+number and an optional closing degree number. recalculate can run several times per
+temperature change and each small change of the valve open percent was written to the
+numbers of all the TRVs. Each write wakes up the battery powered TRVs.
+
+The stage is shared by the UnderlyingValveRegulation of a VTherm. It computes the
+commands of all the valves at once and:
+- suppresses the changes of the open percent smaller than the hysteresis (in percent)
+  while the valve stays open. The closing, the opening and the bounds (0 and 100) are
+  always sent. The percent which is not sent is kept by the valve and the next change
+  is compared to the last sent one, so the small changes add up until they are sent,
+- skips the write of a number whose last sent value is the same,
+- sends the remaining writes of all the valves concurrently.
+
+The explicit commands (initial state, turn off, recalibration, repair) are always
+sent. The counters of the sent and avoided writes are in the custom attributes of the
+VTherm.
+"""
+
+import asyncio
+from typing import Any
+
+from vtherm_api.log_collector import get_vtherm_logger
+
+_LOGGER = get_vtherm_logger(__name__)
+
+# The default hysteresis (in percent of the valve open percent). 0 sends all the changes
+DEFAULT_VALVE_COMMAND_HYSTERESIS = 0
+
+
+class ValveCommandStage:
+    """Computes and sends the commands of the valves of a VTherm"""
+
+    def __init__(self, hysteresis: float = DEFAULT_VALVE_COMMAND_HYSTERESIS):
+        self._hysteresis = max(0, hysteresis or 0)
+        # The last value sent to each number entity
+        self._last_sent: dict[str, int] = {}
+        # Counters
+        self._nb_sent = 0
+        self._nb_avoided = 0
+
+    @property
+    def hysteresis(self) -> float:
+        """The smallest change of the valve open percent which is sent"""
+        return self._hysteresis
+
+    @hysteresis.setter
+    def hysteresis(self, value: float):
+        self._hysteresis = max(0, value or 0)
+
+    def is_below_hysteresis(self, last_percent: float | None, new_percent: float, opening_threshold: float) -> bool:
+        """True if the change from last_percent to new_percent should not be sent"""
+        if self._hysteresis <= 0 or last_percent is None:
+            return False
+        # The valve should stay open and the new percent is not a bound
+        is_open = last_percent >= opening_threshold and last_percent > 0 and new_percent >= opening_threshold and new_percent > 0
+        return is_open and new_percent < 100 and abs(new_percent - last_percent) < self._hysteresis
+
+    async def async_apply(self, underlyings: list[Any]):
+        """Apply the valve open percent of the VTherm to the valves"""
+        batch = []
+        for under in underlyings:
+            new_percent = under.target_percent_open
+            last_percent = under.percent_open
+            if new_percent == last_percent:
+                continue
+
+            commands = under.valve_commands(new_percent)
+            if self.is_below_hysteresis(last_percent, new_percent, under.opening_threshold):
+                _LOGGER.debug("%s - valve open percent change from %s to %s is below the hysteresis. Not sent", under, last_percent, new_percent)
+                self._nb_avoided += len(commands)
+                continue
+
+            _LOGGER.info("%s - Setting valve ouverture percent to %s", under, new_percent)
+            under.percent_open = new_percent
+            batch.append((under, commands, True))
+
+        await self._async_send(batch)
+
+    async def async_send(self, under: Any, percent_open: float):
+        """Send the commands of a percent open to a valve even if they are the last sent ones"""
+        await self._async_send([(under, under.valve_commands(percent_open), False)])
+
+    async def _async_send(self, batch: list[tuple[Any, list[tuple[str, int]], bool]]):
+        """Send the commands of the batch concurrently. The unchanged values are skipped if asked"""
+        writes = []
+        for under, commands, skip_unchanged in batch:
+            for entity_id, value in commands:
+                if skip_unchanged and self._last_sent.get(entity_id) == value:
+                    self._nb_avoided += 1
+                    continue
+                writes.append((under, entity_id, value))
+
+        if writes:
+            await asyncio.gather(*(under.send_value_to_number(entity_id, value) for under, entity_id, value in writes))
+            for _, entity_id, value in writes:
+                self._last_sent[entity_id] = value
+            self._nb_sent += len(writes)
+
+        for under, commands, _ in batch:
+            # The opening degree is the first command
+            under.last_sent_opening_value = commands[0][1]
+
+    def invalidate(self):
+        """Forget the last sent values. Used when the numbers have been written outside of the stage"""
+        self._last_sent = {}
+
+    @property
+    def nb_sent(self) -> int:
+        """The number of writes sent to the numbers"""
+        return self._nb_sent
+
+    @property
+    def nb_avoided(self) -> int:
+        """The number of writes avoided by the hysteresis or because the value was already sent"""
+        return self._nb_avoided
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """The counters of the stage"""
+        return {
+            "hysteresis": self._hysteresis,
+            "nb_sent": self._nb_sent,
+            "nb_avoided": self._nb_avoided,
+        }
@@ -1,5 +1,7 @@
 """ The API of Versatile Thermostat"""
 
+import asyncio
+
 from vtherm_api.log_collector import get_vtherm_logger
 from vtherm_api.vtherm_api import VThermAPI
 from homeassistant.config_entries import ConfigEntry
@@ -18,10 +20,27 @@ from .const import (
     CONF_THERMOSTAT_TYPE,
     CONF_THERMOSTAT_CENTRAL_CONFIG,
     CONF_MAX_ON_PERCENT,
+    CONF_USE_CYCLE_MASTER_CLOCK,
+    CONF_PERFORMANCE_PROFILING,
+    CONF_COMMAND_RATE_LIMITS,
+    CONF_WINDOW_AUTO_SLOPE,
+    CONF_STARTUP_CONCURRENCY,
+    CONF_VALVE_COMMAND_HYSTERESIS,
+    CENTRAL_MODE_EVENT,
 )
 
 from .feature_central_power_manager import FeatureCentralPowerManager
 from .feature_central_boiler_manager import FeatureCentralBoilerManager
+from .cycle_master_clock import CycleMasterClock
+from .outdoor_temperature_hub import OutdoorTemperatureHub
+from .service_call_dispatcher import ServiceCallDispatcher
+from .command_queue import DEFAULT_COMMAND_RATE_LIMITS
+from .history_loader import HistoryLoader
+from .startup_orchestrator import StartupOrchestrator, DEFAULT_STARTUP_CONCURRENCY
+from .central_config_updater import CentralConfigUpdater
+from .valve_command_stage import DEFAULT_VALVE_COMMAND_HYSTERESIS
+from .central_mode_broadcaster import CentralModeBroadcaster
+from .safety_watchdog import SafetyWatchdog
 
 _LOGGER = get_vtherm_logger(__name__)
 
@@ -42,9 +61,32 @@ class VersatileThermostatAPI(VThermAPI):
         self._central_mode_select = None
         # A dict that will store all Number entities which holds the temperature
         self._number_temperatures = dict()
+        # The VTherm climate entities by config_id and the futures of the entities waiting for them
+        self._climates: dict[str, ClimateEntity] = dict()
+        self._climate_waiters: dict[str, asyncio.Future] = dict()
         self._max_on_percent = None
         self._central_power_manager = FeatureCentralPowerManager(hass, self)
         self._central_boiler_manager = FeatureCentralBoilerManager(hass, self)
+        # The optional shared clock of all CycleScheduler (see use_cycle_master_clock)
+        self._cycle_master_clock: CycleMasterClock | None = None
+        # The shared subscriptions to the outdoor temperature sensors
+        self._outdoor_temperature_hub = OutdoorTemperatureHub(hass)
+        # Merges the identical service calls sent to the underlyings
+        self._service_call_dispatcher = ServiceCallDispatcher(hass)
+        # The columnar access to the recorder history used by the calibrations
+        self._history_loader = HistoryLoader(hass)
+        # True if the control loop of the VTherms should be profiled (see performance_profiling)
+        self._performance_profiling = False
+        self._window_auto_slope_params = None
+        self._valve_command_hysteresis = DEFAULT_VALVE_COMMAND_HYSTERESIS
+        # Starts the VTherms concurrently (see startup_concurrency)
+        self._startup_orchestrator = StartupOrchestrator()
+        # Applies the changes of the central configuration to the running VTherms
+        self._central_config_updater = CentralConfigUpdater(hass, self)
+        # Propagates the central mode and the central presets to the VTherms concurrently
+        self._central_mode_broadcaster = CentralModeBroadcaster()
+        # The shared timer of the temperature expiration of the VTherms (safety)
+        self._safety_watchdog = SafetyWatchdog(hass)
 
         # the current time (for testing purpose)
         self._now = None
@@ -99,6 +141,36 @@ class VersatileThermostatAPI(VThermAPI):
                 "We have found max_on_percent setting %s", self._max_on_percent
             )
 
+        if config.get(CONF_USE_CYCLE_MASTER_CLOCK):
+            if self._cycle_master_clock is None:
+                self._cycle_master_clock = CycleMasterClock(self.hass)
+            _LOGGER.debug("The cycle master clock is used for all VTherm cycles")
+        elif self._cycle_master_clock is not None:
+            self._cycle_master_clock.async_shutdown()
+            self._cycle_master_clock = None
+
+        self._performance_profiling = bool(config.get(CONF_PERFORMANCE_PROFILING))
+        if self._performance_profiling:
+            _LOGGER.debug("The control loop of the VTherms is profiled")
+
+        self._window_auto_slope_params = config.get(CONF_WINDOW_AUTO_SLOPE)
+        if self._window_auto_slope_params:
+            _LOGGER.debug("We have found window auto slope params %s", self._window_auto_slope_params)
+
+        self._startup_orchestrator.max_concurrency = config.get(CONF_STARTUP_CONCURRENCY) or DEFAULT_STARTUP_CONCURRENCY
+        self._valve_command_hysteresis = config.get(CONF_VALVE_COMMAND_HYSTERESIS) or DEFAULT_VALVE_COMMAND_HYSTERESIS
+        if self._valve_command_hysteresis:
+            _LOGGER.debug("The changes of the valve open percent under %s%% are not sent to the valves", self._valve_command_hysteresis)
+
+        # The propagation of the central changes uses the same bound
+        self._central_mode_broadcaster.max_concurrency = self._startup_orchestrator.max_concurrency
+        _LOGGER.debug("The VTherms are started and updated %d at a time", self._startup_orchestrator.max_concurrency)
+
+        # The limits of the configuration replace the default ones (0 removes the limit of an integration)
+        rate_limits = {**DEFAULT_COMMAND_RATE_LIMITS, **(config.get(CONF_COMMAND_RATE_LIMITS) or {})}
+        self._service_call_dispatcher.command_queue.set_rate_limits(rate_limits)
+        _LOGGER.debug("The commands sent to the underlyings are rate limited with %s", rate_limits)
+
     def register_temperature_number(
         self,
         config_id: str,
@@ -122,6 +194,40 @@ class VersatileThermostatAPI(VThermAPI):
                 return entity.state
         return None
 
+    def register_climate(self, config_id: str, climate: ClimateEntity):
+        """Register the VTherm climate entity of a config_id and wake up the entities waiting for it"""
+        self._climates[config_id] = climate
+        waiter = self._climate_waiters.pop(config_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(climate)
+
+    def unregister_climate(self, config_id: str, climate: ClimateEntity):
+        """Unregister the VTherm climate entity of a config_id if it is still the registered one"""
+        if self._climates.get(config_id) is climate:
+            del self._climates[config_id]
+
+    @property
+    def registered_climates(self) -> list[ClimateEntity]:
+        """All the registered VTherm climate entities"""
+        return list(self._climates.values())
+
+    def get_climate(self, config_id: str) -> ClimateEntity | None:
+        """Returns the VTherm climate entity of a config_id or None if it is not registered yet"""
+        return self._climates.get(config_id)
+
+    async def async_wait_for_climate(self, config_id: str) -> ClimateEntity:
+        """Returns the VTherm climate entity of a config_id. Waits for its registration if needed"""
+        climate = self._climates.get(config_id)
+        if climate is not None:
+            return climate
+
+        waiter = self._climate_waiters.get(config_id)
+        if waiter is None:
+            waiter = self.hass.loop.create_future()
+            self._climate_waiters[config_id] = waiter
+        # shield the shared future so that a cancelled waiter don't cancel the others
+        return await asyncio.shield(waiter)
+
     async def init_vtherm_links(self, entry_id=None):
         """Initialize all VTherms entities links
         This method is called when HA is fully started (and all entities should be initialized)
@@ -135,16 +241,23 @@ class VersatileThermostatAPI(VThermAPI):
             CLIMATE_DOMAIN, None
         )
         if component:
+            vtherms = []
             for entity in list(component.entities):
                 # A little hack to test if the climate is a VTherm. Cannot use isinstance
                 # due to circular dependency of BaseThermostat
                 try:
                     if entity.device_info and entity.device_info.get("model", None) == DOMAIN:
                         if entry_id is None or entry_id == entity.unique_id:
-                            await entity.async_startup(self.find_central_configuration())  # pyright: ignore[reportAttributeAccessIssue]
+                            vtherms.append(entity)
                 except Exception as e:  # pylint: disable=broad-except
                     _LOGGER.error("Error searching/initializing entity %s: %s", entity.entity_id, e)
 
+            # The central configuration is resolved once for all the VTherms
+            await self._startup_orchestrator.async_start(vtherms, self.find_central_configuration())
+
+        # The list of power managed VTherms may have changed
+        self.central_power_manager.invalidate_vtherm_index()
+
         # start listening for the central manager if not only one vtherm reload
         if not entry_id:
             await self.central_power_manager.start_listening()
@@ -152,16 +265,16 @@ class VersatileThermostatAPI(VThermAPI):
 
     async def init_vtherm_preset_with_central(self):
         """Init all VTherm presets when the VTherm uses central temperature"""
-        # Initialization of all preset for all VTherm
-        component: EntityComponent[ClimateEntity] = self._hass.data.get(
-            CLIMATE_DOMAIN, None
-        )
-        if component:
-            for entity in list(component.entities):
-                if entity.device_info and entity.device_info.get("model", None) == DOMAIN and entity.use_central_config_temperature:  # pyright: ignore[reportAttributeAccessIssue]
-                    await entity.init_presets(self.find_central_configuration())  # pyright: ignore[reportAttributeAccessIssue]
-                    entity.requested_state.force_changed()  # pyright: ignore[reportAttributeAccessIssue]
-                    await entity.update_states(True)  # pyright: ignore[reportAttributeAccessIssue]
+        central_configuration = self.find_central_configuration()
+
+        async def prepare(vtherm) -> bool:
+            if not vtherm.use_central_config_temperature:
+                return False
+            await vtherm.init_presets(central_configuration)
+            vtherm.requested_state.force_changed()
+            return True
+
+        await self._broadcast_central_change(prepare, lambda vtherm: vtherm.update_states(True), {"change": "central_presets"})
 
     def register_central_mode_select(self, central_mode_select):
         """Register the select entity which holds the central_mode"""
@@ -172,17 +285,28 @@ class VersatileThermostatAPI(VThermAPI):
         if self._central_mode_select is None:
             return
 
-        # Update all VTherm states
-        component: EntityComponent[ClimateEntity] = self.hass.data[CLIMATE_DOMAIN]
-        for entity in list(component.entities):
-            if entity.device_info and entity.device_info.get("model", None) == DOMAIN:
-                _LOGGER.debug(
-                    "Changing the central_mode. We have find %s to update",
-                    entity.name,
-                )
-                await entity.check_central_mode(
-                    self._central_mode_select.state, old_central_mode
-                )
+        new_central_mode = self._central_mode_select.state
+
+        async def prepare(vtherm) -> bool:
+            _LOGGER.debug("Changing the central_mode. We have find %s to update", vtherm.name)
+            return vtherm.prepare_central_mode(new_central_mode, old_central_mode)
+
+        await self._broadcast_central_change(
+            prepare,
+            lambda vtherm: vtherm.update_states(),
+            {"change": "central_mode", "central_mode": new_central_mode, "old_central_mode": old_central_mode},
+        )
+
+    async def _broadcast_central_change(self, prepare, update, event_data: dict):
+        """Propagate a central change to all the VTherms and send the latency of the propagation
+        in a CENTRAL_MODE_EVENT"""
+        component: EntityComponent[ClimateEntity] | None = self._hass.data.get(CLIMATE_DOMAIN, None)
+        if not component:
+            return
+
+        vtherms = [entity for entity in list(component.entities) if entity.device_info and entity.device_info.get("model", None) == DOMAIN]
+        report = await self._central_mode_broadcaster.async_broadcast(vtherms, prepare, update)
+        self._hass.bus.async_fire(CENTRAL_MODE_EVENT, {**event_data, **report})
 
     def add_entry(self, entry: ConfigEntry):
         """Add a new entry"""
@@ -199,6 +323,11 @@ class VersatileThermostatAPI(VThermAPI):
         # If not more entries are preset, remove the API
         if len([val for val in self.hass.data[DOMAIN].values() if isinstance(val, ConfigEntry)]) == 0:
             _LOGGER.debug("No more entries-> Remove the API from DOMAIN")
+            if self._cycle_master_clock is not None:
+                self._cycle_master_clock.async_shutdown()
+            self._outdoor_temperature_hub.async_shutdown()
+            self._service_call_dispatcher.async_shutdown()
+            self._safety_watchdog.async_shutdown()
             if DOMAIN in self.hass.data:
                 self.hass.data.pop(DOMAIN)
 
@@ -235,6 +364,61 @@ class VersatileThermostatAPI(VThermAPI):
         """Returns the central power manager"""
         return self._central_power_manager
 
+    @property
+    def cycle_master_clock(self) -> CycleMasterClock | None:
+        """Get the shared clock of the CycleScheduler or None if each scheduler uses its own timers"""
+        return self._cycle_master_clock
+
+    @property
+    def performance_profiling(self) -> bool:
+        """True if the control loop of the VTherms should be profiled"""
+        return self._performance_profiling
+
+    @property
+    def central_config_updater(self) -> CentralConfigUpdater:
+        """Applies the changes of the central configuration without reload"""
+        return self._central_config_updater
+
+    @property
+    def central_mode_broadcaster(self) -> CentralModeBroadcaster:
+        """The concurrent propagation of the central changes to the VTherms"""
+        return self._central_mode_broadcaster
+
+    @property
+    def safety_watchdog(self) -> SafetyWatchdog:
+        """The shared timer which detects the expired temperature measures"""
+        return self._safety_watchdog
+
+    @property
+    def startup_orchestrator(self) -> StartupOrchestrator:
+        """The concurrent startup of the VTherms and its report"""
+        return self._startup_orchestrator
+
+    @property
+    def valve_command_hysteresis(self) -> float:
+        """The smallest change of the valve open percent sent to the valves (see ValveCommandStage)"""
+        return self._valve_command_hysteresis
+
+    @property
+    def window_auto_slope_params(self) -> dict | None:
+        """The parameters of the slope estimator of the window auto detection"""
+        return self._window_auto_slope_params
+
+    @property
+    def service_call_dispatcher(self) -> ServiceCallDispatcher:
+        """Get the dispatcher of the service calls sent to the underlyings"""
+        return self._service_call_dispatcher
+
+    @property
+    def history_loader(self) -> HistoryLoader:
+        """Get the columnar access to the recorder history"""
+        return self._history_loader
+
+    @property
+    def outdoor_temperature_hub(self) -> OutdoorTemperatureHub:
+        """Get the shared subscriptions to the outdoor temperature sensors"""
+        return self._outdoor_temperature_hub
+
     @property
     def central_boiler_manager(self) -> any:
         """Returns the central boiler manager"""
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Replay recorded CSV traces of several rooms through the Auto TPI learning.
+
+A development tool: the rooms are replayed in parallel worker processes with the
+replay engine of custom_components/versatile_thermostat/auto_tpi_replay.py.
+
+Usage from the root of the repository:
+    python scripts/auto_tpi_replay.py room1.csv room2.csv --cycle-min 10
+
+Each CSV file has the columns timestamp,temp_in,temp_out,setpoint,on_percent
+(on_percent in [0, 1]) and an optional hvac_mode column.
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from homeassistant.util import dt as dt_util
+
+from custom_components.versatile_thermostat.auto_tpi_replay import ReplayReport, ReplaySample, async_replay
+
+
+def _replay_in_process(args: tuple[str, list[ReplaySample], dict]) -> ReplayReport:
+    """Replay one room in a worker process"""
+    name, samples, kwargs = args
+    return asyncio.run(async_replay(samples, name=name, **kwargs))
+
+
+def replay_rooms(traces: dict[str, list[ReplaySample]], max_workers: int | None = None, **kwargs) -> dict[str, ReplayReport]:
+    """Replay several rooms in parallel worker processes. kwargs are given to async_replay"""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        reports = executor.map(_replay_in_process, [(name, samples, kwargs) for name, samples in traces.items()])
+        return {report.name: report for report in reports}
+
+
+def load_csv_trace(path: str) -> list[ReplaySample]:
+    """Read a trace with the columns timestamp,temp_in,temp_out,setpoint,on_percent[,hvac_mode]"""
+
+    def to_float(value: str | None) -> float | None:
+        try:
+            return float(value) if value not in (None, "") else None
+        except ValueError:
+            return None
+
+    samples = []
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            timestamp = dt_util.parse_datetime(row.get("timestamp") or "")
+            if timestamp is None:
+                continue
+            samples.append(
+                ReplaySample(
+                    timestamp,
+                    to_float(row.get("temp_in")),
+                    to_float(row.get("temp_out")),
+                    to_float(row.get("setpoint")),
+                    to_float(row.get("on_percent")) or 0.0,
+                    row.get("hvac_mode") or "heat",
+                )
+            )
+    return samples
+
+
+def main(argv: list[str] | None = None):
+    """Replay CSV traces and print one report line per room"""
+    parser = argparse.ArgumentParser(description="Replay recorded traces through the Auto TPI learning")
+    parser.add_argument("traces", nargs="+", help="CSV files (one per room)")
+    parser.add_argument("--cycle-min", type=int, default=10)
+    parser.add_argument("--coef-int", type=float, default=0.6)
+    parser.add_argument("--coef-ext", type=float, default=0.04)
+    parser.add_argument("--heating-rate", type=float, default=0.0, help="Known capacity in °/h (0 to learn it)")
+    parser.add_argument("--continuous", action="store_true", help="Enable the continuous learning")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    traces = {os.path.splitext(os.path.basename(path))[0]: load_csv_trace(path) for path in args.traces}
+    reports = replay_rooms(
+        traces,
+        max_workers=args.workers,
+        cycle_min=args.cycle_min,
+        continuous_learning=args.continuous,
+        coef_int=args.coef_int,
+        coef_ext=args.coef_ext,
+        heating_rate=args.heating_rate,
+    )
+    for report in reports.values():
+        print(
+            f"{report.name}: cycles={report.nb_cycles} Kint={report.coef_int:.3f} Kext={report.coef_ext:.3f} "
+            f"capacity={report.capacity:.2f} convergence_cycle={report.convergence_cycle} convergence_time={report.convergence_time} "
+            f"cpu/cycle={report.cpu_time_per_cycle_ms:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
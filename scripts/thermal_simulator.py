@@ -0,0 +1,305 @@
+"""Vectorized RC thermal simulator to evaluate TPI and PI coefficients offline.
+
+Each room is a first order RC model:
+    dT/dt = capacity * power - loss * (T - T_ext)
+where capacity is the temperature rise per hour at full power (°C/h) and loss
+the inverse of the time constant (1/h). The model is integrated exactly for
+each piecewise constant power phase, so a cycle is one step whatever its length.
+
+All the (room, coefficient set) combinations are simulated at once on NumPy
+arrays, using the same calculation functions than the VTherms:
+compute_tpi_on_percent for over_switch / over_valve and compute_pi_regulation
+for the self-regulation of over_climate. run_sweep spreads big sweeps across
+a process pool.
+
+A development tool, used from the root of the repository:
+    from scripts.thermal_simulator import RoomModels, Scenario, run_sweep
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from custom_components.versatile_thermostat.prop_algo_tpi import compute_tpi_on_percent
+from custom_components.versatile_thermostat.pi_algorithm import compute_pi_regulation
+
+ALGO_TPI = "tpi"
+ALGO_PI = "pi"
+
+# The coefficient sets are split in chunks of this size for the process pool
+DEFAULT_CHUNK_SIZE = 512
+
+
+@dataclass
+class RoomModels:
+    """The thermal models of R rooms (arrays of shape (R,) or scalars)"""
+
+    capacity: np.ndarray  # °C/h at full power
+    loss: np.ndarray  # 1/h
+    power_kw: np.ndarray | float = 1.0  # power of the heater, used for the energy
+    initial_temp: np.ndarray | float | None = None  # defaults to the first setpoint
+    # over_climate only: power of the underlying climate per °C between its (regulated) target and the room temperature
+    device_gain: np.ndarray | float = 1.0
+
+    @property
+    def nb_rooms(self) -> int:
+        """The number of rooms"""
+        return int(np.size(self.capacity))
+
+
+@dataclass
+class Scenario:
+    """The conditions shared by all the rooms, one value per cycle"""
+
+    ext_temps: np.ndarray
+    setpoints: np.ndarray
+    cycle_min: float = 10.0
+    # The first cycles are not counted in the comfort error (initial heating)
+    warmup_cycles: int = 0
+
+    @property
+    def nb_cycles(self) -> int:
+        """The number of simulated cycles"""
+        return len(self.ext_temps)
+
+
+@dataclass
+class SimulationResult:
+    """The metrics of each (room, coefficient set) combination, as arrays of shape (R * K,)"""
+
+    room_index: np.ndarray
+    coef_index: np.ndarray
+    comfort_mae: np.ndarray  # mean absolute error between the mean temperature of each cycle and its setpoint (°C)
+    comfort_rmse: np.ndarray  # root mean square of the same error (°C)
+    energy_kwh: np.ndarray
+    switch_count: np.ndarray  # relay switches for TPI, setpoint changes sent to the underlying for PI
+    params: dict[str, np.ndarray] = field(default_factory=dict)  # the coefficients of each combination
+
+    def __len__(self) -> int:
+        return len(self.room_index)
+
+    def best_per_room(self, energy_weight: float = 0.0) -> np.ndarray:
+        """Returns, for each room, the coefficient set which minimizes comfort_mae + energy_weight * energy_kwh"""
+        score = self.comfort_mae + energy_weight * self.energy_kwh
+        nb_rooms = int(self.room_index.max()) + 1 if len(self) else 0
+        best = np.full(nb_rooms, -1)
+        for room in range(nb_rooms):
+            mask = self.room_index == room
+            best[room] = self.coef_index[mask][np.argmin(score[mask])]
+        return best
+
+    @classmethod
+    def concatenate(cls, results: list["SimulationResult"]) -> "SimulationResult":
+        """Merge the results of several chunks"""
+        return cls(
+            *(np.concatenate([getattr(result, name) for result in results]) for name in ("room_index", "coef_index", "comfort_mae", "comfort_rmse", "energy_kwh", "switch_count")),
+            params={name: np.concatenate([result.params[name] for result in results]) for name in (results[0].params if results else {})},
+        )
+
+
+def _combine(rooms: RoomModels, nb_coefs: int) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """Expand the rooms to the R * K combinations: combination i is room i // K with coefficient set i % K"""
+    nb_rooms = rooms.nb_rooms
+    room_index = np.repeat(np.arange(nb_rooms), nb_coefs)
+    coef_index = np.tile(np.arange(nb_coefs), nb_rooms)
+
+    def expand(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (nb_rooms,))[room_index]
+
+    room_values = {
+        "capacity": expand(rooms.capacity),
+        "loss": expand(rooms.loss),
+        "power_kw": expand(rooms.power_kw),
+        "device_gain": expand(rooms.device_gain),
+    }
+    if rooms.initial_temp is not None:
+        room_values["initial_temp"] = expand(rooms.initial_temp)
+    return room_index, coef_index, room_values
+
+
+def _integrate(temp: np.ndarray, temp_eq: np.ndarray, loss: np.ndarray, duration_h: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Exact solution of dT/dt = loss * (temp_eq - T) during duration_h.
+    Returns the temperature at the end and the mean temperature during the phase"""
+    x = loss * duration_h
+    decay = np.exp(-x)
+    safe_x = np.where(x > 1e-9, x, 1.0)
+    mean_factor = np.where(x > 1e-9, (1.0 - decay) / safe_x, 1.0)
+    return temp_eq + (temp - temp_eq) * decay, temp_eq + (temp - temp_eq) * mean_factor
+
+
+def _coefficients(params: dict[str, np.ndarray], names: tuple[str, ...], nb_rooms: int) -> tuple[int, dict[str, np.ndarray]]:
+    """Check the coefficient arrays and tile them over the rooms"""
+    arrays = {name: np.atleast_1d(np.asarray(params[name], dtype=float)) for name in names}
+    nb_coefs = max(len(array) for array in arrays.values())
+    arrays = {name: np.tile(np.broadcast_to(array, (nb_coefs,)), nb_rooms) for name, array in arrays.items()}
+    return nb_coefs, arrays
+
+
+def _finish(room_index, coef_index, errors: np.ndarray, nb_counted: int, energy, switches, params) -> SimulationResult:
+    """Build the result from the accumulated metrics"""
+    nb_counted = max(1, nb_counted)
+    return SimulationResult(
+        room_index=room_index,
+        coef_index=coef_index,
+        comfort_mae=errors[0] / nb_counted,
+        comfort_rmse=np.sqrt(errors[1] / nb_counted),
+        energy_kwh=energy,
+        switch_count=switches,
+        params=params,
+    )
+
+
+def simulate_tpi(rooms: RoomModels, coef_int, coef_ext, scenario: Scenario, max_on_percent: float | None = None) -> SimulationResult:
+    """Simulate all the combinations of the rooms with the TPI coefficient sets (coef_int[k], coef_ext[k])"""
+    nb_coefs, coefs = _coefficients({"coef_int": coef_int, "coef_ext": coef_ext}, ("coef_int", "coef_ext"), rooms.nb_rooms)
+    room_index, coef_index, room = _combine(rooms, nb_coefs)
+    nb = len(room_index)
+
+    cycle_h = scenario.cycle_min / 60.0
+    temp = room.get("initial_temp", np.full(nb, float(scenario.setpoints[0])))
+    was_on = np.zeros(nb, dtype=bool)
+    errors = np.zeros((2, nb))
+    energy = np.zeros(nb)
+    switches = np.zeros(nb, dtype=np.int64)
+    heat_eq = room["capacity"] / room["loss"]
+
+    for step in range(scenario.nb_cycles):
+        ext_temp = float(scenario.ext_temps[step])
+        setpoint = float(scenario.setpoints[step])
+        # The on_percent used by the cycle scheduler is rounded by TpiAlgorithm.on_percent
+        on_percent = np.round(compute_tpi_on_percent(coefs["coef_int"], coefs["coef_ext"], setpoint - temp, setpoint - ext_temp, max_on_percent), 2)
+
+        # ON phase then OFF phase
+        temp_on, mean_on = _integrate(temp, ext_temp + heat_eq, room["loss"], on_percent * cycle_h)
+        temp, mean_off = _integrate(temp_on, np.full(nb, ext_temp), room["loss"], (1.0 - on_percent) * cycle_h)
+        mean_temp = on_percent * mean_on + (1.0 - on_percent) * mean_off
+
+        starts_on = on_percent > 0
+        ends_on = on_percent >= 1
+        switches += (starts_on != was_on).astype(np.int64) + (starts_on != ends_on).astype(np.int64)
+        was_on = ends_on
+
+        energy += on_percent * cycle_h * room["power_kw"]
+        if step >= scenario.warmup_cycles:
+            error = mean_temp - setpoint
+            errors[0] += np.abs(error)
+            errors[1] += error * error
+
+    return _finish(room_index, coef_index, errors, scenario.nb_cycles - scenario.warmup_cycles, energy, switches, coefs)
+
+
+def simulate_pi(
+    rooms: RoomModels,
+    kp,
+    ki,
+    k_ext,
+    offset_max,
+    accumulated_error_threshold,
+    scenario: Scenario,
+    overheat_protection: bool = True,
+) -> SimulationResult:
+    """Simulate all the combinations of the rooms with the PI coefficient sets of an over_climate self-regulation.
+    The underlying climate heats proportionally to the difference between its regulated target and the room temperature"""
+    names = ("kp", "ki", "k_ext", "offset_max", "accumulated_error_threshold")
+    nb_coefs, coefs = _coefficients(
+        {"kp": kp, "ki": ki, "k_ext": k_ext, "offset_max": offset_max, "accumulated_error_threshold": accumulated_error_threshold}, names, rooms.nb_rooms
+    )
+    room_index, coef_index, room = _combine(rooms, nb_coefs)
+    nb = len(room_index)
+
+    cycle_h = scenario.cycle_min / 60.0
+    temp = room.get("initial_temp", np.full(nb, float(scenario.setpoints[0])))
+    accumulated_error = np.zeros(nb)
+    last_regulated = np.full(nb, np.nan)
+    errors = np.zeros((2, nb))
+    energy = np.zeros(nb)
+    switches = np.zeros(nb, dtype=np.int64)
+
+    for step in range(scenario.nb_cycles):
+        ext_temp = float(scenario.ext_temps[step])
+        setpoint = float(scenario.setpoints[step])
+        regulated, accumulated_error, _, _ = compute_pi_regulation(
+            setpoint,
+            temp,
+            ext_temp,
+            accumulated_error,
+            coefs["kp"],
+            coefs["ki"],
+            coefs["k_ext"],
+            coefs["offset_max"],
+            coefs["accumulated_error_threshold"],
+            overheat_protection,
+            1.0,
+        )
+        switches += (regulated != last_regulated).astype(np.int64)
+        last_regulated = regulated
+
+        power = np.clip(room["device_gain"] * (regulated - temp), 0.0, 1.0)
+        temp, mean_temp = _integrate(temp, ext_temp + power * room["capacity"] / room["loss"], room["loss"], np.full(nb, cycle_h))
+
+        energy += power * cycle_h * room["power_kw"]
+        if step >= scenario.warmup_cycles:
+            error = mean_temp - setpoint
+            errors[0] += np.abs(error)
+            errors[1] += error * error
+
+    return _finish(room_index, coef_index, errors, scenario.nb_cycles - scenario.warmup_cycles, energy, switches, coefs)
+
+
+def _simulate_chunk(args) -> SimulationResult:
+    """Simulate one chunk of coefficient sets (in a worker process)"""
+    algorithm, rooms, params, scenario, kwargs = args
+    if algorithm == ALGO_TPI:
+        return simulate_tpi(rooms, params["coef_int"], params["coef_ext"], scenario, **kwargs)
+    return simulate_pi(
+        rooms, params["kp"], params["ki"], params["k_ext"], params["offset_max"], params["accumulated_error_threshold"], scenario, **kwargs
+    )
+
+
+def run_sweep(
+    algorithm: str,
+    rooms: RoomModels,
+    params: dict[str, np.ndarray],
+    scenario: Scenario,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs,
+) -> SimulationResult:
+    """Simulate every room with every coefficient set of params (arrays of the same length K).
+    The coefficient sets are split in chunks simulated in parallel by a process pool.
+    Returns the result with the coef_index of params. kwargs are given to simulate_tpi / simulate_pi"""
+    if algorithm not in (ALGO_TPI, ALGO_PI):
+        raise ValueError(f"Unknown algorithm {algorithm}. Should be {ALGO_TPI} or {ALGO_PI}")
+
+    params = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in params.items()}
+    nb_coefs = max(len(value) for value in params.values())
+    params = {name: np.broadcast_to(value, (nb_coefs,)) for name, value in params.items()}
+    starts = list(range(0, nb_coefs, chunk_size))
+    chunks = [(algorithm, rooms, {name: value[start : start + chunk_size] for name, value in params.items()}, scenario, kwargs) for start in starts]
+
+    if len(chunks) == 1 or max_workers == 1:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_chunk, chunks))
+
+    # coef_index of a chunk is relative to the chunk start
+    for start, result in zip(starts, results):
+        result.coef_index = result.coef_index + start
+    merged = SimulationResult.concatenate(results)
+    order = np.lexsort((merged.coef_index, merged.room_index))
+    return SimulationResult(
+        merged.room_index[order],
+        merged.coef_index[order],
+        merged.comfort_mae[order],
+        merged.comfort_rmse[order],
+        merged.energy_kwh[order],
+        merged.switch_count[order],
+        {name: value[order] for name, value in merged.params.items()},
+    )
@@ -12,7 +12,11 @@ from custom_components.versatile_thermostat.auto_tpi_manager import (
     AutoTpiState,
     STORAGE_VERSION,
     STORAGE_KEY_PREFIX,
+    RECENT_ERRORS_CAPACITY,
+    SAVE_DELAY_SEC,
+    SAVE_SPREAD_SEC,
 )
+from custom_components.versatile_thermostat.ring_buffer import FloatRingBuffer
 from custom_components.versatile_thermostat.const import (
     AUTO_TPI_EVENT,
     CONF_TPI_COEF_INT,
@@ -188,6 +192,42 @@ async def test_save_data(manager, mock_store):
     saved_data = mock_store.async_save.call_args[0][0]
     assert saved_data["total_cycles"] == 10
 
+def test_recent_errors_ring_buffer():
+    """Test the recent errors are kept in a fixed capacity ring buffer persisted in a compact form"""
+    state = AutoTpiState()
+    for i in range(RECENT_ERRORS_CAPACITY + 5):
+        state.recent_errors.append(i * 0.1)
+
+    assert len(state.recent_errors) == RECENT_ERRORS_CAPACITY
+    assert state.recent_errors[0] == pytest.approx(0.5)
+    assert state.recent_errors.last(2) == pytest.approx([2.3, 2.4])
+
+    data = state.to_dict()
+    assert isinstance(data["recent_errors"]["data"], str)
+    restored = AutoTpiState.from_dict(data)
+    assert restored.recent_errors == state.recent_errors
+
+    # Older versions stored a plain list
+    data["recent_errors"] = [1.0, 2.0, 3.0]
+    restored = AutoTpiState.from_dict(data)
+    assert isinstance(restored.recent_errors, FloatRingBuffer)
+    assert restored.recent_errors == [1.0, 2.0, 3.0]
+    assert restored.recent_errors.capacity == RECENT_ERRORS_CAPACITY
+
+
+async def test_schedule_save_is_debounced(manager, mock_store):
+    """Test the saves after learning steps are delayed and written with the latest state"""
+    manager.async_schedule_save()
+    manager.state.total_cycles = 12
+    manager.async_schedule_save()
+
+    mock_store.async_save.assert_not_called()
+    assert mock_store.async_delay_save.call_count == 2
+    data_func, delay = mock_store.async_delay_save.call_args[0]
+    assert SAVE_DELAY_SEC <= delay < SAVE_DELAY_SEC + SAVE_SPREAD_SEC
+    assert data_func()["total_cycles"] == 12
+
+
 async def test_update_state(manager):
     """Test updating transient state via update()."""
     await manager.update(
@@ -346,7 +386,7 @@ async def test_service_calibrate_capacity(mock_vtherm_for_capacity):
     # Mock the dependency call to history.get_significant_states in BaseThermostat
     # and the config update on the instance. The patch for _async_update_tpi_config_entry must make it awaitable.
     # The new=AsyncMock() is crucial to make the patched method awaitable for the side_effect function
-    with patch("custom_components.versatile_thermostat.auto_tpi_manager.history.get_significant_states") as mock_get_history, \
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states") as mock_get_history, \
          patch.object(vtherm, "_async_update_tpi_config_entry", new=AsyncMock()) as mock_update_config:
         
         # history.get_significant_states is called, it should return a mockable result (even though the inner calculation is mocked)
@@ -377,6 +417,48 @@ async def test_service_calibrate_capacity(mock_vtherm_for_capacity):
         # 4. Check that config update was called (BaseThermostat should update config)
         mock_update_config.assert_called_once()
 
+async def test_calculate_capacity_from_slope_sensor(manager):
+    """Test the columnar capacity calibration (sample-and-hold join, rejections and outliers)"""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def state(value, minutes):
+        return MagicMock(state=value, last_changed=start + timedelta(minutes=minutes))
+
+    # Power is event driven: 100% from t=0, unavailable at t=50 (value is held), 50% from t=60
+    power_history = [state("100", 0), state("unavailable", 50), state("50", 60)]
+    slope_history = [state(str(1.0 + i / 100), 5 + i * 5) for i in range(11)]  # t=5..55, held at 100%
+    slope_history += [
+        state("20.0", 57),  # outlier
+        state("-0.5", 58),  # wrong direction
+        state("unknown", 59),  # invalid
+        state("2.0", 65),  # low power
+    ]
+    # Unsorted input must give the same result
+    slope_history.reverse()
+
+    result = await manager.calculate_capacity_from_slope_sensor(slope_history, power_history, min_power_threshold=0.95, kext_coeff=0.0)
+
+    assert result["success"] is True
+    assert result["samples_before_filter"] == 12
+    assert result["outliers_removed"] == 1
+    assert result["samples_used"] == 11
+    # 75th percentile of 1.00..1.10 is at index int(0.75 * 10) = 7
+    assert result["capacity"] == pytest.approx(1.07)
+    assert result["period"] == pytest.approx(0.0)
+
+    # The same computation from raw columns
+    slope_ts, slope_values = AutoTpiManager._states_to_columns(slope_history)
+    assert slope_ts.size == 15
+    assert sum(1 for v in slope_values if v != v) == 1  # one NaN for the unknown state
+    power_ts, power_values = AutoTpiManager._states_to_columns(power_history)
+    assert manager.calculate_capacity_from_columns(slope_ts, slope_values, power_ts, power_values, min_power_threshold=0.95) == result
+
+    # Not enough samples reports the rejection stats
+    result = await manager.calculate_capacity_from_slope_sensor(slope_history[:4], power_history, min_power_threshold=0.95)
+    assert result["success"] is False
+    assert result["rejection_stats"] == {"low_power": 1, "wrong_direction": 1, "invalid": 1}
+
+
 async def test_update_state_with_boiler_off(manager):
     """Test updating state with central boiler off."""
     await manager.update(
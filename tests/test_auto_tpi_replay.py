@@ -0,0 +1,87 @@
+"""Test the offline Auto TPI replay engine."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.versatile_thermostat.auto_tpi_replay import (
+    ReplayReport,
+    ReplaySample,
+    SimulatedClock,
+    _compute_convergence,
+    async_replay,
+)
+
+START = datetime(2025, 1, 6, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def make_trace(days: float, step_min: int = 5, capacity: float = 4.0, loss: float = 0.08, start: datetime = START):
+    """A room heated by a fixed TPI: temp_in follows a first order model"""
+    samples = []
+    temp_in = 17.0
+    for k in range(int(days * 24 * 60 / step_min)):
+        timestamp = start + timedelta(minutes=k * step_min)
+        temp_out = 5.0 - 4.0 * ((k * step_min // 60) % 24 < 7)
+        setpoint = 19.0 if (k * step_min // 60) % 24 < 7 else 20.0
+        on_percent = min(1.0, max(0.0, 0.6 * (setpoint - temp_in) + 0.02 * (setpoint - temp_out)))
+        samples.append(ReplaySample(timestamp, round(temp_in, 2), temp_out, setpoint, on_percent))
+        temp_in += (capacity * on_percent - loss * (temp_in - temp_out)) * step_min / 60
+    return samples
+
+
+def test_simulated_clock():
+    """Timers are fired in order when the clock is advanced"""
+    clock = SimulatedClock(START)
+    action1, action2 = MagicMock(), MagicMock()
+    clock.call_later(60, action1)
+    cancel2 = clock.call_later(30, action2)
+    cancel2()
+
+    clock.advance_to(START + timedelta(seconds=59))
+    action1.assert_not_called()
+    clock.advance_to(START + timedelta(seconds=120))
+    action1.assert_called_once_with(START + timedelta(seconds=60))
+    action2.assert_not_called()
+    assert clock.now == START + timedelta(seconds=120)
+
+
+def test_compute_convergence():
+    """The convergence is the first cycle after which the coefficients stay close to the final ones"""
+    report = ReplayReport("test")
+    report.history = [(START + timedelta(minutes=10 * i), kint, 0.02) for i, kint in enumerate([0.3, 0.5, 0.58, 0.61, 0.6, 0.6])]
+    _compute_convergence(report, 0.05)
+    assert report.convergence_cycle == 2
+    assert report.convergence_time == timedelta(minutes=20)
+
+
+@pytest.mark.asyncio
+async def test_replay_trace():
+    """Replay 3 days of data through the learning"""
+    samples = make_trace(days=3)
+
+    report = await async_replay(samples, name="room", cycle_min=10, coef_int=0.3, coef_ext=0.01, heating_rate=4.0)
+
+    assert report.nb_cycles == 3 * 24 * 6
+    assert sum(report.statuses.values()) == report.nb_cycles
+    assert any(status.startswith("learned") for status in report.statuses)
+    assert len(report.history) == report.nb_cycles
+    assert report.coef_int > 0
+    assert report.coef_ext > 0
+    assert report.capacity > 0
+    assert report.convergence_cycle is not None
+    assert report.cpu_time_per_cycle_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_replay_with_data_gap():
+    """A gap in the data restarts the cycles at the next sample"""
+    samples = [s for s in make_trace(days=0.2) if not timedelta(hours=1) <= s.timestamp - START < timedelta(hours=3)]
+
+    report = await async_replay(samples, name="gap", cycle_min=10, heating_rate=4.0)
+
+    # 6 cycles in the first hour and one cycle every 10 min from 3:00 to the last sample at 4:40
+    assert report.nb_cycles == 6 + 10
+    cycle_ends = [end for end, _, _ in report.history]
+    assert cycle_ends[5] == START + timedelta(hours=1)
+    assert cycle_ends[6] == START + timedelta(hours=3, minutes=10)
@@ -8,7 +8,7 @@ import logging
 
 from datetime import datetime, timedelta
 
-from unittest.mock import patch, MagicMock, PropertyMock
+from unittest.mock import patch, MagicMock, PropertyMock, AsyncMock
 
 from homeassistant.const import STATE_ON, STATE_OFF
 from homeassistant.core import HomeAssistant
@@ -1661,3 +1661,73 @@ async def test_central_boiler_keep_alive_respects_delayed_activation(hass: HomeA
 
     # Verify that call_service was NOT called (due to pending delayed activation)
     manager.call_service.assert_not_called()
+
+
+async def test_boiler_sensors_skip_unchanged_writes(hass: HomeAssistant):
+    """Test that the boiler sensors only adjust the changed VTherm and don't write the state if the aggregate is unchanged"""
+
+    def make_vtherm(entity_id, device_actives, mean_cycle_power):
+        vtherm = MagicMock()
+        vtherm.entity_id = entity_id
+        vtherm.device_actives = device_actives
+        vtherm.power_manager.mean_cycle_power = mean_cycle_power
+        under = MagicMock()
+        under.entity_id = f"switch.{entity_id.split('.')[1]}"
+        vtherm.activable_underlying_entities = [under]
+        return vtherm
+
+    vtherm1 = make_vtherm("climate.vtherm1", ["switch.vtherm1"], 1000.0)
+    vtherm2 = make_vtherm("climate.vtherm2", [], None)
+
+    nb_sensor = NbActiveDeviceForBoilerSensor(hass, "central_id", "Central", {CONF_NAME: "Central"})
+    power_sensor = TotalPowerActiveDeviceForBoilerSensor(hass, "central_id", "Central", {CONF_NAME: "Central"})
+    api_mock = MagicMock()
+    api_mock.central_boiler_manager.refresh_central_boiler_custom_attributes = AsyncMock()
+
+    with patch("custom_components.versatile_thermostat.sensor.VersatileThermostatAPI.get_vtherm_api", return_value=api_mock), patch.object(
+        NbActiveDeviceForBoilerSensor, "async_write_ha_state"
+    ) as mock_write:
+        for sensor in (nb_sensor, power_sensor):
+            sensor._entities = [vtherm1, vtherm2]
+            await sensor.async_update_contributions(sensor._entities)
+
+        assert nb_sensor.native_value == 1
+        assert nb_sensor.active_device_ids == ["switch.vtherm1"]
+        assert power_sensor.native_value == 1000.0
+        assert power_sensor.active_device_ids == ["switch.vtherm1"]
+        assert mock_write.call_count == 2
+        assert api_mock.central_boiler_manager.refresh_central_boiler_custom_attributes.call_count == 2
+
+        # 1. nothing have changed -> no write and no boiler refresh
+        await nb_sensor.async_update_vtherm(vtherm1)
+        await nb_sensor.calculate_nb_active_devices(None)
+        await power_sensor.async_update_contributions([vtherm1, vtherm2])
+        assert mock_write.call_count == 2
+        assert api_mock.central_boiler_manager.refresh_central_boiler_custom_attributes.call_count == 2
+
+        # 2. vtherm2 becomes active -> only its contribution is added
+        vtherm2.device_actives = ["switch.vtherm2"]
+        vtherm2.power_manager.mean_cycle_power = 500.0
+        await nb_sensor.async_update_vtherm(vtherm2)
+        await power_sensor.async_update_contributions([vtherm2])
+        assert nb_sensor.native_value == 2
+        assert nb_sensor.active_device_ids == ["switch.vtherm1", "switch.vtherm2"]
+        assert power_sensor.native_value == 1500.0
+        assert power_sensor.active_device_ids == ["switch.vtherm1", "switch.vtherm2"]
+        assert mock_write.call_count == 4
+
+        # 3. vtherm1 becomes inactive
+        vtherm1.device_actives = []
+        vtherm1.power_manager.mean_cycle_power = 0
+        await nb_sensor.async_update_vtherm(vtherm1)
+        await power_sensor.async_update_contributions([vtherm1])
+        assert nb_sensor.native_value == 1
+        assert nb_sensor.active_device_ids == ["switch.vtherm2"]
+        assert power_sensor.native_value == 500.0
+        assert power_sensor.active_device_ids == ["switch.vtherm2"]
+        assert mock_write.call_count == 6
+
+        # 4. An unknown VTherm is ignored
+        await nb_sensor.async_update_vtherm(make_vtherm("climate.other", ["switch.other"], 10.0))
+        assert nb_sensor.native_value == 1
+        assert mock_write.call_count == 6
@@ -3,7 +3,7 @@
 """ Test the central_configuration """
 from unittest.mock import patch  # , call
 
-# from datetime import datetime  # , timedelta
+from datetime import datetime, timedelta
 from homeassistant import data_entry_flow
 from homeassistant.data_entry_flow import FlowResultType
 from homeassistant.core import HomeAssistant
@@ -484,3 +484,104 @@ async def test_over_switch_with_central_config_but_no_central_config(
     # in case of error we stays in main
     assert result["step_id"] == "main"
     assert result["errors"] == {"use_main_central_config": "no_central_config"}
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_hot_apply_central_config(hass: HomeAssistant, skip_hass_states_is_state, init_central_power_manager, fake_underlying_switch: MockSwitch):
+    """Tests that a change of the central configuration is applied to the running VTherm without reload"""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="TheOverSwitchMockName",
+        unique_id="uniqueId",
+        data={
+            CONF_NAME: "TheOverSwitchMockName",
+            CONF_THERMOSTAT_TYPE: CONF_THERMOSTAT_SWITCH,
+            CONF_TEMP_SENSOR: "sensor.mock_temp_sensor",
+            CONF_CYCLE_MIN: 5,
+            CONF_USE_WINDOW_FEATURE: True,
+            CONF_USE_MOTION_FEATURE: False,
+            CONF_USE_POWER_FEATURE: True,
+            CONF_DEVICE_POWER: 1000,
+            CONF_USE_PRESENCE_FEATURE: False,
+            CONF_UNDERLYING_LIST: ["switch.mock_switch"],
+            CONF_PROP_FUNCTION: PROPORTIONAL_FUNCTION_TPI,
+            CONF_INVERSE_SWITCH: False,
+            CONF_AUTO_TPI_MODE: False,
+            CONF_WINDOW_SENSOR: "binary_sensor.mock_window_sensor",
+            CONF_USE_MAIN_CENTRAL_CONFIG: True,
+            CONF_USE_TPI_CENTRAL_CONFIG: True,
+            CONF_USE_WINDOW_CENTRAL_CONFIG: True,
+            CONF_USE_MOTION_CENTRAL_CONFIG: True,
+            CONF_USE_POWER_CENTRAL_CONFIG: True,
+            CONF_USE_PRESENCE_CENTRAL_CONFIG: True,
+            CONF_USE_PRESETS_CENTRAL_CONFIG: True,
+            CONF_USE_ADVANCED_CENTRAL_CONFIG: False,
+            CONF_SAFETY_DELAY_MIN: 5,
+            CONF_SAFETY_MIN_ON_PERCENT: 0.3,
+            CONF_SAFETY_DEFAULT_ON_PERCENT: 0.1,
+        },
+    )
+
+    with patch("homeassistant.core.ServiceRegistry.async_call"):
+        entity: ThermostatOverSwitch = await create_thermostat(hass, entry, "climate.theoverswitchmockname")
+        assert entity.window_manager.window_delay_sec == 15
+        assert entity.proportional_algorithm._tpi_coef_int == 0.5
+        assert entity.max_temp == 30
+
+        api = VersatileThermostatAPI.get_vtherm_api(hass)
+        central_config = api.find_central_configuration()
+
+        # 1. A change of the window, TPI, safety and temperature limit parameters is applied without reload
+        with patch("custom_components.versatile_thermostat.reload_all_vtherm") as mock_reload_all, patch.object(hass.config_entries, "async_reload") as mock_reload:
+            hass.config_entries.async_update_entry(
+                central_config,
+                data={**central_config.data, CONF_WINDOW_DELAY: 45, CONF_TPI_COEF_INT: 0.7, CONF_MINIMAL_ACTIVATION_DELAY: 20, CONF_TEMP_MAX: 25, CONF_SAFETY_DELAY_MIN: 20},
+            )
+            await hass.async_block_till_done()
+
+            assert mock_reload_all.call_count == 0
+            assert mock_reload.call_count == 0
+
+        assert search_entity(hass, "climate.theoverswitchmockname", "climate") is entity
+        assert entity.window_manager.window_delay_sec == 45
+        assert entity.proportional_algorithm._tpi_coef_int == 0.7
+        assert entity.minimal_activation_delay == 20
+        assert entity.max_temp == 25
+        # The VTherm has its own advanced parameters
+        assert entity.safety_manager.safety_delay_min == 5
+
+        # 2. A change of the external sensor needs a reload
+        with patch("custom_components.versatile_thermostat.reload_all_vtherm") as mock_reload_all:
+            hass.config_entries.async_update_entry(
+                central_config,
+                data={**central_config.data, CONF_EXTERNAL_TEMP_SENSOR: "sensor.other_ext_temp_sensor"},
+            )
+            await hass.async_block_till_done()
+
+            assert mock_reload_all.call_count == 1
+
+        # 3. The live states of the managers survive the apply: window bypass, safety and overpowering
+        await entity.async_set_hvac_mode(VThermHvacMode_HEAT)
+        await entity.window_manager.set_window_bypass(True)
+        await send_temperature_change_event(entity, 15, datetime.now(tz=get_tz(hass)) - timedelta(minutes=10))
+        await wait_for_local_condition(lambda: entity.safety_manager.is_safety_detected)
+        await entity.power_manager.set_overpowering(True, 1000)
+        assert entity.power_manager.is_overpowering_detected
+
+        with patch("custom_components.versatile_thermostat.base_thermostat.BaseThermostat.send_event") as mock_send_event:
+            await entity.async_apply_central_config(
+                {**entity._entry_infos, CONF_WINDOW_DELAY: 50, CONF_SAFETY_DELAY_MIN: 4, CONF_PRESET_POWER: 12},
+                {CONF_WINDOW_DELAY, CONF_SAFETY_DELAY_MIN, CONF_PRESET_POWER},
+            )
+
+            assert entity.window_manager.window_delay_sec == 50
+            assert entity.safety_manager.safety_delay_min == 4
+            assert entity.power_manager.power_temperature == 12
+
+            assert entity.window_manager.is_window_bypass is True
+            assert entity.safety_manager.safety_state == STATE_ON
+            assert entity.power_manager.overpowering_state == STATE_ON
+            # The safety and the overpowering did not start again
+            assert not [c for c in mock_send_event.call_args_list if c.args[0] in (EventType.SAFETY_EVENT, EventType.POWER_EVENT)]
+
+    entity.remove_thermostat()
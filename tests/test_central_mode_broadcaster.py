@@ -0,0 +1,127 @@
+# pylint: disable=protected-access
+"""Tests of the CentralModeBroadcaster which propagates the central changes to the VTherms."""
+
+import asyncio
+import time
+
+from custom_components.versatile_thermostat.central_mode_broadcaster import CentralModeBroadcaster
+
+
+class FakeVTherm:
+    """A VTherm whose update lasts duration seconds and writes its state several times"""
+
+    running = 0
+    max_running = 0
+
+    def __init__(self, entity_id: str, duration: float, central: bool = True, error: Exception | None = None):
+        self.entity_id = entity_id
+        self.duration = duration
+        self.central = central
+        self.error = error
+        self.central_mode = None
+        self.held = 0
+        self.pending = False
+        self.nb_writes = 0
+        self.written_at = None
+
+    def prepare_central_mode(self, new_central_mode, _old_central_mode) -> bool:
+        """Only the VTherms controlled by the central mode are updated"""
+        if not self.central:
+            return False
+        # The updates should not have begun when all the VTherms are prepared
+        assert FakeVTherm.running == 0
+        self.central_mode = new_central_mode
+        return True
+
+    async def update_states(self):
+        """Update the fake VTherm"""
+        FakeVTherm.running += 1
+        FakeVTherm.max_running = max(FakeVTherm.max_running, FakeVTherm.running)
+        try:
+            self.async_write_ha_state()
+            await asyncio.sleep(self.duration)
+            if self.error:
+                raise self.error
+            self.async_write_ha_state()
+        finally:
+            FakeVTherm.running -= 1
+
+    def async_write_ha_state(self):
+        """Count the writes"""
+        if self.held:
+            self.pending = True
+            return
+        self.nb_writes += 1
+        self.written_at = time.perf_counter()
+
+    def hold_state_write(self):
+        """Hold the writes"""
+        self.held += 1
+
+    def release_state_write(self):
+        """Write the held state when the last hold is released"""
+        self.held -= 1
+        if self.held == 0 and self.pending:
+            self.pending = False
+            self.async_write_ha_state()
+
+
+async def test_concurrent_propagation():
+    """The updates run concurrently within the cap and each VTherm writes its state once"""
+    FakeVTherm.max_running = 0
+    vtherms = [FakeVTherm(f"climate.room_{index}", 0.05) for index in range(20)]
+    vtherms.append(FakeVTherm("climate.not_central", 0.05, central=False))
+    broadcaster = CentralModeBroadcaster(max_concurrency=5)
+
+    async def prepare(vtherm):
+        return vtherm.prepare_central_mode("Stopped", "Auto")
+
+    began = time.perf_counter()
+    report = await broadcaster.async_broadcast(vtherms, prepare, lambda vtherm: vtherm.update_states())
+    elapsed = time.perf_counter() - began
+
+    assert FakeVTherm.max_running == 5
+    # The serial propagation would last 20 * 0.05 = 1 s
+    assert elapsed < 0.5
+    assert report["nb_vtherms"] == 21
+    assert report["nb_updated"] == 20
+    assert report["errors"] == {}
+    assert report["latency_ms"] >= 200
+    assert all(vtherm.central_mode == "Stopped" and vtherm.nb_writes == 1 and not vtherm.held for vtherm in vtherms[:20])
+    assert vtherms[20].central_mode is None and vtherms[20].nb_writes == 0
+
+
+async def test_propagation_errors():
+    """A failing update does not stop the others and releases its state write"""
+    vtherms = [FakeVTherm("climate.ok", 0.01), FakeVTherm("climate.ko", 0.01, error=ValueError("bad underlying"))]
+    broadcaster = CentralModeBroadcaster(max_concurrency=0)
+    assert broadcaster.max_concurrency == 1
+
+    async def prepare(vtherm):
+        return vtherm.prepare_central_mode("Auto", "Stopped")
+
+    report = await broadcaster.async_broadcast(vtherms, prepare, lambda vtherm: vtherm.update_states())
+
+    assert report["errors"] == {"climate.ko": "bad underlying"}
+    assert [vtherm.nb_writes for vtherm in vtherms] == [1, 1]
+    assert not any(vtherm.held for vtherm in vtherms)
+
+
+async def test_each_vtherm_writes_at_the_end_of_its_update():
+    """A fast VTherm writes its state without waiting for the slowest one. An outer hold is kept"""
+    fast, slow, nested = FakeVTherm("climate.fast", 0.01), FakeVTherm("climate.slow", 0.2), FakeVTherm("climate.nested", 0.01)
+    # Another update of the nested VTherm holds its writes during the propagation
+    nested.hold_state_write()
+    broadcaster = CentralModeBroadcaster()
+
+    async def prepare(vtherm):
+        return vtherm.prepare_central_mode("Auto", "Stopped")
+
+    began = time.perf_counter()
+    await broadcaster.async_broadcast([fast, slow, nested], prepare, lambda vtherm: vtherm.update_states())
+
+    assert fast.nb_writes == 1 and fast.written_at - began < 0.1
+    assert slow.nb_writes == 1 and slow.written_at - began >= 0.2
+    assert nested.nb_writes == 0 and nested.held == 1 and nested.pending
+    nested.release_state_write()
+    assert nested.nb_writes == 1
@@ -279,6 +279,53 @@ async def test_central_power_manageer_find_vtherms(
         assert vtherm_results == results
 
 
+async def test_central_power_manager_incremental_index(hass: HomeAssistant):
+    """Test that the sorted VTherm index is built once and then updated incrementally"""
+    vtherm_api: VersatileThermostatAPI = MagicMock(spec=VersatileThermostatAPI)
+    central_power_manager = FeatureCentralPowerManager(hass, vtherm_api)
+
+    vtherms = []
+    for name, current_temp in (("vtherm1", 17), ("vtherm2", 16), ("vtherm3", 15)):
+        vtherm = MagicMock(spec=BaseThermostat)
+        vtherm.name = vtherm.unique_id = name
+        vtherm.is_on = True
+        vtherm.current_temperature = current_temp
+        vtherm.target_temperature = 18
+        vtherm.requested_state = VThermState(VThermHvacMode_HEAT, 18, VThermPreset.COMFORT)
+        vtherm.power_manager.is_configured = True
+        vtherm.power_manager.is_overpowering_detected = False
+        vtherms.append(vtherm)
+
+    with patch(
+        "custom_components.versatile_thermostat.feature_central_power_manager.FeatureCentralPowerManager.get_climate_components_entities",
+        return_value=vtherms,
+    ) as mock_get_entities:
+        # 1. first call builds the index
+        assert [v.name for v in central_power_manager.find_all_vtherm_with_power_management_sorted_by_dtemp()] == ["vtherm1", "vtherm2", "vtherm3"]
+        assert mock_get_entities.call_count == 1
+
+        # 2. a temperature change moves only one VTherm without rescanning the entities
+        vtherms[0].current_temperature = 14
+        central_power_manager.update_vtherm(vtherms[0])
+        assert [v.name for v in central_power_manager.find_all_vtherm_with_power_management_sorted_by_dtemp()] == ["vtherm2", "vtherm3", "vtherm1"]
+
+        # 3. a VTherm turned off leaves the index
+        vtherms[1].is_on = False
+        central_power_manager.update_vtherm(vtherms[1])
+        assert [v.name for v in central_power_manager.find_all_vtherm_with_power_management_sorted_by_dtemp()] == ["vtherm3", "vtherm1"]
+
+        # 4. and comes back when turned on again
+        vtherms[1].is_on = True
+        central_power_manager.update_vtherm(vtherms[1])
+        assert [v.name for v in central_power_manager.find_all_vtherm_with_power_management_sorted_by_dtemp()] == ["vtherm2", "vtherm3", "vtherm1"]
+        assert mock_get_entities.call_count == 1
+
+        # 5. invalidation forces a rebuild
+        central_power_manager.invalidate_vtherm_index()
+        assert [v.name for v in central_power_manager.find_all_vtherm_with_power_management_sorted_by_dtemp()] == ["vtherm2", "vtherm3", "vtherm1"]
+        assert mock_get_entities.call_count == 2
+
+
 @pytest.mark.parametrize(
     "current_power, current_max_power, vtherm_configs, expected_results",
     [
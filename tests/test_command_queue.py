@@ -0,0 +1,205 @@
+# pylint: disable=protected-access
+"""Tests for the CommandQueue which rate limits the commands sent to the underlyings."""
+
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import pytest
+
+from custom_components.versatile_thermostat.command_queue import (
+    CommandQueue,
+    TokenBucket,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    SUPERSEDED,
+)
+
+
+class FakeClock:
+    """A monotonic clock and the timers armed by the queue"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.timers = []
+
+    def monotonic(self):
+        """The current time"""
+        return self.now
+
+    def call_later(self, _hass, delay, action):
+        """Record the timer"""
+        self.timers.append((delay, action))
+        return MagicMock()
+
+    async def fire(self, advance: float):
+        """Advance the clock, call the last armed timer and let the sent commands run"""
+        self.now += advance
+        _, action = self.timers.pop()
+        action(None)
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+
+def make_hass(platforms: dict[str, str]):
+    """A hass whose entity registry gives the platform of the entities"""
+    hass = MagicMock()
+    hass.async_create_task = lambda coro: asyncio.get_running_loop().create_task(coro)
+    registry = MagicMock()
+    registry.async_get.side_effect = lambda entity_id: MagicMock(platform=platforms[entity_id]) if entity_id in platforms else None
+    return hass, registry
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+    """Patch the time and the timers of the command queue"""
+    fake_clock = FakeClock()
+    with patch("custom_components.versatile_thermostat.command_queue.time", fake_clock), patch("custom_components.versatile_thermostat.command_queue.async_call_later", fake_clock.call_later):
+        yield fake_clock
+
+
+def make_queue(platforms: dict[str, str], rate_limits: dict[str, float]) -> CommandQueue:
+    """A CommandQueue with the given platforms and limits"""
+    hass, registry = make_hass(platforms)
+    queue = CommandQueue(hass, rate_limits)
+    with patch("custom_components.versatile_thermostat.command_queue.er") as er:
+        er.async_get.return_value = registry
+        for entity_id in platforms:
+            queue.integration_of(entity_id)
+    return queue
+
+
+def test_token_bucket():
+    """The bucket accepts a burst of capacity tokens then refills at rate"""
+    bucket = TokenBucket(rate=1.0, capacity=2.0, now=0.0)
+
+    assert bucket.try_take(1, 0.0)
+    assert bucket.try_take(1, 0.0)
+    assert not bucket.try_take(1, 0.0)
+    assert bucket.delay_for(1, 0.0) == pytest.approx(1.0)
+    assert bucket.try_take(1, 1.0)
+    # a cost higher than the capacity waits for a full bucket only
+    assert bucket.delay_for(5, 1.0) == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_unlimited_integration_is_sent_directly(clock):
+    """The commands of the integrations without limit are never queued"""
+    queue = make_queue({"switch.hue": "hue", "switch.unknown": None}, {"zha": 1.0})
+    send = AsyncMock(return_value="done")
+
+    for _ in range(5):
+        assert await queue.async_submit(["switch.hue"], send) == "done"
+    assert await queue.async_submit(["switch.unknown"], send) == "done"
+    assert await queue.async_submit([], send) == "done"
+
+    assert send.await_count == 7
+    assert not clock.timers
+    assert queue.stats == {}
+
+
+@pytest.mark.asyncio
+async def test_waiting_command_is_superseded(clock):
+    """A waiting command is dropped when a newer command with the same key is submitted"""
+    queue = make_queue({"climate.trv1": "zha"}, {"zha": 1.0})
+    sent = []
+
+    def sender(value):
+        async def send():
+            sent.append(value)
+            return value
+
+        return send
+
+    # the burst of 2 commands is sent immediately
+    assert await queue.async_submit(["climate.trv1"], sender(18)) == 18
+    assert await queue.async_submit(["climate.trv1"], sender(19), supersede_key="trv1") == 19
+
+    first = asyncio.create_task(queue.async_submit(["climate.trv1"], sender(20), supersede_key="trv1"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(queue.async_submit(["climate.trv1"], sender(21), supersede_key="trv1"))
+    await asyncio.sleep(0)
+
+    assert await first is SUPERSEDED
+    assert queue.stats["zha"]["queue_depth"] == 1
+
+    await clock.fire(1.0)
+    assert await second == 21
+    assert sent == [18, 19, 21]
+    assert queue.stats == {"zha": {"rate_limit": 1.0, "queue_depth": 0, "nb_sent": 3, "nb_delayed": 2, "nb_dropped": 1}}
+
+
+@pytest.mark.asyncio
+async def test_priority_order(clock):
+    """The waiting commands are sent by priority then in submission order"""
+    queue = make_queue({"switch.r1": "zwave_js", "switch.r2": "zwave_js", "switch.r3": "zwave_js"}, {"zwave_js": 0.5})
+    sent = []
+
+    def sender(name):
+        async def send():
+            sent.append(name)
+
+        return send
+
+    await queue.async_submit(["switch.r1"], sender("burst"))
+    tasks = []
+    for name, entity_id, priority in (("low", "switch.r1", PRIORITY_LOW), ("normal", "switch.r2", PRIORITY_NORMAL), ("high", "switch.r3", PRIORITY_HIGH)):
+        tasks.append(asyncio.create_task(queue.async_submit([entity_id], sender(name), priority)))
+        await asyncio.sleep(0)
+
+    # one token (at 0.5 per second) comes back every 2 seconds
+    for _ in range(3):
+        await clock.fire(2.0)
+    await asyncio.gather(*tasks)
+
+    assert sent == ["burst", "high", "normal", "low"]
+
+
+@pytest.mark.asyncio
+async def test_priority_keeps_the_order_of_an_entity(clock):
+    """A command with a higher priority is not sent before the older commands of the same entity"""
+    queue = make_queue({"climate.trv1": "zwave_js", "climate.trv2": "zwave_js"}, {"zwave_js": 0.5})
+    sent = []
+
+    def sender(name):
+        async def send():
+            sent.append(name)
+
+        return send
+
+    await queue.async_submit(["climate.trv2"], sender("burst"))
+    tasks = []
+    for name, entity_id, priority, key in (
+        ("trv1 temperature", "climate.trv1", PRIORITY_LOW, "trv1 temperature"),
+        ("trv2 temperature", "climate.trv2", PRIORITY_NORMAL, "trv2 temperature"),
+        ("trv1 off", "climate.trv1", PRIORITY_HIGH, "trv1 hvac_mode"),
+    ):
+        tasks.append(asyncio.create_task(queue.async_submit([entity_id], sender(name), priority, key)))
+        await asyncio.sleep(0)
+
+    for _ in range(3):
+        await clock.fire(2.0)
+    await asyncio.gather(*tasks)
+
+    # The temperature of trv1 is raised to the priority of its turn off
+    assert sent == ["burst", "trv1 temperature", "trv1 off", "trv2 temperature"]
+    assert queue.stats["zwave_js"]["nb_dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_removing_the_limit_flushes_the_queue(clock):
+    """When the limit of an integration is removed, its waiting commands are sent"""
+    queue = make_queue({"switch.r1": "mqtt"}, {"mqtt": 0.5})
+    send = AsyncMock(return_value=None)
+
+    await queue.async_submit(["switch.r1"], send)
+    waiting = asyncio.create_task(queue.async_submit(["switch.r1"], send))
+    await asyncio.sleep(0)
+    assert send.await_count == 1
+
+    queue.set_rate_limits({"mqtt": 0})
+    await waiting
+
+    assert send.await_count == 2
+    assert queue.stats == {}
+    assert clock.timers
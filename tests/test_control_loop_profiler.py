@@ -0,0 +1,132 @@
+"""Tests for the ControlLoopProfiler."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.versatile_thermostat.control_loop_profiler import (
+    ControlLoopProfiler,
+    COUNTER_SERVICE_CALLS,
+    PHASE_CONTROL_HEATING,
+    PHASE_CYCLE_TICK,
+    PHASE_WRITE_HA_STATE,
+    percentile,
+)
+
+
+class FakeManager:
+    """A feature manager"""
+
+    async def refresh_state(self) -> bool:
+        """Refresh the state"""
+        return True
+
+
+class FakeScheduler:
+    """A cycle scheduler"""
+
+    def __init__(self):
+        self.ticks = []
+
+    async def _tick(self, _now=None, _is_initial: bool = False):
+        self.ticks.append(_is_initial)
+
+
+class FakeUnderlying:
+    """An underlying which calls services"""
+
+    async def hass_services_async_call(self, domain, service, service_data=None):
+        """Call a service"""
+        return None
+
+
+class FakeThermostat:
+    """The profiled methods of a VTherm"""
+
+    def __init__(self):
+        self.managers = [FakeManager()]
+        self.cycle_scheduler = FakeScheduler()
+        self.underlying_entities = [FakeUnderlying()]
+        self.nb_writes = 0
+
+    async def async_control_heating(self, timestamp=None, force=False):
+        await self.managers[0].refresh_state()
+        await self.underlying_entities[0].hass_services_async_call("switch", "turn_on")
+        self.async_write_ha_state()
+        return force
+
+    def async_write_ha_state(self):
+        self.nb_writes += 1
+
+
+def test_percentile():
+    """The nearest-rank percentile"""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.5) is None
+
+
+def test_record_window():
+    """Only the last durations are used for the percentiles but the count and max are global"""
+    profiler = ControlLoopProfiler("test", window=10)
+    for duration in range(100):
+        profiler.record("phase", float(duration))
+
+    stats = profiler.phase_stats("phase")
+    assert stats["count"] == 100
+    assert stats["max_ms"] == 99.0
+    assert stats["mean_ms"] == 49.5
+    assert stats["p50_ms"] == 94.0
+    assert stats["p95_ms"] == 99.0
+    assert profiler.phase_stats("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_instrument_thermostat():
+    """The hot path methods of the instances are timed and the service calls are counted"""
+    thermostat = FakeThermostat()
+    profiler = ControlLoopProfiler("test")
+    profiler.instrument_thermostat(thermostat)
+    # A second call doesn't wrap the methods twice
+    profiler.instrument_thermostat(thermostat)
+
+    with patch("custom_components.versatile_thermostat.control_loop_profiler.time.perf_counter", side_effect=[float(i) for i in range(100)]):
+        assert await thermostat.async_control_heating(force=True) is True
+        await thermostat.cycle_scheduler._tick(_is_initial=True)
+
+    assert thermostat.nb_writes == 1
+    assert thermostat.cycle_scheduler.ticks == [True]
+    stats = profiler.to_dict()
+    assert stats["nb_control_cycles"] == 1
+    assert stats["counters"] == {COUNTER_SERVICE_CALLS: 1}
+    assert set(stats["phases"]) == {PHASE_CONTROL_HEATING, PHASE_WRITE_HA_STATE, PHASE_CYCLE_TICK, "FakeManager.refresh_state"}
+    # perf_counter is called in order: control start, refresh start/end, write start/end, control end
+    assert stats["phases"][PHASE_CONTROL_HEATING]["p50_ms"] == 5000.0
+    assert stats["phases"]["FakeManager.refresh_state"]["p50_ms"] == 1000.0
+
+    # The class is not modified
+    assert not hasattr(FakeThermostat.async_control_heating, "_vtherm_profiled")
+
+    profiler.reset()
+    assert profiler.to_dict()["phases"] == {}
+
+
+@pytest.mark.asyncio
+async def test_exception_is_timed():
+    """The duration is recorded even if the method raises"""
+    profiler = ControlLoopProfiler("test")
+    obj = SimpleNamespace()
+
+    async def failing():
+        raise ValueError("boom")
+
+    obj.run = failing
+    assert profiler.instrument(obj, "run", "run") is True
+    assert profiler.instrument(obj, "missing", "missing") is False
+
+    with pytest.raises(ValueError):
+        await obj.run()
+    assert profiler.phase_stats("run")["count"] == 1
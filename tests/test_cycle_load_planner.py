@@ -0,0 +1,90 @@
+"""Tests for the building-wide load-levelling planner (CycleLoadPlanner)."""
+
+import logging
+import random
+
+import numpy as np
+import pytest
+
+from custom_components.versatile_thermostat.cycle_load_planner import (
+    CycleLoadPlanner,
+    PlannedLoad,
+    plan_offsets,
+    profile_stats,
+    windows_from_offsets,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def test_windows_from_offsets():
+    """Windows are wrapped around the cycle and a full ON cycle is a (0, 0) window"""
+    assert windows_from_offsets([0, 400], 300, 600) == [(0, 300), (400, 100)]
+    assert windows_from_offsets([0, 300], 600, 600) == [(0.0, 0.0), (0.0, 0.0)]
+
+    load = PlannedLoad(1000, 600, [(400, 100)], 1000)
+    times = np.array([1000, 1099, 1100, 1399, 1400, 1600 + 1000])
+    assert list(load.power_at(times)) == [1000, 1000, 0, 0, 1000, 1000]
+
+
+def test_planner_levels_two_half_cycles():
+    """Two VTherms at 50% are planned one after the other instead of at the same time"""
+    planner = CycleLoadPlanner()
+    assert planner.plan_shift("a", 0, 600, [0], 300, 1000) == 0
+    assert planner.plan_shift("b", 0, 600, [0], 300, 1000) == 300
+    assert planner.nb_loads == 2
+
+    times = np.arange(0, 600, 5.0)
+    assert profile_stats(planner.building_power(times)) == (1000, 0)
+
+    # A VTherm starting its cycle later is aligned on the absolute time
+    planner.remove("b")
+    assert planner.plan_shift("c", 100, 600, [0], 300, 1000) == 200
+
+
+def test_planner_forgets_stale_loads():
+    """A load not refreshed since STALE_CYCLES cycles is forgotten"""
+    planner = CycleLoadPlanner()
+    planner.plan_shift("a", 0, 600, [0], 300, 1000)
+    assert planner.plan_shift("b", 1300, 600, [0], 300, 1000) == 0
+    assert planner.nb_loads == 1
+
+
+def test_planner_without_power():
+    """Nothing is planned without power or ON time"""
+    planner = CycleLoadPlanner()
+    assert planner.plan_shift("a", 0, 600, [0], 300, 0) == 0
+    assert planner.plan_shift("b", 0, 600, [0], 0, 1000) == 0
+    assert planner.nb_loads == 0
+
+
+def test_load_planner_benchmark():
+    """Simulate a building with VTherms which all start their cycle at the same time
+    and compare the peak power and its standard deviation with and without the planner"""
+    rnd = random.Random(42)
+    cycle = 600.0
+    loads = [(cycle, round(rnd.uniform(0.1, 0.7) * cycle), rnd.choice([500, 1000, 1500, 2000])) for _ in range(20)]
+    times = np.arange(0, cycle, 1.0)
+
+    def building_profile(shifts):
+        profile = np.zeros(len(times))
+        for (duration, on_time, power), shift in zip(loads, shifts):
+            profile += PlannedLoad(0, duration, windows_from_offsets([shift], on_time, duration), power).power_at(times)
+        return profile
+
+    peak_before, std_before = profile_stats(building_profile([0.0] * len(loads)))
+    peak_after, std_after = profile_stats(building_profile(plan_offsets(loads)))
+
+    _LOGGER.info(
+        "Load planner benchmark: peak %.0f W -> %.0f W, std %.0f W -> %.0f W (mean %.0f W)",
+        peak_before,
+        peak_after,
+        std_before,
+        std_after,
+        sum(on_time * power for _, on_time, power in loads) / cycle,
+    )
+
+    # The mean power cannot change, but the peak and the variations are reduced
+    assert np.mean(building_profile([0.0] * len(loads))) == pytest.approx(np.mean(building_profile(plan_offsets(loads))))
+    assert peak_after < 0.5 * peak_before
+    assert std_after < 0.2 * std_before
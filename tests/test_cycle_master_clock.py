@@ -0,0 +1,128 @@
+"""Tests for CycleMasterClock."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.versatile_thermostat.cycle_master_clock import CycleMasterClock
+from custom_components.versatile_thermostat.cycle_scheduler import CycleScheduler
+from custom_components.versatile_thermostat.vtherm_hvac_mode import VThermHvacMode_HEAT
+
+from .test_cycle_scheduler import make_hass, make_thermostat, make_underlying
+
+
+def run_jobs(hass):
+    """Returns the targets of the jobs run by the clock"""
+    return [c[0][0].target for c in hass.async_run_hass_job.call_args_list]
+
+
+@patch("custom_components.versatile_thermostat.cycle_master_clock.time.monotonic")
+@patch("custom_components.versatile_thermostat.cycle_master_clock.async_call_later")
+def test_master_clock_single_timer(mock_call_later, mock_monotonic):
+    """All the deadlines share one HA timer and the deadlines of a same slot fire together"""
+    mock_monotonic.return_value = 1000.0
+    hass = make_hass()
+    clock = CycleMasterClock(hass)
+
+    action1, action2, action3 = MagicMock(), MagicMock(), MagicMock()
+    clock.async_call_later(10.05, action1)
+    clock.async_call_later(10.2, action2)
+    clock.async_call_later(20, action3)
+
+    # One timer armed at the end of the slot of the first deadline
+    assert mock_call_later.call_count == 1
+    assert mock_call_later.call_args[0][1] == pytest.approx(10.25)
+    assert clock.nb_pending == 3
+
+    # An earlier deadline re-arms the timer
+    cancel4 = clock.async_call_later(5, MagicMock())
+    assert mock_call_later.call_count == 2
+    assert mock_call_later.call_args[0][1] == pytest.approx(5)
+    cancel4()
+    assert clock.nb_pending == 3
+
+    # The timer fires at 1005: nothing is due, the timer is re-armed for the next slot
+    mock_monotonic.return_value = 1005.0
+    clock._on_timer(None)
+    assert run_jobs(hass) == []
+    assert mock_call_later.call_count == 3
+
+    # The timer fires at the end of the slot. Both actions of the slot are run
+    mock_monotonic.return_value = 1010.25
+    clock._on_timer(None)
+    assert run_jobs(hass) == [action1, action2]
+    assert clock.nb_pending == 1
+    assert clock.wakeups == 2
+    assert clock.wakeups_per_minute == 2
+    assert clock.late_ticks == 0
+
+    # The last one is late because the event loop was busy
+    mock_monotonic.return_value = 1025.0
+    clock._on_timer(None)
+    assert run_jobs(hass) == [action1, action2, action3]
+    assert clock.late_ticks == 1
+    assert clock.nb_pending == 0
+
+    stats = clock.stats
+    assert stats["wakeups"] == 3
+    assert stats["late_ticks"] == 1
+    assert stats["max_lateness_sec"] == pytest.approx(5.0)
+
+    # Wakeups older than one minute are not counted anymore
+    mock_monotonic.return_value = 1080.0
+    assert clock.wakeups_per_minute == 1
+
+
+@patch("custom_components.versatile_thermostat.cycle_master_clock.async_call_later")
+def test_master_clock_shutdown(mock_call_later):
+    """Shutdown cancels the HA timer and all the pending calls"""
+    timer_cancel = MagicMock()
+    mock_call_later.return_value = timer_cancel
+    hass = make_hass()
+    clock = CycleMasterClock(hass)
+    clock.async_call_later(10, MagicMock())
+
+    clock.async_shutdown()
+    timer_cancel.assert_called_once()
+    assert clock.nb_pending == 0
+
+
+def test_master_clock_phases_are_spread():
+    """Each scheduler gets a different phase"""
+    clock = CycleMasterClock(make_hass())
+    phases = [clock.register_scheduler() for _ in range(6)]
+    assert phases[0] == 0.0
+    assert all(0.0 <= phase < 1.0 for phase in phases)
+    # no two phases closer than 1/(2*n) of the cycle
+    sorted_phases = sorted(phases)
+    assert min(b - a for a, b in zip(sorted_phases, sorted_phases[1:])) > 1 / 12
+
+
+@pytest.mark.asyncio
+@patch("custom_components.versatile_thermostat.cycle_scheduler.async_call_later")
+async def test_scheduler_with_master_clock(mock_call_later, freezer):
+    """A scheduler with a master clock don't install its own timers and is shifted by its phase"""
+    freezer.move_to("2024-01-01T00:00:00Z")
+    hass = make_hass()
+    clock = MagicMock(spec=CycleMasterClock)
+    clock.register_scheduler.return_value = 0.5
+    # no device power: the planner gives back the default shift (the phase)
+    clock.plan_shift.side_effect = lambda *args, default_shift=0.0: default_shift
+
+    r1 = make_underlying("R1")
+    scheduler = CycleScheduler(hass, make_thermostat(), [r1], 600, master_clock=clock)
+
+    await scheduler.start_cycle(VThermHvacMode_HEAT, 0.2, force=True)
+
+    mock_call_later.assert_not_called()
+    # The ON period starts at half of the cycle: R1 stays off and the first tick is at 300s
+    r1.turn_on.assert_not_called()
+    delays = [c[0][0] for c in clock.async_call_later.call_args_list]
+    assert 300 in delays
+    assert 600 in delays
+    assert scheduler._states[0].on_t == 300
+    assert scheduler._states[0].off_t == 420
+    assert clock.plan_shift.call_args.kwargs["default_shift"] == 300
+
+    await scheduler.cancel_cycle()
+    clock.release.assert_called_with(scheduler)
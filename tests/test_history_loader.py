@@ -0,0 +1,148 @@
+# pylint: disable=protected-access
+"""Tests for the columnar HistoryLoader."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from custom_components.versatile_thermostat.history_loader import HistoryLoader, states_to_columns
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+SLOPE = "sensor.salon_temperature_slope"
+POWER = "sensor.salon_power_percent"
+
+
+def fake_recorder_history(start: datetime, period_min: int = 60):
+    """A get_significant_states which gives one compressed state every period_min for each entity"""
+    calls = []
+
+    def get_significant_states(_hass, start_time, end_time=None, entity_ids=None, **kwargs):
+        calls.append((start_time, end_time, tuple(entity_ids), kwargs))
+        result = {}
+        for index, entity_id in enumerate(entity_ids):
+            first = max(0, int((start_time - start).total_seconds() // (period_min * 60)))
+            states = []
+            ts = start + timedelta(minutes=first * period_min)
+            while ts < end_time:
+                if ts >= start_time:
+                    states.append({"s": str(index * 100 + (ts - start).total_seconds() / 3600), "lu": ts.timestamp()})
+                ts += timedelta(minutes=period_min)
+            result[entity_id] = states
+        return result
+
+    return get_significant_states, calls
+
+
+@pytest.fixture(name="recorder")
+def fixture_recorder():
+    """The recorder executor runs the jobs in threads"""
+    recorder = MagicMock()
+    recorder.async_add_executor_job = lambda job, *args: asyncio.get_running_loop().run_in_executor(None, job, *args)
+    with patch("custom_components.versatile_thermostat.history_loader.get_instance", return_value=recorder), patch(
+        "custom_components.versatile_thermostat.history_loader.time"
+    ) as fake_time:
+        fake_time.time.return_value = NOW.timestamp()
+        yield recorder
+
+
+def test_states_to_columns():
+    """The compressed dicts and the State objects give the same columns"""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    states = [
+        {"s": "19.5", "lu": start.timestamp()},
+        {"s": "unavailable", "lu": start.timestamp() + 60, "lc": start.timestamp() + 30},
+        MagicMock(state="20", last_changed=start + timedelta(minutes=2)),
+        {"s": "21"},  # no time: ignored
+    ]
+
+    timestamps, values = states_to_columns(states)
+
+    np.testing.assert_array_equal(timestamps, [start.timestamp(), start.timestamp() + 30, start.timestamp() + 120])
+    np.testing.assert_array_equal(values, [19.5, np.nan, 20.0])
+
+
+@pytest.mark.asyncio
+async def test_load_concurrent_chunks_and_cache(recorder, tmp_path):  # pylint: disable=unused-argument
+    """The chunks are fetched in compressed format, clipped to the period and the past chunks are read from the cache"""
+    origin = NOW - timedelta(days=10)
+    get_significant_states, calls = fake_recorder_history(origin)
+    loader = HistoryLoader(MagicMock(), cache_dir=str(tmp_path), chunk_duration=timedelta(days=2))
+    start_time, end_time = origin + timedelta(hours=30, minutes=30), NOW - timedelta(hours=5)
+
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states", side_effect=get_significant_states):
+        columns = await loader.async_load([SLOPE, POWER], start_time, end_time)
+
+    assert all(call[3] == {"significant_changes_only": False, "minimal_response": True, "no_attributes": True, "compressed_state_format": True} for call in calls)
+    assert loader.stats == {"nb_chunks_fetched": len(calls), "nb_chunks_from_cache": 0}
+
+    slope_ts, slope_values = columns[SLOPE]
+    # the state at 30h holds at the start of the period, then one state per hour up to the end
+    assert slope_ts[0] == (origin + timedelta(hours=30)).timestamp()
+    assert slope_ts[-1] == (NOW - timedelta(hours=5)).timestamp()
+    assert slope_ts.size == 10 * 24 - 30 - 5 + 1
+    np.testing.assert_allclose(slope_values, (slope_ts - origin.timestamp()) / 3600)
+    np.testing.assert_allclose(columns[POWER][1], 100 + (columns[POWER][0] - origin.timestamp()) / 3600)
+
+    # Second load: only the chunks which are not over are fetched again
+    nb_calls = len(calls)
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states", side_effect=get_significant_states):
+        cached = await loader.async_load([SLOPE, POWER], start_time, end_time)
+
+    assert len(calls) - nb_calls == 1
+    assert calls[-1][1] == NOW
+    assert loader.stats["nb_chunks_from_cache"] == nb_calls - 1
+    for entity_id in (SLOPE, POWER):
+        np.testing.assert_array_equal(cached[entity_id][0], columns[entity_id][0])
+        np.testing.assert_array_equal(cached[entity_id][1], columns[entity_id][1])
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_is_skipped(recorder, tmp_path):  # pylint: disable=unused-argument
+    """A chunk which cannot be fetched is skipped, the others are kept"""
+    origin = NOW - timedelta(days=4)
+    get_significant_states, _ = fake_recorder_history(origin)
+
+    def failing(hass, start_time, end_time=None, entity_ids=None, **kwargs):
+        if start_time > NOW - timedelta(days=1):
+            raise RuntimeError("database is locked")
+        return get_significant_states(hass, start_time, end_time, entity_ids, **kwargs)
+
+    loader = HistoryLoader(MagicMock(), cache_dir=str(tmp_path), chunk_duration=timedelta(days=1))
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states", side_effect=failing):
+        columns = await loader.async_load([SLOPE], origin, NOW)
+
+    # the chunk of the current day is missing: the last state is the one of 23:00 the day before
+    assert columns[SLOPE][0].size == 3 * 24 + 12
+    assert columns[SLOPE][0][-1] == (NOW - timedelta(hours=13)).timestamp()
+
+    empty = await loader.async_load([SLOPE], NOW, NOW)
+    assert empty[SLOPE][0].size == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_cached_chunk_is_fetched_again(recorder, tmp_path):  # pylint: disable=unused-argument
+    """A truncated or empty cached file is removed and its chunk is fetched again. No temporary file is left"""
+    origin = NOW - timedelta(days=3)
+    get_significant_states, calls = fake_recorder_history(origin)
+    loader = HistoryLoader(MagicMock(), cache_dir=str(tmp_path), chunk_duration=timedelta(days=1))
+
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states", side_effect=get_significant_states):
+        columns = await loader.async_load([SLOPE], origin, NOW)
+
+    entity_dir = tmp_path / SLOPE.replace(".", "__")
+    cached_files = sorted(entity_dir.iterdir())
+    assert [path.suffix for path in cached_files] == [".npz"] * 3
+    cached_files[0].write_bytes(cached_files[0].read_bytes()[:40])
+    cached_files[1].write_bytes(b"")
+
+    nb_calls = len(calls)
+    with patch("custom_components.versatile_thermostat.history_loader.history.get_significant_states", side_effect=get_significant_states):
+        reloaded = await loader.async_load([SLOPE], origin, NOW)
+
+    # the 2 invalid chunks and the current one are fetched
+    assert len(calls) - nb_calls == 3
+    np.testing.assert_array_equal(reloaded[SLOPE][0], columns[SLOPE][0])
+    assert [path.suffix for path in sorted(entity_dir.iterdir())] == [".npz"] * 3
@@ -0,0 +1,142 @@
+# pylint: disable=line-too-long, protected-access
+"""Tests of the compact log buffer of the log collector"""
+
+import logging
+import time
+from datetime import datetime, timezone
+
+import pytest
+from vtherm_api.log_collector import VThermLogger, VThermLogHandler
+
+from custom_components.versatile_thermostat import log_buffer
+from custom_components.versatile_thermostat.log_buffer import CompactLogBuffer
+from custom_components.versatile_thermostat.log_guard import set_log_collector_level
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@pytest.fixture(autouse=True, name="restore_collector")
+def fixture_restore_collector():
+    """The buffers created by the tests replace the collector: the previous one is restored after"""
+    previous = VThermLogger._collector
+    yield
+    set_log_collector_level(logging.DEBUG)
+    VThermLogger._collector = previous
+
+
+def make_record(name: str, level: int, message: str, created: float) -> logging.LogRecord:
+    """A log record created at a given time"""
+    record = logging.LogRecord(name, level, __file__, 0, message, None, None)
+    record.created = created
+    return record
+
+
+def feed(handlers, nb_records: int, nb_thermostats: int, start: float, step: float = 0.1):
+    """Send the logs of several thermostats (and some without thermostat) to the handlers"""
+    for index in range(nb_records):
+        thermostat = index % (nb_thermostats + 1)
+        message = f"Room {thermostat} - temperature {index}" if thermostat < nb_thermostats else f"API message {index}"
+        level = logging.INFO if index % 3 == 0 else logging.DEBUG
+        record = make_record(f"custom_components.versatile_thermostat.module{index % 5}", level, message, start + index * step)
+        for handler in handlers:
+            handler.emit(record)
+
+
+def as_tuples(entries):
+    """The comparable content of log entries"""
+    return [(entry.timestamp, entry.level, entry.logger_name, entry.message, entry.thermostat_hint) for entry in entries]
+
+
+def test_same_entries_as_collector():
+    """The filters of get_entries give the entries of the vtherm_api collector"""
+    now = time.time()
+    reference, compact = VThermLogHandler(), CompactLogBuffer()
+    feed((reference, compact), 10000, 8, now - 1000)
+
+    start = datetime.fromtimestamp(now - 800, tz=timezone.utc)
+    end = datetime.fromtimestamp(now - 200, tz=timezone.utc)
+    for thermostat_name in (None, "Room 3", "room 7", "Unknown"):
+        for min_level in (logging.DEBUG, logging.INFO):
+            expected = reference.get_entries(thermostat_name, min_level, start, end)
+            assert as_tuples(compact.get_entries(thermostat_name, min_level, start, end)) == as_tuples(expected)
+
+    assert compact.size == 10000
+    assert compact.stats["nb_loggers"] == 5
+    assert compact.stats["nb_hints"] == 8
+
+
+def test_eviction_by_size_and_age(monkeypatch):
+    """The oldest segments are removed when the buffer is over its size or too old"""
+    monkeypatch.setattr(log_buffer, "SEGMENT_SIZE", 100)
+    now = time.time()
+    compact = CompactLogBuffer(max_bytes=50_000)
+    feed((compact,), 5000, 4, now - 500)
+
+    stats = compact.stats
+    assert stats["nb_bytes"] <= 50_000 + 100 * 200
+    assert stats["nb_evicted"] > 0
+    assert stats["nb_records"] == compact.size == 5000 - stats["nb_evicted"]
+    # The newest records are kept
+    assert compact.get_entries(None, logging.DEBUG, datetime.fromtimestamp(now - 10, tz=timezone.utc))[-1].message == "API message 4999"
+
+    # The records of more than max_age are removed by purge
+    old = CompactLogBuffer(max_age_hours=1)
+    feed((old,), 300, 2, now - 2 * 3600)
+    feed((old,), 10, 2, now - 60)
+    old.purge()
+    assert old.size == 10
+
+
+def test_spill_on_disk(monkeypatch, tmp_path):
+    """The evicted segments are compressed on disk and read back for an export"""
+    monkeypatch.setattr(log_buffer, "SEGMENT_SIZE", 100)
+    now = time.time()
+    reference, compact = VThermLogHandler(), CompactLogBuffer(max_bytes=20_000, spill_dir=str(tmp_path))
+    feed((reference, compact), 3000, 4, now - 400)
+    compact.flush_spill()
+
+    stats = compact.stats
+    assert stats["nb_spilled_segments"] > 0
+    assert stats["nb_records"] < 3000
+    assert len(list(tmp_path.iterdir())) == stats["nb_spilled_segments"]
+
+    start = datetime.fromtimestamp(now - 500, tz=timezone.utc)
+    end = datetime.fromtimestamp(now, tz=timezone.utc)
+    assert len(compact.get_entries("Room 1", logging.DEBUG, start, end)) < len(reference.get_entries("Room 1", logging.DEBUG, start, end))
+
+    # Each export reads back its own segments: the buffer itself is unchanged
+    view, other_view = compact.export_view(start.isoformat(), None), compact.export_view(start, end)
+    assert view.nb_loaded == other_view.nb_loaded == stats["nb_spilled_segments"]
+    del other_view
+    assert as_tuples(view.get_entries("Room 1", logging.DEBUG, start, end)) == as_tuples(reference.get_entries("Room 1", logging.DEBUG, start, end))
+    assert len(compact.get_entries("Room 1", logging.DEBUG, start, end)) < len(reference.get_entries("Room 1", logging.DEBUG, start, end))
+    compact.close()
+
+
+def test_log_buffer_benchmark():
+    """Memory per record and cost of the export of one thermostat among 50, compared to the vtherm_api collector.
+    The timings are only logged: the export reads the records of the thermostat and the records without thermostat only"""
+    now = time.time()
+    nb_records, nb_thermostats = 100_000, 50
+    reference, compact = VThermLogHandler(), CompactLogBuffer()
+    feed((reference, compact), nb_records, nb_thermostats, now - nb_records * 0.01, step=0.01)
+    start = datetime.fromtimestamp(now - nb_records * 0.01 - 1, tz=timezone.utc)
+    end = datetime.fromtimestamp(now, tz=timezone.utc)
+
+    began = time.perf_counter()
+    expected = reference.get_entries("Room 12", logging.DEBUG, start, end)
+    reference_cost = time.perf_counter() - began
+    began = time.perf_counter()
+    entries = compact.get_entries("Room 12", logging.DEBUG, start, end)
+    compact_cost = time.perf_counter() - began
+
+    assert as_tuples(entries) == as_tuples(expected)
+    # The records of "Room 12" and the ones without thermostat (see feed)
+    assert compact.stats["nb_visited"] == sum(1 for index in range(nb_records) if index % (nb_thermostats + 1) in (12, nb_thermostats))
+    _LOGGER.info(
+        "Log buffer benchmark with %d records: %.0f bytes/record, export of one thermostat in %.1f ms (%.1f ms with the vtherm_api collector)",
+        nb_records,
+        compact.stats["nb_bytes"] / nb_records,
+        compact_cost * 1e3,
+        reference_cost * 1e3,
+    )
@@ -0,0 +1,104 @@
+# pylint: disable=line-too-long, protected-access
+"""Tests of the debug guard of the hot paths and of the leveled log collector"""
+
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from vtherm_api.log_collector import VThermLogger, get_vtherm_logger
+
+from custom_components.versatile_thermostat import ema, open_window_algorithm
+from custom_components.versatile_thermostat.commons import write_event_log
+from custom_components.versatile_thermostat.ema import ExponentialMovingAverage
+from custom_components.versatile_thermostat.log_guard import LeveledLogHandler, is_debug_enabled, set_log_collector_level
+from custom_components.versatile_thermostat.open_window_algorithm import WindowOpenDetectionAlgorithm
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@pytest.fixture(name="collector")
+def fixture_collector():
+    """A leveled collector installed for the test, the previous one is restored after"""
+    previous = VThermLogger._collector
+    collector = LeveledLogHandler()
+    yield collector
+    set_log_collector_level(logging.DEBUG)
+    VThermLogger._collector = previous
+
+
+def test_debug_guard(collector):
+    """The guard follows the collector level and the level of the logger"""
+    logger = get_vtherm_logger("custom_components.versatile_thermostat.test_log_guard_logger")
+    logger.setLevel(logging.INFO)
+
+    assert is_debug_enabled(logger) is True
+    set_log_collector_level(logging.INFO)
+    assert is_debug_enabled(logger) is False
+    logger.setLevel(logging.DEBUG)
+    assert is_debug_enabled(logger) is True
+    logger.setLevel(logging.INFO)
+
+    # The collector drops the records under its level
+    logger.debug("Salon - a debug message %s", 1)
+    logger.info("Salon - an info message %s", 2)
+    messages = [entry.message for entry in collector.get_entries()]
+    assert messages == ["Salon - an info message 2"]
+
+
+def test_write_event_log_is_lazy(collector):
+    """The args of the event are formatted in the collector only"""
+    logger = get_vtherm_logger("custom_components.versatile_thermostat.test_log_guard_event")
+
+    write_event_log(logger, "Salon", "Temperature changed to state %s", "19.5")
+    write_event_log(logger, "Salon", "Set target temp: 50%")
+
+    messages = [entry.message for entry in collector.get_entries()]
+    assert messages[0].startswith("Salon - ---------------------> NEW EVENT: Temperature changed to state 19.5 ---")
+    assert messages[1].startswith("Salon - ---------------------> NEW EVENT: Set target temp: 50% ---")
+    assert [entry.thermostat_hint for entry in collector.get_entries()] == ["Salon", "Salon"]
+
+
+def test_log_guard_benchmark(collector, monkeypatch):
+    """Per cycle overhead of the logs of the hot paths (EMA, window slope and event log of a temperature event)
+    with the log collector at DEBUG and at INFO. The timings are only logged: the test checks that the debug
+    records of the hot paths are not created at INFO"""
+    ema._LOGGER.setLevel(logging.INFO)
+    open_window_algorithm._LOGGER.setLevel(logging.INFO)
+    logger = get_vtherm_logger("custom_components.versatile_thermostat.test_log_guard_benchmark")
+    logger.setLevel(logging.INFO)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    nb_cycles = 2000
+    created: Counter = Counter()
+    make_record = logging.Logger.makeRecord
+
+    def counting_make_record(self, name, level, *args, **kwargs):
+        created[(name, level)] += 1
+        return make_record(self, name, level, *args, **kwargs)
+
+    monkeypatch.setattr(logging.Logger, "makeRecord", counting_make_record)
+
+    def run_cycles() -> float:
+        created.clear()
+        the_ema = ExponentialMovingAverage("Salon", 300, timezone.utc, 2, 0.5)
+        the_algo = WindowOpenDetectionAlgorithm(3.0, 0.0, vtherm=None)
+        began = time.perf_counter()
+        for cycle in range(nb_cycles):
+            timestamp = start + timedelta(minutes=cycle)
+            write_event_log(logger, "Salon", "Temperature changed to state %s", 19.5)
+            temperature = the_ema.calculate_ema(19.5 + (cycle % 7) * 0.05, timestamp)
+            the_algo.add_temp_measurement(temperature, timestamp)
+        return (time.perf_counter() - began) / nb_cycles
+
+    def nb_debug_records() -> int:
+        return sum(count for (name, level), count in created.items() if level == logging.DEBUG and name in (ema.__name__, open_window_algorithm.__name__))
+
+    set_log_collector_level(logging.DEBUG)
+    debug_cost = run_cycles()
+    assert nb_debug_records() >= nb_cycles
+    set_log_collector_level(logging.INFO)
+    info_cost = run_cycles()
+    assert nb_debug_records() == 0
+
+    _LOGGER.info("Log guard benchmark: %.1f µs/cycle with the collector at DEBUG, %.1f µs/cycle at INFO", debug_cost * 1e6, info_cost * 1e6)
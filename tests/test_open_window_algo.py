@@ -4,6 +4,7 @@
 from datetime import datetime, timedelta
 from custom_components.versatile_thermostat.open_window_algorithm import (
     WindowOpenDetectionAlgorithm,
+    RegressionSlopeAlgorithm,
 )
 
 from .commons import *  # pylint: disable=wildcard-import, unused-wildcard-import
@@ -238,3 +239,58 @@ async def test_open_window_algo_fake_point(
     assert the_algo.last_slope == 0.67
     assert the_algo.is_window_close_detected() is True
     assert the_algo.is_window_open_detected() is False
+
+
+def test_regression_slope_algo():
+    """Tests the regression slope: exact on a line, a confidence interval and a sliding window"""
+    the_algo = RegressionSlopeAlgorithm(3.0, 0.0, window_min=10, max_samples=8)
+    now = datetime(2026, 1, 1, 12, 0)
+
+    assert the_algo.add_temp_measurement(temperature=20, datetime_measure=now) is None
+    # 2 points: a slope but no interval
+    assert the_algo.add_temp_measurement(temperature=19.9, datetime_measure=now + timedelta(minutes=1)) == pytest.approx(-6.0)
+    assert the_algo.slope_confidence_interval is None
+    assert the_algo.is_window_open_detected() is False
+
+    # a perfect line: the interval is the slope
+    the_algo.add_temp_measurement(temperature=19.8, datetime_measure=now + timedelta(minutes=2))
+    assert the_algo.last_slope == pytest.approx(-6.0)
+    assert the_algo.slope_confidence_interval == pytest.approx((-6.0, -6.0))
+    assert the_algo.is_window_open_detected() is True
+    assert the_algo.is_window_close_detected() is False
+
+    # The temperature is stable again: the old points leave the window and the slope goes back to 0
+    for minute in range(3, 40):
+        the_algo.add_temp_measurement(temperature=19.8, datetime_measure=now + timedelta(minutes=minute))
+    assert the_algo.last_slope == pytest.approx(0.0, abs=1e-9)
+    assert the_algo.is_window_open_detected() is False
+    assert the_algo.is_window_close_detected() is True
+
+    # Not increasing time and aberrant values are ignored
+    assert the_algo.add_temp_measurement(temperature=10, datetime_measure=now + timedelta(minutes=39)) == pytest.approx(0.0, abs=1e-9)
+    assert the_algo.add_temp_measurement(temperature=10, datetime_measure=now + timedelta(minutes=40)) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_regression_slope_algo_noise():
+    """A noisy drop is detected only when it is significant and the running sums stay exact over time"""
+    the_algo = RegressionSlopeAlgorithm(3.0, 0.0, window_min=15, max_samples=16)
+    now = datetime(2026, 1, 1, 12, 0)
+    noise = [0.1, -0.1, 0.05, -0.05, 0.0, 0.1, -0.1, 0.0]
+
+    # Stable noisy temperature over two days
+    for minute in range(2 * 24 * 60):
+        the_algo.add_temp_measurement(temperature=20 + noise[minute % 8], datetime_measure=now + timedelta(minutes=minute))
+        assert the_algo.is_window_open_detected() is False
+    low, high = the_algo.slope_confidence_interval
+    assert low < 0 < high
+    assert the_algo.last_slope == pytest.approx(low + (high - low) / 2)
+
+    # The window opens: -6°/h
+    start = now + timedelta(minutes=2 * 24 * 60)
+    detected_after = None
+    for minute in range(15):
+        the_algo.add_temp_measurement(temperature=20 - 0.1 * minute + noise[minute % 8], datetime_measure=start + timedelta(minutes=minute))
+        if detected_after is None and the_algo.is_window_open_detected():
+            detected_after = minute
+    assert detected_after is not None and detected_after <= 10
+    assert the_algo.last_slope == pytest.approx(-6.0, abs=1.5)
@@ -0,0 +1,111 @@
+"""Tests for the OutdoorTemperatureHub."""
+
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import pytest
+
+from custom_components.versatile_thermostat.outdoor_temperature_hub import OutdoorTemperatureHub
+
+HUB = "custom_components.versatile_thermostat.outdoor_temperature_hub"
+
+
+def make_vtherm():
+    """A VTherm as seen by the hub"""
+    vtherm = MagicMock()
+    vtherm.async_ext_temperature_control = AsyncMock()
+    return vtherm
+
+
+def make_event(entity_id: str, state: str):
+    """A state change event of the sensor"""
+    new_state = MagicMock()
+    new_state.entity_id = entity_id
+    new_state.state = state
+    return MagicMock(data={"entity_id": entity_id, "new_state": new_state})
+
+
+@patch(f"{HUB}.async_call_later")
+@patch(f"{HUB}.async_track_state_change_event")
+def test_one_listener_per_sensor(mock_track, mock_call_later):
+    """The VTherms using the same sensor share one listener which is removed with the last subscriber"""
+    hub = OutdoorTemperatureHub(MagicMock())
+    vtherm1, vtherm2, vtherm3 = make_vtherm(), make_vtherm(), make_vtherm()
+
+    unsub1 = hub.subscribe("sensor.outdoor", vtherm1)
+    unsub2 = hub.subscribe("sensor.outdoor", vtherm2)
+    unsub3 = hub.subscribe("sensor.other", vtherm3)
+    assert mock_track.call_count == 2
+    assert hub.stats["nb_sensors"] == 2
+    assert hub.stats["nb_subscribers"] == 3
+
+    unsub1()
+    mock_track.return_value.assert_not_called()
+    unsub2()
+    unsub3()
+    assert mock_track.return_value.call_count == 2
+    assert hub.stats["nb_sensors"] == 0
+
+
+@patch(f"{HUB}.async_call_later")
+@patch(f"{HUB}.async_track_state_change_event")
+def test_fan_out_with_jitter(mock_track, mock_call_later):
+    """The value is given to all the VTherms at once and their control cycles are spread"""
+    hass = MagicMock()
+    hub = OutdoorTemperatureHub(hass, max_jitter_sec=10)
+    vtherms = [make_vtherm() for _ in range(4)]
+    for vtherm in vtherms:
+        hub.subscribe("sensor.outdoor", vtherm)
+    listener = mock_track.call_args[0][2]
+
+    event = make_event("sensor.outdoor", "12.5")
+    listener(event)
+
+    for vtherm in vtherms:
+        vtherm.set_ext_temperature.assert_called_once_with(12.5, event.data["new_state"])
+    # the first VTherm is controlled immediately, the others are delayed
+    assert hass.async_create_task.call_count == 1
+    assert [c[0][1] for c in mock_call_later.call_args_list] == pytest.approx([2.5, 5.0, 7.5])
+    assert hub.nb_pending_controls == 3
+
+    # A new value before the end of the window is coalesced with the pending controls
+    listener(make_event("sensor.outdoor", "12.0"))
+    assert vtherms[3].set_ext_temperature.call_count == 2
+    assert mock_call_later.call_count == 3
+    assert hub.stats["nb_coalesced"] == 3
+
+
+@patch(f"{HUB}.async_call_later")
+@patch(f"{HUB}.async_track_state_change_event")
+@pytest.mark.asyncio
+async def test_pending_control(mock_track, mock_call_later):
+    """A pending control runs the control cycle of the VTherm once and can be cancelled by the unsubscribe"""
+    hub = OutdoorTemperatureHub(MagicMock(), max_jitter_sec=10)
+    vtherm1, vtherm2, vtherm3 = make_vtherm(), make_vtherm(), make_vtherm()
+    hub.subscribe("sensor.outdoor", vtherm1)
+    hub.subscribe("sensor.outdoor", vtherm2)
+    unsub3 = hub.subscribe("sensor.outdoor", vtherm3)
+    mock_track.call_args[0][2](make_event("sensor.outdoor", "3"))
+
+    run_control2 = mock_call_later.call_args_list[0][0][2]
+    await run_control2(None)
+    vtherm2.async_ext_temperature_control.assert_awaited_once()
+
+    unsub3()
+    mock_call_later.return_value.assert_called_once()
+    assert hub.nb_pending_controls == 0
+    assert hub.stats["nb_controls"] == 2
+
+
+@pytest.mark.parametrize("state", ["unavailable", "unknown", "nan", "not a number"])
+@patch(f"{HUB}.async_call_later")
+@patch(f"{HUB}.async_track_state_change_event")
+def test_invalid_states_are_ignored(mock_track, mock_call_later, state):
+    """Invalid states of the sensor are not given to the VTherms"""
+    hub = OutdoorTemperatureHub(MagicMock())
+    vtherm = make_vtherm()
+    hub.subscribe("sensor.outdoor", vtherm)
+
+    mock_track.call_args[0][2](make_event("sensor.outdoor", state))
+
+    vtherm.set_ext_temperature.assert_not_called()
+    assert hub.stats["nb_events"] == 0
@@ -97,6 +97,48 @@ async def test_safety_feature_manager_post_init(
         assert custom_attributes["safety_manager"].get("safety_default_on_percent", None) == safety_default_on_percent or DEFAULT_SAFETY_DEFAULT_ON_PERCENT
 
 
+async def test_safety_feature_manager_deadline(
+    hass: HomeAssistant,
+):
+    """Test the deadline of the temperature measures registered in the SafetyWatchdog"""
+
+    tz = get_tz(hass)  # pylint: disable=invalid-name
+    now = datetime.now(tz=tz)
+    fake_vtherm = MagicMock(spec=BaseThermostat)
+    type(fake_vtherm).name = PropertyMock(return_value="the name")
+    type(fake_vtherm).now = PropertyMock(return_value=now)
+    type(fake_vtherm).last_temperature_measure = PropertyMock(return_value=now - timedelta(minutes=2))
+    type(fake_vtherm).last_ext_temperature_measure = PropertyMock(return_value=now - timedelta(minutes=4))
+    fake_vtherm.requested_state = MagicMock(hvac_mode=VThermHvacMode_HEAT)
+
+    safety_manager = FeatureSafetyManager(fake_vtherm, hass)
+    safety_manager.post_init(
+        {
+            CONF_SAFETY_DELAY_MIN: 10,
+            CONF_SAFETY_MIN_ON_PERCENT: 0.5,
+            CONF_SAFETY_DEFAULT_ON_PERCENT: 0.1,
+        }
+    )
+    watchdog = VersatileThermostatAPI.get_vtherm_api(hass).safety_watchdog
+
+    # 1. the oldest measure (the outdoor one) gives the deadline
+    await safety_manager.start_listening()
+    assert watchdog.get_deadline(safety_manager) == pytest.approx((now - timedelta(minutes=4)).timestamp() + 600)
+
+    # 2. the measures are not expired: the safety state is known without computing the deltas
+    assert await safety_manager.refresh_state() is False
+    assert safety_manager.safety_state == STATE_OFF
+
+    # 3. a new outdoor measure moves the deadline
+    type(fake_vtherm).last_ext_temperature_measure = PropertyMock(return_value=now)
+    safety_manager.refresh_deadline()
+    assert watchdog.get_deadline(safety_manager) == pytest.approx((now - timedelta(minutes=2)).timestamp() + 600)
+
+    # 4. the deadline is removed when the manager stops
+    safety_manager.stop_listening()
+    assert watchdog.get_deadline(safety_manager) is None
+
+
 @pytest.mark.parametrize("expected_lingering_tasks", [True])
 @pytest.mark.parametrize("expected_lingering_timers", [True])
 async def test_security_feature(
@@ -0,0 +1,79 @@
+# pylint: disable=protected-access
+"""Tests of the SafetyWatchdog which detects the expired temperature measures."""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.versatile_thermostat.safety_watchdog import SafetyWatchdog, DEADLINE_MARGIN_SEC
+
+
+def make_manager(name: str) -> MagicMock:
+    """A safety manager whose async_on_deadline returns its name"""
+    manager = MagicMock()
+    manager.async_on_deadline = MagicMock(return_value=name)
+    return manager
+
+
+def expired(hass) -> list:
+    """The names of the managers called by the watchdog"""
+    return [c[0][0] for c in hass.async_create_task.call_args_list]
+
+
+@patch("custom_components.versatile_thermostat.safety_watchdog.dt_util.utcnow")
+@patch("custom_components.versatile_thermostat.safety_watchdog.async_call_later")
+def test_watchdog_single_timer(mock_call_later, mock_utcnow):
+    """One timer for the earliest deadline. A new measure moves the deadline of its manager"""
+    mock_utcnow.return_value = datetime.fromtimestamp(1000, tz=timezone.utc)
+    hass = MagicMock()
+    watchdog = SafetyWatchdog(hass)
+    room1, room2, room3 = make_manager("room1"), make_manager("room2"), make_manager("room3")
+
+    watchdog.set_deadline(room1, 1600)
+    watchdog.set_deadline(room2, 1300)
+    watchdog.set_deadline(room3, 1900)
+    assert watchdog.nb_deadlines == 3
+    # The timer is re-armed for the earlier deadline of room2 only
+    assert mock_call_later.call_count == 2
+    assert mock_call_later.call_args[0][1] == pytest.approx(300 + DEADLINE_MARGIN_SEC)
+
+    # A new measure of room2: its deadline moves after the one of room1. The armed timer is kept
+    watchdog.set_deadline(room2, 1700)
+    assert mock_call_later.call_count == 2
+
+    # The timer fires: nothing is due and the timer is re-armed for room1
+    mock_utcnow.return_value = datetime.fromtimestamp(1301, tz=timezone.utc)
+    watchdog._on_timer(None)
+    assert expired(hass) == []
+    assert mock_call_later.call_args[0][1] == pytest.approx(299 + DEADLINE_MARGIN_SEC)
+
+    # room1 and room2 expire together. The old deadline of room2 is ignored
+    mock_utcnow.return_value = datetime.fromtimestamp(1750, tz=timezone.utc)
+    watchdog._on_timer(None)
+    assert expired(hass) == ["room1", "room2"]
+    assert watchdog.nb_deadlines == 1
+    assert watchdog.stats["nb_expirations"] == 2
+
+    # The removal of the last deadline cancels the timer
+    watchdog.remove(room3)
+    assert watchdog.nb_deadlines == 0
+    assert watchdog.stats["heap_size"] == 0
+    mock_call_later.return_value.assert_called()
+
+
+@patch("custom_components.versatile_thermostat.safety_watchdog.dt_util.utcnow")
+@patch("custom_components.versatile_thermostat.safety_watchdog.async_call_later")
+def test_watchdog_heap_compaction(mock_call_later, mock_utcnow):
+    """The moved deadlines do not grow the heap without limit"""
+    mock_utcnow.return_value = datetime.fromtimestamp(1000, tz=timezone.utc)
+    watchdog = SafetyWatchdog(MagicMock())
+    managers = [make_manager(f"room{index}") for index in range(10)]
+
+    for measure in range(100):
+        for index, manager in enumerate(managers):
+            watchdog.set_deadline(manager, 1000 + measure * 60 + index)
+
+    assert watchdog.nb_deadlines == 10
+    assert watchdog.stats["heap_size"] <= 4 * 10 + 16 + 1
+    assert watchdog.get_deadline(managers[3]) == 1000 + 99 * 60 + 3
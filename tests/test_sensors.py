@@ -558,3 +558,73 @@ async def test_sensors_over_climate_minimal(
         hass, "sensor.theoverclimatemockname_last_external_temperature_date", "sensor"
     )
     assert last_ext_temperature_sensor is None
+
+
+async def test_companion_entities_find_climate_by_config_id(
+    hass: HomeAssistant,
+    skip_hass_states_is_state,
+):
+    """Test that the companion entities resolve their climate through the API index"""
+    api = VersatileThermostatAPI.get_vtherm_api(hass)
+
+    climate = MagicMock(spec=BaseThermostat)
+    other_climate = MagicMock(spec=BaseThermostat)
+    assert api.get_climate("config_id") is None
+
+    # Two entities wait for the same climate. One is cancelled before the registration
+    waiter1 = hass.async_create_background_task(api.async_wait_for_climate("config_id"), "waiter1")
+    waiter2 = hass.async_create_background_task(api.async_wait_for_climate("config_id"), "waiter2")
+    await asyncio.sleep(0)
+    assert not waiter1.done()
+    waiter2.cancel()
+    await asyncio.sleep(0)
+
+    api.register_climate("config_id", climate)
+    assert await waiter1 is climate
+    assert api.get_climate("config_id") is climate
+    assert await api.async_wait_for_climate("config_id") is climate
+
+    # Unregistering an old instance (reload) keeps the new one
+    api.unregister_climate("config_id", other_climate)
+    assert api.get_climate("config_id") is climate
+    api.unregister_climate("config_id", climate)
+    assert api.get_climate("config_id") is None
+
+    # A real VTherm registers itself and its sensors find it
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="TheOverSwitchMockName",
+        unique_id="uniqueId",
+        data={
+            CONF_NAME: "TheOverSwitchMockName",
+            CONF_THERMOSTAT_TYPE: CONF_THERMOSTAT_SWITCH,
+            CONF_TEMP_SENSOR: "sensor.mock_temp_sensor",
+            CONF_EXTERNAL_TEMP_SENSOR: "sensor.mock_ext_temp_sensor",
+            CONF_CYCLE_MIN: 5,
+            CONF_TEMP_MIN: 15,
+            CONF_TEMP_MAX: 30,
+            "eco_temp": 17,
+            "comfort_temp": 18,
+            "boost_temp": 19,
+            CONF_USE_WINDOW_FEATURE: False,
+            CONF_USE_MOTION_FEATURE: False,
+            CONF_USE_POWER_FEATURE: False,
+            CONF_USE_PRESENCE_FEATURE: False,
+            CONF_UNDERLYING_LIST: ["switch.mock_switch"],
+            CONF_PROP_FUNCTION: PROPORTIONAL_FUNCTION_TPI,
+            CONF_TPI_COEF_INT: 0.3,
+            CONF_TPI_COEF_EXT: 0.01,
+            CONF_MINIMAL_ACTIVATION_DELAY: 30,
+            CONF_MINIMAL_DEACTIVATION_DELAY: 0,
+            CONF_SAFETY_DELAY_MIN: 5,
+            CONF_SAFETY_MIN_ON_PERCENT: 0.3,
+        },
+    )
+
+    entity: BaseThermostat = await create_thermostat(hass, entry, "climate.theoverswitchmockname")
+    assert entity
+    assert api.get_climate(entry.entry_id) is entity
+
+    on_percent_sensor: OnPercentSensor = search_entity(hass, "sensor.theoverswitchmockname_power_percent", "sensor")
+    assert on_percent_sensor
+    assert on_percent_sensor.my_climate is entity
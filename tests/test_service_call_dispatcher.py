@@ -0,0 +1,202 @@
+"""Tests for the ServiceCallDispatcher."""
+
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, call, patch
+
+import pytest
+
+from custom_components.versatile_thermostat.command_queue import PRIORITY_LOW, SUPERSEDED
+from custom_components.versatile_thermostat.service_call_dispatcher import ServiceCallDispatcher
+
+
+def make_hass(side_effect=None):
+    """A hass which records the service calls"""
+    hass = MagicMock()
+    hass.services.async_call = AsyncMock(side_effect=side_effect, return_value=None)
+    hass.async_create_task = lambda coro: asyncio.get_running_loop().create_task(coro)
+    hass.async_create_background_task = lambda coro, _name: asyncio.get_running_loop().create_task(coro)
+    return hass
+
+
+@pytest.mark.asyncio
+async def test_single_call_is_unchanged():
+    """A call alone in its window is sent with its own arguments"""
+    hass = make_hass()
+    dispatcher = ServiceCallDispatcher(hass)
+
+    await dispatcher.async_call("switch", "turn_on", {"entity_id": "switch.r1"})
+
+    assert hass.services.async_call.call_args_list == [call("switch", "turn_on", {"entity_id": "switch.r1"})]
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_merged():
+    """The identical commands of the underlyings are sent in one call, the others concurrently"""
+    hass = make_hass()
+    dispatcher = ServiceCallDispatcher(hass)
+
+    results = await asyncio.gather(
+        dispatcher.async_call("climate", "set_temperature", {"entity_id": "climate.trv1", "temperature": 19.5}, False, None, None, False),
+        dispatcher.async_call("climate", "set_temperature", {"entity_id": "climate.trv2", "temperature": 19.5}, False, None, None, False),
+        dispatcher.async_call("climate", "set_temperature", {"entity_id": "climate.trv3", "temperature": 20.0}, False, None, None, False),
+        dispatcher.async_call("number", "set_value", {"value": 40}, False, None, {"entity_id": "number.v1"}, False),
+        dispatcher.async_call("number", "set_value", {"value": 40}, False, None, {"entity_id": "number.v2"}, False),
+    )
+
+    assert results == [None] * 5
+    assert hass.services.async_call.await_count == 3
+    hass.services.async_call.assert_has_awaits(
+        [
+            call("climate", "set_temperature", {"entity_id": ["climate.trv1", "climate.trv2"], "temperature": 19.5}, False, None, None, False),
+            call("climate", "set_temperature", {"entity_id": "climate.trv3", "temperature": 20.0}, False, None, None, False),
+            call("number", "set_value", {"value": 40}, False, None, {"entity_id": ["number.v1", "number.v2"]}, False),
+        ],
+        any_order=True,
+    )
+    assert dispatcher.stats == {"nb_commands": 5, "nb_service_calls": 3, "nb_merged_commands": 4, "command_queue": {}}
+
+
+@pytest.mark.asyncio
+async def test_merged_call_failure_is_reported_per_entity():
+    """When the merged call fails, each entity is retried alone and gets its own error"""
+
+    async def service_call(domain, service, service_data, *args):
+        if isinstance(service_data["entity_id"], list) or service_data["entity_id"] == "switch.r2":
+            raise ValueError(f"failed {service_data['entity_id']}")
+
+    hass = make_hass(service_call)
+    dispatcher = ServiceCallDispatcher(hass)
+
+    results = await asyncio.gather(
+        dispatcher.async_call("switch", "turn_on", {"entity_id": "switch.r1"}),
+        dispatcher.async_call("switch", "turn_on", {"entity_id": "switch.r2"}),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], ValueError)
+    assert str(results[1]) == "failed switch.r2"
+    # the merged call then one call per entity
+    assert hass.services.async_call.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_calls_with_response_are_not_merged():
+    """A call which returns a response is sent alone"""
+    hass = make_hass()
+    hass.services.async_call.return_value = {"climate.trv1": {"ok": True}}
+    dispatcher = ServiceCallDispatcher(hass)
+
+    response = await dispatcher.async_call("climate", "get_info", {"entity_id": "climate.trv1"}, True, None, None, True)
+
+    assert response == {"climate.trv1": {"ok": True}}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """No more than max_concurrent calls per integration are in flight"""
+    in_flight, max_in_flight = 0, 0
+
+    async def service_call(*args):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    hass = make_hass(service_call)
+    dispatcher = ServiceCallDispatcher(hass, max_concurrent=2)
+
+    await asyncio.gather(*(dispatcher.async_call("number", "set_value", {"entity_id": f"number.v{i}", "value": i}) for i in range(6)))
+
+    assert hass.services.async_call.await_count == 6
+    assert max_in_flight == 2
+
+    # The bound is per integration: the calls to another bridge are not delayed
+    max_in_flight = 0
+    dispatcher.command_queue._integrations.update({f"number.v{i}": "zha" if i % 2 else "mqtt" for i in range(6)})
+    await asyncio.gather(*(dispatcher.async_call("number", "set_value", {"entity_id": f"number.v{i}", "value": i}) for i in range(6)))
+
+    assert hass.services.async_call.await_count == 12
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_superseded_per_entity():
+    """The merged calls of a rate limited integration wait per entity: a turn_off of two relays supersedes
+    the waiting keep-alive turn_on of one of them and is sent in one call when it leaves the queue"""
+    hass = make_hass()
+    dispatcher = ServiceCallDispatcher(hass)
+    dispatcher.command_queue._integrations.update({"switch.r0": "zha", "switch.r1": "zha", "switch.r2": "zha"})
+    dispatcher.command_queue.set_rate_limits({"zha": 0.5})
+    timers = []
+
+    with patch("custom_components.versatile_thermostat.command_queue.time") as mock_time, patch(
+        "custom_components.versatile_thermostat.command_queue.async_call_later", side_effect=lambda _hass, _delay, action: timers.append(action)
+    ):
+        mock_time.monotonic.return_value = 1000.0
+        # The only token is taken
+        await dispatcher.async_call("switch", "turn_on", {"entity_id": "switch.r0"})
+
+        keep_alive = asyncio.create_task(dispatcher.async_call("switch", "turn_on", {"entity_id": "switch.r1"}, priority=PRIORITY_LOW))
+        await asyncio.sleep(0)
+        turn_off = asyncio.gather(
+            dispatcher.async_call("switch", "turn_off", {"entity_id": "switch.r1"}),
+            dispatcher.async_call("switch", "turn_off", {"entity_id": "switch.r2"}),
+        )
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        assert await keep_alive is SUPERSEDED
+
+        # One token sends the two waiting turn_off
+        mock_time.monotonic.return_value += 2.0
+        timers.pop()(None)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert await turn_off == [None, None]
+
+    assert hass.services.async_call.call_args_list == [
+        call("switch", "turn_on", {"entity_id": "switch.r0"}),
+        call("switch", "turn_off", {"entity_id": ["switch.r1", "switch.r2"]}, False, None, None, False),
+    ]
+    assert dispatcher.command_queue.stats["zha"]["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_trvs_of_a_rate_limited_integration_are_merged():
+    """The identical commands to the TRVs of a VTherm behind zha are sent in one call for one token"""
+    hass = make_hass()
+    dispatcher = ServiceCallDispatcher(hass)
+    trvs = [f"climate.trv{index}" for index in range(4)]
+    dispatcher.command_queue._integrations.update({trv: "zha" for trv in trvs})
+
+    await asyncio.gather(*(dispatcher.async_call("climate", "set_temperature", {"entity_id": trv, "temperature": 19.5}) for trv in trvs))
+
+    assert hass.services.async_call.call_args_list == [call("climate", "set_temperature", {"entity_id": trvs, "temperature": 19.5}, False, None, None, False)]
+    assert dispatcher.stats["nb_merged_commands"] == 4
+    assert dispatcher.command_queue.stats["zha"]["nb_sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_others():
+    """The batch is sent by its own task: the cancellation of the caller which opened the window only cancels its wait"""
+    release = asyncio.Event()
+
+    async def service_call(*_args):
+        await release.wait()
+
+    hass = make_hass(service_call)
+    dispatcher = ServiceCallDispatcher(hass)
+    callers = [asyncio.create_task(dispatcher.async_call("climate", "set_temperature", {"entity_id": f"climate.trv{index}", "temperature": 19})) for index in range(3)]
+    for _ in range(10):
+        await asyncio.sleep(0)
+    # The merged call is in flight
+    assert hass.services.async_call.await_count == 1
+
+    callers[0].cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*callers[1:]) == [None, None]
+    assert callers[0].cancelled()
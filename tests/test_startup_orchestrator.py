@@ -0,0 +1,77 @@
+# pylint: disable=protected-access
+"""Tests of the StartupOrchestrator which starts the VTherms concurrently."""
+
+import asyncio
+import time
+
+from custom_components.versatile_thermostat.startup_orchestrator import StartupOrchestrator
+
+
+class FakeVTherm:
+    """A VTherm whose startup lasts duration seconds and counts the concurrent startups"""
+
+    running = 0
+    max_running = 0
+
+    def __init__(self, entity_id: str, duration: float, error: Exception | None = None):
+        self.entity_id = entity_id
+        self.duration = duration
+        self.error = error
+        self.central_configuration = None
+
+    async def async_startup(self, central_configuration):
+        """Start the fake VTherm"""
+        FakeVTherm.running += 1
+        FakeVTherm.max_running = max(FakeVTherm.max_running, FakeVTherm.running)
+        try:
+            self.central_configuration = central_configuration
+            await asyncio.sleep(self.duration)
+            if self.error:
+                raise self.error
+        finally:
+            FakeVTherm.running -= 1
+
+
+async def test_concurrent_startup():
+    """The startups run concurrently within the cap and the time to control is near the slowest startup"""
+    FakeVTherm.max_running = 0
+    vtherms = [FakeVTherm(f"climate.room_{index}", 0.05) for index in range(30)]
+    vtherms.append(FakeVTherm("climate.slow", 0.2))
+    central_config = object()
+    orchestrator = StartupOrchestrator(max_concurrency=10)
+
+    began = time.perf_counter()
+    durations = await orchestrator.async_start(vtherms, central_config)
+    elapsed = time.perf_counter() - began
+
+    assert FakeVTherm.max_running == 10
+    # The serial startup would last 30 * 0.05 + 0.2 = 1.7 s
+    assert elapsed < 0.6
+    assert all(vtherm.central_configuration is central_config for vtherm in vtherms)
+    assert len(durations) == 31
+    assert orchestrator.get_startup_duration("climate.slow") >= 0.2
+    report = orchestrator.report
+    assert report["max_concurrency"] == 10
+    assert report["total_sec"] >= 0.2
+    assert report["errors"] == {}
+
+
+async def test_errors_and_reload():
+    """A failing startup does not stop the others and the reload of one VTherm keeps the report of the others"""
+    FakeVTherm.max_running = 0
+    vtherms = [FakeVTherm("climate.ok", 0.01), FakeVTherm("climate.ko", 0.01, ValueError("bad sensor")), FakeVTherm("climate.other", 0.01)]
+    orchestrator = StartupOrchestrator(max_concurrency=1)
+
+    await orchestrator.async_start(vtherms, None)
+    assert FakeVTherm.max_running == 1
+    assert set(orchestrator.report["vtherms"]) == {"climate.ok", "climate.ko", "climate.other"}
+    assert orchestrator.report["errors"] == {"climate.ko": "bad sensor"}
+
+    # The reload of the failing VTherm only updates its own entry
+    vtherms[1].error = None
+    await orchestrator.async_start([vtherms[1]], None)
+    assert set(orchestrator.report["vtherms"]) == {"climate.ok", "climate.ko", "climate.other"}
+    assert orchestrator.report["errors"] == {}
+
+    orchestrator.max_concurrency = 0
+    assert orchestrator.max_concurrency == 1
@@ -0,0 +1,98 @@
+"""Tests for the batch identification of the thermal model."""
+
+import logging
+import time
+
+import numpy as np
+
+from custom_components.versatile_thermostat.thermal_identification import hold_on_grid, identify_thermal_model
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPACITY = 2.0
+K_LOSS = 0.1
+GAIN = 0.05
+CYCLE_MIN = 5
+
+
+def simulate_room(days: int, seed: int = 1):
+    """A room driven by a TPI which follows a daily setpoint schedule. The sensors send one state per minute"""
+    rng = np.random.default_rng(seed)
+    step_sec = 60
+    timestamps = np.arange(0, days * 86400, step_sec, dtype=np.float64)
+    t_out = 5 + 4 * np.sin(2 * np.pi * timestamps / 86400) + rng.normal(0, 0.1, timestamps.size)
+    t_in = np.empty(timestamps.size)
+    power = np.empty(timestamps.size)
+    temperature = 18.0
+    for i, ts in enumerate(timestamps):
+        target = 20.0 if (ts % 86400) > 6 * 3600 else 17.0
+        if i % CYCLE_MIN == 0:
+            on_percent = min(max(0.6 * (target - temperature) + 0.05 * (target - t_out[i]), 0.0), 1.0)
+        power[i] = on_percent * 100
+        temperature += (CAPACITY * on_percent - K_LOSS * (temperature - t_out[i]) + GAIN) * step_sec / 3600
+        t_in[i] = temperature + rng.normal(0, 0.02)
+    return (timestamps, np.round(t_in, 2)), (timestamps, t_out), (timestamps, power)
+
+
+def test_hold_on_grid():
+    """The last value before each grid time is held, NaN before the first value or when too old"""
+    columns = (np.array([100.0, 200.0]), np.array([1.0, 2.0]))
+    held = hold_on_grid(columns, np.array([50.0, 100.0, 150.0, 250.0, 1000.0]), max_age_sec=500)
+    np.testing.assert_array_equal(held, [np.nan, 1.0, 1.0, 2.0, np.nan])
+
+
+def test_identify_synthetic_room():
+    """The capacity and the loss rate of a simulated room are recovered"""
+    temp_in, temp_out, power = simulate_room(days=20)
+
+    result = identify_thermal_model(temp_in, temp_out, power, cycle_min=CYCLE_MIN)
+
+    assert result["success"] is True
+    assert abs(result["capacity"] - CAPACITY) / CAPACITY < 0.05
+    assert abs(result["k_loss"] - K_LOSS) / K_LOSS < 0.05
+    assert result["coef_ext"] == round(result["k_loss"] / result["capacity"], 4)
+    assert 0.01 <= result["coef_int"] <= 1.0
+    assert result["r_squared"] > 0.8
+    assert result["confidence"] > 0.5
+
+
+def test_identify_failures():
+    """No history, a constant power or a non physical model are reported as failures"""
+    empty = (np.empty(0), np.empty(0))
+    temp_in, temp_out, power = simulate_room(days=2)
+
+    assert identify_thermal_model(empty, temp_out, power, cycle_min=CYCLE_MIN)["error"] == "Missing history"
+
+    constant = (power[0], np.full(power[0].size, 50.0))
+    result = identify_thermal_model(temp_in, temp_out, constant, cycle_min=CYCLE_MIN)
+    assert result["success"] is False
+    assert "power" in result["error"]
+
+    # The temperature falls when heating: no positive capacity
+    inverted = (temp_in[0], 40 - temp_in[1])
+    assert identify_thermal_model(inverted, temp_out, power, cycle_min=CYCLE_MIN)["success"] is False
+
+
+def test_identify_one_year_is_fast():
+    """A year of 1-minute history is identified and the model is recovered. The duration (well under a
+    second) is only logged: a wall clock bound would be flaky on a loaded runner"""
+    rng = np.random.default_rng(2)
+    step_sec = 60
+    timestamps = np.arange(0, 365 * 86400, step_sec, dtype=np.float64)
+    # The power changes every 30 minutes
+    power = np.repeat(rng.uniform(0, 100, timestamps.size // 30 + 1), 30)[: timestamps.size]
+    t_out = 5 + 4 * np.sin(2 * np.pi * timestamps / 86400)
+    t_in = np.empty(timestamps.size)
+    temperature = 18.0
+    for i, (on_percent, outdoor) in enumerate(zip((power / 100).tolist(), t_out.tolist())):
+        temperature += (CAPACITY * on_percent - K_LOSS * (temperature - outdoor) + GAIN) * step_sec / 3600
+        t_in[i] = temperature
+
+    started = time.perf_counter()
+    result = identify_thermal_model((timestamps, t_in), (timestamps, t_out), (timestamps, power), cycle_min=CYCLE_MIN)
+    _LOGGER.info("Identification of one year of history in %.3f s", time.perf_counter() - started)
+
+    assert result["success"] is True
+    assert result["samples_used"] > 500_000
+    assert abs(result["capacity"] - CAPACITY) / CAPACITY < 0.05
+    assert abs(result["k_loss"] - K_LOSS) / K_LOSS < 0.05
@@ -0,0 +1,134 @@
+# pylint: disable=line-too-long
+""" Tests of the vectorized thermal simulator used to tune the TPI and PI coefficients """
+
+import math
+
+import numpy as np
+import pytest
+
+from custom_components.versatile_thermostat.pi_algorithm import PITemperatureRegulator
+from custom_components.versatile_thermostat.prop_algo_tpi import TpiAlgorithm
+from custom_components.versatile_thermostat.vtherm_hvac_mode import VThermHvacMode_HEAT
+from scripts.thermal_simulator import (
+    ALGO_PI,
+    ALGO_TPI,
+    RoomModels,
+    Scenario,
+    run_sweep,
+    simulate_pi,
+    simulate_tpi,
+)
+
+
+def make_scenario(nb_cycles: int = 144) -> Scenario:
+    """One day with a night setback and a sinusoidal outdoor temperature"""
+    steps = np.arange(nb_cycles)
+    ext_temps = 5.0 + 4.0 * np.sin(2 * np.pi * steps / nb_cycles)
+    setpoints = np.where((steps // 6) % 24 < 7, 17.0, 20.0)
+    return Scenario(ext_temps, setpoints, cycle_min=10, warmup_cycles=6)
+
+
+ROOMS = RoomModels(capacity=np.array([3.0, 5.0]), loss=np.array([0.1, 0.05]), power_kw=np.array([1.0, 2.0]), initial_temp=17.0)
+
+
+def test_simulate_tpi_matches_tpi_algorithm():
+    """The vectorized simulation gives the same results than a room driven by a TpiAlgorithm"""
+    scenario = make_scenario()
+    coef_int = [0.3, 0.6, 0.9]
+    coef_ext = [0.01, 0.02, 0.05]
+
+    result = simulate_tpi(ROOMS, coef_int, coef_ext, scenario)
+    assert len(result) == 2 * 3
+
+    cycle_h = scenario.cycle_min / 60
+    for i in range(len(result)):
+        room, coef = result.room_index[i], result.coef_index[i]
+        capacity, loss, power_kw = ROOMS.capacity[room], ROOMS.loss[room], ROOMS.power_kw[room]
+        algo = TpiAlgorithm(coef_int[coef], coef_ext[coef], "climate.sim")
+
+        temp, energy, errors = 17.0, 0.0, 0.0
+        for step in range(scenario.nb_cycles):
+            ext_temp, setpoint = scenario.ext_temps[step], scenario.setpoints[step]
+            algo.calculate(setpoint, temp, ext_temp, None, VThermHvacMode_HEAT)
+            on_percent = algo.on_percent
+            mean_temp = 0.0
+            # exact integration of the ON then the OFF phase
+            for duration, temp_eq in ((on_percent * cycle_h, ext_temp + capacity / loss), ((1 - on_percent) * cycle_h, ext_temp)):
+                decay = math.exp(-loss * duration)
+                if duration > 0:
+                    mean_temp += (temp_eq + (temp - temp_eq) * (1 - decay) / (loss * duration)) * duration / cycle_h
+                temp = temp_eq + (temp - temp_eq) * decay
+            energy += on_percent * cycle_h * power_kw
+            if step >= scenario.warmup_cycles:
+                errors += abs(mean_temp - setpoint)
+
+        assert result.energy_kwh[i] == pytest.approx(energy)
+        assert result.comfort_mae[i] == pytest.approx(errors / (scenario.nb_cycles - scenario.warmup_cycles))
+
+
+def test_simulate_tpi_switch_count():
+    """A switch is counted at each change of the relay state"""
+    rooms = RoomModels(capacity=np.array([3.0]), loss=np.array([0.1]), initial_temp=17.0)
+    scenario = Scenario(np.full(3, 5.0), np.full(3, 20.0), cycle_min=10)
+
+    result = simulate_tpi(rooms, [0.3], [0.01], scenario)
+
+    # cycle 1 at 100%: ON. cycle 2 at 96%: OFF at the end. cycle 3: ON then OFF
+    assert result.switch_count[0] == 4
+
+
+def test_simulate_pi_matches_pi_regulator():
+    """The vectorized simulation drives the same PI calculation than PITemperatureRegulator"""
+    scenario = make_scenario()
+    result = simulate_pi(ROOMS, [0.3, 0.5], [0.05, 0.1], [0.1, 0.1], [2, 3], [10, 20], scenario)
+
+    cycle_h = scenario.cycle_min / 60
+    for i in range(len(result)):
+        room = result.room_index[i]
+        params = {name: value[i] for name, value in result.params.items()}
+        capacity, loss, power_kw = ROOMS.capacity[room], ROOMS.loss[room], ROOMS.power_kw[room]
+        regulator = PITemperatureRegulator(scenario.setpoints[0], params["kp"], params["ki"], params["k_ext"], params["offset_max"], params["accumulated_error_threshold"], True)
+
+        temp, energy, last_regulated, switches = 17.0, 0.0, None, 0
+        for step in range(scenario.nb_cycles):
+            regulator.set_target_temp(scenario.setpoints[step])
+            regulated = regulator.calculate_regulated_temperature(temp, scenario.ext_temps[step], 1.0)
+            switches += regulated != last_regulated
+            last_regulated = regulated
+            power = min(1.0, max(0.0, regulated - temp))
+            temp_eq = scenario.ext_temps[step] + power * capacity / loss
+            temp = temp_eq + (temp - temp_eq) * math.exp(-loss * cycle_h)
+            energy += power * cycle_h * power_kw
+
+        assert result.energy_kwh[i] == pytest.approx(energy)
+        assert result.switch_count[i] == switches
+
+
+@pytest.mark.parametrize("algorithm, params", [(ALGO_TPI, {"coef_int": np.linspace(0.1, 1.0, 7), "coef_ext": 0.02}), (ALGO_PI, {"kp": np.linspace(0.1, 1.0, 7), "ki": 0.05, "k_ext": 0.1, "offset_max": 2, "accumulated_error_threshold": 20})])
+def test_run_sweep_chunks(algorithm, params):
+    """The chunked sweep gives the same result than one simulation of all the combinations"""
+    scenario = make_scenario(72)
+    chunked = run_sweep(algorithm, ROOMS, params, scenario, max_workers=1, chunk_size=3)
+
+    if algorithm == ALGO_TPI:
+        direct = simulate_tpi(ROOMS, params["coef_int"], np.full(7, params["coef_ext"]), scenario)
+    else:
+        direct = simulate_pi(ROOMS, params["kp"], *(np.full(7, params[name]) for name in ("ki", "k_ext", "offset_max", "accumulated_error_threshold")), scenario)
+
+    assert list(chunked.room_index) == list(direct.room_index)
+    assert list(chunked.coef_index) == list(direct.coef_index)
+    np.testing.assert_allclose(chunked.comfort_mae, direct.comfort_mae)
+    np.testing.assert_allclose(chunked.energy_kwh, direct.energy_kwh)
+    np.testing.assert_array_equal(chunked.switch_count, direct.switch_count)
+
+    best = chunked.best_per_room()
+    assert len(best) == 2
+    for room, coef in enumerate(best):
+        mask = chunked.room_index == room
+        assert chunked.comfort_mae[mask][coef] == chunked.comfort_mae[mask].min()
+
+
+def test_run_sweep_unknown_algorithm():
+    """Only tpi and pi are simulated"""
+    with pytest.raises(ValueError):
+        run_sweep("smartpi", ROOMS, {"coef_int": [0.6]}, make_scenario(6))
@@ -2,9 +2,18 @@
 
 """Test that the volatile custom attribute sections are excluded from the recorder history."""
 
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
 from custom_components.versatile_thermostat.base_thermostat import BaseThermostat
 from custom_components.versatile_thermostat.thermostat_climate import ThermostatOverClimate
 
+from .commons import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
 
 # Section top-level keys shared by all VTherm types
 COMMON_EXCLUDED_SECTIONS = {
@@ -42,3 +51,72 @@ def test_recorded_semantic_sections_are_kept():
     excluded = BaseThermostat._entity_component_unrecorded_attributes
     assert "current_state" not in excluded
     assert "requested_state" not in excluded
+
+
+async def test_identical_state_writes_are_skipped(hass: HomeAssistant, skip_hass_states_is_state):
+    """Identical VTherm states are not written again and static sections are cached until marked dirty."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="TheOverSwitchMockName",
+        unique_id="uniqueId",
+        data={
+            CONF_NAME: "TheOverSwitchMockName",
+            CONF_THERMOSTAT_TYPE: CONF_THERMOSTAT_SWITCH,
+            CONF_TEMP_SENSOR: "sensor.mock_temp_sensor",
+            CONF_EXTERNAL_TEMP_SENSOR: "sensor.mock_ext_temp_sensor",
+            CONF_CYCLE_MIN: 5,
+            CONF_TEMP_MIN: 15,
+            CONF_TEMP_MAX: 30,
+            CONF_USE_WINDOW_FEATURE: False,
+            CONF_USE_MOTION_FEATURE: False,
+            CONF_USE_POWER_FEATURE: False,
+            CONF_USE_PRESENCE_FEATURE: False,
+            CONF_UNDERLYING_LIST: ["switch.mock_switch"],
+            CONF_PROP_FUNCTION: PROPORTIONAL_FUNCTION_TPI,
+            CONF_TPI_COEF_INT: 0.3,
+            CONF_TPI_COEF_EXT: 0.01,
+            CONF_MINIMAL_ACTIVATION_DELAY: 30,
+            CONF_MINIMAL_DEACTIVATION_DELAY: 0,
+            CONF_SAFETY_DELAY_MIN: 5,
+            CONF_SAFETY_MIN_ON_PERCENT: 0.3,
+        },
+    )
+
+    entity: BaseThermostat = await create_thermostat(hass, entry, "climate.theoverswitchmockname")
+    assert entity
+
+    now = datetime.now(get_tz(hass))
+    entity._set_now(now)
+    entity.update_custom_attributes()
+    entity.async_write_ha_state()
+    configuration = entity._custom_attributes_sections["configuration"]
+
+    with patch("homeassistant.helpers.entity.Entity.async_write_ha_state") as mock_write:
+        # 1. only last_update_datetime changes -> no write
+        entity._set_now(now + timedelta(minutes=1))
+        entity.update_custom_attributes()
+        entity.async_write_ha_state()
+        assert mock_write.call_count == 0
+        assert entity.extra_state_attributes["specific_states"]["last_update_datetime"] == (now + timedelta(minutes=1)).isoformat()
+        # the configuration section is reused
+        assert entity._custom_attributes_sections["configuration"] is configuration
+
+        # 2. a preset temperature changes. The section is rebuilt only when marked dirty
+        old_eco = entity.extra_state_attributes["preset_temperatures"]["eco_temp"]
+        entity._presets[VThermPreset.ECO] = old_eco + 1
+        entity.update_custom_attributes()
+        assert entity.extra_state_attributes["preset_temperatures"]["eco_temp"] == old_eco
+
+        entity.mark_custom_attributes_dirty("preset_temperatures")
+        entity.update_custom_attributes()
+        assert entity.extra_state_attributes["preset_temperatures"]["eco_temp"] == old_eco + 1
+        assert entity._custom_attributes_sections["configuration"] is configuration
+
+        entity.async_write_ha_state()
+        assert mock_write.call_count == 1
+
+        # 3. the same state again -> no write
+        entity.async_write_ha_state()
+        assert mock_write.call_count == 1
+
+    entity.remove_thermostat()
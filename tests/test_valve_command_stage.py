@@ -0,0 +1,93 @@
+# pylint: disable=protected-access
+"""Tests of the ValveCommandStage which sends the commands of the valves of a VTherm."""
+
+from unittest.mock import AsyncMock
+
+from custom_components.versatile_thermostat.opening_degree_algorithm import OpeningClosingDegreeCalculation
+from custom_components.versatile_thermostat.valve_command_stage import ValveCommandStage
+
+
+class FakeValve:
+    """A valve with an opening and a closing degree number"""
+
+    def __init__(self, name: str, opening_threshold: int = 10):
+        self.name = name
+        self.opening_threshold = opening_threshold
+        self.target_percent_open = 0
+        self.percent_open = None
+        self.last_sent_opening_value = None
+        self.send_value_to_number = AsyncMock()
+
+    def valve_commands(self, percent_open):
+        """The opening and closing degrees"""
+        opening, closing = OpeningClosingDegreeCalculation.calculate_opening_closing_degree(percent_open, 0, 100, 100, self.opening_threshold)
+        return [(f"number.{self.name}_opening", opening), (f"number.{self.name}_closing", closing)]
+
+    def sent(self) -> list:
+        """The values sent to the numbers"""
+        return [c.args for c in self.send_value_to_number.await_args_list]
+
+
+async def test_hysteresis_and_unchanged_values():
+    """The small changes of an open valve are not sent but they add up. Closing and bounds are always sent"""
+    stage = ValveCommandStage(hysteresis=5)
+    valve = FakeValve("room")
+
+    valve.target_percent_open = 50
+    await stage.async_apply([valve])
+    assert valve.sent() == [("number.room_opening", 44), ("number.room_closing", 56)]
+    assert valve.last_sent_opening_value == 44
+
+    # +3 is below the hysteresis
+    valve.target_percent_open = 53
+    await stage.async_apply([valve])
+    assert len(valve.sent()) == 2
+    assert valve.percent_open == 50
+    assert stage.nb_avoided == 2
+
+    # +3 again: +6 from the last sent percent
+    valve.target_percent_open = 56
+    await stage.async_apply([valve])
+    assert valve.sent()[-2:] == [("number.room_opening", 51), ("number.room_closing", 49)]
+
+    # 100 and the closing are always sent
+    valve.target_percent_open = 100
+    await stage.async_apply([valve])
+    valve.target_percent_open = 5
+    await stage.async_apply([valve])
+    assert valve.sent()[-4:] == [("number.room_opening", 100), ("number.room_closing", 0), ("number.room_opening", 0), ("number.room_closing", 100)]
+
+    # Under the opening threshold the degrees do not change: nothing is written
+    valve.target_percent_open = 0
+    await stage.async_apply([valve])
+    assert len(valve.sent()) == 8
+    assert stage.stats == {"hysteresis": 5, "nb_sent": 8, "nb_avoided": 4}
+
+    # An explicit command is always sent
+    await stage.async_send(valve, 0)
+    assert len(valve.sent()) == 10
+
+
+async def test_batch_of_valves():
+    """The commands of all the valves are sent in one batch"""
+    stage = ValveCommandStage()
+    valves = [FakeValve(f"room{index}") for index in range(3)]
+    for valve in valves:
+        valve.target_percent_open = 40
+
+    await stage.async_apply(valves)
+    assert all(valve.sent() == [(f"number.{valve.name}_opening", 33), (f"number.{valve.name}_closing", 67)] for valve in valves)
+    assert stage.nb_sent == 6
+
+    # Without hysteresis, all the changes of the percent are sent
+    valves[1].target_percent_open = 41
+    await stage.async_apply(valves)
+    assert stage.nb_sent == 8
+    assert stage.nb_avoided == 0
+
+    # After an invalidation the same values are sent again
+    stage.invalidate()
+    valves[1].target_percent_open = 40
+    valves[1].percent_open = 41
+    await stage.async_apply(valves)
+    assert stage.nb_sent == 10